@@ -0,0 +1,60 @@
+# benchmarks/dataset.py
+
+import os
+import sqlite3
+import sys
+from datetime import date, datetime, time
+
+# Adiciona a pasta 'src' ao path para que possamos importar o backend
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import schema, data_generator
+
+# Escalas dos conjuntos de dados (número de reservas, veículos e clientes)
+ESCALAS = {
+    'pequena': {'reservas': 1_000, 'veiculos': 50, 'clientes': 300},
+    'media': {'reservas': 100_000, 'veiculos': 500, 'clientes': 20_000},
+    'grande': {'reservas': 1_000_000, 'veiculos': 2_000, 'clientes': 100_000},
+}
+
+FORMATO_DATA = data_generator.FORMATO_DATA
+
+# Data fixa em torno da qual as reservas são geradas. Não depende do dia da execução: o
+# mesmo banco (e a mesma baseline) serve em qualquer dia, e a cache só muda com a semente,
+# a escala e a versão do schema.
+REFERENCIA = date(2025, 1, 1)
+
+
+def construir_dataset(caminho, reservas, veiculos, clientes, semente=42, referencia=None):
+    """
+    Cria em 'caminho' um banco novo (schema via migrações) com dados sintéticos
+    determinísticos: a mesma semente e referência produzem sempre o mesmo banco.
+    """
+    referencia = referencia or REFERENCIA
+    if os.path.exists(caminho):
+        os.remove(caminho)
+
+    conn = sqlite3.connect(caminho)
+    conn.row_factory = sqlite3.Row
+    schema.aplicar_migracoes(conn)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    data_generator.gerar_dados(conn, veiculos=veiculos, clientes=clientes, reservas=reservas, semente=semente,
+                               referencia=datetime.combine(referencia, time(12, 0)))
+    conn.execute("PRAGMA journal_mode = DELETE")
+    conn.close()
+    return caminho
+
+
+def obter_dataset(escala, diretorio, semente=42):
+    """Devolve o caminho do banco da escala pedida, construindo-o se ainda não existir em cache."""
+    config = ESCALAS[escala]
+    os.makedirs(diretorio, exist_ok=True)
+    nome = f"{escala}_s{semente}_v{schema.VERSAO_ATUAL}.db"
+    caminho = os.path.join(diretorio, nome)
+    if not os.path.exists(caminho):
+        # Constrói num arquivo temporário: uma construção interrompida nunca fica em cache
+        temporario = caminho + '.tmp'
+        construir_dataset(temporario, config['reservas'], config['veiculos'], config['clientes'],
+                          semente=semente)
+        os.replace(temporario, caminho)
+    return caminho
@@ -0,0 +1,190 @@
+# benchmarks/run_benchmarks.py
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+import dataset  # noqa: E402  (também adiciona 'src' ao path)
+from backend import database as db  # noqa: E402
+from backend import analytics, analytics_snapshot  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+DIRETORIO_CACHE = os.path.join(DIRETORIO, '.cache')
+DIRETORIO_RESULTADOS = os.path.join(DIRETORIO, 'results')
+BASELINE_PADRAO = os.path.join(DIRETORIO, 'baseline.json')
+
+# Abaixo disto a variação é sobretudo ruído do sistema; não conta como regressão
+MINIMO_MS_PADRAO = 1.0
+
+
+# --- Casos de benchmark ---
+# Cada caso recebe o contexto (dados da escala) e devolve a função a cronometrar.
+
+def _caso_verificar_disponibilidade(contexto):
+    """50 verificações de disponibilidade com veículos e períodos pseudoaleatórios (fixos)."""
+    rng = random.Random(7)
+    referencia = datetime.combine(contexto['referencia'], datetime.min.time())
+    pedidos = []
+    for _ in range(50):
+        inicio = referencia + timedelta(days=rng.randint(-365, 60))
+        fim = inicio + timedelta(days=rng.randint(1, 10))
+        pedidos.append((rng.randint(1, contexto['veiculos']), inicio.strftime(dataset.FORMATO_DATA),
+                        fim.strftime(dataset.FORMATO_DATA)))
+
+    def executar():
+        for id_veiculo, inicio, fim in pedidos:
+            db.verificar_disponibilidade_veiculo(id_veiculo, inicio, fim)
+    return executar
+
+
+def _caso_disponiveis_periodo(contexto):
+    inicio = datetime.combine(contexto['referencia'], datetime.min.time()) + timedelta(days=7)
+    fim = inicio + timedelta(days=3)
+    return lambda: db.listar_veiculos_disponiveis_periodo(inicio.strftime(dataset.FORMATO_DATA),
+                                                           fim.strftime(dataset.FORMATO_DATA))
+
+
+CASOS = {
+    'listar_veiculos': lambda contexto: db.listar_veiculos,
+    'listar_clientes': lambda contexto: db.listar_clientes,
+    'verificar_disponibilidade_veiculo_x50': _caso_verificar_disponibilidade,
+    'listar_veiculos_disponiveis_periodo': _caso_disponiveis_periodo,
+    'listar_todas_reservas_detalhadas': lambda contexto: db.listar_todas_reservas_detalhadas,
+    'get_reservas_df': lambda contexto: analytics.get_reservas_df,
+    'get_faturamento_mensal': lambda contexto: analytics.get_faturamento_mensal,
+    'get_veiculos_por_status': lambda contexto: analytics.get_veiculos_por_status,
+}
+
+
+def cronometrar(funcao, aquecimento, repeticoes):
+    """Executa 'aquecimento' vezes sem medir e devolve as estatísticas (ms) de 'repeticoes' execuções."""
+    for _ in range(aquecimento):
+        funcao()
+    tempos = []
+    gc.collect()
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {
+        'repeticoes': repeticoes,
+        'min_ms': round(tempos[0], 3),
+        'mediana_ms': round(statistics.median(tempos), 3),
+        'media_ms': round(statistics.mean(tempos), 3),
+        'p95_ms': round(tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))], 3),
+        'desvio_ms': round(statistics.stdev(tempos), 3) if len(tempos) > 1 else 0.0,
+    }
+
+
+def executar_escala(escala, casos, aquecimento, repeticoes, semente):
+    """Corre os casos sobre uma cópia isolada do dataset da escala."""
+    origem = dataset.obter_dataset(escala, DIRETORIO_CACHE, semente=semente)
+    resultados = {}
+    db_path_original, snapshot_dir_original = db.DB_PATH, analytics_snapshot.SNAPSHOT_DIR
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db.DB_PATH = os.path.join(temp_dir, 'benchmark.db')
+        analytics_snapshot.SNAPSHOT_DIR = os.path.join(temp_dir, 'snapshots')
+        shutil.copyfile(origem, db.DB_PATH)
+        try:
+            # Na aplicação o agendador mantém o snapshot; aqui é criado uma vez antes das medições
+            analytics_snapshot.exportar_snapshot()
+            contexto = dict(dataset.ESCALAS[escala], referencia=dataset.REFERENCIA)
+            for nome in casos:
+                funcao = CASOS[nome](contexto)
+                resultados[nome] = cronometrar(funcao, aquecimento, repeticoes)
+                logging.info(f"[{escala}] {nome}: mediana {resultados[nome]['mediana_ms']:.2f} ms")
+        finally:
+            db.DB_PATH, analytics_snapshot.SNAPSHOT_DIR = db_path_original, snapshot_dir_original
+    return resultados
+
+
+def comparar(atual, baseline, limiar, minimo_ms):
+    """
+    Compara as medianas com a baseline. Retorna a lista de regressões:
+    casos cuja mediana subiu mais do que 'limiar' (fração) e acima de 'minimo_ms'.
+    """
+    regressoes = []
+    for escala, casos in atual['resultados'].items():
+        for nome, medicao in casos.items():
+            base = baseline.get('resultados', {}).get(escala, {}).get(nome)
+            if not base:
+                continue
+            antes, depois = base['mediana_ms'], medicao['mediana_ms']
+            razao = depois / antes if antes > 0 else float('inf')
+            medicao['razao_baseline'] = round(razao, 3)
+            if razao > 1 + limiar and depois - antes > minimo_ms:
+                regressoes.append((escala, nome, antes, depois, razao))
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks das funções críticas do backend e da análise.")
+    parser.add_argument('--escalas', default='pequena,media',
+                        help=f"Escalas separadas por vírgula ({', '.join(dataset.ESCALAS)}). Padrão: pequena,media")
+    parser.add_argument('--casos', help=f"Casos a executar (padrão: todos): {', '.join(CASOS)}")
+    parser.add_argument('--aquecimento', type=int, default=1, help="Execuções de aquecimento por caso")
+    parser.add_argument('--repeticoes', type=int, default=5, help="Execuções medidas por caso")
+    parser.add_argument('--semente', type=int, default=42, help="Semente do gerador de dados")
+    parser.add_argument('--saida', help="Arquivo JSON de resultados (padrão: benchmarks/results/<data>.json)")
+    parser.add_argument('--baseline', default=BASELINE_PADRAO, help="Arquivo de baseline para comparação")
+    parser.add_argument('--guardar-baseline', action='store_true', help="Grava os resultados como nova baseline")
+    parser.add_argument('--limiar', type=float, default=0.20,
+                        help="Aumento relativo da mediana considerado regressão (padrão: 0.20 = 20%%)")
+    parser.add_argument('--minimo-ms', type=float, default=MINIMO_MS_PADRAO,
+                        help="Diferença absoluta mínima (ms) para contar como regressão")
+    args = parser.parse_args()
+
+    escalas = [e.strip() for e in args.escalas.split(',') if e.strip()]
+    casos = [c.strip() for c in args.casos.split(',')] if args.casos else list(CASOS)
+    desconhecidos = [e for e in escalas if e not in dataset.ESCALAS] + [c for c in casos if c not in CASOS]
+    if desconhecidos:
+        parser.error(f"Escalas/casos desconhecidos: {', '.join(desconhecidos)}")
+
+    resultado = {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'ambiente': {'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version,
+                     'plataforma': platform.platform()},
+        'parametros': {'semente': args.semente, 'aquecimento': args.aquecimento, 'repeticoes': args.repeticoes},
+        'resultados': {},
+    }
+    for escala in escalas:
+        resultado['resultados'][escala] = executar_escala(escala, casos, args.aquecimento, args.repeticoes,
+                                                          args.semente)
+
+    regressoes = []
+    if os.path.exists(args.baseline) and not args.guardar_baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressoes = comparar(resultado, json.load(f), args.limiar, args.minimo_ms)
+
+    saida = args.saida or os.path.join(DIRETORIO_RESULTADOS, datetime.now().strftime('%Y%m%d_%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    logging.info(f"Resultados gravados em {saida}")
+
+    if args.guardar_baseline:
+        shutil.copyfile(saida, args.baseline)
+        logging.info(f"Baseline atualizada: {args.baseline}")
+
+    for escala, nome, antes, depois, razao in regressoes:
+        logging.error(f"REGRESSÃO [{escala}] {nome}: {antes:.2f} ms -> {depois:.2f} ms (x{razao:.2f})")
+    sys.exit(1 if regressoes else 0)
+
+
+if __name__ == '__main__':
+    main()
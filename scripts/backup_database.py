@@ -0,0 +1,47 @@
+# scripts/backup_database.py
+
+import argparse
+import os
+import sys
+import logging
+
+# Adiciona a pasta 'src' ao path para que possamos importar o backend
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import backup
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backups online do banco de dados (API de backup do SQLite).")
+    parser.add_argument('--diretorio', help="Pasta dos backups (padrão: 'backup.diretorio' do config.json ou data/backups)")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    criar = sub.add_parser('criar', help="Cria um backup verificado e aplica a retenção")
+    criar.add_argument('--sem-compressao', action='store_true', help="Guarda o .db sem gzip")
+
+    sub.add_parser('listar', help="Lista os backups existentes, do mais recente para o mais antigo")
+
+    restaurar = sub.add_parser('restaurar', help="Repõe um backup (feche a aplicação antes)")
+    restaurar.add_argument('arquivo', help="Caminho do backup (.db ou .db.gz)")
+    restaurar.add_argument('--destino', help="Banco a substituir só com esta cópia "
+                                             "(padrão: o banco principal e o arquivo, com o mesmo carimbo)")
+    args = parser.parse_args()
+
+    try:
+        if args.comando == 'criar':
+            backup.criar_backup(args.diretorio, comprimir=False if args.sem_compressao else None)
+        elif args.comando == 'listar':
+            for base, caminhos in sorted(backup.listar_backups(args.diretorio).items()):
+                print(f"{base}:")
+                for caminho in caminhos:
+                    print(f"  {caminho} ({os.path.getsize(caminho)} bytes)")
+        else:
+            backup.restaurar_backup(args.arquivo, args.destino)
+    except backup.ErroBackup as e:
+        logging.error(str(e))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+# scripts/desempenho_ui.py
+
+import argparse
+import json
+import os
+import sys
+
+# Adiciona a pasta 'src' ao path para que possamos importar o backend
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import desempenho_ui
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumo do log de desempenho da interface (logs/desempenho_ui.jsonl).")
+    parser.add_argument('--diretorio', help="Pasta do log (padrão: logs/)")
+    parser.add_argument('--top', type=int, default=10, help="Linhas por secção (padrão: 10)")
+    parser.add_argument('--json', action='store_true', help="Escreve o resumo em JSON")
+    args = parser.parse_args()
+
+    resumo = desempenho_ui.resumir(args.diretorio)
+    if args.json:
+        print(json.dumps(resumo, indent=2, ensure_ascii=False))
+    else:
+        print(desempenho_ui.formatar_resumo(resumo, args.top))
+
+
+if __name__ == '__main__':
+    main()
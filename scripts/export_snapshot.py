@@ -0,0 +1,31 @@
+# scripts/export_snapshot.py
+
+import argparse
+import os
+import sys
+import logging
+
+# Adiciona a pasta 'src' ao path para que possamos importar o backend
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import analytics_snapshot
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta as reservas para um snapshot colunar (Parquet/Arrow).")
+    parser.add_argument('--destino', default=analytics_snapshot.SNAPSHOT_DIR,
+                        help="Diretório do snapshot (padrão: data/snapshots/reservas)")
+    parser.add_argument('--formato', choices=sorted(analytics_snapshot.FORMATOS),
+                        help="feather (Arrow IPC sem compressão, padrão) ou parquet")
+    parser.add_argument('--completo', action='store_true',
+                        help="Reescreve o snapshot inteiro em vez de anexar apenas as alterações")
+    args = parser.parse_args()
+
+    manifesto = analytics_snapshot.exportar_snapshot(args.destino, args.formato, args.completo)
+    logging.info(f"Snapshot em {args.destino}: {len(manifesto['partes'])} parte(s), "
+                 f"marca d'água {manifesto['marca_dagua']}.")
+
+
+if __name__ == '__main__':
+    main()
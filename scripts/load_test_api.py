@@ -0,0 +1,91 @@
+# scripts/load_test_api.py
+
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+
+def _trabalhador(host, porta, caminhos, usar_etag, fim, latencias, estados, lock):
+    """Um cliente com uma ligação keep-alive, a repetir os caminhos até ao fim do teste."""
+    conn = http.client.HTTPConnection(host, porta, timeout=10)
+    etags = {}
+    minhas_latencias = []
+    meus_estados = Counter()
+    i = 0
+    while time.perf_counter() < fim:
+        caminho = caminhos[i % len(caminhos)]
+        i += 1
+        cabecalhos = {'Accept-Encoding': 'gzip'}
+        if usar_etag and caminho in etags:
+            cabecalhos['If-None-Match'] = etags[caminho]
+        inicio = time.perf_counter()
+        try:
+            conn.request('GET', caminho, headers=cabecalhos)
+            resposta = conn.getresponse()
+            resposta.read()
+        except (OSError, http.client.HTTPException):
+            meus_estados['erro'] += 1
+            conn.close()
+            conn = http.client.HTTPConnection(host, porta, timeout=10)
+            continue
+        minhas_latencias.append(time.perf_counter() - inicio)
+        meus_estados[resposta.status] += 1
+        if resposta.getheader('ETag'):
+            etags[caminho] = resposta.getheader('ETag')
+    conn.close()
+    with lock:
+        latencias.extend(minhas_latencias)
+        estados.update(meus_estados)
+
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga da API local (pedidos/s e latências).")
+    parser.add_argument('--url', default='http://127.0.0.1:8080', help="Endereço base da API")
+    parser.add_argument('--clientes', type=int, default=16, help="Clientes simultâneos (ligações keep-alive)")
+    parser.add_argument('--duracao', type=float, default=10.0, help="Duração do teste em segundos")
+    parser.add_argument('--etag', action='store_true', help="Reenvia o ETag recebido (If-None-Match)")
+    parser.add_argument('--caminho', action='append',
+                        help="Caminho a pedir (pode repetir). Padrão: veículos, clientes e reservas")
+    args = parser.parse_args()
+
+    url = urlparse(args.url)
+    caminhos = args.caminho or ['/api/veiculos', '/api/clientes?limite=100', '/api/reservas?limite=100']
+    fim = time.perf_counter() + args.duracao
+    latencias, estados, lock = [], Counter(), threading.Lock()
+
+    threads = [threading.Thread(target=_trabalhador,
+                                args=(url.hostname, url.port or 80, caminhos, args.etag, fim, latencias, estados, lock))
+               for _ in range(args.clientes)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duracao = time.perf_counter() - inicio
+
+    resultado = {
+        'pedidos': len(latencias),
+        'pedidos_por_segundo': round(len(latencias) / duracao, 1),
+        'latencia_media_ms': round(statistics.mean(latencias) * 1000, 2) if latencias else 0.0,
+        'latencia_p50_ms': round(_percentil(latencias, 0.50) * 1000, 2),
+        'latencia_p95_ms': round(_percentil(latencias, 0.95) * 1000, 2),
+        'latencia_p99_ms': round(_percentil(latencias, 0.99) * 1000, 2),
+        'estados': {str(k): v for k, v in sorted(estados.items(), key=lambda kv: str(kv[0]))},
+    }
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,286 @@
+import heapq
+import itertools
+import logging
+import queue
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from . import config_manager as cfg
+from . import database as db
+from . import status_reconciler
+
+# --- Motor de alertas por prazos ---
+# Em vez de cada vista consultar o banco ao ser construída, um único motor mantém em memória
+# os veículos com revisão próxima e as reservas por devolver que começam até amanhã, e guarda
+# num heap o próximo instante em que o alerta de cada um muda (revisão a entrar no aviso ou a
+# vencer, dia do levantamento, hora do levantamento, dia da devolução, hora da devolução).
+# Uma só thread dorme até ao prazo mais próximo (ou até à próxima verificação de
+# alterações) e, ao acordar, recalcula só as entradas devidas.
+# Atualização incremental:
+#   - reservas alteradas/apagadas desde a última versão vista (versao_alteracao), pelos índices;
+#   - geração da tabela 'veiculos' mudou -> relê a janela de revisões (pelo índice da data);
+#   - à meia-noite a janela avança e tudo é relido.
+# Entradas do heap que ficaram obsoletas (a entidade mudou entretanto) são ignoradas ao sair.
+# As vistas subscrevem e recebem ('novo' | 'removido', alerta) numa fila, que esvaziam na
+# thread do Tk; nunca tocam no banco.
+# Uma devolução está em atraso enquanto a reserva não tem 'data_devolucao' depois da data de
+# fim, seja qual for o status: o reconciliador conclui a reserva pela data, não pela entrega.
+# As reservas por devolver (ativas ou já concluídas) vêm do índice parcial idx_reservas_por_devolver.
+
+FORMATO_DATA = '%Y-%m-%d %H:%M:%S'
+
+# Tipos de alerta, por ordem de prioridade
+TIPOS = ('devolucao_atrasada', 'revisao_vencida', 'devolucao_hoje', 'levantamento_hoje', 'revisao_proxima')
+
+SQL_REVISOES_JANELA = """
+    SELECT id, marca, modelo, placa, data_proxima_revisao FROM veiculos
+    WHERE data_proxima_revisao <= ?
+"""
+
+_SQL_RESERVAS = """
+    SELECT r.id, r.id_veiculo, r.data_inicio, r.data_fim, r.status, r.data_devolucao, v.marca, v.modelo,
+           v.placa, c.nome_completo
+    FROM reservas r
+    JOIN veiculos v ON v.id = r.id_veiculo
+    JOIN clientes c ON c.id = r.id_cliente
+"""
+
+SQL_RESERVAS_JANELA = (_SQL_RESERVAS + "WHERE r.status = 'ativa' AND r.data_inicio < ? AND r.data_devolucao IS NULL"
+                       + " UNION ALL " + _SQL_RESERVAS
+                       + "WHERE r.status = 'concluída' AND r.data_devolucao IS NULL")
+SQL_RESERVAS_ALTERADAS = _SQL_RESERVAS + "WHERE r.versao_alteracao > ?"
+SQL_RESERVAS_REMOVIDAS = "SELECT id_reserva FROM reservas_removidas WHERE versao_alteracao > ?"
+
+
+def _converter(data):
+    try:
+        return datetime.strptime(data, FORMATO_DATA)
+    except ValueError:
+        return datetime.strptime(data[:10], '%Y-%m-%d')
+
+
+def _meia_noite(instante):
+    return datetime.combine(instante.date(), datetime.min.time())
+
+
+def estado_revisao(data_revisao, agora, dias_aviso):
+    """(tipo de alerta ou None, instante da próxima mudança ou None) de uma revisão."""
+    aviso = _meia_noite(data_revisao) - timedelta(days=dias_aviso)
+    vencida = _meia_noite(data_revisao) + timedelta(days=1)
+    if agora < aviso:
+        return None, aviso
+    if agora < vencida:
+        return 'revisao_proxima', vencida
+    return 'revisao_vencida', None
+
+
+def estado_reserva(inicio, fim, agora):
+    """(tipo de alerta ou None, instante da próxima mudança ou None) de uma reserva por devolver."""
+    if agora < _meia_noite(inicio):
+        return None, _meia_noite(inicio)
+    if agora < inicio:
+        return 'levantamento_hoje', inicio
+    if agora > fim:
+        return 'devolucao_atrasada', None
+    if agora >= _meia_noite(fim):
+        return 'devolucao_hoje', fim + timedelta(seconds=1)
+    return None, _meia_noite(fim)
+
+
+class MotorAlertas:
+    """Alertas ativos, prazos num heap e subscritores. Os métodos públicos são thread-safe."""
+
+    def __init__(self, dias_revisao=None, intervalo_sincronizacao=None):
+        config = cfg.obter_secao('alertas')
+        self.dias_revisao = config['dias_revisao'] if dias_revisao is None else dias_revisao
+        self.intervalo_sincronizacao = (config['intervalo_sincronizacao_s'] if intervalo_sincronizacao is None
+                                        else intervalo_sincronizacao)
+        self._lock = threading.RLock()
+        self._parar = threading.Event()
+        self._thread = None
+        self._subscritores = []
+        self._limpar()
+
+    def _limpar(self):
+        self._entidades = {}  # chave -> (dados, instante do prazo)
+        self._versoes = {}  # chave -> versão da última atualização (entradas do heap obsoletas)
+        self._heap = []
+        self._sequencia = itertools.count()
+        self._ativos = {}  # chave -> alerta
+        self.geracao_veiculos = None
+        self.versao_reservas = None
+        self.dia = None
+
+    # --- Subscrição ---
+
+    def subscrever(self):
+        """Fila que recebe ('novo', alerta) / ('removido', alerta); já traz os alertas ativos."""
+        fila = queue.Queue()
+        with self._lock:
+            for alerta in self.ativos():
+                fila.put(('novo', alerta))
+            self._subscritores.append(fila)
+        return fila
+
+    def cancelar_subscricao(self, fila):
+        with self._lock:
+            if fila in self._subscritores:
+                self._subscritores.remove(fila)
+
+    def ativos(self):
+        """Alertas ativos, por prioridade e prazo."""
+        with self._lock:
+            return sorted(self._ativos.values(), key=lambda a: (TIPOS.index(a['tipo']), a['instante']))
+
+    def _emitir(self, evento, alerta):
+        for fila in self._subscritores:
+            fila.put((evento, alerta))
+
+    # --- Estado ---
+
+    def _atualizar(self, chave, dados, prazo, agora):
+        """Recalcula o alerta de uma entidade (dados None = deixou de existir) e agenda o próximo prazo."""
+        versao = self._versoes.get(chave, 0) + 1
+        self._versoes[chave] = versao
+        tipo, proximo = None, None
+        if dados is None:
+            self._entidades.pop(chave, None)
+        else:
+            self._entidades[chave] = (dados, prazo)
+            if chave[0] == 'revisao':
+                tipo, proximo = estado_revisao(prazo, agora, self.dias_revisao)
+            else:
+                tipo, proximo = estado_reserva(prazo[0], prazo[1], agora)
+
+        novo = None
+        if tipo is not None:
+            instante = prazo if chave[0] == 'revisao' else (prazo[0] if tipo == 'levantamento_hoje' else prazo[1])
+            novo = dict(dados, tipo=tipo, chave=chave, instante=instante)
+        anterior = self._ativos.get(chave)
+        if anterior != novo:
+            if anterior is not None:
+                del self._ativos[chave]
+                self._emitir('removido', anterior)
+            if novo is not None:
+                self._ativos[chave] = novo
+                self._emitir('novo', novo)
+        if proximo is not None:
+            heapq.heappush(self._heap, (proximo, next(self._sequencia), chave, versao))
+
+    def _atualizar_revisao(self, row, agora):
+        dados = {'id_veiculo': row['id'], 'marca': row['marca'], 'modelo': row['modelo'], 'placa': row['placa']}
+        self._atualizar(('revisao', row['id']), dados, _converter(row['data_proxima_revisao']), agora)
+
+    def _atualizar_reserva(self, row, agora, limite):
+        chave = ('reserva', row['id'])
+        inicio, fim = _converter(row['data_inicio']), _converter(row['data_fim'])
+        por_devolver = row['status'] in ('ativa', 'concluída') and row['data_devolucao'] is None
+        if not por_devolver or inicio >= limite:
+            if chave in self._entidades:
+                self._atualizar(chave, None, None, agora)
+            return
+        dados = {'id_reserva': row['id'], 'id_veiculo': row['id_veiculo'], 'marca': row['marca'],
+                 'modelo': row['modelo'], 'placa': row['placa'], 'cliente': row['nome_completo']}
+        self._atualizar(chave, dados, (inicio, fim), agora)
+
+    def _limites(self, agora):
+        hoje = _meia_noite(agora)
+        return (hoje + timedelta(days=self.dias_revisao)).strftime('%Y-%m-%d'), hoje + timedelta(days=2)
+
+    def _marcas_de_agua(self, conn):
+        geracao = dict(conn.execute(db.SQL_GERACOES_TABELAS).fetchall()).get('veiculos')
+        versao = conn.execute(status_reconciler.SQL_VERSAO_ATUAL).fetchone()[0]
+        return geracao, versao
+
+    def _recarregar_revisoes(self, conn, agora):
+        limite_revisoes, _ = self._limites(agora)
+        vistas = set()
+        for row in conn.execute(SQL_REVISOES_JANELA, (limite_revisoes,)):
+            vistas.add(('revisao', row['id']))
+            self._atualizar_revisao(row, agora)
+        for chave in [c for c in self._entidades if c[0] == 'revisao' and c not in vistas]:
+            self._atualizar(chave, None, None, agora)
+
+    def carregar(self, agora=None):
+        """Leitura completa da janela (arranque e mudança de dia)."""
+        agora = agora or datetime.now()
+        _, limite_reservas = self._limites(agora)
+        with self._lock, db.conectar_bd() as conn:
+            geracao, versao = self._marcas_de_agua(conn)
+            anteriores = set(self._entidades)
+            vistas = set()
+            self._heap, self._versoes = [], {}
+            for row in conn.execute(SQL_RESERVAS_JANELA, (limite_reservas.strftime(FORMATO_DATA),)):
+                vistas.add(('reserva', row['id']))
+                self._atualizar_reserva(row, agora, limite_reservas)
+            for chave in anteriores - vistas:
+                if chave[0] == 'reserva':
+                    self._atualizar(chave, None, None, agora)
+            self._recarregar_revisoes(conn, agora)
+            self.geracao_veiculos, self.versao_reservas, self.dia = geracao, versao, agora.date()
+        logging.info(f"Motor de alertas: {len(self._entidades)} prazos em memória, {len(self._ativos)} alertas ativos.")
+
+    def sincronizar(self, agora=None):
+        """Aplica as alterações do banco desde a última leitura. Retorna True se algo mudou."""
+        agora = agora or datetime.now()
+        if self.dia != agora.date():
+            self.carregar(agora)
+            return True
+        _, limite_reservas = self._limites(agora)
+        with self._lock, db.conectar_bd() as conn:
+            geracao, versao = self._marcas_de_agua(conn)
+            if versao == self.versao_reservas and geracao == self.geracao_veiculos:
+                return False
+            if versao != self.versao_reservas:
+                for row in conn.execute(SQL_RESERVAS_ALTERADAS, (self.versao_reservas,)):
+                    self._atualizar_reserva(row, agora, limite_reservas)
+                for (id_reserva,) in conn.execute(SQL_RESERVAS_REMOVIDAS, (self.versao_reservas,)):
+                    if ('reserva', id_reserva) in self._entidades:
+                        self._atualizar(('reserva', id_reserva), None, None, agora)
+            if geracao != self.geracao_veiculos:
+                self._recarregar_revisoes(conn, agora)
+            self.geracao_veiculos, self.versao_reservas = geracao, versao
+        return True
+
+    def avancar(self, agora=None):
+        """Processa os prazos já atingidos. Retorna o instante do próximo prazo (ou None)."""
+        agora = agora or datetime.now()
+        with self._lock:
+            while self._heap:
+                instante, _, chave, versao = self._heap[0]
+                if self._versoes.get(chave) != versao or chave not in self._entidades:
+                    heapq.heappop(self._heap)  # Obsoleta: a entidade foi atualizada ou removida depois
+                    continue
+                if instante > agora:
+                    return instante
+                heapq.heappop(self._heap)
+                dados, prazo = self._entidades[chave]
+                self._atualizar(chave, dados, prazo, agora)
+            return None
+
+    # --- Thread ---
+
+    def iniciar(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._loop, name="alertas", daemon=True)
+        self._thread.start()
+
+    def parar(self, timeout=5.0):
+        self._parar.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _loop(self):
+        while not self._parar.is_set():
+            espera = self.intervalo_sincronizacao
+            try:
+                self.sincronizar()
+                proximo = self.avancar()
+                if proximo is not None:
+                    espera = min(espera, max((proximo - datetime.now()).total_seconds(), 0))
+            except sqlite3.Error as e:
+                logging.error(f"Motor de alertas: erro ao ler o banco: {e}", exc_info=True)
+            self._parar.wait(espera)
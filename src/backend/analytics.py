@@ -1,5 +1,7 @@
+import logging
 import pandas as pd
 from . import database as db
+from . import analytics_snapshot
 
 
 def get_veiculos_df():
@@ -23,9 +25,38 @@ def get_veiculos_df():
     return df
 
 
+# Colunas de 'reservas' devolvidas por get_reservas_df (o mesmo contrato de listar_reservas)
+COLUNAS_RESERVAS = ['id', 'id_cliente', 'id_veiculo', 'id_forma_pagamento',
+                    'data_inicio', 'data_fim', 'valor_total', 'status']
+
+
+def _get_reservas_df_snapshot():
+    """
+    Carrega as reservas a partir do snapshot colunar (memory-mapped), que o agendador
+    atualiza em segundo plano. Retorna None se o snapshot não estiver disponível.
+    """
+    try:
+        df = analytics_snapshot.carregar_reservas_df()
+    except ImportError:
+        return None  # pyarrow não instalado: usa o caminho via SQLite
+    except Exception as e:
+        logging.warning(f"Snapshot de reservas indisponível, a usar o SQLite: {e}")
+        return None
+    if df is None:
+        return None
+
+    df = df.rename(columns={'reserva_id': 'id'})[COLUNAS_RESERVAS]
+    df['valor_total'] = df['valor_total'].astype(float)
+    return df.dropna(subset=['data_inicio', 'data_fim'])
+
+
 # Função para obter dados de reservas
 def get_reservas_df():
     """Busca todas as reservas e retorna como um DataFrame do Pandas."""
+    df = _get_reservas_df_snapshot()
+    if df is not None:
+        return df
+
     reservas = db.listar_reservas()
     if not reservas:
         logging.warning("get_reservas_df: Nenhuma reserva encontrada.")
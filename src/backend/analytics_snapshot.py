@@ -0,0 +1,345 @@
+import json
+import logging
+import os
+
+from . import arquivo_reservas
+from . import database as db
+from . import schema
+
+# Diretório padrão do snapshot colunar (ao lado do banco de dados)
+SNAPSHOT_DIR = os.path.join(os.path.dirname(db.DB_PATH), 'snapshots', 'reservas')
+NOME_MANIFESTO = 'manifesto.json'
+
+# Acima deste número de partes incrementais, a próxima atualização reescreve
+# o snapshot num único arquivo compacto.
+MAX_PARTES_ANTES_DE_COMPACTAR = 50
+
+FORMATOS = {'parquet': '.parquet', 'feather': '.arrow'}
+# Arrow IPC sem compressão: as partes são lidas em memory-map, sem descompressão nem cópia
+FORMATO_PADRAO = 'feather'
+
+# As colunas "denormalizadas" (cliente, veículo, forma de pagamento) refletem os dados
+# do momento em que a reserva foi alterada pela última vez. LEFT JOIN: o snapshot tem as
+# mesmas reservas que a tabela, mesmo que o cliente ou o veículo já não exista.
+SQL_SNAPSHOT_RESERVAS = """
+    SELECT
+        r.id AS reserva_id,
+        r.id_cliente,
+        r.id_veiculo,
+        r.id_forma_pagamento,
+        r.data_inicio,
+        r.data_fim,
+        r.valor_total,
+        r.status,
+        r.versao_alteracao,
+        c.nome_completo AS cliente_nome,
+        CAST(c.nif AS TEXT) AS cliente_nif,
+        v.marca,
+        v.modelo,
+        v.placa,
+        v.valor_diaria,
+        fp.nome AS forma_pagamento
+    FROM reservas r
+    LEFT JOIN clientes c ON r.id_cliente = c.id
+    LEFT JOIN veiculos v ON r.id_veiculo = v.id
+    LEFT JOIN formas_pagamento fp ON r.id_forma_pagamento = fp.id
+    WHERE r.versao_alteracao > ?
+    ORDER BY r.versao_alteracao
+"""
+
+# As reservas arquivadas (ver arquivo_reservas) entram no snapshot completo com as mesmas colunas
+SQL_SNAPSHOT_ARQUIVADAS = SQL_SNAPSHOT_RESERVAS.replace(
+    "FROM reservas r", f"FROM {arquivo_reservas.ALIAS}.reservas r")
+
+SQL_REMOVIDAS_DESDE = """
+    SELECT id_reserva, versao_alteracao FROM reservas_removidas
+    WHERE versao_alteracao > ? ORDER BY versao_alteracao
+"""
+
+SQL_VERSAO_ATUAL = "SELECT valor FROM sequencia_alteracoes WHERE id = 1"
+
+
+def _schema_arrow():
+    import pyarrow as pa
+
+    return pa.schema([
+        ('reserva_id', pa.int64()),
+        ('id_cliente', pa.int64()),
+        ('id_veiculo', pa.int64()),
+        ('id_forma_pagamento', pa.int64()),
+        ('data_inicio', pa.timestamp('us')),
+        ('data_fim', pa.timestamp('us')),
+        ('valor_total', pa.decimal128(12, 2)),
+        ('status', pa.string()),
+        ('versao_alteracao', pa.int64()),
+        ('cliente_nome', pa.string()),
+        ('cliente_nif', pa.string()),
+        ('marca', pa.string()),
+        ('modelo', pa.string()),
+        ('placa', pa.string()),
+        ('valor_diaria', pa.decimal128(10, 2)),
+        ('forma_pagamento', pa.string()),
+        # Linhas com removida=True são marcas de remoção (só reserva_id e versão preenchidos)
+        ('removida', pa.bool_()),
+    ])
+
+
+def _converter_lote(linhas, schema_arrow):
+    """Converte um lote de sqlite3.Row num RecordBatch tipado (datas e decimais)."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    colunas = list(zip(*linhas))
+    nomes = linhas[0].keys()
+    por_nome = dict(zip(nomes, colunas))
+
+    arrays = []
+    for campo in schema_arrow:
+        if campo.name == 'removida':
+            arrays.append(pa.array([False] * len(linhas), pa.bool_()))
+            continue
+        valores = por_nome[campo.name]
+        if pa.types.is_timestamp(campo.type):
+            array = _converter_datas(valores, campo.type)
+        elif pa.types.is_decimal(campo.type):
+            array = pc.round(pa.array(valores, pa.float64()), 2).cast(campo.type, safe=False)
+        else:
+            array = pa.array(valores, campo.type)
+        arrays.append(array)
+    return pa.RecordBatch.from_arrays(arrays, schema=schema_arrow)
+
+
+def _converter_datas(valores, tipo):
+    """Converte strings ISO em timestamps; valores irreconhecíveis viram nulos."""
+    import pyarrow as pa
+    from datetime import datetime
+
+    try:
+        return pa.array(valores, pa.string()).cast(tipo)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        convertidos = []
+        for valor in valores:
+            try:
+                convertidos.append(datetime.fromisoformat(valor) if valor else None)
+            except (ValueError, TypeError):
+                logging.warning(f"Data inválida ignorada no snapshot: {valor!r}")
+                convertidos.append(None)
+        return pa.array(convertidos, tipo)
+
+
+def _lote_remocoes(removidas, schema_arrow):
+    import pyarrow as pa
+
+    n = len(removidas)
+    arrays = []
+    for campo in schema_arrow:
+        if campo.name == 'reserva_id':
+            arrays.append(pa.array([r['id_reserva'] for r in removidas], pa.int64()))
+        elif campo.name == 'versao_alteracao':
+            arrays.append(pa.array([r['versao_alteracao'] for r in removidas], pa.int64()))
+        elif campo.name == 'removida':
+            arrays.append(pa.array([True] * n, pa.bool_()))
+        else:
+            arrays.append(pa.nulls(n, campo.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema_arrow)
+
+
+def ler_manifesto(diretorio=None):
+    """Lê o manifesto do snapshot. Retorna None se ainda não houver snapshot."""
+    caminho = os.path.join(diretorio or SNAPSHOT_DIR, NOME_MANIFESTO)
+    if not os.path.exists(caminho):
+        return None
+    try:
+        with open(caminho, 'r') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        logging.warning(f"Manifesto do snapshot ilegível em {caminho}; será recriado.")
+        return None
+
+
+def _gravar_manifesto(diretorio, manifesto):
+    caminho = os.path.join(diretorio, NOME_MANIFESTO)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w') as f:
+        json.dump(manifesto, f, indent=4)
+    os.replace(temporario, caminho)
+
+
+class _EscritorParte:
+    """Escreve uma parte do snapshot (Parquet ou Arrow IPC) lote a lote, de forma atómica."""
+
+    def __init__(self, caminho, formato, schema_arrow):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.caminho = caminho
+        self.temporario = caminho + '.tmp'
+        self.linhas = 0
+        if formato == 'parquet':
+            self.writer = pq.ParquetWriter(self.temporario, schema_arrow, compression='zstd')
+            self._escrever = self.writer.write_batch
+        else:
+            # Arrow IPC sem compressão: pode ser lido em memory-map sem cópia
+            self._sink = pa.OSFile(self.temporario, 'wb')
+            self.writer = pa.ipc.new_file(self._sink, schema_arrow)
+            self._escrever = self.writer.write_batch
+
+    def escrever(self, lote):
+        self._escrever(lote)
+        self.linhas += lote.num_rows
+
+    def concluir(self):
+        self.writer.close()
+        if hasattr(self, '_sink'):
+            self._sink.close()
+        os.replace(self.temporario, self.caminho)
+
+    def abortar(self):
+        try:
+            self.writer.close()
+            if hasattr(self, '_sink'):
+                self._sink.close()
+        finally:
+            if os.path.exists(self.temporario):
+                os.remove(self.temporario)
+
+
+def exportar_snapshot(diretorio=None, formato=None, completo=False, tamanho_lote=50000):
+    """
+    Exporta as reservas (com cliente, veículo e forma de pagamento) para um snapshot colunar.
+
+    Em modo incremental (padrão) só são escritas as reservas alteradas ou removidas desde
+    a marca d'água do manifesto, numa nova parte. Em modo completo (ou quando o formato
+    muda, ou há partes demais) o snapshot é reescrito num único arquivo.
+    Corre no agendador (tarefa 'exportar_snapshot'), fora da thread da interface.
+
+    Returns:
+        dict: o manifesto atualizado.
+    """
+    diretorio = diretorio or SNAPSHOT_DIR
+    manifesto = ler_manifesto(diretorio)
+    formato = formato or FORMATO_PADRAO
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de snapshot desconhecido: {formato}")
+    os.makedirs(diretorio, exist_ok=True)
+    schema.aplicar_migracoes()
+
+    if (manifesto is None or manifesto.get('formato') != formato
+            or len(manifesto.get('partes', [])) >= MAX_PARTES_ANTES_DE_COMPACTAR):
+        completo = True
+
+    marca_dagua = 0 if completo else manifesto['marca_dagua']
+
+    with db.conectar_bd() as conn:
+        versao_atual = conn.execute(SQL_VERSAO_ATUAL).fetchone()[0]
+    if not completo and versao_atual <= marca_dagua:
+        return manifesto  # Nada mudou desde a última exportação
+
+    schema_arrow = _schema_arrow()
+    # A numeração nunca se repete, para que uma parte listada no manifesto anterior não seja sobrescrita
+    numero_parte = (manifesto or {}).get('proxima_parte', 1)
+    nome_parte = f"parte-{numero_parte:06d}{FORMATOS[formato]}"
+    escritor = _EscritorParte(os.path.join(diretorio, nome_parte), formato, schema_arrow)
+
+    try:
+        # Lê até à versão atual: alterações concorrentes ficam para a próxima exportação
+        for lote in db.iterar_consulta(SQL_SNAPSHOT_RESERVAS, (marca_dagua,), tamanho_lote):
+            lote = [row for row in lote if row['versao_alteracao'] <= versao_atual]
+            if lote:
+                escritor.escrever(_converter_lote(lote, schema_arrow))
+
+        if completo:
+            for lote in arquivo_reservas.iterar_arquivadas(SQL_SNAPSHOT_ARQUIVADAS, (0,), tamanho_lote):
+                escritor.escrever(_converter_lote(lote, schema_arrow))
+        else:
+            for lote in db.iterar_consulta(SQL_REMOVIDAS_DESDE, (marca_dagua,), tamanho_lote):
+                lote = [row for row in lote if row['versao_alteracao'] <= versao_atual]
+                if lote:
+                    escritor.escrever(_lote_remocoes(lote, schema_arrow))
+        escritor.concluir()
+    except Exception:
+        escritor.abortar()
+        raise
+
+    partes_antigas = [] if not completo else (manifesto or {}).get('partes', [])
+    novo_manifesto = {
+        'formato': formato,
+        'marca_dagua': versao_atual,
+        'proxima_parte': numero_parte + 1,
+        'partes': [nome_parte] if completo else manifesto['partes'] + [nome_parte],
+    }
+    _gravar_manifesto(diretorio, novo_manifesto)
+
+    # Só depois de o novo manifesto estar gravado é que as partes antigas são removidas
+    for parte in partes_antigas:
+        caminho = os.path.join(diretorio, parte)
+        if parte != nome_parte and os.path.exists(caminho):
+            os.remove(caminho)
+
+    logging.info(f"Snapshot de reservas {'completo' if completo else 'incremental'}: "
+                 f"{escritor.linhas} linhas em {nome_parte} (marca d'água {versao_atual}).")
+    return novo_manifesto
+
+
+def atualizar_snapshot():
+    """
+    Tarefa do agendador: exportação incremental do snapshot padrão.
+    Retorna o número de partes e a marca d'água, ou None se o pyarrow não estiver instalado.
+    """
+    try:
+        manifesto = exportar_snapshot()
+    except ImportError:
+        logging.debug("pyarrow não instalado: a análise usa o SQLite e o snapshot não é mantido.")
+        return None
+    return {'partes': len(manifesto['partes']), 'marca_dagua': manifesto['marca_dagua']}
+
+
+def carregar_tabela(diretorio=None):
+    """
+    Lê todas as partes do snapshot em memory-map e devolve uma pyarrow.Table
+    com apenas a versão mais recente de cada reserva (remoções já aplicadas).
+    Retorna None se não houver snapshot.
+    """
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    diretorio = diretorio or SNAPSHOT_DIR
+    manifesto = ler_manifesto(diretorio)
+    if manifesto is None:
+        return None
+
+    tabelas = []
+    for parte in manifesto['partes']:
+        caminho = os.path.join(diretorio, parte)
+        if manifesto['formato'] == 'parquet':
+            tabelas.append(pq.read_table(caminho, memory_map=True))
+        else:
+            tabelas.append(pa.ipc.open_file(pa.memory_map(caminho, 'r')).read_all())
+    tabela = pa.concat_tables(tabelas)
+
+    if len(tabelas) > 1 and tabela.num_rows:
+        # Fica apenas a última versão de cada reserva
+        tabela = tabela.sort_by([('reserva_id', 'ascending'), ('versao_alteracao', 'descending')])
+        ids = tabela.column('reserva_id').to_numpy()
+        mascara = np.empty(len(ids), dtype=bool)
+        mascara[0] = True
+        mascara[1:] = ids[1:] != ids[:-1]
+        tabela = tabela.filter(pa.array(mascara))
+
+    return tabela.filter(pc.invert(tabela.column('removida'))).drop_columns(['removida'])
+
+
+def carregar_reservas_df(diretorio=None, atualizar=False):
+    """
+    Retorna as reservas do snapshot como DataFrame do Pandas (só leitura: o agendador
+    mantém o snapshot atualizado). Com atualizar=True, aplica antes uma exportação
+    incremental (custo proporcional às alterações), garantindo que o resultado reflete o banco.
+    """
+    if atualizar:
+        exportar_snapshot(diretorio)
+    tabela = carregar_tabela(diretorio)
+    if tabela is None:
+        return None
+    return tabela.to_pandas()
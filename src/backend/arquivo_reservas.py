@@ -0,0 +1,235 @@
+import logging
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+from . import config_manager as cfg
+from . import database as db
+
+# --- Arquivo de reservas antigas (partição fria) ---
+# Reservas 'concluída'/'cancelada' que terminaram há mais de 'horizonte_dias' (secção
+# "arquivo" do config.json) passam da tabela 'reservas' para luxury_wheels_archive.db, ao
+# lado do banco principal. A tabela quente fica pequena; o histórico completo continua
+# acessível anexando o arquivo (ATTACH ... AS arq) e usando a vista temporária
+# 'reservas_historico' (UNION ALL das duas tabelas) ou as consultas de histórico abaixo.
+#
+# A mudança é feita em lotes, cada um numa transação que abrange os dois bancos. O trigger
+# de DELETE deixa uma lápide em 'reservas_removidas'; como a reserva não foi apagada (só
+# mudou de sítio), a lápide é retirada no mesmo lote e o snapshot analítico mantém-na.
+# As chaves estrangeiras não atravessam bancos: o arquivo guarda os ids de cliente/veículo
+# tal como estavam.
+
+NOME_ARQUIVO = 'luxury_wheels_archive.db'
+ALIAS = 'arq'
+
+STATUS_ARQUIVAVEIS = ('concluída', 'cancelada')
+
+COLUNAS = ("id, id_cliente, id_veiculo, id_forma_pagamento, data_inicio, data_fim, valor_total, status, "
+           "versao_alteracao, data_devolucao")
+
+ESQUEMA_ARQUIVO = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {ALIAS}.reservas (
+        id INTEGER PRIMARY KEY,
+        id_cliente INTEGER NOT NULL,
+        id_veiculo INTEGER NOT NULL,
+        id_forma_pagamento INTEGER,
+        data_inicio DATETIME NOT NULL,
+        data_fim DATETIME NOT NULL,
+        valor_total REAL,
+        status TEXT NOT NULL,
+        versao_alteracao INTEGER NOT NULL DEFAULT 0,
+        arquivada_em DATETIME NOT NULL,
+        data_devolucao DATETIME
+    )
+    """,
+    f"CREATE INDEX IF NOT EXISTS {ALIAS}.idx_arquivo_veiculo_inicio ON reservas (id_veiculo, data_inicio)",
+    f"CREATE INDEX IF NOT EXISTS {ALIAS}.idx_arquivo_cliente_inicio ON reservas (id_cliente, data_inicio)",
+]
+
+# Colunas acrescentadas depois da criação de arquivos já existentes (coluna -> tipo)
+COLUNAS_ACRESCENTADAS = {'data_devolucao': 'DATETIME'}
+
+SQL_VISTA_HISTORICO = f"""
+    CREATE TEMP VIEW IF NOT EXISTS reservas_historico AS
+    SELECT {COLUNAS} FROM main.reservas
+    UNION ALL
+    SELECT {COLUNAS} FROM {ALIAS}.reservas
+"""
+
+SQL_SELECIONAR_LOTE = f"""
+    INSERT INTO temp.lote_arquivo (id)
+    SELECT id FROM main.reservas
+    WHERE status IN ({', '.join('?' * len(STATUS_ARQUIVAVEIS))}) AND data_fim < ?
+    LIMIT ?
+"""
+
+SQL_COPIAR_LOTE = f"""
+    INSERT INTO {ALIAS}.reservas ({COLUNAS}, arquivada_em)
+    SELECT {COLUNAS}, ? FROM main.reservas WHERE id IN (SELECT id FROM temp.lote_arquivo)
+"""
+
+SQL_APAGAR_LOTE = "DELETE FROM main.reservas WHERE id IN (SELECT id FROM temp.lote_arquivo)"
+
+SQL_VERSAO_ATUAL = "SELECT valor FROM main.sequencia_alteracoes WHERE id = 1"
+
+# As lápides do lote são as únicas com versão acima da lida antes do DELETE (índice por versão)
+SQL_RETIRAR_LAPIDES = """
+    DELETE FROM main.reservas_removidas
+    WHERE versao_alteracao > ? AND id_reserva IN (SELECT id FROM temp.lote_arquivo)
+"""
+
+# Mesmas colunas de database.SQL_RESERVAS_POR_VEICULO / SQL_RESERVAS_POR_CLIENTE
+SQL_ARQUIVADAS_POR_VEICULO = f"""
+    SELECT r.data_inicio, r.data_fim, r.status, c.nome_completo, c.nif
+    FROM {ALIAS}.reservas r
+    JOIN main.clientes c ON r.id_cliente = c.id
+    WHERE r.id_veiculo = ? ORDER BY r.data_inicio DESC
+"""
+
+SQL_ARQUIVADAS_POR_CLIENTE = f"""
+    SELECT
+        r.id,
+        r.data_inicio,
+        r.data_fim,
+        r.status AS status_reserva,
+        v.marca,
+        v.modelo,
+        v.placa
+    FROM {ALIAS}.reservas r
+    JOIN main.veiculos v ON r.id_veiculo = v.id
+    WHERE r.id_cliente = ?
+    ORDER BY r.data_inicio DESC
+"""
+
+
+def caminho_arquivo():
+    """O arquivo fica na mesma pasta do banco principal (segue database.DB_PATH)."""
+    return os.path.join(os.path.dirname(db.DB_PATH), NOME_ARQUIVO)
+
+
+def anexar_arquivo(conn, criar=False, caminho=None):
+    """
+    Anexa o arquivo à conexão como 'arq' e cria a vista temporária 'reservas_historico'.
+    Se o arquivo não existir e 'criar' for False, não anexa nada e retorna False.
+    """
+    if any(row[1] == ALIAS for row in conn.execute("PRAGMA database_list")):
+        return True
+    caminho = caminho or caminho_arquivo()
+    if not criar and not os.path.exists(caminho):
+        return False
+    # ATTACH não pode ocorrer dentro de uma transação: a conexão tem de estar livre
+    conn.execute(f"ATTACH DATABASE ? AS {ALIAS}", (caminho,))
+    for sql in ESQUEMA_ARQUIVO:
+        conn.execute(sql)
+    existentes = {row[1] for row in conn.execute(f"PRAGMA {ALIAS}.table_info(reservas)")}
+    for coluna, tipo in COLUNAS_ACRESCENTADAS.items():
+        if coluna not in existentes:
+            conn.execute(f"ALTER TABLE {ALIAS}.reservas ADD COLUMN {coluna} {tipo}")
+    conn.execute(SQL_VISTA_HISTORICO)
+    return True
+
+
+def limpar_arquivo(conn):
+    """
+    Apaga as reservas do arquivo que fica ao lado do banco de 'conn'. Usado quando as
+    tabelas principais são esvaziadas: os ids de reservas, clientes e veículos recomeçam
+    do 1, e o arquivo antigo ficaria associado a registos que nada têm a ver com ele.
+    """
+    principal = next((row[2] for row in conn.execute("PRAGMA database_list") if row[1] == 'main'), '')
+    if not principal:  # Banco em memória: não há arquivo
+        return
+    ja_anexado = any(row[1] == ALIAS for row in conn.execute("PRAGMA database_list"))
+    conn.commit()  # ATTACH/DETACH não podem ocorrer dentro de uma transação
+    if not anexar_arquivo(conn, caminho=os.path.join(os.path.dirname(principal), NOME_ARQUIVO)):
+        return
+    conn.execute(f"DELETE FROM {ALIAS}.reservas")
+    conn.commit()
+    if not ja_anexado:
+        conn.execute("DROP VIEW IF EXISTS temp.reservas_historico")
+        conn.execute(f"DETACH DATABASE {ALIAS}")
+
+
+def arquivar_reservas(horizonte_dias=None, tamanho_lote=None, referencia=None, conn_externa=None):
+    """
+    Move para o arquivo as reservas concluídas/canceladas que terminaram antes de
+    'referencia - horizonte_dias'. Cada lote é uma transação; retorna o total movido.
+    """
+    config = cfg.obter_secao('arquivo')
+    horizonte_dias = config['horizonte_dias'] if horizonte_dias is None else horizonte_dias
+    tamanho_lote = tamanho_lote or config['tamanho_lote']
+    limite = ((referencia or datetime.now()) - timedelta(days=horizonte_dias)).strftime('%Y-%m-%d %H:%M:%S')
+
+    conn = conn_externa or db.conectar_bd()
+    if not conn:
+        return 0
+    total = 0
+    try:
+        anexar_arquivo(conn, criar=True)
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS lote_arquivo (id INTEGER PRIMARY KEY)")
+        agora = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM temp.lote_arquivo")
+                movidas = conn.execute(SQL_SELECIONAR_LOTE, (*STATUS_ARQUIVAVEIS, limite, tamanho_lote)).rowcount
+                if movidas:
+                    versao_antes = conn.execute(SQL_VERSAO_ATUAL).fetchone()[0]
+                    conn.execute(SQL_COPIAR_LOTE, (agora,))
+                    conn.execute(SQL_APAGAR_LOTE)
+                    conn.execute(SQL_RETIRAR_LAPIDES, (versao_antes,))
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+            total += movidas
+            if movidas < tamanho_lote:
+                break
+        if total:
+            logging.info(f"Arquivo: {total} reservas anteriores a {limite} movidas para {NOME_ARQUIVO}.")
+        return total
+    except sqlite3.Error as e:
+        logging.error(f"Erro ao arquivar reservas (movidas até ao erro: {total}): {e}", exc_info=True)
+        return total
+    finally:
+        conn.execute("DROP TABLE IF EXISTS temp.lote_arquivo")
+        if not conn_externa:
+            conn.close()
+
+
+def buscar_arquivadas(conn, sql, params):
+    """Executa uma consulta sobre o arquivo, se ele existir; caso contrário retorna []."""
+    try:
+        if not anexar_arquivo(conn):
+            return []
+        return conn.execute(sql, params).fetchall()
+    except sqlite3.Error as e:
+        logging.error(f"Erro ao consultar o arquivo de reservas: {e}", exc_info=True)
+        return []
+
+
+def iterar_arquivadas(sql, params=(), tamanho_lote=1000):
+    """Como database.iterar_consulta, mas com o arquivo anexado; sem arquivo não produz nada."""
+    if not os.path.exists(caminho_arquivo()):
+        return
+    conn = db.conectar_bd()
+    if not conn:
+        return
+    try:
+        anexar_arquivo(conn)
+        cursor = conn.execute(sql, params)
+        while True:
+            lote = cursor.fetchmany(tamanho_lote)
+            if not lote:
+                break
+            yield lote
+    finally:
+        conn.close()
+
+
+def conectar_historico():
+    """Conexão ao banco principal com o arquivo anexado e a vista 'reservas_historico' disponível."""
+    conn = db.conectar_bd()
+    if conn:
+        anexar_arquivo(conn, criar=True)
+    return conn
@@ -0,0 +1,286 @@
+import gzip
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+
+from . import arquivo_reservas
+from . import config_manager as cfg
+from . import database as db
+
+# --- Backups online ---
+# A cópia usa a API de backup do SQLite (sqlite3.Connection.backup): o banco é copiado em
+# passos de 'paginas_por_passo' páginas e, entre passos, a thread dorme 'pausa_ms'. O
+# bloqueio de leitura só é mantido durante cada passo, por isso os postos continuam a
+# gravar durante o backup. Se outra conexão gravar a meio, o SQLite recomeça a cópia; com
+# escritas constantes isso podia repetir-se sem fim, por isso, ao fim de MAX_REINICIOS, o
+# resto é copiado num único passo (um bloqueio de leitura curto, do tamanho de uma cópia).
+# Cada cópia passa por PRAGMA integrity_check antes de ser (opcionalmente) comprimida com
+# gzip; as mais antigas do que as 'retencao' mais recentes são apagadas.
+#
+# Com arquivo de reservas, o banco principal e o arquivo formam um par: o arquivamento move
+# reservas de um para o outro numa transação que abrange os dois. As duas cópias são então
+# feitas pela mesma conexão (com o arquivo anexado) dentro de uma única transação de
+# leitura, que impede qualquer COMMIT nos dois bancos até ambas estarem feitas; cada cópia
+# é feita num só passo para esse bloqueio ser curto. O par fica com o mesmo carimbo e é
+# restaurado em conjunto.
+
+PREFIXO = 'luxury_wheels'
+MAX_REINICIOS = 3
+BASE_ARQUIVO = os.path.splitext(arquivo_reservas.NOME_ARQUIVO)[0]
+_RE_BACKUP = re.compile(r'^(?P<base>[a-z_]+)_(?P<data>\d{8}_\d{6}_\d{3})\.db(?:\.gz)?$')
+
+
+class ErroBackup(Exception):
+    """Backup ou restauro inválido (falha na verificação de integridade, arquivo inexistente...)."""
+
+
+def diretorio_backups():
+    diretorio = cfg.obter('backup', 'diretorio')
+    return diretorio or os.path.join(os.path.dirname(db.DB_PATH), 'backups')
+
+
+def _verificar_integridade(conn):
+    try:
+        resultado = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    except sqlite3.DatabaseError as e:
+        raise ErroBackup(f"Cópia ilegível: {e}")
+    if resultado != ['ok']:
+        raise ErroBackup(f"Falha na verificação de integridade: {'; '.join(resultado[:5])}")
+
+
+class _DemasiadosReinicios(Exception):
+    pass
+
+
+def _copiar_online(origem, destino, paginas_por_passo, pausa):
+    """Copia 'origem' para o arquivo 'destino' em passos; retorna o número de páginas."""
+    estado = {'total': 0, 'restantes': None, 'reinicios': 0}
+
+    def _progresso(status, restantes, total):
+        # Restantes a crescer = a cópia recomeçou porque a origem foi alterada
+        if estado['restantes'] is not None and restantes > estado['restantes']:
+            estado['reinicios'] += 1
+            if estado['reinicios'] >= MAX_REINICIOS:
+                raise _DemasiadosReinicios()
+        estado.update(total=total, restantes=restantes)
+        if restantes and pausa:
+            time.sleep(pausa)  # Sem bloqueio na origem: os escritores avançam
+
+    fonte = sqlite3.connect(origem)
+    alvo = sqlite3.connect(destino)
+    try:
+        try:
+            fonte.backup(alvo, pages=paginas_por_passo, progress=_progresso)
+        except _DemasiadosReinicios:
+            logging.info(f"Backup de {origem}: {MAX_REINICIOS} reinícios por escritas concorrentes; "
+                         f"a concluir num único passo.")
+            fonte.backup(alvo)
+        _verificar_integridade(alvo)
+    finally:
+        alvo.close()
+        fonte.close()
+    return estado['total']
+
+
+def _copiar_par(origem, arquivo, destino, destino_arquivo):
+    """Copia o banco principal e o arquivo de reservas no mesmo instante; retorna as páginas de cada."""
+    fonte = sqlite3.connect(origem, isolation_level=None)
+    try:
+        fonte.execute(f"ATTACH DATABASE ? AS {arquivo_reservas.ALIAS}", (arquivo,))
+        # Transação de leitura nos dois bancos: nenhum outro posto consegue gravar até ao COMMIT
+        fonte.execute("BEGIN")
+        fonte.execute("SELECT COUNT(*) FROM main.sqlite_master").fetchone()
+        fonte.execute(f"SELECT COUNT(*) FROM {arquivo_reservas.ALIAS}.sqlite_master").fetchone()
+        paginas = []
+        for nome, caminho in (('main', destino), (arquivo_reservas.ALIAS, destino_arquivo)):
+            alvo = sqlite3.connect(caminho)
+            try:
+                fonte.backup(alvo, name=nome)
+                _verificar_integridade(alvo)
+                paginas.append(alvo.execute("PRAGMA page_count").fetchone()[0])
+            finally:
+                alvo.close()
+        fonte.execute("COMMIT")
+    finally:
+        fonte.close()
+    return paginas
+
+
+def _comprimir(caminho):
+    with open(caminho, 'rb') as entrada, gzip.open(caminho + '.gz', 'wb', compresslevel=6) as saida:
+        shutil.copyfileobj(entrada, saida, 1024 * 1024)
+    os.remove(caminho)
+    return caminho + '.gz'
+
+
+def criar_backup(diretorio=None, comprimir=None):
+    """
+    Faz o backup do banco principal (e do arquivo de reservas, se existir, no mesmo instante)
+    e aplica a retenção. Retorna a lista de {'caminho', 'paginas', 'bytes', 'segundos'} das
+    cópias criadas.
+    """
+    config = cfg.obter_secao('backup')
+    diretorio = diretorio or diretorio_backups()
+    comprimir = config['comprimir'] if comprimir is None else comprimir
+    os.makedirs(diretorio, exist_ok=True)
+
+    agora = datetime.now()
+    carimbo = f"{agora:%Y%m%d_%H%M%S}_{agora.microsecond // 1000:03d}"
+    origens = [(PREFIXO, db.DB_PATH)]
+    if os.path.exists(arquivo_reservas.caminho_arquivo()):
+        origens.append((BASE_ARQUIVO, arquivo_reservas.caminho_arquivo()))
+    finais = [os.path.join(diretorio, f"{base}_{carimbo}.db") for base, _ in origens]
+    temporarios = [final + '.tmp' for final in finais]
+
+    inicio = time.perf_counter()
+    try:
+        if len(origens) == 1:
+            paginas = [_copiar_online(db.DB_PATH, temporarios[0], config['paginas_por_passo'],
+                                      config['pausa_ms'] / 1000)]
+        else:
+            paginas = _copiar_par(db.DB_PATH, origens[1][1], *temporarios)
+        for temporario, final in zip(temporarios, finais):
+            os.replace(temporario, final)
+    except Exception:
+        for temporario in temporarios:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+        raise
+
+    criados = []
+    for final, n_paginas in zip(finais, paginas):
+        if comprimir:
+            final = _comprimir(final)
+        info = {'caminho': final, 'paginas': n_paginas, 'bytes': os.path.getsize(final),
+                'segundos': round(time.perf_counter() - inicio, 3)}
+        logging.info(f"Backup criado: {final} ({n_paginas} páginas, {info['bytes']} bytes, {info['segundos']}s).")
+        criados.append(info)
+
+    rotacionar(diretorio, config['retencao'])
+    return criados
+
+
+def listar_backups(diretorio=None):
+    """Retorna {base: [caminhos do mais recente para o mais antigo]}."""
+    diretorio = diretorio or diretorio_backups()
+    if not os.path.isdir(diretorio):
+        return {}
+    grupos = {}
+    for nome in os.listdir(diretorio):
+        m = _RE_BACKUP.match(nome)
+        if m:
+            grupos.setdefault(m.group('base'), []).append((m.group('data'), os.path.join(diretorio, nome)))
+    return {base: [caminho for _, caminho in sorted(itens, reverse=True)] for base, itens in grupos.items()}
+
+
+def rotacionar(diretorio=None, retencao=None):
+    """Mantém apenas as 'retencao' cópias mais recentes de cada banco; retorna as apagadas."""
+    retencao = cfg.obter('backup', 'retencao') if retencao is None else retencao
+    apagados = []
+    for caminhos in listar_backups(diretorio).values():
+        for caminho in caminhos[max(retencao, 1):]:
+            os.remove(caminho)
+            apagados.append(caminho)
+    if apagados:
+        logging.info(f"Backups: {len(apagados)} cópias antigas removidas pela retenção.")
+    return apagados
+
+
+def _par(caminho_backup):
+    """{base: caminho} das cópias com o mesmo carimbo de 'caminho_backup' (principal e arquivo)."""
+    m = _RE_BACKUP.match(os.path.basename(caminho_backup))
+    if not m:
+        return {PREFIXO: caminho_backup}
+    par = {}
+    for base in (PREFIXO, BASE_ARQUIVO):
+        for extensao in ('.db', '.db.gz'):
+            caminho = os.path.join(os.path.dirname(caminho_backup), f"{base}_{m.group('data')}{extensao}")
+            if os.path.exists(caminho):
+                par[base] = caminho
+    return par
+
+
+def _preparar_restauro(caminho_backup, destino):
+    """Descomprime a cópia (se preciso) para junto do destino e verifica-a; retorna (caminho, temporário)."""
+    if not caminho_backup.endswith('.gz'):
+        origem, temporario = caminho_backup, None
+    else:
+        origem = temporario = destino + '.restauro.tmp'
+        try:
+            with gzip.open(caminho_backup, 'rb') as entrada, open(temporario, 'wb') as saida:
+                shutil.copyfileobj(entrada, saida, 1024 * 1024)
+        except (OSError, EOFError) as e:
+            os.remove(temporario)
+            raise ErroBackup(f"Cópia ilegível: {e}")
+    fonte = sqlite3.connect(origem)
+    try:
+        _verificar_integridade(fonte)
+    except ErroBackup:
+        if temporario:
+            os.remove(temporario)
+        raise
+    finally:
+        fonte.close()
+    return origem, temporario
+
+
+def _restaurar_ficheiro(origem, destino):
+    fonte = sqlite3.connect(origem)
+    try:
+        alvo = sqlite3.connect(destino)
+        try:
+            fonte.backup(alvo)  # pages=-1: tudo num único passo
+        finally:
+            alvo.close()
+    finally:
+        fonte.close()
+
+
+def restaurar_backup(caminho_backup, destino=None):
+    """
+    Repõe um backup (.db ou .db.gz). Sem 'destino', repõe o par inteiro com o mesmo carimbo:
+    o banco principal e o arquivo de reservas (se a cópia for anterior ao arquivo, as
+    reservas arquivadas entretanto são apagadas, porque o principal restaurado ainda as tem).
+    Com 'destino', repõe só esta cópia nesse caminho.
+    As cópias são todas verificadas antes de tocar em qualquer banco; cada uma é gravada de
+    uma só vez pela API de backup, sob bloqueio exclusivo, para que as outras conexões vejam
+    o banco antigo ou o restaurado, nunca um misto. Retorna os destinos restaurados.
+    """
+    if not os.path.exists(caminho_backup):
+        raise ErroBackup(f"Backup inexistente: {caminho_backup}")
+    if destino is not None:
+        copias = [(caminho_backup, destino)]
+    else:
+        par = _par(caminho_backup)
+        if PREFIXO not in par:
+            raise ErroBackup(f"Backup do banco principal em falta para {caminho_backup}: "
+                             f"o arquivo de reservas só é restaurado junto com ele.")
+        copias = [(par[PREFIXO], db.DB_PATH)]
+        if BASE_ARQUIVO in par:
+            copias.append((par[BASE_ARQUIVO], arquivo_reservas.caminho_arquivo()))
+
+    inicio = time.perf_counter()
+    preparadas = []
+    try:
+        for copia, alvo in copias:
+            preparadas.append((*_preparar_restauro(copia, alvo), alvo))
+        for origem, _, alvo in preparadas:
+            _restaurar_ficheiro(origem, alvo)
+    finally:
+        for _, temporario, _ in preparadas:
+            if temporario and os.path.exists(temporario):
+                os.remove(temporario)
+    if destino is None and len(copias) == 1 and os.path.exists(arquivo_reservas.caminho_arquivo()):
+        conn = db.conectar_bd()
+        try:
+            arquivo_reservas.limpar_arquivo(conn)
+        finally:
+            conn.close()
+    destinos = [alvo for _, alvo in copias]
+    logging.info(f"Backup {caminho_backup} restaurado em {', '.join(destinos)} "
+                 f"({time.perf_counter() - inicio:.2f}s).")
+    return destinos
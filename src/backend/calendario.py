@@ -0,0 +1,127 @@
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from . import arquivo_reservas
+from . import config_manager as cfg
+from . import database as db
+
+# --- Calendário da frota (vista de Gantt) ---
+# A vista só pede as reservas dos veículos visíveis, na janela de datas visível (com margem).
+# Cada veículo é resolvido pelo índice (id_veiculo, data_inicio), em duas partes:
+#   - reservas que começam dentro da janela (intervalo no índice);
+#   - a última reserva que começou antes da janela, que é a única que ainda pode estar a
+#     decorrer no início dela: as reservas não canceladas de um veículo não se sobrepõem
+#     (SQL_VERIFICAR_DISPONIBILIDADE), por isso não é preciso percorrer o histórico.
+# Os ids dos veículos vão como um array JSON (json_each), para a instrução ser sempre a mesma.
+
+
+def _sql_janela(tabela):
+    return f"""
+    SELECT r.id, r.id_veiculo, r.data_inicio, r.data_fim, r.status, c.nome_completo
+    FROM json_each(?) AS j
+    JOIN {tabela} r ON r.id_veiculo = j.value AND r.data_inicio >= ? AND r.data_inicio < ?
+    JOIN main.clientes c ON r.id_cliente = c.id
+    WHERE r.status != 'cancelada'
+    UNION ALL
+    SELECT r.id, r.id_veiculo, r.data_inicio, r.data_fim, r.status, c.nome_completo
+    FROM json_each(?) AS j
+    JOIN {tabela} r ON r.id = (
+        SELECT r2.id FROM {tabela} r2
+        WHERE r2.id_veiculo = j.value AND r2.data_inicio < ? AND r2.status != 'cancelada'
+        ORDER BY r2.data_inicio DESC LIMIT 1
+    )
+    JOIN main.clientes c ON r.id_cliente = c.id
+    WHERE r.data_fim >= ?
+"""
+
+
+SQL_RESERVAS_JANELA = _sql_janela('main.reservas')
+SQL_ARQUIVADAS_JANELA = _sql_janela(f'{arquivo_reservas.ALIAS}.reservas')
+
+FORMATO = '%Y-%m-%d %H:%M:%S'
+
+
+def _parametros(ids_veiculos, inicio, fim):
+    ids = json.dumps(list(ids_veiculos))
+    inicio, fim = inicio.strftime(FORMATO), fim.strftime(FORMATO)
+    return ids, inicio, fim, ids, inicio, inicio
+
+
+def _converter(data):
+    try:
+        return datetime.strptime(data, FORMATO)
+    except ValueError:
+        return datetime.strptime(data[:10], '%Y-%m-%d')
+
+
+def reservas_na_janela(ids_veiculos, inicio, fim, incluir_arquivo=True):
+    """
+    Reservas (não canceladas) dos veículos indicados que se sobrepõem a [inicio, fim[,
+    como {id_veiculo: [(inicio, fim, status, cliente, id_reserva)]} ordenadas por início.
+    Com 'incluir_arquivo', junta as reservas já movidas para o arquivo.
+    """
+    resultado = {id_: [] for id_ in ids_veiculos}
+    if not resultado:
+        return resultado
+    params = _parametros(resultado, inicio, fim)
+    with db.conectar_bd() as conn:
+        linhas = conn.execute(SQL_RESERVAS_JANELA, params).fetchall()
+        if incluir_arquivo:
+            linhas += arquivo_reservas.buscar_arquivadas(conn, SQL_ARQUIVADAS_JANELA, params)
+    vistas = set()
+    for id_reserva, id_veiculo, data_inicio, data_fim, status, cliente in linhas:
+        if id_reserva in vistas:
+            continue
+        vistas.add(id_reserva)
+        resultado[id_veiculo].append((_converter(data_inicio), _converter(data_fim), status, cliente, id_reserva))
+    for reservas in resultado.values():
+        reservas.sort()
+    return resultado
+
+
+class JanelaCalendario:
+    """
+    Cache das reservas da última janela pedida (veículos x datas), alargada por
+    'margem_dias' de cada lado: deslocar a vista dentro dessa margem não consulta o banco.
+    Invalida-se quando a geração da tabela 'reservas' muda.
+    """
+
+    def __init__(self, margem_dias=None, incluir_arquivo=None):
+        config = cfg.obter_secao('calendario')
+        self.margem = timedelta(days=config['margem_dias'] if margem_dias is None else margem_dias)
+        self.incluir_arquivo = config['incluir_arquivo'] if incluir_arquivo is None else incluir_arquivo
+        self._lock = threading.Lock()
+        self._ids = frozenset()
+        self._inicio = self._fim = None
+        self._geracao = None
+        self._reservas = {}
+        self.consultas = 0
+
+    def obter(self, ids_veiculos, inicio, fim):
+        """
+        {id_veiculo: [reservas]} para os veículos pedidos. Pode incluir reservas da
+        margem, fora de [inicio, fim[: quem desenha recorta.
+        """
+        geracao = db.obter_geracoes_tabelas().get('reservas')
+        with self._lock:
+            ids = frozenset(ids_veiculos)
+            coberta = (self._inicio is not None and geracao == self._geracao and ids <= self._ids
+                       and self._inicio <= inicio and fim <= self._fim)
+            if not coberta:
+                self._inicio, self._fim = inicio - self.margem, fim + self.margem
+                try:
+                    self._reservas = reservas_na_janela(ids, self._inicio, self._fim, self.incluir_arquivo)
+                except sqlite3.Error as e:
+                    logging.error(f"Erro ao buscar as reservas do calendário: {e}", exc_info=True)
+                    self._reservas = {}
+                    self._inicio = None
+                self._ids, self._geracao = ids, geracao
+                self.consultas += 1
+            return {id_: self._reservas.get(id_, []) for id_ in ids_veiculos}
+
+    def invalidar(self):
+        with self._lock:
+            self._inicio = None
@@ -1,38 +1,268 @@
+import atexit
+import copy
 import json
+import logging
 import os
+import tempfile
+import threading
 
 # Determina o caminho para o arquivo de configuração na raiz do projeto
 CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
 
+# --- Cache em memória ---
+# O config.json é lido uma vez e guardado já interpretado; só volta a ser lido quando o
+# mtime (ou o tamanho) do arquivo muda. As escritas são atómicas (arquivo temporário na
+# mesma pasta + os.replace) e as alterações feitas com definir() são agrupadas: várias
+# alterações seguidas geram uma única escrita, ATRASO_GRAVACAO segundos depois.
+
+ATRASO_GRAVACAO = 0.5
+
+# Secções tipadas: {secção: {chave: (tipo, valor padrão)}}. No config.json cada secção é
+# um objeto, por exemplo {"api": {"workers": 32}}; o que faltar assume o valor padrão.
+SECOES = {
+    'api': {
+        'workers': (int, 16),
+        'cache_respostas': (int, 256),
+        'limite_pagina_padrao': (int, 500),
+        'limite_pagina_maximo': (int, 5000),
+    },
+    'agendador': {
+        'intervalo_reconciliar_status': (int, 5 * 60),
+        'intervalo_manutencao_revisoes': (int, 60 * 60),
+        'intervalo_arquivar_reservas': (int, 24 * 60 * 60),
+        'intervalo_backup': (int, 24 * 60 * 60),
+        'intervalo_snapshot_analitico': (int, 5 * 60),
+    },
+    'arquivo': {
+        'horizonte_dias': (int, 365),
+        'tamanho_lote': (int, 5000),
+    },
+    'escritas': {
+        'tentativas': (int, 8),
+        'espera_base_ms': (int, 10),
+        'espera_max_ms': (int, 500),
+        'timeout_ms': (int, 250),  # busy_timeout de cada tentativa
+    },
+    'imagens': {
+        'diretorio': (str, ''),  # Vazio: data/imagens, ao lado do banco
+        'cache_max': (int, 200),  # CTkImage descodificadas mantidas em memória
+        'workers': (int, 4),
+    },
+    'deduplicacao': {
+        'limiar': (float, 0.75),  # Pontuação mínima para sinalizar um possível duplicado
+        'max_bloco': (int, 200),  # Blocos fonéticos maiores não são comparados par a par
+    },
+    'fila_escritas': {
+        'intervalo_ms': (int, 5),  # Tempo máximo que uma escrita espera pelas do mesmo lote
+        'max_lote': (int, 500),
+    },
+    'indice_frota': {
+        'idade_maxima_s': (int, 300),  # O status operacional depende da hora: releitura completa periódica
+        'linhas_visiveis': (int, 500),  # Linhas desenhadas na tabela de veículos (o resto fica só no índice)
+        'intervalo_sincronizacao_s': (int, 10),  # Verificação em segundo plano da necessidade de releitura completa
+    },
+    'alertas': {
+        'dias_revisao': (int, 15),  # Antecedência do alerta de revisão próxima
+        'intervalo_sincronizacao_s': (int, 5),  # Verificação de alterações no banco (leitura das marcas d'água)
+    },
+    'recomendador': {
+        'sugestoes': (int, 5),  # Alternativas mostradas quando o veículo escolhido está ocupado
+        'peso_marca': (float, 3.0),
+        'peso_modelo': (float, 2.0),
+        'peso_cor': (float, 0.5),
+        'peso_ano': (float, 0.2),  # Por ano de diferença
+        'peso_valor': (float, 2.0),  # Por unidade de |ln(diária / diária pedida)|: o dobro do preço ~ 1.4
+    },
+    'manutencao': {
+        'duracao_dias': (int, 1),  # Dias de oficina por revisão
+        'capacidade_diaria': (int, 2),  # Veículos que a oficina recebe por dia
+        'horizonte_dias': (int, 30),  # Planeia as revisões que vencem até esta distância
+        'intervalo_revisao_dias': (int, 365),  # Próxima revisão, contada a partir do fim do bloco
+    },
+    'otimizador': {
+        'folga_minima_h': (int, 24),  # Intervalos livres mais curtos contam como sobra invendável
+        'profundidade': (int, 3),  # Pedidos do lote que podem ser deslocados em cadeia para caber um novo
+        'maximo_pedidos_lote': (int, 5000),  # Limite de pedidos por POST /api/reservas/lote
+    },
+    'calendario': {
+        'margem_dias': (int, 60),  # Dias pedidos a mais de cada lado da vista (deslocar sem consultar)
+        'incluir_arquivo': (bool, True),  # Mostra também as reservas arquivadas
+    },
+    'backup': {
+        'diretorio': (str, ''),  # Vazio: data/backups, ao lado do banco
+        'paginas_por_passo': (int, 256),
+        'pausa_ms': (int, 20),
+        'retencao': (int, 14),
+        'comprimir': (bool, True),
+    },
+    'logging': {
+        'json': (bool, False),
+        'fila_max': (int, 10000),
+        'max_bytes': (int, 1048576),
+        'backups': (int, 3),
+    },
+    'diagnostico': {
+        'perfil_sql': (bool, False),
+    },
+    'desempenho_ui': {
+        'ativo': (bool, True),  # Vigia do ciclo de eventos do Tk e spans (desligado: nada é medido)
+        'intervalo_batimento_ms': (int, 100),
+        'limiar_bloqueio_ms': (int, 500),  # Interface parada há mais do que isto: captura a pilha
+        'limiar_span_ms': (int, 0),  # Spans mais curtos não são registados
+        'intervalo_resumo_s': (int, 60),  # Janela de cada resumo da latência do ciclo de eventos
+        'max_bytes': (int, 1048576),
+        'backups': (int, 3),
+    },
+}
+
+_lock = threading.RLock()
+_config = None
+_assinatura = None  # (mtime_ns, tamanho) do arquivo quando foi lido/gravado
+_pendente = False
+_temporizador = None
+
+
+def _assinatura_arquivo():
+    try:
+        estado = os.stat(CONFIG_PATH)
+    except FileNotFoundError:
+        return None
+    return estado.st_mtime_ns, estado.st_size
+
+
+def _ler_se_alterado():
+    """Relê o arquivo só se mudou desde a última leitura (e não há alterações por gravar)."""
+    global _config, _assinatura
+    assinatura = _assinatura_arquivo()
+    if _config is not None and (_pendente or assinatura == _assinatura):
+        return _config
+    if assinatura is None:
+        _config = {}
+    else:
+        try:
+            with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+                _config = json.load(f)
+        except (json.JSONDecodeError, UnicodeDecodeError, OSError) as e:
+            logging.error(f"config.json inválido, a usar configuração vazia: {e}")
+            _config = {}
+    _assinatura = assinatura
+    return _config
+
+
 def carregar_config():
-    """Carrega as configurações do arquivo JSON. Se não existir, cria um vazio."""
-    if not os.path.exists(CONFIG_PATH):
-        return {}
+    """Retorna uma cópia das configurações (do cache em memória). Se o arquivo não existir, vazia."""
+    with _lock:
+        return copy.deepcopy(_ler_se_alterado())
+
+
+def _gravar_atomico(config_data):
+    global _assinatura
+    pasta = os.path.dirname(CONFIG_PATH)
+    descritor, caminho_tmp = tempfile.mkstemp(prefix='.config.', suffix='.tmp', dir=pasta)
     try:
-        with open(CONFIG_PATH, 'r') as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return {}
+        with os.fdopen(descritor, 'w', encoding='utf-8') as f:
+            json.dump(config_data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(caminho_tmp, CONFIG_PATH)
+    except Exception:
+        if os.path.exists(caminho_tmp):
+            os.remove(caminho_tmp)
+        raise
+    _assinatura = _assinatura_arquivo()
+
 
 def salvar_config(config_data):
-    """Salva um dicioário de configurações no arquivo JSON."""
-    with open(CONFIG_PATH, 'w') as f:
-        json.dump(config_data, f, indent=4)
+    """Salva um dicionário de configurações no arquivo JSON (imediatamente e de forma atómica)."""
+    global _config, _pendente
+    with _lock:
+        _cancelar_temporizador()
+        _config = copy.deepcopy(config_data)
+        _gravar_atomico(_config)
+        _pendente = False
+
+
+def _cancelar_temporizador():
+    global _temporizador
+    if _temporizador is not None:
+        _temporizador.cancel()
+        _temporizador = None
+
+
+def gravar_pendentes():
+    """Grava já as alterações agrupadas que ainda aguardam a escrita (chamado também à saída)."""
+    global _pendente
+    with _lock:
+        _cancelar_temporizador()
+        if not _pendente:
+            return
+        try:
+            _gravar_atomico(_config)
+            _pendente = False
+        except OSError as e:
+            logging.error(f"Erro ao gravar config.json: {e}", exc_info=True)
+
+
+def definir(chave, valor=None, remover=False):
+    """Altera (ou remove) uma chave de topo; a escrita é agrupada com as alterações seguintes."""
+    global _pendente, _temporizador
+    with _lock:
+        config = _ler_se_alterado()
+        if remover:
+            if chave not in config:
+                return
+            del config[chave]
+        else:
+            if chave in config and config[chave] == valor:
+                return
+            config[chave] = valor
+        _pendente = True
+        if _temporizador is None:
+            _temporizador = threading.Timer(ATRASO_GRAVACAO, gravar_pendentes)
+            _temporizador.daemon = True
+            _temporizador.start()
+
+
+atexit.register(gravar_pendentes)
+
+
+def _converter(secao, chave, tipo, padrao, valor):
+    if tipo is bool or tipo is str:
+        if isinstance(valor, tipo):
+            return valor
+    elif isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return tipo(valor)
+    logging.warning(f"config.json: '{secao}.{chave}' inválido ({valor!r}); a usar {padrao!r}.")
+    return padrao
+
+
+def obter_secao(secao):
+    """Retorna a secção com todos os valores (convertidos para o tipo declarado ou o padrão)."""
+    esquema = SECOES[secao]
+    with _lock:
+        valores = _ler_se_alterado().get(secao)
+    if not isinstance(valores, dict):
+        valores = {}
+    resultado = {}
+    for chave, (tipo, padrao) in esquema.items():
+        resultado[chave] = _converter(secao, chave, tipo, padrao, valores[chave]) if chave in valores else padrao
+    return resultado
+
+
+def obter(secao, chave):
+    """Valor tipado de uma chave de uma secção (só um stat; o arquivo é relido apenas se mudou)."""
+    return obter_secao(secao)[chave]
+
 
 def salvar_email_lembrado(email):
     """Salva o email do usuário para ser lembrado."""
-    config = carregar_config()
-    config['lembrar_email'] = email
-    salvar_config(config)
+    definir('lembrar_email', email)
 
 def obter_email_lembrado():
     """Obtém o email salvo, se existir"""
-    config = carregar_config()
-    return config.get('lembrar_email', '')
+    with _lock:
+        return _ler_se_alterado().get('lembrar_email', '')
 
 def limpar_email_lembrado():
     """Limpa o email salvo das configurações."""
-    config = carregar_config()
-    if 'lembrar_email' in config:
-        del config['lembrar_email']
-        salvar_config(config)
\ No newline at end of file
+    definir('lembrar_email', remover=True)
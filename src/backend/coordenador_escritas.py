@@ -0,0 +1,106 @@
+import logging
+import random
+import sqlite3
+import threading
+import time
+
+from . import config_manager as cfg
+
+# --- Coordenação de escritas entre postos ---
+# Vários postos partilham o mesmo arquivo SQLite. Uma escrita que depende de uma leitura
+# (ex.: "o veículo está livre? então reserva") tem de ler e gravar na mesma transação
+# BEGIN IMMEDIATE: o bloqueio RESERVED é pedido logo no início, por isso nenhum outro posto
+# pode gravar entre a verificação e a inserção (sem reservas duplicadas).
+# Se o banco estiver ocupado (SQLITE_BUSY / "database is locked"), a transação inteira é
+# repetida com espera exponencial limitada e aleatória (secção "escritas" do config.json).
+# Tempos de espera, repetições e falhas ficam em métricas consultáveis.
+
+_lock = threading.Lock()
+_metricas = {
+    'transacoes': 0,
+    'repeticoes': 0,
+    'falhas': 0,
+    'espera_total_s': 0.0,
+    'espera_max_s': 0.0,
+}
+
+
+class ErroContencao(sqlite3.OperationalError):
+    """O banco continuou ocupado depois de todas as tentativas."""
+
+
+def _ocupado(erro):
+    mensagem = str(erro).lower()
+    return 'locked' in mensagem or 'busy' in mensagem
+
+
+def _registar(espera, repeticoes, falhou=False):
+    with _lock:
+        _metricas['transacoes'] += 1
+        _metricas['repeticoes'] += repeticoes
+        _metricas['falhas'] += 1 if falhou else 0
+        _metricas['espera_total_s'] += espera
+        _metricas['espera_max_s'] = max(_metricas['espera_max_s'], espera)
+
+
+def obter_metricas():
+    """Cópia das métricas de contenção deste processo (com a espera média por transação)."""
+    with _lock:
+        metricas = dict(_metricas)
+    metricas['espera_media_s'] = metricas['espera_total_s'] / metricas['transacoes'] if metricas['transacoes'] else 0.0
+    return metricas
+
+
+def limpar_metricas():
+    with _lock:
+        for chave in _metricas:
+            _metricas[chave] = 0.0 if chave.startswith('espera') else 0
+
+
+def _conectar(timeout_ms):
+    from . import database as db  # Importação tardia: database importa este módulo
+    conn = db.conectar_bd()
+    if conn is None:
+        raise sqlite3.OperationalError("Não foi possível abrir o banco de dados.")
+    conn.isolation_level = None  # Transações explícitas (BEGIN IMMEDIATE / COMMIT)
+    conn.execute(f"PRAGMA busy_timeout = {int(timeout_ms)}")
+    return conn
+
+
+def executar_escrita(funcao, descricao='escrita'):
+    """
+    Executa funcao(conn) dentro de BEGIN IMMEDIATE ... COMMIT e retorna o seu resultado.
+    Em caso de banco ocupado repete a transação inteira (funcao volta a ser chamada, por isso
+    deve ler o que precisa dentro dela). Esgotadas as tentativas, lança ErroContencao.
+    """
+    config = cfg.obter_secao('escritas')
+    conn = _conectar(config['timeout_ms'])
+    inicio = time.perf_counter()
+    repeticoes = 0
+    try:
+        while True:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                espera = time.perf_counter() - inicio  # Até obter o bloqueio de escrita
+                try:
+                    resultado = funcao(conn)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    raise
+                _registar(espera, repeticoes)
+                return resultado
+            except sqlite3.OperationalError as e:
+                if not _ocupado(e):
+                    raise
+                if repeticoes + 1 >= config['tentativas']:
+                    _registar(time.perf_counter() - inicio, repeticoes, falhou=True)
+                    logging.error(f"Coordenador: '{descricao}' desistiu após {repeticoes + 1} tentativas "
+                                  f"com o banco ocupado ({time.perf_counter() - inicio:.2f}s).")
+                    raise ErroContencao(f"Banco ocupado: '{descricao}' não foi gravada.") from e
+                pausa = min(config['espera_base_ms'] * 2 ** repeticoes, config['espera_max_ms']) / 1000
+                time.sleep(random.uniform(pausa / 2, pausa))
+                repeticoes += 1
+    finally:
+        conn.close()
@@ -0,0 +1,307 @@
+import logging
+import time
+import unicodedata
+from datetime import datetime
+
+import numpy as np
+
+from . import arquivo_reservas
+
+# --- Vocabulário dos dados sintéticos ---
+
+MARCAS_MODELOS = {
+    'BMW': ['Série 3', 'Série 5', 'X3', 'X5', 'i4'],
+    'Mercedes-Benz': ['A-Class', 'C-Class', 'E-Class', 'GLC'],
+    'Audi': ['A3', 'A4', 'Q3', 'Q5'],
+    'Jaguar': ['F-Pace', 'E-Pace'],
+    'Land Rover': ['Evoque', 'Velar'],
+    'Volvo': ['XC40', 'XC60'],
+    'Porsche': ['Macan', 'Cayenne'],
+}
+CORES = ['Preto', 'Branco', 'Prata', 'Cinza', 'Azul Escuro', 'Vermelho']
+FORMAS_PAGAMENTO = ['Cartão de Crédito', 'PIX', 'Dinheiro', 'Transferência Bancária']
+
+PRIMEIROS_NOMES = [
+    'Afonso', 'Alice', 'Ana', 'André', 'Beatriz', 'Bernardo', 'Carolina', 'Catarina', 'Diogo', 'Duarte',
+    'Francisco', 'Gabriel', 'Gonçalo', 'Guilherme', 'Henrique', 'Inês', 'Joana', 'João', 'Lara', 'Leonor',
+    'Luísa', 'Margarida', 'Maria', 'Mariana', 'Martim', 'Matilde', 'Miguel', 'Pedro', 'Rafael', 'Rodrigo',
+    'Salvador', 'Santiago', 'Sofia', 'Tomás', 'Vasco', 'Vitória',
+]
+APELIDOS = [
+    'Almeida', 'Alves', 'Antunes', 'Barbosa', 'Carvalho', 'Correia', 'Costa', 'Cunha', 'Dias', 'Fernandes',
+    'Ferreira', 'Gomes', 'Gonçalves', 'Henriques', 'Lopes', 'Machado', 'Marques', 'Martins', 'Mendes',
+    'Monteiro', 'Moreira', 'Nunes', 'Oliveira', 'Pereira', 'Pinto', 'Ribeiro', 'Rocha', 'Rodrigues',
+    'Santos', 'Silva', 'Simões', 'Soares', 'Sousa', 'Teixeira', 'Vieira',
+]
+DOMINIOS_EMAIL = ['gmail.com', 'hotmail.com', 'sapo.pt', 'outlook.pt', 'iol.pt']
+LETRAS = np.array(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ'))
+
+FORMATO_DATA = '%Y-%m-%d %H:%M:%S'
+
+# Janela das reservas em relação à data de referência (como o antigo populate_database.py)
+DIAS_HISTORICO = 365
+DIAS_FUTURO = 30
+DURACAO_MIN_DIAS, DURACAO_MAX_DIAS = 2, 12
+PROB_CANCELADA = 0.05
+# Intervalo mínimo entre duas reservas do mesmo veículo: as verificações de
+# disponibilidade tratam fim == início como sobreposição.
+INTERVALO_MINIMO = np.timedelta64(1, 'h')
+
+TAMANHO_LOTE_INSERCAO = 100_000
+
+# Índices de 'reservas' recriados no fim de uma carga em massa (mais rápido do que mantê-los linha a linha)
+INDICES_RESERVAS = {
+    'idx_reservas_versao': "CREATE INDEX IF NOT EXISTS idx_reservas_versao ON reservas (versao_alteracao)",
+    'idx_reservas_status_fim': "CREATE INDEX IF NOT EXISTS idx_reservas_status_fim ON reservas (status, data_fim)",
+    'idx_reservas_status_inicio':
+        "CREATE INDEX IF NOT EXISTS idx_reservas_status_inicio ON reservas (status, data_inicio)",
+    'idx_reservas_veiculo_inicio':
+        "CREATE INDEX IF NOT EXISTS idx_reservas_veiculo_inicio ON reservas (id_veiculo, data_inicio)",
+    'idx_reservas_cliente_inicio':
+        "CREATE INDEX IF NOT EXISTS idx_reservas_cliente_inicio ON reservas (id_cliente, data_inicio)",
+    'idx_reservas_por_devolver':
+        "CREATE INDEX IF NOT EXISTS idx_reservas_por_devolver ON reservas (status, data_devolucao) "
+        "WHERE data_devolucao IS NULL",
+}
+
+
+def _permutacao_afim(rng, n, espaco, multiplicador):
+    """
+    n valores distintos em [0, espaco), sem materializar o espaço inteiro:
+    i -> (i * multiplicador + deslocamento) % espaco é uma bijeção quando
+    o multiplicador é primo com 'espaco'.
+    """
+    if n > espaco:
+        raise ValueError(f"Não é possível gerar {n} valores distintos num espaço de {espaco}.")
+    deslocamento = int(rng.integers(0, espaco))
+    return (np.arange(n, dtype=np.int64) * multiplicador + deslocamento) % espaco
+
+
+def _datas_para_texto(datas):
+    """datetime64[s] -> 'YYYY-MM-DD HH:MM:SS' (formato usado no banco), vetorizado."""
+    return np.char.replace(np.datetime_as_string(datas, unit='s'), 'T', ' ')
+
+
+def _digito_controlo_nif(corpos):
+    """Dígito de controlo (módulo 11) para corpos de NIF com 8 dígitos, vetorizado."""
+    soma = np.zeros(len(corpos), dtype=np.int64)
+    resto = corpos.copy()
+    for peso in range(2, 10):  # do último dígito do corpo (peso 2) ao primeiro (peso 9)
+        soma += (resto % 10) * peso
+        resto //= 10
+    digito = 11 - soma % 11
+    return np.where(digito >= 10, 0, digito)
+
+
+def _digito_controlo_cc(valores):
+    """
+    Último dígito do Cartão de Cidadão para os valores dos 11 primeiros caracteres
+    (dígitos 0..9, letras 10..35), vetorizado: as regras de validacao.validar_cc.
+    """
+    duplicados = valores[:, 0::2] * 2  # Posições 1, 3, ... a contar da direita (o 12º não é duplicado)
+    soma = np.where(duplicados > 9, duplicados - 9, duplicados).sum(axis=1) + valores[:, 1::2].sum(axis=1)
+    return (10 - soma % 10) % 10
+
+
+def _ascii(texto):
+    """Remove os acentos (os emails só aceitam ASCII)."""
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+
+
+# --- Geradores de colunas ---
+
+def gerar_veiculos(rng, quantidade, referencia):
+    """Retorna a lista de linhas (marca, modelo, ano, placa, cor, valor_diaria, data_proxima_revisao)."""
+    marcas = list(MARCAS_MODELOS)
+    pares = [(marca, modelo) for marca in marcas for modelo in MARCAS_MODELOS[marca]]
+    idx_pares = rng.integers(0, len(pares), quantidade)
+    anos = rng.integers(2020, 2025, quantidade)
+    cores = rng.integers(0, len(CORES), quantidade)
+    valores = np.round(rng.uniform(300, 1500, quantidade), 2)
+    revisoes = (np.datetime64(referencia.date(), 'D')
+                + rng.integers(-30, 366, quantidade).astype('timedelta64[D]')).astype(str)
+
+    # Matrículas portuguesas no formato AA-00-AA, distintas entre si
+    codigos = _permutacao_afim(rng, quantidade, 26 ** 4 * 100, 7919)
+    numeros, letras = codigos % 100, codigos // 100
+    placas = [f"{LETRAS[l // 17576]}{LETRAS[l // 676 % 26]}-{n:02d}-{LETRAS[l // 26 % 26]}{LETRAS[l % 26]}"
+              for n, l in zip(numeros.tolist(), letras.tolist())]
+
+    return [(pares[p][0], pares[p][1], a, placa, CORES[c], v, r)
+            for p, a, placa, c, v, r in zip(idx_pares.tolist(), anos.tolist(), placas, cores.tolist(),
+                                             valores.tolist(), revisoes.tolist())]
+
+
+def gerar_clientes(rng, quantidade):
+    """Retorna a lista de linhas (nome_completo, nif, telefone, email, cc), com NIF/CC/email únicos."""
+    primeiros = rng.integers(0, len(PRIMEIROS_NOMES), quantidade)
+    apelidos = rng.integers(0, len(APELIDOS), (quantidade, 2))
+    dominios = rng.integers(0, len(DOMINIOS_EMAIL), quantidade)
+
+    # NIF de pessoa singular: 8 dígitos (a começar por 1 ou 2) + dígito de controlo
+    corpos = 10_000_000 + _permutacao_afim(rng, quantidade, 20_000_000, 7919)
+    nifs = corpos * 10 + _digito_controlo_nif(corpos)
+    telefones = 910_000_000 + rng.integers(0, 30_000_000, quantidade)
+    # Cartão de Cidadão: número civil (8 dígitos) + controlo + versão (2 letras) + controlo final
+    numeros_cc = _permutacao_afim(rng, quantidade, 100_000_000, 7927)
+    controlos_civis = _digito_controlo_nif(numeros_cc)
+    versoes_cc = rng.integers(0, 26, (quantidade, 2))
+    digitos_cc = numeros_cc[:, None] // 10 ** np.arange(7, -1, -1) % 10
+    controlos_cc = _digito_controlo_cc(np.column_stack([digitos_cc, controlos_civis, versoes_cc + 10]))
+
+    linhas = []
+    for i, (p, (a1, a2), d, nif, tel, cc, c1, (v1, v2), c2) in enumerate(zip(
+            primeiros.tolist(), apelidos.tolist(), dominios.tolist(), nifs.tolist(), telefones.tolist(),
+            numeros_cc.tolist(), controlos_civis.tolist(), versoes_cc.tolist(), controlos_cc.tolist()), start=1):
+        primeiro, apelido1, apelido2 = PRIMEIROS_NOMES[p], APELIDOS[a1], APELIDOS[a2]
+        email = _ascii(f"{primeiro}.{apelido2}{i}@{DOMINIOS_EMAIL[d]}").lower()
+        linhas.append((f"{primeiro} {apelido1} {apelido2}", nif, tel, email,
+                       f"{cc:08d}{c1}{LETRAS[v1]}{LETRAS[v2]}{c2}"))
+    return linhas
+
+
+def gerar_reservas(rng, quantidade, valores_diaria, n_clientes, n_formas_pagamento, referencia):
+    """
+    Gera reservas sem conflitos, de forma vetorizada.
+
+    As reservas são distribuídas pelos veículos (uns mais procurados do que outros) e,
+    em cada veículo, colocadas em sequência na linha do tempo: início = fim da anterior
+    + um intervalo. Os intervalos são escalados por veículo para a linha do tempo
+    ocupar a janela [referência - 1 ano, referência + 30 dias]; se as reservas não
+    couberem nessa janela, o histórico de toda a frota estende-se para trás.
+
+    Retorna um iterador de linhas
+    (id_cliente, id_veiculo, id_forma_pagamento, data_inicio, data_fim, valor_total, status).
+    """
+    n_veiculos = len(valores_diaria)
+    if quantidade == 0 or n_veiculos == 0:
+        return iter(())
+
+    # Reservas por veículo (popularidade variável) e ordenadas por veículo
+    popularidade = rng.gamma(8.0, 1.0, n_veiculos)
+    por_veiculo = rng.multinomial(quantidade, popularidade / popularidade.sum())
+    veiculos = np.repeat(np.arange(n_veiculos), por_veiculo)
+    com_reservas = por_veiculo > 0
+    contagens = por_veiculo[com_reservas]
+    primeiras = (np.cumsum(por_veiculo) - por_veiculo)[com_reservas]
+    ultimas = primeiras + contagens - 1
+
+    # Tudo em segundos
+    duracao_dias = rng.integers(DURACAO_MIN_DIAS, DURACAO_MAX_DIAS + 1, quantidade)
+    duracao = duracao_dias * 86400
+    intervalo_min = int(INTERVALO_MINIMO / np.timedelta64(1, 's'))
+    intervalo_bruto = rng.exponential(1.0, quantidade)
+    # Folga depois da última reserva, para os veículos não terminarem todos no fim da janela
+    cauda_bruta = rng.exponential(1.0, n_veiculos)
+
+    soma_duracao = np.bincount(veiculos, weights=duracao, minlength=n_veiculos)
+    soma_bruto = np.bincount(veiculos, weights=intervalo_bruto, minlength=n_veiculos) + cauda_bruta
+    # Com muitas reservas por veículo a janela alarga-se (para trás) para caberem todas,
+    # com a mesma duração para todos os veículos
+    ocupacao_maxima = (soma_duracao + por_veiculo * intervalo_min).max()
+    janela = max((DIAS_HISTORICO + DIAS_FUTURO) * 86400, int(ocupacao_maxima * 1.25))
+    livre = np.maximum(janela - soma_duracao - por_veiculo * intervalo_min, 0)
+    escala = livre / soma_bruto
+    # Intervalos arredondados ao quarto de hora
+    intervalo = (intervalo_bruto * escala[veiculos]).astype(np.int64) // 900 * 900 + intervalo_min
+    cauda = ((cauda_bruta * escala).astype(np.int64) // 900 * 900)[veiculos]
+
+    # Varrimento: fim de cada reserva = soma acumulada (intervalo + duração) dentro do veículo
+    passo = intervalo + duracao
+    acumulado = np.cumsum(passo)
+    acumulado -= np.repeat(acumulado[primeiras] - passo[primeiras], contagens)
+    total_veiculo = np.repeat(acumulado[ultimas], contagens)
+    fim_janela = np.datetime64(referencia.replace(minute=0, second=0, microsecond=0), 's') \
+        + np.timedelta64(DIAS_FUTURO, 'D')
+    fins = fim_janela - (total_veiculo - acumulado + cauda).astype('timedelta64[s]')
+    inicios = fins - duracao.astype('timedelta64[s]')
+
+    agora = np.datetime64(referencia.replace(microsecond=0), 's')
+    status = np.where(fins < agora, 'concluída', 'ativa')
+    status[rng.random(quantidade) < PROB_CANCELADA] = 'cancelada'
+
+    clientes = rng.integers(1, n_clientes + 1, quantidade)
+    formas = rng.integers(1, n_formas_pagamento + 1, quantidade)
+    valores = np.round(np.asarray(valores_diaria)[veiculos] * duracao_dias, 2)
+
+    return zip(clientes.tolist(), (veiculos + 1).tolist(), formas.tolist(),
+               _datas_para_texto(inicios).tolist(), _datas_para_texto(fins).tolist(),
+               valores.tolist(), status.tolist())
+
+
+# --- Carga no banco ---
+
+def limpar_tabelas(conn):
+    """
+    Apaga todos os dados (reservas, veículos, clientes, utilizadores, formas de pagamento),
+    incluindo as reservas arquivadas: os ids recomeçam do 1 e colidiriam com as do arquivo.
+    """
+    arquivo_reservas.limpar_arquivo(conn)
+    # A ordem é importante devido às chaves estrangeiras. As marcas de remoção de
+    # reservas ficam: o snapshot incremental precisa delas para esquecer as linhas antigas.
+    for tabela in ('reservas', 'veiculos', 'clientes', 'utilizadores', 'formas_pagamento'):
+        conn.execute(f"DELETE FROM {tabela}")
+    conn.execute("DELETE FROM sqlite_sequence WHERE name IN "
+                 "('reservas', 'veiculos', 'clientes', 'utilizadores', 'formas_pagamento')")
+    conn.commit()
+
+
+def _inserir_em_lotes(conn, sql, linhas):
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) >= TAMANHO_LOTE_INSERCAO:
+            conn.executemany(sql, lote)
+            lote = []
+    if lote:
+        conn.executemany(sql, lote)
+
+
+def gerar_dados(conn, veiculos=50, clientes=50, reservas=150, semente=None, referencia=None):
+    """
+    Gera e insere dados sintéticos num banco já migrado (tabelas vazias).
+    A mesma semente e referência produzem sempre os mesmos dados.
+
+    Os índices de 'reservas' são removidos durante a carga e recriados no fim,
+    e cada tabela é inserida com executemany numa única transação.
+
+    Returns:
+        dict: número de linhas inseridas por tabela.
+    """
+    referencia = referencia or datetime.now()
+    rng = np.random.default_rng(semente)
+    inicio = time.perf_counter()
+
+    linhas_veiculos = gerar_veiculos(rng, veiculos, referencia)
+    linhas_clientes = gerar_clientes(rng, clientes)
+
+    conn.execute("BEGIN")
+    try:
+        conn.executemany("INSERT INTO formas_pagamento (nome) VALUES (?)", [(f,) for f in FORMAS_PAGAMENTO])
+        conn.executemany(
+            "INSERT INTO veiculos (marca, modelo, ano, placa, cor, valor_diaria, data_proxima_revisao, status) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, 'disponível')", linhas_veiculos)
+        conn.executemany("INSERT INTO clientes (nome_completo, nif, telefone, email, cc) VALUES (?, ?, ?, ?, ?)",
+                         linhas_clientes)
+
+        for nome in INDICES_RESERVAS:
+            conn.execute(f"DROP INDEX IF EXISTS {nome}")
+        linhas_reservas = gerar_reservas(rng, reservas, [v[5] for v in linhas_veiculos], clientes,
+                                         len(FORMAS_PAGAMENTO), referencia)
+        # As reservas concluídas do histórico foram devolvidas na data de fim
+        _inserir_em_lotes(conn,
+                          "INSERT INTO reservas (id_cliente, id_veiculo, id_forma_pagamento, data_inicio, data_fim, "
+                          "valor_total, status, data_devolucao) "
+                          "VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, CASE WHEN ?7 = 'concluída' THEN ?5 END)",
+                          linhas_reservas)
+        for comando in INDICES_RESERVAS.values():
+            conn.execute(comando)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    conn.execute("ANALYZE")
+    logging.info(f"Dados sintéticos gerados em {time.perf_counter() - inicio:.1f}s: "
+                 f"{veiculos} veículos, {clientes} clientes, {reservas} reservas.")
+    return {'veiculos': veiculos, 'clientes': clientes, 'reservas': reservas}
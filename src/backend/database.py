@@ -1,8 +1,10 @@
+import json
 import logging
 import sqlite3
 import bcrypt
 import os
 from datetime import date, timedelta, datetime
+from . import coordenador_escritas, profiler
 
 
 # --- Configuração do Banco de Dados ---
@@ -15,12 +17,55 @@ def conectar_bd():
         conn = sqlite3.connect(DB_PATH)
         conn.row_factory = sqlite3.Row  # Permite acessar colunas por nome
         conn.execute("PRAGMA foreign_keys = ON")
+        if profiler.ativo():
+            profiler.instrumentar(conn)
         return conn
     except sqlite3.Error as e:
         logging.error(f"Erro ao conectar ao banco de dados: {e}", exc_info=True)
         return None
 
 
+def iterar_consulta(sql, params=(), tamanho_lote=1000):
+    """
+    Executa uma consulta e devolve o resultado em lotes de até 'tamanho_lote' linhas,
+    sem nunca materializar o resultado completo em memória.
+    A conexão é própria do gerador e é fechada quando ele termina ou é descartado.
+    """
+    conn = conectar_bd()
+    if not conn:
+        return
+    try:
+        cursor = conn.execute(sql, params)
+        while True:
+            lote = cursor.fetchmany(tamanho_lote)
+            if not lote:
+                break
+            yield lote
+    finally:
+        conn.close()
+
+
+def colunas_consulta(sql, params=()):
+    """Retorna os nomes das colunas de uma consulta, sem ler nenhuma linha."""
+    with conectar_bd() as conn:
+        cursor = conn.execute(f"SELECT * FROM ({sql}) LIMIT 0", params)
+        return [descricao[0] for descricao in cursor.description]
+
+
+def contar_linhas_consulta(sql, params=()):
+    """Retorna o número de linhas que uma consulta produziria."""
+    with conectar_bd() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM ({sql})", params)
+        return cursor.fetchone()[0]
+
+
+def consulta_tem_linhas(sql, params=()):
+    """True se a consulta produz pelo menos uma linha (para na primeira, sem contar as restantes)."""
+    with conectar_bd() as conn:
+        return bool(conn.execute(f"SELECT EXISTS ({sql})", params).fetchone()[0])
+
+
 # --- Funções de Segurança ---
 def hash_senha(senha):
     """Gera um hash seguro para a senha."""
@@ -86,41 +131,58 @@ def adicionar_veiculo(marca, modelo, ano, placa, cor, valor_diaria, data_proxima
             return False
 
 
+# Veículos com o 'status_operacional' calculado a partir das reservas ativas
+_SQL_VEICULOS_OPERACIONAL = """
+    SELECT 
+        v.id, v.marca, v.modelo, v.ano, v.placa, v.cor, v.valor_diaria, v.data_proxima_revisao, v.imagem_path,
+        CASE
+            WHEN v.status = 'manutenção' THEN 'Manutenção'
+            WHEN r_hoje.id IS NOT NULL THEN 'Alugado'
+            WHEN r_devolucao.id IS NOT NULL THEN 'Devolução Hoje'
+            WHEN r_futuro.id IS NOT NULL THEN 'Reservado'
+            ELSE 'Disponível'
+        END AS status_operacional,
+        COALESCE(r_hoje.data_fim, r_devolucao.data_fim) AS data_retorno
+    FROM veiculos v
+    LEFT JOIN reservas r_hoje ON v.id = r_hoje.id_veiculo AND r_hoje.status = 'ativa' AND ? BETWEEN r_hoje.data_inicio AND r_hoje.data_fim
+    LEFT JOIN reservas r_devolucao ON v.id = r_devolucao.id_veiculo AND r_devolucao.status = 'ativa' AND r_devolucao.data_fim BETWEEN ? AND ?
+    LEFT JOIN reservas r_futuro ON v.id = r_futuro.id_veiculo AND r_futuro.status = 'ativa' AND r_futuro.data_inicio > ? AND r_futuro.data_inicio <= ?
+"""
+
+SQL_LISTAR_VEICULOS = _SQL_VEICULOS_OPERACIONAL + "    ORDER BY v.marca, v.modelo\n"
+
+# O mesmo, só para um veículo (atualização incremental do índice da frota)
+SQL_VEICULO_OPERACIONAL = _SQL_VEICULOS_OPERACIONAL + "    WHERE v.id = ?\n"
+
+
+def parametros_listar_veiculos():
+    """Calcula os parâmetros de data (agora, hoje, limite de reserva) usados por SQL_LISTAR_VEICULOS."""
+    agora = datetime.now()
+    hoje_inicio = agora.strftime('%Y-%m-%d 00:00:00')
+    hoje_fim = agora.strftime('%Y-%m-%d 23:59:59')
+    limite_reserva = (agora + timedelta(days=2)).strftime('%Y-%m-%d 23:59:59')
+    return (agora.strftime('%Y-%m-%d %H:%M:%S'), hoje_inicio, hoje_fim, hoje_fim, limite_reserva)
+
+
 def listar_veiculos():
     """
     Retorna uma lista de todos os veículos, com um 'status_operacional' calculado.
     Estados: Manutenção, Alugado, Devolução Hoje, Reservado, Disponível.
     """
-    hoje_inicio = datetime.now().strftime('%Y-%m-%d 00:00:00')
-    hoje_fim = datetime.now().strftime('%Y-%m-%d 23:59:59')
-    limite_reserva = (datetime.now() + timedelta(days=2)).strftime('%Y-%m-%d 23:59:59')
-
-    sql = """
-        SELECT 
-            v.id, v.marca, v.modelo, v.ano, v.placa, v.cor, v.valor_diaria, v.data_proxima_revisao, v.imagem_path,
-            CASE
-                WHEN v.status = 'manutenção' THEN 'Manutenção'
-                WHEN r_hoje.id IS NOT NULL THEN 'Alugado'
-                WHEN r_devolucao.id IS NOT NULL THEN 'Devolução Hoje'
-                WHEN r_futuro.id IS NOT NULL THEN 'Reservado'
-                ELSE 'Disponível'
-            END AS status_operacional,
-            COALESCE(r_hoje.data_fim, r_devolucao.data_fim) AS data_retorno
-        FROM veiculos v
-        LEFT JOIN reservas r_hoje ON v.id = r_hoje.id_veiculo AND r_hoje.status = 'ativa' AND ? BETWEEN r_hoje.data_inicio AND r_hoje.data_fim
-        LEFT JOIN reservas r_devolucao ON v.id = r_devolucao.id_veiculo AND r_devolucao.status = 'ativa' AND r_devolucao.data_fim BETWEEN ? AND ?
-        LEFT JOIN reservas r_futuro ON v.id = r_futuro.id_veiculo AND r_futuro.status = 'ativa' AND r_futuro.data_inicio > ? AND r_futuro.data_inicio <= ?
-        ORDER BY v.marca, v.modelo
-    """
     with conectar_bd() as conn:
         cursor = conn.cursor()
-        cursor.execute(sql, (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), hoje_inicio, hoje_fim, hoje_fim, limite_reserva))
+        cursor.execute(SQL_LISTAR_VEICULOS, parametros_listar_veiculos())
         return cursor.fetchall()
 
+def sql_atualizar_por_id(tabela, campos):
+    """Monta 'UPDATE tabela SET c1 = ?, c2 = ? WHERE id = ?' para as chaves de 'campos'."""
+    atribuicoes = ", ".join([f"{chave} = ?" for chave in campos])
+    return f"UPDATE {tabela} SET {atribuicoes} WHERE id = ?"
+
+
 def atualizar_veiculo(id_veiculo, **kwargs):
-    campos = ", ".join([f"{chave} = ?" for chave in kwargs.keys()])
     valores = list(kwargs.values()) + [id_veiculo]
-    sql = f"UPDATE veiculos SET {campos} WHERE id = ?"
+    sql = sql_atualizar_por_id('veiculos', kwargs)
     with conectar_bd() as conn:
         cursor = conn.cursor()
         cursor.execute(sql, valores)
@@ -165,30 +227,42 @@ def deletar_veiculo(id_veiculo):
         if conn:
             conn.close()
 
+# Intervalo sobre a coluna (e não DATE(data_fim) = ?) para poder usar o índice (status, data_fim)
+SQL_VEICULOS_DEVOLUCAO_HOJE = """
+    SELECT v.id FROM veiculos v
+    JOIN reservas r ON v.id = r.id_veiculo
+    WHERE r.status = 'ativa' AND r.data_fim BETWEEN ? AND ?
+"""
+
+
 def buscar_veiculos_com_devolucao_hoje():
-    hoje_str = date.today().strftime('%Y/%m/%d')
-    sql = """
-            SELECT v.id FROM veiculos v
-            JOIN reservas r ON v.id = r.id_veiculo
-            WHERE r.status = 'ativa' AND DATE(r.data_fim) = ?
-        """
+    hoje = date.today()
     with conectar_bd() as conn:
         cursor = conn.cursor()
-        cursor.execute(sql, (hoje_str,))
+        cursor.execute(SQL_VEICULOS_DEVOLUCAO_HOJE,
+                       (hoje.strftime('%Y-%m-%d 00:00:00'), hoje.strftime('%Y-%m-%d 23:59:59')))
         # Retorna um conjunto de IDs para busca rápida
         return {row['id'] for row in cursor.fetchall()}
 
+SQL_RESERVAS_POR_VEICULO = """
+    SELECT r.data_inicio, r.data_fim, r.status, c.nome_completo, c.nif
+    FROM reservas r
+    JOIN clientes c ON r.id_cliente = c.id
+    WHERE r.id_veiculo = ? ORDER BY r.data_inicio DESC
+"""
+
+
 def buscar_reservas_por_veiculo(id_veiculo):
-    sql = """
-        SELECT r.data_inicio, r.data_fim, r.status, c.nome_completo, c.nif
-        FROM reservas r
-        JOIN clientes c ON r.id_cliente = c.id
-        WHERE r.id_veiculo = ? ORDER BY r.data_inicio DESC
-    """
+    """Histórico completo do veículo: reservas da tabela quente e, se existir, do arquivo."""
+    from . import arquivo_reservas  # Importação tardia: arquivo_reservas importa este módulo
     with conectar_bd() as conn:
         cursor = conn.cursor()
-        cursor.execute(sql, (id_veiculo,))
-        return cursor.fetchall()
+        cursor.execute(SQL_RESERVAS_POR_VEICULO, (id_veiculo,))
+        reservas = cursor.fetchall()
+        arquivadas = arquivo_reservas.buscar_arquivadas(conn, arquivo_reservas.SQL_ARQUIVADAS_POR_VEICULO, (id_veiculo,))
+    if not arquivadas:
+        return reservas
+    return sorted(reservas + arquivadas, key=lambda r: r['data_inicio'], reverse=True)
 
 def buscar_veiculo_por_id(id_veiculo):
     """Busca um único veículo pelo seu ID."""
@@ -199,8 +273,11 @@ def buscar_veiculo_por_id(id_veiculo):
         return cursor.fetchone()
 
 # --- CRUD: Clientes ---
+SQL_ADICIONAR_CLIENTE = "INSERT INTO clientes (nome_completo, nif, telefone, email, cc) VALUES (?, ?, ?, ?, ?)"
+
+
 def adicionar_cliente(nome_completo, nif, telefone, email, cc, cursor=None):
-    sql = "INSERT INTO clientes (nome_completo, nif, telefone, email, cc) VALUES (?, ?, ?, ?, ?)"
+    sql = SQL_ADICIONAR_CLIENTE
     try:
         with conectar_bd() as conn:
             cursor = conn.cursor()
@@ -217,18 +294,39 @@ def adicionar_cliente(nome_completo, nif, telefone, email, cc, cursor=None):
         logging.error(f"Erro de banco de dados ao tentar adicionar cliente: {e}", exc_info=True)
         return False
 
+SQL_LISTAR_CLIENTES = "SELECT * FROM clientes ORDER BY nome_completo"
+
+
 def listar_clientes():
-    sql = "SELECT * FROM clientes ORDER BY nome_completo"
     with conectar_bd() as conn:
         cursor = conn.cursor()
-        cursor.execute(sql)
+        cursor.execute(SQL_LISTAR_CLIENTES)
         return cursor.fetchall()
 
 
+SQL_BUSCAR_CLIENTE_POR_ID = "SELECT * FROM clientes WHERE id = ?"
+
+
+def buscar_cliente_por_id(id_cliente):
+    with conectar_bd() as conn:
+        cursor = conn.cursor()
+        cursor.execute(SQL_BUSCAR_CLIENTE_POR_ID, (id_cliente,))
+        return cursor.fetchone()
+
+
+SQL_CLIENTES_EXISTENTES = "SELECT id FROM clientes WHERE id IN (SELECT value FROM json_each(?))"
+SQL_FORMAS_PAGAMENTO_EXISTENTES = "SELECT id FROM formas_pagamento WHERE id IN (SELECT value FROM json_each(?))"
+
+
+def ids_existentes(sql, ids):
+    """Subconjunto de 'ids' que existe na tabela de 'sql' (SQL_CLIENTES_EXISTENTES, ...), numa só consulta."""
+    with conectar_bd() as conn:
+        return {row[0] for row in conn.execute(sql, (json.dumps(sorted(ids)),))}
+
+
 def atualizar_cliente(id_cliente, **kwargs):
-    campos = ", ".join([f"{chave} = ?" for chave in kwargs.keys()])
     valores = list(kwargs.values()) + [id_cliente]
-    sql = f"UPDATE clientes SET {campos} WHERE id = ?"
+    sql = sql_atualizar_por_id('clientes', kwargs)
     with conectar_bd() as conn:
         cursor = conn.cursor()
         cursor.execute(sql, valores)
@@ -282,47 +380,52 @@ def deletar_cliente(id_cliente):
 def adicionar_reserva(id_cliente, id_veiculo, id_forma_pagamento, data_inicio, data_fim):
     """
     Adiciona uma nova reserva e atualiza o status do veículo.
-    Operação transacional e robusta usando gerenciador de contexto.
+    A leitura do veículo, a verificação de conflitos e a inserção ocorrem na mesma
+    transação BEGIN IMMEDIATE (via coordenador de escritas): dois postos a reservar o
+    mesmo veículo ao mesmo tempo nunca criam reservas sobrepostas.
     """
     sql_get_veiculo = "SELECT valor_diaria, status FROM veiculos WHERE id = ?"
     sql_insert_reserva = """
         INSERT INTO reservas (id_cliente, id_veiculo, id_forma_pagamento, data_inicio, data_fim, valor_total, status)
         VALUES (?, ?, ?, ?, ?, ?, 'ativa')
     """
-    sql_update_veiculo = "UPDATE veiculos SET status = 'alugado' WHERE id = ?"
-
+    # Se a reserva já está a decorrer, o veículo fica 'alugado' de imediato;
+    # reservas futuras são tratadas pelo reconciliador de status quando começarem.
+    sql_update_veiculo = "UPDATE veiculos SET status = 'alugado' WHERE id = ? AND status = 'disponível'"
 
     try:
-        with conectar_bd() as conn:
-            cursor = conn.cursor()
-
-
-            cursor.execute(sql_get_veiculo, (id_veiculo,))
-            veiculo = cursor.fetchone()
-            if not veiculo or veiculo['status'] != 'disponível':
-                logging.error(f"Erro: Veículo {id_veiculo} não está disponível para reserva.", exc_info=True)
+        # Assume que o formato da data já está correto (YYYY-MM-DD HH:MM:SS)
+        d_inicio = datetime.strptime(data_inicio, '%Y-%m-%d %H:%M:%S')
+        d_fim = datetime.strptime(data_fim, '%Y-%m-%d %H:%M:%S')
+        num_dias = (d_fim - d_inicio).days
+        if num_dias < 0:  # Uma reserva pode ser de 0 dias (retirada e entrega no mesmo dia)
+            return False
+        # Garante pelo menos 1 dia de cobrança
+        dias_cobranca = num_dias if num_dias > 0 else 1
+
+        def _inserir(conn):
+            veiculo = conn.execute(sql_get_veiculo, (id_veiculo,)).fetchone()
+            # Um veículo alugado agora pode ser reservado para depois: as datas são
+            # verificadas abaixo; só os veículos em manutenção ficam fora de reserva.
+            if not veiculo or veiculo['status'] == 'manutenção':
+                logging.error(f"Erro: Veículo {id_veiculo} não está disponível para reserva.")
                 return False
-
-
-            valor_diaria = veiculo['valor_diaria']
-            # Assume que o formato da data já está correto (YYYY-MM-DD)
-            d_inicio = datetime.strptime(data_inicio, '%Y-%m-%d %H:%M:%S')
-            d_fim = datetime.strptime(data_fim, '%Y-%m-%d %H:%M:%S')
-
-            num_dias = (d_fim - d_inicio).days
-            if num_dias < 0:  # Uma reserva pode ser de 0 dias (retirada e entrega no mesmo dia)
+            # Verificação feita já com o bloqueio de escrita: outro posto pode ter reservado entretanto
+            if conn.execute(SQL_VERIFICAR_DISPONIBILIDADE, (id_veiculo, data_fim, data_inicio)).fetchone()[0]:
+                logging.warning(f"Reserva recusada: o veículo {id_veiculo} já tem uma reserva nesse período.")
+                return False
+            if conn.execute(SQL_VERIFICAR_MANUTENCAO, (id_veiculo, data_fim, data_inicio)).fetchone()[0]:
+                logging.warning(f"Reserva recusada: o veículo {id_veiculo} tem manutenção planeada nesse período.")
                 return False
 
-            # Garante pelo menos 1 dia de cobrança
-            dias_cobranca = num_dias if num_dias > 0 else 1
             valor_total = veiculo['valor_diaria'] * dias_cobranca
-
-            cursor.execute(sql_insert_reserva,
-                           (id_cliente, id_veiculo, id_forma_pagamento, data_inicio, data_fim, valor_total))
-            #cursor.execute(sql_update_veiculo, (id_veiculo,))
-
+            conn.execute(sql_insert_reserva,
+                         (id_cliente, id_veiculo, id_forma_pagamento, data_inicio, data_fim, valor_total))
+            if d_inicio <= datetime.now() <= d_fim:
+                conn.execute(sql_update_veiculo, (id_veiculo,))
             return True
 
+        return coordenador_escritas.executar_escrita(_inserir, f"reserva do veículo {id_veiculo}")
 
     except (ValueError, Exception) as e:
 
@@ -330,73 +433,114 @@ def adicionar_reserva(id_cliente, id_veiculo, id_forma_pagamento, data_inicio, d
 
         return False
 
+SQL_LISTAR_RESERVAS = "SELECT * FROM reservas ORDER BY data_inicio DESC"
+
+
 def listar_reservas():
-    sql = "SELECT * FROM reservas ORDER BY data_inicio DESC"
     with conectar_bd() as conn:
         cursor = conn.cursor()
-        cursor.execute(sql)
+        cursor.execute(SQL_LISTAR_RESERVAS)
         return cursor.fetchall()
 
 
 def atualizar_reserva(reserva_id, nova_data_inicio, nova_data_fim):
     """
     Atualiza as datas de uma reserva após verificar a disponibilidade do veículo,
-    ignorando a própria reserva na verificação de conflitos.
+    ignorando a própria reserva na verificação de conflitos. Verificação e atualização
+    ocorrem na mesma transação BEGIN IMMEDIATE (via coordenador de escritas).
     """
-    # 1. Pega o ID do veículo da reserva que estamos editando
-    reserva_atual = buscar_reserva_por_id(reserva_id)
-    if not reserva_atual:
-        return False, "Reserva não encontrada."
-    id_veiculo = reserva_atual['id_veiculo']
+    sql = "UPDATE reservas SET data_inicio = ?, data_fim = ? WHERE id = ?"
 
-    # 2. Verifica a disponibilidade, ignorando a própria reserva
-    if not verificar_disponibilidade_veiculo(id_veiculo, nova_data_inicio, nova_data_fim, id_reserva_existente=reserva_id):
-        return False, "Conflito de datas. O veículo não está disponível no novo período solicitado."
+    def _atualizar(conn):
+        # 1. Pega o ID do veículo da reserva que estamos editando
+        reserva_atual = conn.execute(SQL_BUSCAR_RESERVA_POR_ID, (reserva_id,)).fetchone()
+        if not reserva_atual:
+            return False, "Reserva não encontrada."
+        id_veiculo = reserva_atual['id_veiculo']
+
+        # 2. Verifica a disponibilidade, ignorando a própria reserva
+        conflitos = conn.execute(SQL_VERIFICAR_DISPONIBILIDADE + " AND id != ?",
+                                 (id_veiculo, nova_data_fim, nova_data_inicio, reserva_id)).fetchone()[0]
+        if conflitos:
+            return False, "Conflito de datas. O veículo não está disponível no novo período solicitado."
+        if conn.execute(SQL_VERIFICAR_MANUTENCAO, (id_veiculo, nova_data_fim, nova_data_inicio)).fetchone()[0]:
+            return False, "O veículo tem uma manutenção planeada no novo período solicitado."
+
+        # 3. Se não houver conflito, atualiza a reserva
+        conn.execute(sql, (nova_data_inicio, nova_data_fim, reserva_id))
+        return True, "Reserva atualizada com sucesso."
 
-    # 3. Se não houver conflito, atualiza a reserva
-    sql = "UPDATE reservas SET data_inicio = ?, data_fim = ? WHERE id = ?"
     try:
-        with conectar_bd() as conn:
-            cursor = conn.cursor()
-            cursor.execute(sql, (nova_data_inicio, nova_data_fim, reserva_id))
-            return True, "Reserva atualizada com sucesso."
+        return coordenador_escritas.executar_escrita(_atualizar, f"atualização da reserva {reserva_id}")
+    except coordenador_escritas.ErroContencao:
+        return False, "O banco de dados está ocupado. Tente novamente dentro de instantes."
     except sqlite3.Error as e:
         logging.error(f"Erro ao atualizar reserva ID {reserva_id}: {e}", exc_info=True)
         return False, "Ocorreu um erro no banco de dados."
 
+SQL_DELETAR_RESERVA = "DELETE FROM reservas WHERE id = ?"
+
+
 def deletar_reserva(reserva_id):
     """Deleta uma reserva do banco de dados."""
-    sql = "DELETE FROM reservas WHERE id = ?"
     try:
         with conectar_bd() as conn:
             cursor = conn.cursor()
-            cursor.execute(sql, (reserva_id,))
+            cursor.execute(SQL_DELETAR_RESERVA, (reserva_id,))
             return cursor.rowcount > 0
     except sqlite3.Error as e:
         logging.error(f"Erro ao deletar reserva ID {reserva_id}: {e}", exc_info=True)
         return False
 
-# Em src/backend/database.py
-def buscar_reservas_por_cliente(id_cliente):
-    """Busca todas as reservas de um cliente, juntando com dados do veículo."""
-    sql = """
-        SELECT
-            r.id,
-            r.data_inicio,
-            r.data_fim,
-            r.status AS status_reserva,
-            v.marca,
-            v.modelo,
-            v.placa
-        FROM reservas r
-        JOIN veiculos v ON r.id_veiculo = v.id
-        WHERE r.id_cliente = ?
-        ORDER BY r.data_inicio DESC
+# Só reservas já começadas e ainda por devolver (a versão de alteração avisa o motor de alertas)
+SQL_REGISTAR_DEVOLUCAO = """
+    UPDATE reservas SET data_devolucao = ?1
+    WHERE id = ?2 AND data_devolucao IS NULL AND status != 'cancelada' AND data_inicio <= ?1
+"""
+
+
+def registar_devolucao(reserva_id, data_devolucao=None):
+    """
+    Regista a entrega do veículo de uma reserva. Retorna True se a devolução foi gravada;
+    False se a reserva não existe, ainda não começou, foi cancelada ou já tinha sido devolvida.
     """
+    data_devolucao = data_devolucao or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    try:
+        with conectar_bd() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SQL_REGISTAR_DEVOLUCAO, (data_devolucao, reserva_id))
+            return cursor.rowcount > 0
+    except sqlite3.Error as e:
+        logging.error(f"Erro ao registar a devolução da reserva ID {reserva_id}: {e}", exc_info=True)
+        return False
+
+SQL_RESERVAS_POR_CLIENTE = """
+    SELECT
+        r.id,
+        r.data_inicio,
+        r.data_fim,
+        r.status AS status_reserva,
+        v.marca,
+        v.modelo,
+        v.placa
+    FROM reservas r
+    JOIN veiculos v ON r.id_veiculo = v.id
+    WHERE r.id_cliente = ?
+    ORDER BY r.data_inicio DESC
+"""
+
+
+def buscar_reservas_por_cliente(id_cliente):
+    """Busca todas as reservas de um cliente (incluindo as arquivadas), juntando com dados do veículo."""
+    from . import arquivo_reservas  # Importação tardia: arquivo_reservas importa este módulo
     with conectar_bd() as conn:
         cursor = conn.cursor()
-        cursor.execute(sql, (id_cliente,))
-        return cursor.fetchall()
+        cursor.execute(SQL_RESERVAS_POR_CLIENTE, (id_cliente,))
+        reservas = cursor.fetchall()
+        arquivadas = arquivo_reservas.buscar_arquivadas(conn, arquivo_reservas.SQL_ARQUIVADAS_POR_CLIENTE, (id_cliente,))
+    if not arquivadas:
+        return reservas
+    return sorted(reservas + arquivadas, key=lambda r: r['data_inicio'], reverse=True)
 
 # --- CRUD: Formas de Pagamento ---
 def listar_formas_pagamento():
@@ -429,19 +573,42 @@ def importar_clientes_de_csv(caminho_arquivo):
             logging.error(msg)
             return 0, 0, [msg]
 
+        # NIF/CC/telefone/email validados de uma vez (vetorizado) e já normalizados para gravar
+        from . import validacao
+        codigos_erro, df = validacao.validar_clientes(df)
+
+        # Importação tardia: deduplicacao importa este módulo
+        from .deduplicacao import construir_indice
+
         # CORREÇÃO: Usamos o with aqui para garantir que a transação seja gerenciada
         with conectar_bd() as conn:
             cursor = conn.cursor()
+            # Duplicados (também dentro do próprio arquivo) detetados em memória, com os
+            # identificadores normalizados, antes de tentar o INSERT
+            indice = construir_indice(conn)
             for index, row in df.iterrows():
+                if codigos_erro[index]:
+                    falhas += 1
+                    erros_detalhados.append(
+                        f"Linha {index + 2}: {'; '.join(validacao.descrever_erros(codigos_erro[index]))}.")
+                    continue
                 try:
-                    # Usando a função já existente para adicionar cliente
-                    # A função adicionar_cliente já faz o seu próprio commit, o que não é ideal para um lote.
-                    # Vamos inserir diretamente para controlar a transação.
-                    cursor.execute(
-                        "INSERT INTO clientes (nome_completo, nif, telefone, email, cc) VALUES (?, ?, ?, ?, ?)",
-                        (row['nome_completo'], row['nif'], row['telefone'], row['email'], row['cc'])
-                    )
+                    dados = (row['nome_completo'], row['nif'], row['telefone'], row['email'], row['cc'])
+                    candidatos = indice.verificar(*dados)
+                    exato = next((c for c in candidatos if {'nif', 'cc', 'email'} & set(c['motivos'])), None)
+                    if exato:
+                        falhas += 1
+                        erros_detalhados.append(
+                            f"Linha {index + 2}: duplicado do cliente ID {exato['id']} "
+                            f"({', '.join(exato['motivos'])}).")
+                        continue
+                    cursor.execute(SQL_ADICIONAR_CLIENTE, dados)
+                    indice.adicionar(cursor.lastrowid, *dados)
                     sucessos += 1
+                    if candidatos:
+                        erros_detalhados.append(
+                            f"Linha {index + 2}: importado, mas parece duplicado do cliente ID "
+                            f"{candidatos[0]['id']} (pontuação {candidatos[0]['pontuacao']:.2f}).")
                 except (sqlite3.IntegrityError) as e:
                     falhas += 1
                     erros_detalhados.append(
@@ -468,75 +635,76 @@ def importar_clientes_de_csv(caminho_arquivo):
         return sucessos, falhas, erros_detalhados
 
     return sucessos, falhas, erros_detalhados
+SQL_REVISOES_PROXIMAS = """
+    SELECT id, marca, modelo, placa, data_proxima_revisao
+    FROM veiculos
+    WHERE data_proxima_revisao BETWEEN ? AND ?
+    ORDER BY data_proxima_revisao ASC
+"""
+
+SQL_REVISOES_VENCIDAS = """
+    SELECT id, marca, modelo, placa, data_proxima_revisao
+    FROM veiculos
+    WHERE data_proxima_revisao < ?
+    ORDER BY data_proxima_revisao DESC
+"""
+
+
 def buscar_revisoes_proximas(dias_limite=15):
     """Busca veículos com revisão agendada entre hjoje e a data limite"""
     hoje = date.today()
     data_limite = hoje + timedelta(days=dias_limite)
-    sql = """
-            SELECT id, marca, modelo, placa, data_proxima_revisao 
-            FROM veiculos 
-            WHERE data_proxima_revisao BETWEEN ? AND ?
-            ORDER BY data_proxima_revisao ASC
-        """
     with conectar_bd() as conn:
         cursor = conn.cursor()
-        cursor.execute(sql, (hoje.strftime('%Y-%m-%d'), data_limite.strftime('%Y-%m-%d')))
+        cursor.execute(SQL_REVISOES_PROXIMAS, (hoje.strftime('%Y-%m-%d'), data_limite.strftime('%Y-%m-%d')))
         return cursor.fetchall()
 
 
 def buscar_revisoes_vencidas():
     """Busca veículos cuja data de revisão já passou e não foi atualizada."""
     hoje = date.today()
-    sql = """
-            SELECT id, marca, modelo, placa, data_proxima_revisao 
-            FROM veiculos 
-            WHERE data_proxima_revisao < ?
-            ORDER BY data_proxima_revisao DESC
-        """
     with conectar_bd() as conn:
         cursor = conn.cursor()
-        cursor.execute(sql, (hoje.strftime('%Y-%m-%d'),))
+        cursor.execute(SQL_REVISOES_VENCIDAS, (hoje.strftime('%Y-%m-%d'),))
         return cursor.fetchall()
 
-def importar_clientes_de_csv(caminho_arquivo):
-    import pandas as pd
+SQL_VEICULOS_DISPONIVEIS_PERIODO = """
+    SELECT v.id, v.marca, v.modelo, v.ano, v.placa, v.cor, v.valor_diaria
+    FROM veiculos v
+    WHERE v.status != 'manutenção'  -- mesma regra de adicionar_reserva; as datas decidem o resto
+      AND NOT EXISTS (
+          SELECT 1 FROM reservas r
+          WHERE r.id_veiculo = v.id AND r.status != 'cancelada'
+            AND r.data_inicio <= ?1 AND r.data_fim >= ?2
+      )
+      AND NOT EXISTS (
+          SELECT 1 FROM manutencoes m
+          WHERE m.id_veiculo = v.id AND m.status = 'planeada'
+            AND m.data_inicio <= ?1 AND m.data_fim >= ?2
+      )
+    ORDER BY v.marca, v.modelo
+"""
+
+
+def listar_veiculos_disponiveis_periodo(data_inicio, data_fim):
+    """
+    Retorna os veículos fora de 'manutenção' e sem reservas (não canceladas)
+    nem manutenções planeadas que se sobreponham ao período. Datas no formato 'YYYY-MM-DD HH:MM:SS'.
+    """
+    with conectar_bd() as conn:
+        cursor = conn.cursor()
+        cursor.execute(SQL_VEICULOS_DISPONIVEIS_PERIODO, (data_fim, data_inicio))
+        return cursor.fetchall()
 
-    sucessos = 0
-    falhas = 0
-    erros_detalhados = []
 
-    try:
-        df = pd.read_csv(caminho_arquivo, sep=';', dtype=str)
+SQL_GERACOES_TABELAS = "SELECT tabela, geracao FROM geracoes_tabelas"
 
-        colunas_obrigatorias = {'nome_completo', 'nif', 'telefone', 'email', 'cc'}
-        if not colunas_obrigatorias.issubset(df.columns):
-            return 0, 0, [f"Arquivo CSV deve conter as colunas: {', '.join(colunas_obrigatorias)}"]
 
-        with conectar_bd() as conn:
-            cursor = conn.cursor()
-            for index, row in df.iterrows():
-                try:
-                    if adicionar_cliente(
-                        row['nome_completo'], row['nif'],
-                        row['telefone'], row['email'], row['cc'],
-                        cursor_existente=cursor
-                    ):
-                        sucessos += 1
-                    else:
-                        falhas += 1
-                        erros_detalhados.append(
-                            f"Linha {index + 2}: NIF/Email/CC '{row.get('nif', 'N/A')}' provavelmente já existe.")
-
-                except KeyError as e:
-                    falhas += 1
-                    erros_detalhados.append(f"Linha{index + 2}: Coluna faltando - Erro: {e}")
+def obter_geracoes_tabelas():
+    """Retorna {tabela: geração}. A geração muda sempre que a tabela recebe uma escrita."""
+    with conectar_bd() as conn:
+        return {row['tabela']: row['geracao'] for row in conn.execute(SQL_GERACOES_TABELAS)}
 
-            conn.commit()
-
-    except Exception as e:
-        erros_detalhados.append(f"Erro inesperado ao processar o arquivo: {e}")
-        return sucessos, falhas, erros_detalhados
-    return sucessos, falhas, erros_detalhados
 
 def listar_veiculos_disponiveis():
     """Retorna uma lista de todos os veículos com status 'disponível'."""
@@ -554,21 +722,31 @@ def buscar_veiculo_por_id(id_veiculo):
         cursor.execute(sql, (id_veiculo,))
         return cursor.fetchone()
 
+# Dois períodos sobrepõem-se se cada um começa antes (ou quando) o outro termina.
+# Equivale aos três casos "engloba / início conflita / fim conflita", mas numa única
+# condição de intervalo que o índice (id_veiculo, data_inicio) consegue usar.
+SQL_VERIFICAR_DISPONIBILIDADE = """
+    SELECT COUNT(*) FROM reservas
+    WHERE id_veiculo = ? AND status != 'cancelada'
+      AND data_inicio <= ? AND data_fim >= ?
+"""
+
+# Blocos de manutenção planeados que se sobrepõem ao período (mesmos parâmetros)
+SQL_VERIFICAR_MANUTENCAO = """
+    SELECT COUNT(*) FROM manutencoes
+    WHERE id_veiculo = ? AND status = 'planeada'
+      AND data_inicio <= ? AND data_fim >= ?
+"""
+
+
 def verificar_disponibilidade_veiculo(id_veiculo, data_inicio, data_fim, id_reserva_existente=None):
     """
     Verifica se um veículo está disponível em um dado período,
     opcionalmente ignorando uma reserva existente (para o caso de edição).
     Retorna True se disponível, False se houver conflito.
     """
-    sql = """
-        SELECT COUNT(*) FROM reservas
-        WHERE id_veiculo = ? AND status != 'cancelada' AND (
-            (data_inicio <= ? AND data_fim >= ?) OR -- Reserva existente engloba o novo período
-            (data_inicio >= ? AND data_inicio <= ?) OR -- Início da nova reserva conflita
-            (data_fim >= ? AND data_fim <= ?) -- Fim da nova reserva conflita
-        )
-    """
-    params = [id_veiculo, data_inicio, data_fim, data_inicio, data_fim, data_inicio, data_fim]
+    sql = SQL_VERIFICAR_DISPONIBILIDADE
+    params = [id_veiculo, data_fim, data_inicio]
 
     if id_reserva_existente:
         sql += " AND id != ?"
@@ -578,56 +756,70 @@ def verificar_disponibilidade_veiculo(id_veiculo, data_inicio, data_fim, id_rese
         cursor = conn.cursor()
         cursor.execute(sql, params)
         conflitos = cursor.fetchone()[0]
+        conflitos += conn.execute(SQL_VERIFICAR_MANUTENCAO, params[:3]).fetchone()[0]
         return conflitos == 0
 
+SQL_RESERVAS_DETALHADAS = """
+    SELECT
+        r.id AS reserva_id,
+        r.data_inicio,
+        r.data_fim,
+        r.valor_total,
+        r.status,
+        c.nome_completo AS cliente_nome,
+        c.nif AS cliente_nif,
+        v.marca,
+        v.modelo,
+        v.placa,
+        fp.nome AS forma_pagamento
+    FROM reservas r
+    JOIN clientes c ON r.id_cliente = c.id
+    JOIN veiculos v ON r.id_veiculo = v.id
+    -- CORREÇÃO: Usar 'id_forma_pagamento' (singular)
+    LEFT JOIN formas_pagamento fp ON r.id_forma_pagamento = fp.id 
+    ORDER BY r.data_inicio DESC
+"""
+
+
 def listar_todas_reservas_detalhadas():
     """
     Lista todas as reservas com detalhes do cliente, do veículo e da forma de pagamento.
     """
-    sql = """
-        SELECT
-            r.id AS reserva_id,
-            r.data_inicio,
-            r.data_fim,
-            r.valor_total,
-            r.status,
-            c.nome_completo AS cliente_nome,
-            c.nif AS cliente_nif,
-            v.marca,
-            v.modelo,
-            v.placa,
-            fp.nome AS forma_pagamento
-        FROM reservas r
-        JOIN clientes c ON r.id_cliente = c.id
-        JOIN veiculos v ON r.id_veiculo = v.id
-        -- CORREÇÃO: Usar 'id_forma_pagamento' (singular)
-        LEFT JOIN formas_pagamento fp ON r.id_forma_pagamento = fp.id 
-        ORDER BY r.data_inicio DESC
-    """
     with conectar_bd() as conn:
         cursor = conn.cursor()
-        cursor.execute(sql)
+        cursor.execute(SQL_RESERVAS_DETALHADAS)
         return cursor.fetchall()
 
+SQL_BUSCAR_RESERVA_POR_ID = "SELECT * FROM reservas WHERE id = ?"
+
+
 def buscar_reserva_por_id(reserva_id):
     """Busca uma única reserva pelos seus detalhes."""
-    sql = "SELECT * FROM reservas WHERE id = ?"
     with conectar_bd() as conn:
         cursor = conn.cursor()
-        cursor.execute(sql, (reserva_id,))
+        cursor.execute(SQL_BUSCAR_RESERVA_POR_ID, (reserva_id,))
         return cursor.fetchone()
 
+
+SQL_ULTIMOS_CLIENTES = "SELECT nome_completo, email, nif FROM clientes ORDER BY id DESC LIMIT ?"
+
+
 def listar_ultimos_clientes(limite=5):
     """
     Busca os últimos 'limite' clientes cadastrados no sistema.
     """
-    sql = "SELECT nome_completo, email, nif FROM clientes ORDER BY id DESC LIMIT ?"
     with conectar_bd() as conn:
         cursor = conn.cursor()
-        cursor.execute(sql, (limite,))
+        cursor.execute(SQL_ULTIMOS_CLIENTES, (limite,))
         return cursor.fetchall()
 
 
+# Uma única instrução: seleciona e atualiza os veículos no mesmo passo
+SQL_COLOCAR_EM_MANUTENCAO = """
+    UPDATE veiculos SET status = 'manutenção' WHERE data_proxima_revisao <= ? AND status != 'manutenção'
+"""
+
+
 def colocar_veiculos_revisao_em_manutencao():
     """
     Encontra todos os veículos com revisão vencida ou próxima (15 dias)
@@ -636,29 +828,14 @@ def colocar_veiculos_revisao_em_manutencao():
     """
     data_limite = (datetime.now() + timedelta(days=15)).strftime('%Y-%m-%d')
 
-    # Seleciona os IDs dos veículos que precisam de manutenção
-    sql_select_ids = "SELECT id FROM veiculos WHERE data_proxima_revisao <= ? AND status != 'manutenção'"
-
-    # Atualiza o status desses veículos
-    sql_update = "UPDATE veiculos SET status = 'manutenção' WHERE id IN ({})"
-
     try:
         with conectar_bd() as conn:
             cursor = conn.cursor()
-            cursor.execute(sql_select_ids, (data_limite,))
-            ids_para_atualizar = [row['id'] for row in cursor.fetchall()]
-
-            if not ids_para_atualizar:
-                return 0  # Nenhum veículo para atualizar
-
-            # Cria os placeholders para a cláusula IN
-            placeholders = ','.join('?' for _ in ids_para_atualizar)
-            sql_update = sql_update.format(placeholders)
-
-            cursor.execute(sql_update, ids_para_atualizar)
+            cursor.execute(SQL_COLOCAR_EM_MANUTENCAO, (data_limite,))
             conn.commit()
 
             return cursor.rowcount
     except sqlite3.Error as e:
         logging.error(f"Erro ao colocar veículos em manutenção: {e}", exc_info=True)
-        return -1  # Indica um erro
\ No newline at end of file
+        return -1  # Indica um erro
+
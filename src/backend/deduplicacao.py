@@ -0,0 +1,266 @@
+import difflib
+import functools
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+
+from . import config_manager as cfg
+from . import database as db
+from . import validacao
+
+# --- Deteção de clientes duplicados ---
+# As restrições UNIQUE só apanham valores exatamente iguais ("123 456 789" e "123456789"
+# são NIFs diferentes para o SQLite). Aqui cada cliente é normalizado (NIF/CC/telefone/email,
+# com as mesmas regras de validacao.py)
+# e entra em dois tipos de índice em memória:
+#   - índices de hash por identificador normalizado (duplicados exatos, O(1));
+#   - blocos por chave fonética do nome (primeiro + último nome), para quase-duplicados
+#     ("Conceição Sousa" / "Conseicao Souza").
+# Só os pares dentro do mesmo bloco ou com um identificador em comum são pontuados, por
+# isso a varredura da tabela inteira é quase linear e a verificação de um cliente novo
+# (formulário, importação) não passa pelo banco.
+
+SQL_CLIENTES_DEDUP = "SELECT id, nome_completo, nif, telefone, email, cc FROM clientes"
+
+# Regras fonéticas (português), aplicadas por ordem depois de retirar os acentos
+_REGRAS_FONETICAS = [
+    (re.compile(r'ph'), 'f'),
+    (re.compile(r'ch|sh'), 'x'),
+    (re.compile(r'lh'), 'l'),
+    (re.compile(r'nh'), 'n'),
+    (re.compile(r'qu|q'), 'k'),
+    (re.compile(r'c(?=[ei])'), 's'),
+    (re.compile(r'c'), 'k'),
+    (re.compile(r'g(?=[ei])'), 'j'),
+    (re.compile(r'z'), 's'),
+    (re.compile(r'y'), 'i'),
+    (re.compile(r'w'), 'v'),
+    (re.compile(r'h'), ''),
+    (re.compile(r'(.)\1+'), r'\1'),
+]
+
+
+def _sem_acentos(texto):
+    return ''.join(c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c))
+
+
+def normalizar_nome(nome):
+    return ' '.join(_sem_acentos(str(nome or '')).lower().split())
+
+
+def normalizar_email(email):
+    """Além da normalização de validacao, ignora o sufixo "+etiqueta" da parte local."""
+    texto = validacao.normalizar_email(email)
+    local, _, dominio = texto.partition('@')
+    return f"{local.split('+', 1)[0]}@{dominio}" if dominio else texto
+
+
+@functools.lru_cache(maxsize=65536)  # Os nomes próprios e apelidos repetem-se muito
+def chave_fonetica(palavra):
+    """Código fonético de uma palavra: consoantes com som equivalente unificadas, vogais (exceto a 1ª) omitidas."""
+    palavra = _sem_acentos(palavra).lower()
+    palavra = re.sub(r'[^a-z]', '', palavra)
+    if not palavra:
+        return ''
+    for regra, substituto in _REGRAS_FONETICAS:
+        palavra = regra.sub(substituto, palavra)
+    return palavra[:1] + re.sub(r'[aeiou]', '', palavra[1:])
+
+
+def chave_bloco(nome):
+    partes = normalizar_nome(nome).split()
+    if not partes:
+        return ''
+    return f"{chave_fonetica(partes[0])}|{chave_fonetica(partes[-1])}"
+
+
+def normalizar_cliente(nome_completo, nif, telefone, email, cc):
+    return {
+        'nome': normalizar_nome(nome_completo),
+        'nif': validacao.normalizar_nif(nif),
+        'telefone': validacao.normalizar_telefone(telefone),
+        'email': normalizar_email(email),
+        'cc': validacao.normalizar_cc(cc),
+        'bloco': chave_bloco(nome_completo),
+    }
+
+
+def pontuar(a, b, limiar=0.0):
+    """
+    Retorna (pontuação de 0 a 1, [motivos]) para dois clientes normalizados.
+    Pares que nem no melhor caso chegam ao 'limiar' são descartados com (0.0, [])
+    antes da comparação completa dos nomes (a parte cara).
+    """
+    motivos = [campo for campo in ('nif', 'cc', 'email', 'telefone') if a[campo] and a[campo] == b[campo]]
+    if 'nif' in motivos or 'cc' in motivos:
+        return 1.0, motivos
+    comparador = difflib.SequenceMatcher(None, a['nome'], b['nome'])
+    maximo_possivel = 0.5 * comparador.quick_ratio() + (0.25 if 'telefone' in motivos else 0.0) + 0.25
+    if 'email' not in motivos and maximo_possivel < limiar:
+        return 0.0, []
+    semelhanca_nome = comparador.ratio()
+    pontuacao = 0.5 * semelhanca_nome
+    if 'telefone' in motivos:
+        pontuacao += 0.25
+    if 'email' in motivos:
+        pontuacao = max(pontuacao + 0.25, 0.9)
+    elif a['email'] and b['email']:
+        local_a, local_b = a['email'].split('@')[0], b['email'].split('@')[0]
+        pontuacao += 0.25 * difflib.SequenceMatcher(None, local_a, local_b).ratio()
+    if semelhanca_nome >= 0.85:
+        motivos.append('nome')
+    return round(min(pontuacao, 1.0), 3), motivos
+
+
+class IndiceDuplicados:
+    """Índices em memória (hash por identificador + blocos fonéticos) sobre os clientes."""
+    CAMPOS_HASH = ('nif', 'cc', 'email', 'telefone')
+
+    def __init__(self, limiar=None, max_bloco=None):
+        config = cfg.obter_secao('deduplicacao')
+        self.limiar = config['limiar'] if limiar is None else limiar
+        self.max_bloco = max_bloco or config['max_bloco']
+        self.registos = {}
+        self.hashes = {campo: defaultdict(set) for campo in self.CAMPOS_HASH}
+        self.blocos = defaultdict(set)
+
+    def adicionar(self, id_cliente, nome_completo, nif, telefone, email, cc):
+        registo = normalizar_cliente(nome_completo, nif, telefone, email, cc)
+        self.remover(id_cliente)
+        self.registos[id_cliente] = registo
+        for campo in self.CAMPOS_HASH:
+            if registo[campo]:
+                self.hashes[campo][registo[campo]].add(id_cliente)
+        if registo['bloco']:
+            self.blocos[registo['bloco']].add(id_cliente)
+
+    def remover(self, id_cliente):
+        registo = self.registos.pop(id_cliente, None)
+        if registo is None:
+            return
+        for campo in self.CAMPOS_HASH:
+            self.hashes[campo].get(registo[campo], set()).discard(id_cliente)
+        self.blocos.get(registo['bloco'], set()).discard(id_cliente)
+
+    def _candidatos(self, registo):
+        candidatos = set()
+        for campo in self.CAMPOS_HASH:
+            if registo[campo]:
+                candidatos |= self.hashes[campo].get(registo[campo], set())
+        bloco = self.blocos.get(registo['bloco'], set())
+        if len(bloco) <= self.max_bloco:  # Blocos enormes (nomes muito comuns) só contam pelos hashes
+            candidatos |= bloco
+        return candidatos
+
+    def verificar(self, nome_completo, nif, telefone, email, cc, ignorar_id=None):
+        """
+        Retorna os possíveis duplicados de um cliente (novo ou em edição) como lista de
+        {'id', 'pontuacao', 'motivos'}, do mais provável para o menos provável.
+        """
+        registo = normalizar_cliente(nome_completo, nif, telefone, email, cc)
+        encontrados = []
+        for id_candidato in self._candidatos(registo):
+            if id_candidato == ignorar_id:
+                continue
+            pontuacao, motivos = pontuar(registo, self.registos[id_candidato], self.limiar)
+            if pontuacao >= self.limiar:
+                encontrados.append({'id': id_candidato, 'pontuacao': pontuacao, 'motivos': motivos})
+        return sorted(encontrados, key=lambda c: -c['pontuacao'])
+
+    def pares_suspeitos(self):
+        """
+        Todos os pares (id_a, id_b, pontuação, motivos) acima do limiar na tabela inteira.
+        Só compara clientes que partilham um bloco ou um identificador normalizado.
+        """
+        grupos = [ids for indice in self.hashes.values() for ids in indice.values() if len(ids) > 1]
+        grupos += [ids for ids in self.blocos.values() if 1 < len(ids) <= self.max_bloco]
+        vistos = set()
+        pares = []
+        for grupo in grupos:
+            ids = sorted(grupo)
+            for i, id_a in enumerate(ids):
+                for id_b in ids[i + 1:]:
+                    if (id_a, id_b) in vistos:
+                        continue
+                    vistos.add((id_a, id_b))
+                    pontuacao, motivos = pontuar(self.registos[id_a], self.registos[id_b], self.limiar)
+                    if pontuacao >= self.limiar:
+                        pares.append((id_a, id_b, pontuacao, motivos))
+        return sorted(pares, key=lambda p: (-p[2], p[0], p[1]))
+
+
+def construir_indice(conn=None, limiar=None):
+    """Cria o índice com todos os clientes do banco."""
+    indice = IndiceDuplicados(limiar=limiar)
+    inicio = time.perf_counter()
+    if conn is None:
+        with db.conectar_bd() as conn:
+            linhas = conn.execute(SQL_CLIENTES_DEDUP).fetchall()
+    else:
+        linhas = conn.execute(SQL_CLIENTES_DEDUP).fetchall()
+    for row in linhas:
+        indice.adicionar(row[0], *row[1:])
+    logging.info(f"Índice de duplicados: {len(linhas)} clientes em {time.perf_counter() - inicio:.2f}s.")
+    return indice
+
+
+_indice = None
+_geracao_indice = None
+_reconstrucao = None
+_lock_indice = threading.Lock()
+
+
+def _reconstruir(geracao):
+    global _indice, _geracao_indice, _reconstrucao
+    try:
+        novo = construir_indice()
+    except sqlite3.Error as e:
+        logging.error(f"Índice de duplicados: erro ao reconstruir: {e}", exc_info=True)
+        novo = None
+    with _lock_indice:
+        if novo is not None:
+            _indice, _geracao_indice = novo, geracao
+        _reconstrucao = None
+
+
+def obter_indice():
+    """
+    Índice partilhado. Quando a geração da tabela 'clientes' muda, o índice é reconstruído
+    numa thread daemon (cerca de 1,5 s com 50 mil clientes) e o anterior continua a ser
+    servido até o novo estar pronto. Retorna None enquanto o primeiro índice é construído.
+    """
+    global _reconstrucao
+    geracao = db.obter_geracoes_tabelas().get('clientes')
+    with _lock_indice:
+        if geracao != _geracao_indice and _reconstrucao is None:
+            _reconstrucao = threading.Thread(target=_reconstruir, args=(geracao,), name="indice-duplicados",
+                                             daemon=True)
+            _reconstrucao.start()
+        return _indice
+
+
+def registar_cliente(id_cliente, nome_completo, nif, telefone, email, cc):
+    """Atualiza o índice servido com um cliente gravado neste posto, sem esperar pela reconstrução."""
+    with _lock_indice:
+        if _indice is not None:
+            _indice.adicionar(id_cliente, nome_completo, nif, telefone, email, cc)
+
+
+def esquecer_cliente(id_cliente):
+    """Retira do índice servido um cliente apagado neste posto."""
+    with _lock_indice:
+        if _indice is not None:
+            _indice.remover(id_cliente)
+
+
+def verificar_cliente(nome_completo, nif, telefone, email, cc, ignorar_id=None):
+    """Possíveis duplicados de um cliente, para o formulário de clientes ([] se o índice ainda não existe)."""
+    indice = obter_indice()
+    if indice is None:
+        logging.info("Índice de duplicados ainda em construção: verificação de duplicados ignorada.")
+        return []
+    return indice.verificar(nome_completo, nif, telefone, email, cc, ignorar_id=ignorar_id)
@@ -0,0 +1,320 @@
+import functools
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+from . import config_manager as cfg
+from .logger_config import LOG_DIR
+
+# --- Desempenho da interface (Tk) ---
+# Dois instrumentos, ambos com registos numa fila gravada fora da thread do Tk:
+#   - spans: duração de blocos de código da interface (construção das vistas, carregar_dados,
+#     gráficos, login), com span(nome) ou @medido;
+#   - vigia do ciclo de eventos: um batimento com after() mede o atraso de cada volta do
+#     mainloop (resumido periodicamente: média, p95, máximo). Uma thread verifica o último
+#     batimento e, se o Tk está parado há mais de 'limiar_bloqueio_ms', captura a pilha da
+#     thread principal (sys._current_frames) enquanto ela ainda está bloqueada.
+# Os registos vão em linhas JSON para logs/desempenho_ui.jsonl, com rotação; resumir() e
+# scripts/desempenho_ui.py agregam-nos. Com 'ativo' a False nada é medido nem posto na fila
+# (sem o vigia, ninguém a esvaziaria); mesmo ativa, a fila tem no máximo MAX_PENDENTES
+# registos e os que não cabem são descartados.
+
+NOME_LOG = 'desempenho_ui.jsonl'
+RAIZ_CODIGO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # src/
+MAX_QUADROS = 12  # Quadros da pilha guardados por bloqueio (os mais interiores)
+MAX_PENDENTES = 10000
+
+_pendentes = queue.Queue(maxsize=MAX_PENDENTES)
+_descartados = 0
+_lock_ficheiros = threading.Lock()
+_handlers = {}
+
+
+def _ativo():
+    return cfg.obter('desempenho_ui', 'ativo')
+
+
+def registar(registo):
+    """Põe um registo na fila; é gravado por gravar_pendentes() (thread do vigia ou ao sair)."""
+    global _descartados
+    if not _ativo():
+        return
+    registo.setdefault('em', datetime.now().isoformat(timespec='milliseconds'))
+    try:
+        _pendentes.put_nowait(registo)
+    except queue.Full:
+        _descartados += 1
+
+
+@contextmanager
+def span(nome, **detalhes):
+    """Mede o bloco e regista-o se durar pelo menos 'limiar_span_ms' (nada faz com 'ativo' a False)."""
+    if not _ativo():
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        duracao = (time.perf_counter() - inicio) * 1000
+        if duracao >= cfg.obter('desempenho_ui', 'limiar_span_ms'):
+            registar({'tipo': 'span', 'nome': nome, 'duracao_ms': round(duracao, 2),
+                      'thread': threading.current_thread().name, **detalhes})
+
+
+def medido(funcao):
+    """Decorador: span com o nome qualificado da função (ex.: 'VehicleView.carregar_dados')."""
+    @functools.wraps(funcao)
+    def envolvida(*args, **kwargs):
+        with span(funcao.__qualname__):
+            return funcao(*args, **kwargs)
+    return envolvida
+
+
+def _caminho_log(diretorio=None):
+    return os.path.join(diretorio or LOG_DIR, NOME_LOG)
+
+
+def _handler(caminho):
+    handler = _handlers.get(caminho)
+    if handler is None:
+        config = cfg.obter_secao('desempenho_ui')
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        handler = RotatingFileHandler(caminho, maxBytes=config['max_bytes'], backupCount=config['backups'],
+                                      encoding='utf-8', delay=True)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        _handlers[caminho] = handler
+    return handler
+
+
+def gravar_pendentes(diretorio=None):
+    """Grava os registos em fila no log rotativo. Retorna quantos foram gravados."""
+    global _descartados
+    gravados = 0
+    if _descartados:
+        logging.warning(f"Desempenho da interface: {_descartados} registos descartados (fila cheia).")
+        _descartados = 0
+    with _lock_ficheiros:
+        handler = _handler(_caminho_log(diretorio))
+        while True:
+            try:
+                registo = _pendentes.get_nowait()
+            except queue.Empty:
+                break
+            handler.emit(logging.LogRecord('desempenho_ui', logging.INFO, __file__, 0,
+                                           json.dumps(registo, ensure_ascii=False), None, None))
+            gravados += 1
+    return gravados
+
+
+def fechar():
+    """Fecha os arquivos de log abertos (os registos ainda em fila ficam por gravar)."""
+    with _lock_ficheiros:
+        for handler in _handlers.values():
+            handler.close()
+        _handlers.clear()
+
+
+def _da_aplicacao(caminho):
+    """True se o ficheiro está dentro de RAIZ_CODIGO (comparação independente do sistema operativo)."""
+    raiz = os.path.normcase(RAIZ_CODIGO)
+    return os.path.normcase(os.path.abspath(caminho)).startswith(os.path.join(raiz, ''))
+
+
+def _pilha(frame):
+    """
+    Quadros da pilha como ('arquivo:linha em função', da_aplicacao), do exterior para o
+    interior. Os arquivos do código da aplicação ficam com o caminho relativo a RAIZ_CODIGO.
+    """
+    quadros = []
+    while frame is not None:
+        codigo = frame.f_code
+        caminho = codigo.co_filename
+        da_aplicacao = _da_aplicacao(caminho)
+        if da_aplicacao:
+            caminho = os.path.relpath(caminho, RAIZ_CODIGO)
+        quadros.append((f"{caminho}:{frame.f_lineno} em {codigo.co_name}", da_aplicacao))
+        frame = frame.f_back
+    return quadros[::-1][-MAX_QUADROS:]
+
+
+def _origem(quadros):
+    """Quadro mais interior do código da aplicação (ou o mais interior de todos, se não houver)."""
+    return next((q for q, da_aplicacao in reversed(quadros) if da_aplicacao), quadros[-1][0] if quadros else '?')
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+class Vigia:
+    """Batimento no mainloop do Tk e thread que captura a pilha quando ele fica parado."""
+
+    def __init__(self, intervalo_ms=None, limiar_bloqueio_ms=None, intervalo_resumo_s=None, diretorio=None):
+        config = cfg.obter_secao('desempenho_ui')
+        self.intervalo_ms = config['intervalo_batimento_ms'] if intervalo_ms is None else intervalo_ms
+        self.limiar_bloqueio_ms = config['limiar_bloqueio_ms'] if limiar_bloqueio_ms is None else limiar_bloqueio_ms
+        self.intervalo_resumo_s = config['intervalo_resumo_s'] if intervalo_resumo_s is None else intervalo_resumo_s
+        self.diretorio = diretorio
+        self.raiz = None
+        self.id_thread = threading.get_ident()
+        self._lock = threading.Lock()
+        self._latencias = []
+        self._ultimo = self._previsto = time.monotonic()
+        self._bloqueio = None  # Registo do bloqueio em curso (já capturado)
+        self._agendado = None
+        self._parar = threading.Event()
+        self._thread = None
+
+    # --- Thread do Tk ---
+
+    def iniciar(self, raiz):
+        """Chamado na thread do Tk: essa é a thread vigiada."""
+        if not _ativo():
+            return
+        self.raiz = raiz
+        self.id_thread = threading.get_ident()
+        self._ultimo = time.monotonic()
+        self._previsto = self._ultimo + self.intervalo_ms / 1000
+        self._agendado = raiz.after(self.intervalo_ms, self._batimento)
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._loop, name="vigia-tk", daemon=True)
+        self._thread.start()
+
+    def _batimento(self):
+        self.batimento(time.monotonic())
+        self._agendado = self.raiz.after(self.intervalo_ms, self._batimento)
+
+    def batimento(self, agora):
+        """Regista o atraso desta volta do mainloop em relação ao after() pedido."""
+        latencia = max((agora - self._previsto) * 1000, 0.0)
+        with self._lock:
+            self._latencias.append(latencia)
+            self._ultimo = agora
+            self._previsto = agora + self.intervalo_ms / 1000
+            bloqueio, self._bloqueio = self._bloqueio, None
+        if bloqueio is not None:
+            registar({'tipo': 'fim_bloqueio', 'origem': bloqueio['origem'], 'duracao_ms': round(latencia, 1)})
+
+    def parar(self, timeout=2.0):
+        if self._agendado is not None and self.raiz is not None:
+            self.raiz.after_cancel(self._agendado)
+            self._agendado = None
+        self._parar.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self.resumir_latencias()
+        gravar_pendentes(self.diretorio)
+
+    # --- Thread do vigia ---
+
+    def verificar(self, agora):
+        """Se a thread vigiada está parada além do limiar, captura a sua pilha (uma vez por bloqueio)."""
+        with self._lock:
+            parado = (agora - self._ultimo) * 1000 - self.intervalo_ms
+            if parado < self.limiar_bloqueio_ms or self._bloqueio is not None:
+                return None
+            frame = sys._current_frames().get(self.id_thread)
+            quadros = _pilha(frame) if frame is not None else []
+            pilha = [q for q, _ in quadros]
+            origem = _origem(quadros)
+            self._bloqueio = {'tipo': 'bloqueio', 'parado_ms': round(parado, 1), 'origem': origem, 'pilha': pilha}
+        logging.warning(f"Interface parada há {parado:.0f} ms em {origem}")
+        registar(dict(self._bloqueio))
+        return self._bloqueio
+
+    def resumir_latencias(self):
+        with self._lock:
+            latencias, self._latencias = self._latencias, []
+        if latencias:
+            registar({'tipo': 'latencia', 'n': len(latencias), 'media_ms': round(sum(latencias) / len(latencias), 2),
+                      'p95_ms': round(_percentil(latencias, 0.95), 2), 'max_ms': round(max(latencias), 2)})
+
+    def _loop(self):
+        proximo_resumo = time.monotonic() + self.intervalo_resumo_s
+        while not self._parar.wait(self.intervalo_ms / 2000):
+            agora = time.monotonic()
+            try:
+                self.verificar(agora)
+                if agora >= proximo_resumo:
+                    self.resumir_latencias()
+                    proximo_resumo = agora + self.intervalo_resumo_s
+                gravar_pendentes(self.diretorio)
+            except Exception as e:  # O vigia nunca deve derrubar a aplicação
+                logging.error(f"Vigia da interface: {e}", exc_info=True)
+
+
+# --- Resumo ---
+
+def _ler_registos(diretorio=None):
+    caminho = _caminho_log(diretorio)
+    caminhos = [f"{caminho}.{i}" for i in range(cfg.obter('desempenho_ui', 'backups'), 0, -1)] + [caminho]
+    for atual in caminhos:
+        if not os.path.exists(atual):
+            continue
+        with open(atual, encoding='utf-8') as f:
+            for linha in f:
+                try:
+                    yield json.loads(linha)
+                except json.JSONDecodeError:
+                    continue
+
+
+def resumir(diretorio=None):
+    """
+    Agrega o log rotativo: spans por nome (n, média, p95, máximo), latência do mainloop e
+    bloqueios por origem (quadro mais interior do código da aplicação).
+    """
+    duracoes, origens = {}, {}
+    latencia = {'n': 0, 'soma_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+    for registo in _ler_registos(diretorio):
+        tipo = registo.get('tipo')
+        if tipo == 'span':
+            duracoes.setdefault(registo['nome'], []).append(registo['duracao_ms'])
+        elif tipo == 'latencia':
+            latencia['n'] += registo['n']
+            latencia['soma_ms'] += registo['media_ms'] * registo['n']
+            latencia['p95_ms'] = max(latencia['p95_ms'], registo['p95_ms'])  # Pior janela
+            latencia['max_ms'] = max(latencia['max_ms'], registo['max_ms'])
+        elif tipo in ('bloqueio', 'fim_bloqueio'):
+            origem = origens.setdefault(registo['origem'], {'origem': registo['origem'], 'bloqueios': 0,
+                                                            'max_ms': 0.0, 'pilha': []})
+            if tipo == 'bloqueio':
+                origem['bloqueios'] += 1
+                origem['pilha'] = registo['pilha']
+            origem['max_ms'] = max(origem['max_ms'], registo.get('duracao_ms', registo.get('parado_ms', 0.0)))
+
+    spans = [{'nome': nome, 'n': len(valores), 'media_ms': round(sum(valores) / len(valores), 2),
+              'p95_ms': _percentil(valores, 0.95), 'max_ms': max(valores), 'total_ms': round(sum(valores), 2)}
+             for nome, valores in duracoes.items()]
+    return {
+        'spans': sorted(spans, key=lambda s: s['total_ms'], reverse=True),
+        'latencia': {'n': latencia['n'], 'p95_ms': latencia['p95_ms'], 'max_ms': latencia['max_ms'],
+                     'media_ms': round(latencia['soma_ms'] / latencia['n'], 2) if latencia['n'] else 0.0},
+        'bloqueios': sorted(origens.values(), key=lambda o: (o['bloqueios'], o['max_ms']), reverse=True),
+    }
+
+
+def formatar_resumo(resumo, limite=10):
+    """Texto legível do resumo (para o script e para os logs)."""
+    latencia = resumo['latencia']
+    linhas = [f"Ciclo de eventos: {latencia['n']} batimentos, atraso médio {latencia['media_ms']} ms, "
+              f"p95 {latencia['p95_ms']} ms, máximo {latencia['max_ms']} ms", "", "Spans (por tempo total):"]
+    for s in resumo['spans'][:limite]:
+        linhas.append(f"  {s['nome']}: {s['n']}x, média {s['media_ms']} ms, p95 {s['p95_ms']} ms, "
+                      f"máx. {s['max_ms']} ms")
+    linhas += ["", "Bloqueios da interface (por origem):"]
+    for b in resumo['bloqueios'][:limite]:
+        linhas.append(f"  {b['bloqueios']}x, até {b['max_ms']} ms: {b['origem']}")
+        linhas += [f"      {quadro}" for quadro in b['pilha'][-5:]]
+    if not resumo['bloqueios']:
+        linhas.append("  (nenhum)")
+    return "\n".join(linhas)
@@ -0,0 +1,222 @@
+import csv
+import logging
+import os
+import threading
+from datetime import datetime
+
+from . import database as db
+
+# Número de linhas lidas do cursor por vez. Mantém a memória constante
+# independentemente do tamanho do histórico exportado.
+TAMANHO_LOTE_PADRAO = 2000
+
+# --- Especificações das exportações das vistas ---
+# Cada especificação diz qual consulta executar, como renomear as colunas
+# e quais colunas de data devem ser formatadas (coluna -> formato de saída).
+
+RENOMEAR_RESERVAS = {
+    'reserva_id': 'ID da Reserva',
+    'cliente_nome': 'Cliente',
+    'cliente_nif': 'NIF do Cliente',
+    'marca': 'Marca do Veículo',
+    'modelo': 'Modelo do Veículo',
+    'placa': 'Placa',
+    'data_inicio': 'Data de Início',
+    'data_fim': 'Data de Fim',
+    'valor_total': 'Valor Total (€)',
+    'status': 'Status',
+    'forma_pagamento': 'Forma de Pagamento'
+}
+
+
+def especificacao_reservas():
+    """Exportação do relatório de reservas (ReservationView)."""
+    return {
+        'sql': db.SQL_RESERVAS_DETALHADAS,
+        'params': (),
+        'renomear': RENOMEAR_RESERVAS,
+        'colunas_data': {'data_inicio': '%d/%m/%Y %H:%M', 'data_fim': '%d/%m/%Y %H:%M'},
+    }
+
+
+def especificacao_clientes():
+    """Exportação da lista de clientes (ClientView)."""
+    return {
+        'sql': db.SQL_LISTAR_CLIENTES,
+        'params': (),
+        'renomear': {},
+        'colunas_data': {},
+    }
+
+
+def especificacao_veiculos():
+    """Exportação da frota com o status operacional calculado (VehicleView)."""
+    return {
+        'sql': db.SQL_LISTAR_VEICULOS,
+        'params': db.parametros_listar_veiculos(),
+        'renomear': {'valor_diaria': 'valor_diaria_eur'},
+        'colunas_data': {},
+    }
+
+
+class ExportacaoCancelada(Exception):
+    """Lançada quando o utilizador cancela uma exportação em andamento."""
+
+
+def _formatar_data(valor, formato_saida):
+    """
+    Converte uma data vinda do banco para o formato de saída.
+    O caminho rápido usa fromisoformat (formato gravado pelo backend);
+    valores em DD/MM/AAAA ainda são aceites. Valores irreconhecíveis são mantidos.
+    """
+    if not valor:
+        return ''
+    if isinstance(valor, datetime):
+        return valor.strftime(formato_saida)
+    try:
+        return datetime.fromisoformat(valor).strftime(formato_saida)
+    except (ValueError, TypeError):
+        pass
+    try:
+        return datetime.strptime(valor, '%d/%m/%Y').strftime(formato_saida)
+    except (ValueError, TypeError):
+        return valor
+
+
+class _EscritorCSV:
+    """Escreve linhas num CSV compatível com o Excel europeu (';' e utf-8-sig)."""
+
+    def __init__(self, caminho):
+        self.arquivo = open(caminho, 'w', newline='', encoding='utf-8-sig')
+        self.writer = csv.writer(self.arquivo, delimiter=';')
+
+    def escrever_linhas(self, linhas):
+        self.writer.writerows(linhas)
+
+    def fechar(self):
+        self.arquivo.close()
+
+
+class _EscritorXLSX:
+    """Escreve linhas num .xlsx usando o modo write-only do openpyxl (memória constante)."""
+
+    def __init__(self, caminho):
+        from openpyxl import Workbook
+
+        self.caminho = caminho
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet()
+
+    def escrever_linhas(self, linhas):
+        for linha in linhas:
+            self.sheet.append(linha)
+
+    def fechar(self):
+        self.workbook.save(self.caminho)
+        self.workbook.close()
+
+
+def _criar_escritor(caminho, formato):
+    formato = formato or ('xlsx' if caminho.lower().endswith('.xlsx') else 'csv')
+    if formato == 'xlsx':
+        return _EscritorXLSX(caminho)
+    return _EscritorCSV(caminho)
+
+
+def exportar_em_streaming(caminho, sql, params=(), renomear=None, colunas_data=None, formato=None,
+                          tamanho_lote=TAMANHO_LOTE_PADRAO, progresso=None, cancelar=None):
+    """
+    Exporta o resultado de uma consulta para CSV ou XLSX lendo o cursor em lotes.
+    As colunas são renomeadas e as datas formatadas à medida que as linhas são escritas.
+
+    Args:
+        progresso: função chamada com o total de linhas escritas após cada lote.
+        cancelar: threading.Event; se for sinalizado, a exportação é interrompida,
+                  o arquivo parcial é removido e ExportacaoCancelada é lançada.
+
+    Returns:
+        int: número de linhas exportadas.
+    """
+    renomear = renomear or {}
+    colunas_data = colunas_data or {}
+
+    escritor = _criar_escritor(caminho, formato)
+    linhas_escritas = 0
+    concluido = False
+    try:
+        indices_data = None
+        for lote in db.iterar_consulta(sql, params, tamanho_lote):
+            if cancelar is not None and cancelar.is_set():
+                raise ExportacaoCancelada()
+
+            if indices_data is None:
+                colunas = lote[0].keys()
+                escritor.escrever_linhas([[renomear.get(c, c) for c in colunas]])
+                indices_data = [(i, colunas_data[c]) for i, c in enumerate(colunas) if c in colunas_data]
+
+            linhas = [list(row) for row in lote]
+            for linha in linhas:
+                for i, formato_saida in indices_data:
+                    linha[i] = _formatar_data(linha[i], formato_saida)
+
+            escritor.escrever_linhas(linhas)
+            linhas_escritas += len(linhas)
+            if progresso:
+                progresso(linhas_escritas)
+        if indices_data is None:  # Resultado vazio: o arquivo leva na mesma o cabeçalho
+            escritor.escrever_linhas([[renomear.get(c, c) for c in db.colunas_consulta(sql, params)]])
+        concluido = True
+    finally:
+        escritor.fechar()
+        if not concluido and os.path.exists(caminho):
+            os.remove(caminho)
+
+    logging.info(f"Exportação concluída: {linhas_escritas} linhas escritas em {caminho}")
+    return linhas_escritas
+
+
+class ExportacaoEmSegundoPlano(threading.Thread):
+    """
+    Executa uma exportação numa thread separada para não bloquear a interface.
+    A vista consulta 'linhas_exportadas', 'total', 'erro' e 'is_alive()' periodicamente
+    (via after()) e pode chamar cancelar() a qualquer momento.
+    """
+
+    def __init__(self, caminho, especificacao, formato=None, tamanho_lote=TAMANHO_LOTE_PADRAO):
+        super().__init__(daemon=True)
+        self.caminho = caminho
+        self.especificacao = especificacao
+        self.formato = formato
+        self.tamanho_lote = tamanho_lote
+        self.total = None
+        self.linhas_exportadas = 0
+        self.erro = None
+        self.cancelada = False
+        self._evento_cancelar = threading.Event()
+
+    def cancelar(self):
+        self._evento_cancelar.set()
+
+    def _atualizar_progresso(self, linhas):
+        self.linhas_exportadas = linhas
+
+    def run(self):
+        try:
+            self.total = db.contar_linhas_consulta(self.especificacao['sql'], self.especificacao['params'])
+            exportar_em_streaming(
+                self.caminho,
+                self.especificacao['sql'],
+                self.especificacao['params'],
+                renomear=self.especificacao['renomear'],
+                colunas_data=self.especificacao['colunas_data'],
+                formato=self.formato,
+                tamanho_lote=self.tamanho_lote,
+                progresso=self._atualizar_progresso,
+                cancelar=self._evento_cancelar,
+            )
+        except ExportacaoCancelada:
+            self.cancelada = True
+            logging.info(f"Exportação para {self.caminho} cancelada pelo utilizador.")
+        except Exception as e:
+            self.erro = e
+            logging.error(f"Erro ao exportar para {self.caminho}: {e}", exc_info=True)
@@ -0,0 +1,200 @@
+import atexit
+import logging
+import queue
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from . import config_manager as cfg
+from . import database as db
+
+# --- Fila de escritas com commit agrupado ---
+# Cada escrita síncrona do database.py abre uma conexão e faz o seu próprio commit (um
+# fsync por escrita, e a espera do busy_timeout na thread de quem chama). Os formulários de
+# clientes, veículos e reservas gravam por esta fila (as variantes no fim deste módulo) e
+# recebem o resultado na thread do Tk com frontend.futuros.ao_concluir; rajadas de escritas
+# pequenas (integrações, edições em lote) também podem usá-la. Uma única thread escritora
+# junta o que chegar durante 'intervalo_ms' (até 'max_lote' instruções) numa só transação.
+# Cada instrução corre dentro do seu próprio SAVEPOINT, por isso uma IntegrityError só anula
+# essa instrução, e cada chamador recebe o seu resultado (rowcount, id inserido) ou a sua
+# exceção num Future, depois de o COMMIT do lote estar feito.
+
+_TERMINAR = object()
+
+
+def _ocupado(erro):
+    mensagem = str(erro).lower()
+    return 'locked' in mensagem or 'busy' in mensagem
+
+
+class FilaEscritas:
+    """Thread escritora única com commit agrupado. submeter() retorna um Future."""
+
+    def __init__(self, intervalo_ms=None, max_lote=None):
+        config = cfg.obter_secao('fila_escritas')
+        self.intervalo = (config['intervalo_ms'] if intervalo_ms is None else intervalo_ms) / 1000
+        self.max_lote = max_lote or config['max_lote']
+        self.config_escritas = cfg.obter_secao('escritas')
+        self._fila = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.lotes = 0
+        self.instrucoes = 0
+
+    def iniciar(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="fila-escritas", daemon=True)
+                self._thread.start()
+        return self
+
+    def submeter(self, sql, params=()):
+        """Coloca uma instrução na fila. O Future resolve para {'linhas': rowcount, 'id': lastrowid}."""
+        futuro = Future()
+        self._fila.put((sql, params, futuro))
+        return futuro
+
+    def parar(self, timeout=10):
+        """Grava o que ainda está na fila e termina a thread escritora."""
+        if self._thread is None:
+            return
+        self._fila.put(_TERMINAR)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _recolher_lote(self, primeiro):
+        lote = [primeiro]
+        limite = time.monotonic() + self.intervalo
+        terminar = False
+        while len(lote) < self.max_lote:
+            restante = limite - time.monotonic()
+            try:
+                item = self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if item is _TERMINAR:
+                terminar = True
+                break
+            lote.append(item)
+        return lote, terminar
+
+    def _conectar(self):
+        conn = db.conectar_bd()
+        if conn is None:
+            raise sqlite3.OperationalError("Fila de escritas: não foi possível abrir o banco de dados.")
+        conn.isolation_level = None  # Transações explícitas
+        conn.execute(f"PRAGMA busy_timeout = {self.config_escritas['timeout_ms']}")
+        return conn
+
+    def _loop(self):
+        conn = None
+        try:
+            while True:
+                primeiro = self._fila.get()
+                if primeiro is _TERMINAR:
+                    break
+                lote, terminar = self._recolher_lote(primeiro)
+                # Escritas canceladas pelo chamador antes de chegarem ao lote não são gravadas
+                lote = [item for item in lote if item[2].set_running_or_notify_cancel()]
+                if lote:
+                    try:
+                        conn = conn or self._conectar()
+                        self._gravar_lote(conn, lote)
+                    except Exception as e:
+                        # A thread escritora nunca morre: o lote falha, a conexão é reaberta no seguinte
+                        logging.error(f"Fila de escritas: lote de {len(lote)} instruções abandonado: {e}",
+                                      exc_info=True)
+                        for _, _, futuro in lote:
+                            if not futuro.done():
+                                futuro.set_exception(e)
+                        if conn is not None:
+                            conn.close()  # Anula também uma transação que tenha ficado aberta
+                            conn = None
+                if terminar:
+                    break
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _gravar_lote(self, conn, lote):
+        tentativas = self.config_escritas['tentativas']
+        for tentativa in range(tentativas):
+            resultados = []
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                for sql, params, _ in lote:
+                    conn.execute("SAVEPOINT instrucao")
+                    try:
+                        cursor = conn.execute(sql, params)
+                        resultados.append((True, {'linhas': cursor.rowcount, 'id': cursor.lastrowid}))
+                    except sqlite3.Error as e:
+                        if _ocupado(e):
+                            raise  # O lote inteiro é repetido
+                        resultados.append((False, e))
+                        conn.execute("ROLLBACK TO instrucao")
+                    conn.execute("RELEASE instrucao")
+                conn.execute("COMMIT")
+                break
+            except sqlite3.Error as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                if not _ocupado(e) or tentativa + 1 >= tentativas:
+                    logging.error(f"Fila de escritas: lote de {len(lote)} instruções falhou: {e}", exc_info=True)
+                    for _, _, futuro in lote:
+                        futuro.set_exception(e)
+                    return
+                pausa = min(self.config_escritas['espera_base_ms'] * 2 ** tentativa,
+                            self.config_escritas['espera_max_ms']) / 1000
+                time.sleep(random.uniform(pausa / 2, pausa))
+
+        # Só depois do COMMIT: um resultado entregue é um resultado gravado
+        self.lotes += 1
+        self.instrucoes += len(lote)
+        for (_, _, futuro), (sucesso, valor) in zip(lote, resultados):
+            if sucesso:
+                futuro.set_result(valor)
+            else:
+                futuro.set_exception(valor)
+
+
+_fila = None
+_lock_fila = threading.Lock()
+
+
+def obter_fila():
+    """Fila partilhada do processo, criada e iniciada no primeiro uso."""
+    global _fila
+    with _lock_fila:
+        if _fila is None:
+            _fila = FilaEscritas().iniciar()
+            atexit.register(parar_fila)
+        return _fila
+
+
+def parar_fila():
+    """Grava as escritas pendentes e termina a fila partilhada."""
+    global _fila
+    with _lock_fila:
+        if _fila is not None:
+            _fila.parar()
+            _fila = None
+
+
+# --- Variantes assíncronas das escritas do database.py (mesmas instruções SQL) ---
+
+def adicionar_cliente(nome_completo, nif, telefone, email, cc):
+    return obter_fila().submeter(db.SQL_ADICIONAR_CLIENTE, (nome_completo, nif, telefone, email, cc))
+
+
+def atualizar_cliente(id_cliente, **kwargs):
+    return obter_fila().submeter(db.sql_atualizar_por_id('clientes', kwargs), [*kwargs.values(), id_cliente])
+
+
+def atualizar_veiculo(id_veiculo, **kwargs):
+    return obter_fila().submeter(db.sql_atualizar_por_id('veiculos', kwargs), [*kwargs.values(), id_veiculo])
+
+
+def deletar_reserva(reserva_id):
+    return obter_fila().submeter(db.SQL_DELETAR_RESERVA, (reserva_id,))
@@ -0,0 +1,390 @@
+import gzip
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from . import config_manager as cfg
+from . import database as db
+from . import otimizador_atribuicao
+
+# Respostas menores do que isto não compensam o custo do gzip
+TAMANHO_MINIMO_GZIP = 1024
+
+
+class ErroAPI(Exception):
+    """Erro com código HTTP, devolvido ao cliente como JSON {'erro': mensagem}."""
+
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+def _parse_data(valor, nome, fim_do_dia=False):
+    """Aceita 'YYYY-MM-DD' ou 'YYYY-MM-DD HH:MM:SS' e devolve o formato do banco."""
+    if not valor:
+        raise ErroAPI(400, f"Parâmetro obrigatório em falta: {nome}")
+    try:
+        data = datetime.fromisoformat(valor)
+    except (TypeError, ValueError):  # TypeError: valor JSON que não é texto (número, lista...)
+        raise ErroAPI(400, f"Data inválida em '{nome}': {valor}")
+    if fim_do_dia and len(valor) == 10:
+        return data.strftime('%Y-%m-%d 23:59:59')
+    return data.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _paginacao(query):
+    config = cfg.obter_secao('api')
+    try:
+        limite = int(query.get('limite', [config['limite_pagina_padrao']])[0])
+        offset = int(query.get('offset', [0])[0])
+    except ValueError:
+        raise ErroAPI(400, "Parâmetros 'limite' e 'offset' devem ser inteiros.")
+    # LIMIT negativo no SQLite devolve todas as linhas, sem respeitar 'limite_pagina_maximo'
+    if limite < 1 or offset < 0:
+        raise ErroAPI(400, "'limite' deve ser pelo menos 1 e 'offset' não pode ser negativo.")
+    return min(limite, config['limite_pagina_maximo']), offset
+
+
+# --- Rotas de leitura ---
+# Cada rota devolve (tabelas de que depende, função que produz o corpo).
+# As tabelas alimentam o ETag: enquanto as suas gerações não mudarem,
+# a resposta para o mesmo URL é a mesma.
+
+def _rota_veiculos(conn, query, match):
+    def produzir():
+        return [dict(r) for r in conn.execute(db.SQL_LISTAR_VEICULOS, db.parametros_listar_veiculos())]
+    # O status operacional depende da hora: o ETag muda pelo menos a cada minuto
+    return ('veiculos', 'reservas'), datetime.now().strftime('%Y%m%d%H%M'), produzir
+
+
+def _rota_veiculos_disponiveis(conn, query, match):
+    inicio = _parse_data(query.get('inicio', [None])[0], 'inicio')
+    fim = _parse_data(query.get('fim', [None])[0], 'fim', fim_do_dia=True)
+    if fim < inicio:
+        raise ErroAPI(400, "'fim' deve ser posterior a 'inicio'.")
+
+    def produzir():
+        return [dict(r) for r in conn.execute(db.SQL_VEICULOS_DISPONIVEIS_PERIODO, (fim, inicio))]
+    return ('veiculos', 'reservas'), '', produzir
+
+
+def _rota_clientes(conn, query, match):
+    limite, offset = _paginacao(query)
+
+    def produzir():
+        sql = f"{db.SQL_LISTAR_CLIENTES} LIMIT ? OFFSET ?"
+        return [dict(r) for r in conn.execute(sql, (limite, offset))]
+    return ('clientes',), '', produzir
+
+
+def _rota_cliente(conn, query, match):
+    id_cliente = int(match.group(1))
+
+    def produzir():
+        row = conn.execute("SELECT * FROM clientes WHERE id = ?", (id_cliente,)).fetchone()
+        if row is None:
+            raise ErroAPI(404, f"Cliente {id_cliente} não encontrado.")
+        return dict(row)
+    return ('clientes',), '', produzir
+
+
+def _rota_reservas(conn, query, match):
+    limite, offset = _paginacao(query)
+
+    def produzir():
+        sql = f"{db.SQL_RESERVAS_DETALHADAS} LIMIT ? OFFSET ?"
+        return [dict(r) for r in conn.execute(sql, (limite, offset))]
+    return ('reservas', 'clientes', 'veiculos'), '', produzir
+
+
+ROTAS_GET = [
+    (re.compile(r'^/api/veiculos/?$'), _rota_veiculos),
+    (re.compile(r'^/api/veiculos/disponiveis/?$'), _rota_veiculos_disponiveis),
+    (re.compile(r'^/api/clientes/?$'), _rota_clientes),
+    (re.compile(r'^/api/clientes/(\d+)/?$'), _rota_cliente),
+    (re.compile(r'^/api/reservas/?$'), _rota_reservas),
+]
+
+
+def _forma_pagamento(pedido, prefixo=''):
+    id_forma_pagamento = pedido.get('id_forma_pagamento')
+    try:
+        return None if id_forma_pagamento is None else int(id_forma_pagamento)
+    except (TypeError, ValueError):
+        raise ErroAPI(400, f"{prefixo}id_forma_pagamento deve ser um número inteiro.")
+
+
+def _verificar_referencias(pedidos):
+    """
+    Cliente e forma de pagamento de cada pedido têm de existir (422), para que uma referência
+    inválida não chegue ao INSERT como violação de chave estrangeira.
+    'pedidos': [(prefixo da mensagem, id_cliente, id_forma_pagamento ou None)].
+    """
+    clientes = db.ids_existentes(db.SQL_CLIENTES_EXISTENTES, {id_cliente for _, id_cliente, _ in pedidos})
+    formas = db.ids_existentes(db.SQL_FORMAS_PAGAMENTO_EXISTENTES, {forma for _, _, forma in pedidos} - {None})
+    for prefixo, id_cliente, id_forma_pagamento in pedidos:
+        if id_cliente not in clientes:
+            raise ErroAPI(422, f"{prefixo}O cliente {id_cliente} não existe.")
+        if id_forma_pagamento is not None and id_forma_pagamento not in formas:
+            raise ErroAPI(422, f"{prefixo}A forma de pagamento {id_forma_pagamento} não existe.")
+
+
+def _criar_reserva(dados):
+    """POST /api/reservas: valida, verifica disponibilidade e cria a reserva."""
+    try:
+        id_cliente = int(dados['id_cliente'])
+        id_veiculo = int(dados['id_veiculo'])
+    except (KeyError, TypeError, ValueError):
+        raise ErroAPI(400, "Campos obrigatórios: id_cliente, id_veiculo, data_inicio, data_fim.")
+    id_forma_pagamento = _forma_pagamento(dados)
+    inicio = _parse_data(dados.get('data_inicio'), 'data_inicio')
+    fim = _parse_data(dados.get('data_fim'), 'data_fim', fim_do_dia=True)
+    if fim <= inicio:
+        raise ErroAPI(400, "A data de fim deve ser posterior à data de início.")
+
+    _verificar_referencias([('', id_cliente, id_forma_pagamento)])
+    if not db.verificar_disponibilidade_veiculo(id_veiculo, inicio, fim):
+        raise ErroAPI(409, "O veículo não está disponível no período solicitado.")
+    if not db.adicionar_reserva(id_cliente, id_veiculo, id_forma_pagamento, inicio, fim):
+        # Outro posto pode ter reservado o veículo entre a verificação e a gravação
+        if not db.verificar_disponibilidade_veiculo(id_veiculo, inicio, fim):
+            raise ErroAPI(409, "O veículo não está disponível no período solicitado.")
+        raise ErroAPI(422, "Não foi possível criar a reserva.")
+    return {'id_cliente': id_cliente, 'id_veiculo': id_veiculo, 'data_inicio': inicio, 'data_fim': fim}
+
+
+def _criar_reservas_lote(dados):
+    """
+    POST /api/reservas/lote: {'pedidos': [{id_cliente, marca, modelo?, data_inicio, data_fim}],
+    'simular': bool}. O otimizador escolhe o veículo de cada pedido; com 'simular' nada é gravado.
+    """
+    pedidos = dados.get('pedidos')
+    if not isinstance(pedidos, list) or not pedidos:
+        raise ErroAPI(400, "Campo obrigatório: pedidos (lista não vazia).")
+    if len(pedidos) > cfg.obter('otimizador', 'maximo_pedidos_lote'):
+        raise ErroAPI(413, "Demasiados pedidos no lote.")
+    validados = []
+    for chave, pedido in enumerate(pedidos):
+        try:
+            id_cliente = int(pedido['id_cliente'])
+            marca = str(pedido['marca'])
+        except (KeyError, TypeError, ValueError):
+            raise ErroAPI(400, f"Pedido {chave}: campos obrigatórios id_cliente, marca, data_inicio, data_fim.")
+        id_forma_pagamento = _forma_pagamento(pedido, f"Pedido {chave}: ")
+        inicio = _parse_data(pedido.get('data_inicio'), 'data_inicio')
+        fim = _parse_data(pedido.get('data_fim'), 'data_fim', fim_do_dia=True)
+        if fim <= inicio:
+            raise ErroAPI(400, f"Pedido {chave}: a data de fim deve ser posterior à data de início.")
+        validados.append({'chave': chave, 'id_cliente': id_cliente, 'marca': marca, 'modelo': pedido.get('modelo'),
+                          'id_forma_pagamento': id_forma_pagamento, 'data_inicio': inicio, 'data_fim': fim})
+
+    try:
+        # Referências inválidas são erros do pedido, não veículos reservados por outro posto
+        _verificar_referencias([(f"Pedido {p['chave']}: ", p['id_cliente'], p['id_forma_pagamento'])
+                                for p in validados])
+
+        if dados.get('simular'):
+            resultado = otimizador_atribuicao.atribuir_pedidos(validados)
+        else:
+            resultado = otimizador_atribuicao.reservar_pedidos(validados)
+    except sqlite3.Error as e:
+        logging.error(f"Erro ao atribuir o lote de pedidos: {e}", exc_info=True)
+        raise ErroAPI(503, "Banco de dados indisponível.")
+    # Pedidos cujo veículo foi reservado por outro posto entretanto contam como sem veículo
+    falhadas = set(resultado.get('falhadas', ()))
+    return {
+        'simulado': bool(dados.get('simular')),
+        'atribuidos': [{'pedido': chave, 'id_veiculo': id_veiculo}
+                       for chave, id_veiculo in sorted(resultado['atribuicoes'].items()) if chave not in falhadas],
+        'sem_veiculo': sorted(resultado['sem_veiculo'] + list(falhadas)),
+    }
+
+
+class ManipuladorAPI(BaseHTTPRequestHandler):
+    """Atende os pedidos JSON. Uma instância por ligação, executada num worker do servidor."""
+
+    protocol_version = "HTTP/1.1"  # Permite keep-alive (Content-Length sempre definido)
+    server_version = "LuxuryWheelsAPI/1.0"
+    timeout = 30  # Fecha ligações keep-alive inativas, libertando o worker
+    # Cabeçalhos e corpo saem em escritas separadas; sem isto, o Nagle e o ACK atrasado
+    # do cliente somam ~40 ms a cada resposta numa ligação keep-alive.
+    disable_nagle_algorithm = True
+
+    def log_message(self, formato, *args):
+        logging.debug("API %s - %s", self.address_string(), formato % args)
+
+    def _enviar(self, status, corpo=b'', etag=None, cabecalhos_extra=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        for chave, valor in (cabecalhos_extra or {}).items():
+            self.send_header(chave, valor)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        if corpo and self.command != 'HEAD':
+            self.wfile.write(corpo)
+
+    def _enviar_erro(self, status, mensagem):
+        self._enviar(status, json.dumps({'erro': mensagem}, ensure_ascii=False).encode('utf-8'))
+
+    def _aceita_gzip(self):
+        return 'gzip' in self.headers.get('Accept-Encoding', '')
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        for padrao, rota in ROTAS_GET:
+            match = padrao.match(url.path)
+            if match:
+                break
+        else:
+            self._enviar_erro(404, f"Rota desconhecida: {url.path}")
+            return
+
+        try:
+            conn = self.server.conexao_do_worker()
+            tabelas, variante, produzir = rota(conn, query, match)
+
+            etag = self.server.calcular_etag(conn, tabelas, self.path, variante)
+            if etag in (t.strip() for t in self.headers.get('If-None-Match', '').split(',')):
+                self._enviar(304, etag=etag)
+                return
+
+            aceita_gzip = self._aceita_gzip()
+            em_cache = self.server.cache.obter((etag, aceita_gzip))
+            if em_cache is None:
+                corpo = json.dumps(produzir(), ensure_ascii=False, default=str).encode('utf-8')
+                usa_gzip = aceita_gzip and len(corpo) >= TAMANHO_MINIMO_GZIP
+                if usa_gzip:
+                    corpo = gzip.compress(corpo, compresslevel=5)
+                self.server.cache.guardar((etag, aceita_gzip), (corpo, usa_gzip))
+            else:
+                corpo, usa_gzip = em_cache
+
+            extra = {'Vary': 'Accept-Encoding'}
+            if usa_gzip:
+                extra['Content-Encoding'] = 'gzip'
+            self._enviar(200, corpo, etag=etag, cabecalhos_extra=extra)
+        except ErroAPI as e:
+            self._enviar_erro(e.status, e.mensagem)
+        except sqlite3.Error as e:
+            logging.error(f"Erro de banco de dados na API ({self.path}): {e}", exc_info=True)
+            self._enviar_erro(503, "Erro de banco de dados.")
+
+    do_HEAD = do_GET
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if re.match(r'^/api/reservas/?$', url.path):
+            criar = _criar_reserva
+        elif re.match(r'^/api/reservas/lote/?$', url.path):
+            criar = _criar_reservas_lote
+        else:
+            self._enviar_erro(404, f"Rota desconhecida: {url.path}")
+            return
+        try:
+            try:
+                tamanho = int(self.headers.get('Content-Length', 0))
+            except ValueError:
+                tamanho = -1
+            if tamanho < 0:
+                raise ErroAPI(400, "Cabeçalho Content-Length inválido.")
+            dados = json.loads(self.rfile.read(tamanho) or b'{}')
+            if not isinstance(dados, dict):
+                raise ErroAPI(400, "O corpo deve ser um objeto JSON.")
+            criada = criar(dados)
+            self._enviar(201, json.dumps(criada, ensure_ascii=False).encode('utf-8'))
+        except json.JSONDecodeError:
+            self._enviar_erro(400, "JSON inválido.")
+        except ErroAPI as e:
+            self._enviar_erro(e.status, e.mensagem)
+        except sqlite3.Error as e:
+            logging.error(f"Erro de banco de dados na API ({self.path}): {e}", exc_info=True)
+            self._enviar_erro(503, "Erro de banco de dados.")
+
+
+class _CacheRespostas:
+    """LRU pequena de corpos já serializados (e comprimidos), indexada pelo ETag."""
+
+    def __init__(self, capacidade):
+        self.capacidade = capacidade
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave):
+        with self._lock:
+            valor = self._itens.get(chave)
+            if valor is not None:
+                self._itens.move_to_end(chave)
+            return valor
+
+    def guardar(self, chave, valor):
+        with self._lock:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+
+
+class ServidorAPI(HTTPServer):
+    """
+    Servidor HTTP com um conjunto fixo de workers. Cada worker mantém a sua própria
+    conexão SQLite (reutilizada entre pedidos), evitando abrir uma conexão por pedido.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, endereco, workers=None):
+        super().__init__(endereco, ManipuladorAPI)
+        config = cfg.obter_secao('api')
+        self.workers = workers or config['workers']
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="api-worker")
+        self.cache = _CacheRespostas(config['cache_respostas'])
+        self._local = threading.local()
+
+    def conexao_do_worker(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = db.conectar_bd()
+            if conn is None:
+                raise ErroAPI(503, "Banco de dados indisponível.")
+            self._local.conn = conn
+        return conn
+
+    def calcular_etag(self, conn, tabelas, caminho, variante=''):
+        """ETag derivado das gerações de escrita das tabelas usadas pela rota."""
+        geracoes = {row['tabela']: row['geracao'] for row in conn.execute(db.SQL_GERACOES_TABELAS)}
+        assinatura = caminho + '|' + variante + '|' + ','.join(f"{t}:{geracoes.get(t)}" for t in tabelas)
+        return '"' + hashlib.sha1(assinatura.encode('utf-8')).hexdigest()[:20] + '"'
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._processar, request, client_address)
+
+    def _processar(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def criar_servidor(host='127.0.0.1', porta=8080, workers=None):
+    """Cria o servidor; sem 'workers', usa a secção "api" do config.json."""
+    return ServidorAPI((host, porta), workers=workers)
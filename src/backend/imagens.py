@@ -0,0 +1,115 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+
+from PIL import Image, ImageOps
+
+from . import config_manager as cfg
+from . import database as db
+
+# --- Armazém de imagens dos veículos ---
+# As fotos são guardadas pelo conteúdo: o nome do arquivo é o SHA-256 dos bytes, numa
+# subpasta com os 2 primeiros caracteres (ex.: "3f/3fa9...c1.jpg"). A mesma foto enviada
+# duas vezes ocupa um único arquivo, e uma chave nunca muda de conteúdo, por isso pode ser
+# guardada em veiculos.imagem_path e usada como chave de cache sem invalidação.
+# No envio são geradas as miniaturas de TAMANHOS_MINIATURA (JPEG, lado maior em pixels),
+# para que as listas e galerias nunca tenham de descodificar a foto original.
+
+TAMANHOS_MINIATURA = (64, 160, 480)
+EXTENSOES = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp', 'GIF': '.gif', 'BMP': '.bmp'}
+
+
+class ErroImagem(Exception):
+    """Arquivo inexistente ou que não é uma imagem suportada."""
+
+
+def diretorio_imagens():
+    diretorio = cfg.obter('imagens', 'diretorio')
+    return diretorio or os.path.join(os.path.dirname(db.DB_PATH), 'imagens')
+
+
+def caminho_imagem(chave):
+    """Caminho absoluto da foto original guardada sob 'chave'."""
+    return os.path.join(diretorio_imagens(), *chave.split('/'))
+
+
+def caminho_miniatura(chave, tamanho):
+    """Caminho da miniatura de 'chave' com o lado maior igual a 'tamanho' (pode ainda não existir)."""
+    resumo = os.path.splitext(os.path.basename(chave))[0]
+    return os.path.join(diretorio_imagens(), 'miniaturas', str(tamanho), resumo[:2], f"{resumo}.jpg")
+
+
+def _resumo_arquivo(caminho):
+    resumo = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+
+def _gravar_atomico(destino, gravar):
+    """Chama gravar(caminho_temporario) e move o resultado para 'destino' de uma só vez."""
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    fd, temporario = tempfile.mkstemp(dir=os.path.dirname(destino), suffix='.tmp')
+    os.close(fd)
+    try:
+        gravar(temporario)
+        os.replace(temporario, destino)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def gerar_miniatura(chave, tamanho):
+    """Gera (se ainda não existir) a miniatura de 'chave' e retorna o seu caminho."""
+    destino = caminho_miniatura(chave, tamanho)
+    if os.path.exists(destino):
+        return destino
+    with Image.open(caminho_imagem(chave)) as imagem:
+        imagem.draft('RGB', (tamanho, tamanho))  # JPEG: descodifica já reduzido (muito mais rápido)
+        imagem = ImageOps.exif_transpose(imagem).convert('RGB')
+        imagem.thumbnail((tamanho, tamanho), Image.Resampling.LANCZOS)
+        _gravar_atomico(destino, lambda caminho: imagem.save(caminho, 'JPEG', quality=85, optimize=True))
+    return destino
+
+
+def guardar_imagem(caminho_origem):
+    """
+    Copia a foto para o armazém e gera as miniaturas. Retorna a chave (caminho relativo)
+    a guardar em veiculos.imagem_path. Lança ErroImagem se o arquivo não for uma imagem.
+    """
+    try:
+        with Image.open(caminho_origem) as imagem:
+            formato = imagem.format
+            imagem.verify()
+    except (OSError, SyntaxError) as e:
+        raise ErroImagem(f"Imagem inválida: {caminho_origem} ({e})")
+    if formato not in EXTENSOES:
+        raise ErroImagem(f"Formato de imagem não suportado: {formato}")
+
+    resumo = _resumo_arquivo(caminho_origem)
+    chave = f"{resumo[:2]}/{resumo}{EXTENSOES[formato]}"
+    destino = caminho_imagem(chave)
+    if not os.path.exists(destino):
+        _gravar_atomico(destino, lambda caminho: shutil.copyfile(caminho_origem, caminho))
+        logging.info(f"Imagem guardada: {chave}")
+    for tamanho in TAMANHOS_MINIATURA:
+        gerar_miniatura(chave, tamanho)
+    return chave
+
+
+def resolver_miniatura(imagem_path, tamanho):
+    """
+    Caminho da miniatura mais adequada para o valor de veiculos.imagem_path.
+    Chaves do armazém usam (ou geram) a miniatura; caminhos antigos, fora do armazém,
+    são usados tal como estão. Retorna None se não houver imagem.
+    """
+    if not imagem_path:
+        return None
+    if os.path.exists(caminho_imagem(imagem_path)):
+        tamanho = next((t for t in TAMANHOS_MINIATURA if t >= tamanho), TAMANHOS_MINIATURA[-1])
+        return gerar_miniatura(imagem_path, tamanho)
+    return imagem_path if os.path.exists(imagem_path) else None
@@ -0,0 +1,397 @@
+import logging
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from . import config_manager as cfg
+from . import database as db
+from . import status_reconciler
+
+# --- Índice da frota em memória (colunar) ---
+# A lista de veículos (com o status operacional calculado a partir das reservas) é lida uma
+# vez para arrays NumPy, um por atributo. As colunas de texto com poucos valores distintos
+# (marca, modelo, cor, status) ficam como códigos inteiros com índice invertido
+# (valor -> posições), os números e datas como arrays numéricos. Filtrar e ordenar é então
+# aritmética sobre arrays, sem SQLite, o que permite reaplicar os filtros a cada tecla.
+# Atualização incremental:
+#   - reservas alteradas/apagadas desde a última versão vista (versao_alteracao) -> só os
+#     veículos afetados são relidos (SQL_VEICULO_OPERACIONAL, pela chave primária);
+#   - alterações locais a veículos -> atualizar_veiculos([ids]) / remover_veiculos([ids]);
+#   - alteração só na tabela 'veiculos' (outro posto, reconciliador de status) ou índice mais
+#     velho do que 'idade_maxima_s' (o status depende da hora) -> releitura completa. Uma edição
+#     de veículo noutro posto feita junto com alterações de reservas pode assim demorar até
+#     'idade_maxima_s' a aparecer.
+
+SQL_VEICULOS_ALTERADOS = """
+    SELECT id_veiculo FROM reservas WHERE versao_alteracao > ?
+    UNION
+    SELECT id_veiculo FROM reservas_removidas WHERE versao_alteracao > ? AND id_veiculo IS NOT NULL
+"""
+
+CATEGORIAS = ('marca', 'modelo', 'cor', 'status_operacional')
+NUMERICAS = {'ano': np.int32, 'valor_diaria': np.float64}
+DATAS = ('data_proxima_revisao', 'data_retorno')
+TEXTO = ('placa', 'imagem_path') + DATAS  # As datas também ficam como texto, no formato original do banco
+
+
+class _Categoria:
+    """Coluna categórica: códigos int32 por linha, dicionário de valores e índice invertido."""
+
+    def __init__(self, valores):
+        self.valores = []
+        self.codigo_de = {}
+        self.codigos = np.array([self.codificar(v) for v in valores], dtype=np.int32)
+        self._invertido = None
+
+    def codificar(self, valor):
+        valor = valor if valor is not None else ''
+        codigo = self.codigo_de.get(valor)
+        if codigo is None:
+            codigo = self.codigo_de[valor] = len(self.valores)
+            self.valores.append(valor)
+            self._invertido = None
+        return codigo
+
+    def invertido(self):
+        """{código: posições ordenadas} (recalculado só depois de alterações)."""
+        if self._invertido is None:
+            ordem = np.argsort(self.codigos, kind='stable')
+            codigos, inicios = np.unique(self.codigos[ordem], return_index=True)
+            self._invertido = dict(zip(codigos.tolist(), np.split(ordem, inicios[1:])))
+        return self._invertido
+
+    def posicoes(self, valores):
+        """Posições das linhas cujo valor está em 'valores'."""
+        invertido = self.invertido()
+        partes = [invertido[self.codigo_de[v]] for v in valores
+                  if v in self.codigo_de and self.codigo_de[v] in invertido]
+        return np.concatenate(partes) if partes else np.zeros(0, dtype=np.int64)
+
+    def chave_ordenacao(self):
+        """Posição alfabética de cada linha (para ordenar pela coluna)."""
+        ordem_alfabetica = np.argsort(np.array([str(v).lower() for v in self.valores], dtype=object), kind='stable')
+        posto = np.empty(len(self.valores), dtype=np.int32)
+        posto[ordem_alfabetica] = np.arange(len(self.valores), dtype=np.int32)
+        return posto[self.codigos]
+
+    def alterar(self, posicao, valor):
+        self.codigos[posicao] = self.codificar(valor)
+        self._invertido = None
+
+    def filtrar_linhas(self, manter):
+        self.codigos = self.codigos[manter]
+        self._invertido = None
+
+    def acrescentar(self, valores):
+        self.codigos = np.concatenate([self.codigos, np.array([self.codificar(v) for v in valores], dtype=np.int32)])
+        self._invertido = None
+
+
+def _data(valor):
+    if not valor:
+        return np.datetime64('NaT', 's')
+    try:
+        return np.datetime64(str(valor).replace(' ', 'T'), 's')
+    except ValueError:
+        return np.datetime64('NaT', 's')
+
+
+class IndiceFrota:
+    """Colunas NumPy da frota, com filtros combinados e ordenação por qualquer coluna."""
+
+    def __init__(self):
+        self.geracao_veiculos = None
+        self.versao_reservas = None
+        self.atualizado_em = 0.0
+        self._carregar_linhas([])
+
+    # --- Construção e atualização ---
+
+    def _carregar_linhas(self, linhas):
+        vistos = set()
+        unicas = []
+        for linha in linhas:  # Os LEFT JOIN podem repetir um veículo com várias reservas futuras
+            if linha['id'] not in vistos:
+                vistos.add(linha['id'])
+                unicas.append(linha)
+        self.ids = np.array([l['id'] for l in unicas], dtype=np.int64)
+        self.categorias = {c: _Categoria([l[c] for l in unicas]) for c in CATEGORIAS}
+        self.numericas = {c: np.array([l[c] if l[c] is not None else np.nan for l in unicas], dtype=np.float64)
+                          for c in NUMERICAS}
+        self.datas = {c: np.array([_data(l[c]) for l in unicas], dtype='datetime64[s]') for c in DATAS}
+        self.texto = {c: np.array([l[c] or '' for l in unicas], dtype=object) for c in TEXTO}
+        self._reindexar()
+
+    def _reindexar(self):
+        self.posicao_de = {id_: i for i, id_ in enumerate(self.ids.tolist())}
+        self._caracteristicas = None
+        # Texto da pesquisa livre: marca, modelo, placa e cor em minúsculas, numa só coluna
+        self._pesquisa = np.array([
+            f"{self.categorias['marca'].valores[m]} {self.categorias['modelo'].valores[mo]} {p} "
+            f"{self.categorias['cor'].valores[c]}".lower()
+            for m, mo, p, c in zip(self.categorias['marca'].codigos.tolist(), self.categorias['modelo'].codigos.tolist(),
+                                   self.texto['placa'].tolist(), self.categorias['cor'].codigos.tolist())
+        ], dtype=str)
+
+    def _marcas_de_agua(self, conn):
+        geracao = dict(conn.execute(db.SQL_GERACOES_TABELAS).fetchall()).get('veiculos')
+        versao = conn.execute(status_reconciler.SQL_VERSAO_ATUAL).fetchone()[0]
+        return geracao, versao
+
+    def recarregar(self):
+        """Releitura completa (SQL_LISTAR_VEICULOS)."""
+        inicio = time.perf_counter()
+        with db.conectar_bd() as conn:
+            geracao, versao = self._marcas_de_agua(conn)
+            linhas = conn.execute(db.SQL_LISTAR_VEICULOS, db.parametros_listar_veiculos()).fetchall()
+        self._carregar_linhas(linhas)
+        self.geracao_veiculos, self.versao_reservas = geracao, versao
+        self.atualizado_em = time.monotonic()
+        logging.info(f"Índice da frota: {len(self.ids)} veículos em {time.perf_counter() - inicio:.2f}s.")
+
+    def sincronizar(self):
+        """Põe o índice em dia com o banco, da forma mais barata possível. Retorna True se algo mudou."""
+        idade_maxima = cfg.obter('indice_frota', 'idade_maxima_s')
+        if self.geracao_veiculos is None or time.monotonic() - self.atualizado_em > idade_maxima:
+            self.recarregar()
+            return True
+        with db.conectar_bd() as conn:
+            geracao, versao = self._marcas_de_agua(conn)
+            if versao != self.versao_reservas:
+                # Criar/terminar uma reserva também muda veiculos.status (e a geração de 'veiculos'):
+                # com reservas alteradas, os veículos a reler são os dessas reservas
+                alterados = [row[0] for row in conn.execute(SQL_VEICULOS_ALTERADOS,
+                                                            (self.versao_reservas, self.versao_reservas))]
+            elif geracao != self.geracao_veiculos:
+                alterados = None
+            else:
+                return False
+        if alterados is None:
+            self.recarregar()
+        else:
+            self.atualizar_veiculos(alterados)
+            self.versao_reservas = versao
+        return True
+
+    def precisa_recarregar(self, margem=1.0):
+        """
+        True se o próximo sincronizar() faria uma releitura completa. Com 'margem' < 1 a idade
+        conta a partir dessa fração de 'idade_maxima_s' (para recarregar antes de expirar).
+        """
+        idade_maxima = cfg.obter('indice_frota', 'idade_maxima_s')
+        if self.geracao_veiculos is None or time.monotonic() - self.atualizado_em > idade_maxima * margem:
+            return True
+        with db.conectar_bd() as conn:
+            geracao, versao = self._marcas_de_agua(conn)
+        return versao == self.versao_reservas and geracao != self.geracao_veiculos
+
+    def atualizar_veiculos(self, ids):
+        """Relê só estes veículos (inseridos, editados ou com reservas alteradas)."""
+        params = db.parametros_listar_veiculos()
+        with db.conectar_bd() as conn:
+            linhas = [conn.execute(db.SQL_VEICULO_OPERACIONAL, (*params, id_)).fetchone() for id_ in ids]
+            geracao, _ = self._marcas_de_agua(conn)
+        removidos = [id_ for id_, linha in zip(ids, linhas) if linha is None]
+        novos = []
+        for linha in filter(None, linhas):
+            posicao = self.posicao_de.get(linha['id'])
+            if posicao is None:
+                novos.append(linha)
+                continue
+            for c in CATEGORIAS:
+                self.categorias[c].alterar(posicao, linha[c])
+            for c in NUMERICAS:
+                self.numericas[c][posicao] = linha[c] if linha[c] is not None else np.nan
+            for c in DATAS:
+                self.datas[c][posicao] = _data(linha[c])
+            for c in TEXTO:
+                self.texto[c][posicao] = linha[c] or ''
+        if novos:
+            self.ids = np.concatenate([self.ids, np.array([l['id'] for l in novos], dtype=np.int64)])
+            for c in CATEGORIAS:
+                self.categorias[c].acrescentar([l[c] for l in novos])
+            for c in NUMERICAS:
+                self.numericas[c] = np.concatenate([self.numericas[c], np.array(
+                    [l[c] if l[c] is not None else np.nan for l in novos], dtype=np.float64)])
+            for c in DATAS:
+                self.datas[c] = np.concatenate([self.datas[c], np.array([_data(l[c]) for l in novos],
+                                                                        dtype='datetime64[s]')])
+            for c in TEXTO:
+                self.texto[c] = np.concatenate([self.texto[c], np.array([l[c] or '' for l in novos], dtype=object)])
+        if removidos:
+            self.remover_veiculos(removidos)
+        else:
+            self._reindexar()
+        self.geracao_veiculos = geracao  # As alterações locais já estão refletidas
+
+    def remover_veiculos(self, ids):
+        manter = ~np.isin(self.ids, np.array(list(ids), dtype=np.int64))
+        self.ids = self.ids[manter]
+        for categoria in self.categorias.values():
+            categoria.filtrar_linhas(manter)
+        for colunas in (self.numericas, self.datas, self.texto):
+            for c in colunas:
+                colunas[c] = colunas[c][manter]
+        self._reindexar()
+
+    # --- Consulta ---
+
+    def valores_distintos(self, coluna):
+        """Valores de uma coluna categórica presentes na frota, por ordem alfabética."""
+        categoria = self.categorias[coluna]
+        presentes = [categoria.valores[c] for c in categoria.invertido()]
+        return sorted(presentes, key=str.lower)
+
+    def filtrar(self, texto='', ordenar_por='marca', decrescente=False, **filtros):
+        """
+        Retorna as posições das linhas que satisfazem todos os filtros, já ordenadas.
+        Filtros: marca/modelo/cor/status_operacional=[valores], ano_min, ano_max,
+        valor_min, valor_max, revisao_ate (datetime/str). 'texto' procura em marca,
+        modelo, placa e cor (sem distinguir maiúsculas).
+        """
+        selecao = np.ones(len(self.ids), dtype=bool)
+        for coluna in CATEGORIAS:
+            valores = filtros.get(coluna)
+            if valores:
+                dentro = np.zeros(len(self.ids), dtype=bool)
+                dentro[self.categorias[coluna].posicoes(valores)] = True
+                selecao &= dentro
+        for coluna, minimo, maximo in (('ano', 'ano_min', 'ano_max'), ('valor_diaria', 'valor_min', 'valor_max')):
+            if filtros.get(minimo) is not None:
+                selecao &= self.numericas[coluna] >= filtros[minimo]
+            if filtros.get(maximo) is not None:
+                selecao &= self.numericas[coluna] <= filtros[maximo]
+        if filtros.get('revisao_ate') is not None:
+            selecao &= self.datas['data_proxima_revisao'] <= _data(filtros['revisao_ate'])
+        texto = texto.strip().lower()
+        if texto:
+            candidatas = np.flatnonzero(selecao)
+            encontradas = np.char.find(self._pesquisa[candidatas], texto) >= 0
+            selecao[:] = False
+            selecao[candidatas[encontradas]] = True
+
+        posicoes = np.flatnonzero(selecao)
+        chave = self._chave_ordenacao(ordenar_por)[posicoes]
+        ordem = np.argsort(chave, kind='stable')
+        if decrescente:
+            ordem = ordem[::-1]
+        return posicoes[ordem]
+
+    def _chave_ordenacao(self, coluna):
+        if coluna in self.categorias:
+            return self.categorias[coluna].chave_ordenacao()
+        if coluna in self.numericas:
+            return self.numericas[coluna]
+        if coluna in self.datas:
+            return self.datas[coluna]
+        if coluna in self.texto:
+            return self.texto[coluna].astype(str)
+        return self.ids
+
+    def linhas(self, posicoes):
+        """Dicionários (como os de listar_veiculos) para as posições indicadas."""
+        resultado = []
+        for p in np.asarray(posicoes).tolist():
+            linha = {'id': int(self.ids[p])}
+            for c, categoria in self.categorias.items():
+                linha[c] = categoria.valores[categoria.codigos[p]]
+            for c in NUMERICAS:
+                valor = self.numericas[c][p]
+                linha[c] = None if np.isnan(valor) else (int(valor) if c == 'ano' else float(valor))
+            for c in TEXTO:
+                linha[c] = self.texto[c][p] or None
+            resultado.append(linha)
+        return resultado
+
+    def caracteristicas(self):
+        """
+        Matriz (veículos x 5) para comparar veículos: códigos de marca, modelo e cor, ano e
+        logaritmo da diária (a diferença é a razão entre preços). Calculada na primeira
+        chamada depois de cada alteração do índice.
+        """
+        if self._caracteristicas is None:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                valor = np.log(self.numericas['valor_diaria'])
+            self._caracteristicas = np.column_stack([
+                self.categorias['marca'].codigos, self.categorias['modelo'].codigos, self.categorias['cor'].codigos,
+                self.numericas['ano'], np.where(np.isfinite(valor), valor, np.nan),
+            ]).astype(np.float64)
+        return self._caracteristicas
+
+    def __len__(self):
+        return len(self.ids)
+
+
+_indice = None
+_lock_indice = threading.Lock()
+
+
+def obter_indice():
+    """Índice partilhado do processo, sincronizado com o banco antes de ser devolvido."""
+    global _indice
+    with _lock_indice:
+        if _indice is None:
+            _indice = IndiceFrota()
+        _indice.sincronizar()
+        return _indice
+
+
+def indice_atual():
+    """Índice partilhado tal como está (sem sincronizar), ou None se ainda não foi construído."""
+    return _indice
+
+
+def recarregar_indice():
+    """
+    Releitura completa para um índice novo, que substitui o partilhado no fim. Quem já tem
+    o índice antigo continua a lê-lo sem ver arrays a meio de uma troca.
+    """
+    global _indice
+    novo = IndiceFrota()
+    novo.recarregar()
+    with _lock_indice:
+        _indice = novo
+    return novo
+
+
+class SincronizadorIndice:
+    """
+    Constrói o índice partilhado ao arrancar e volta a lê-lo por completo numa thread daemon
+    sempre que a releitura seria necessária (veículos alterados ou meia 'idade_maxima_s'),
+    para que obter_indice() na thread da interface só faça atualizações incrementais.
+    """
+
+    def __init__(self, intervalo=None):
+        self.intervalo = intervalo or cfg.obter('indice_frota', 'intervalo_sincronizacao_s')
+        self._parar = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._loop, name="indice-frota", daemon=True)
+        self._thread.start()
+
+    def parar(self, timeout=5.0):
+        self._parar.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def atualizar(self):
+        """Recarrega o índice partilhado se estiver por construir ou perto de expirar. Retorna True se recarregou."""
+        atual = indice_atual()
+        if atual is not None and not atual.precisa_recarregar(margem=0.5):
+            return False
+        recarregar_indice()
+        return True
+
+    def _loop(self):
+        while not self._parar.is_set():
+            try:
+                self.atualizar()
+            except sqlite3.Error as e:
+                logging.error(f"Índice da frota: erro ao recarregar em segundo plano: {e}", exc_info=True)
+            self._parar.wait(self.intervalo)
@@ -1,29 +1,166 @@
+import atexit
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
-
-def setup_logging():
-    """Configura o sistema de logging para a aplicação."""
-    log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'logs')
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-
-    log_file = os.path.join(log_dir, 'luxury_wheels.log')
-
-    #Config basica e level INFO de captura de erros:
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(),
-            #maxBytes: 1MB por arquivo, backupCount: 3 arquivos antigos
-            RotatingFileHandler(log_file, maxBytes=1048576, backupCount=3)
-        ]
-    )
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from . import config_manager as cfg
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'logs')
+FORMATO_TEXTO = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# --- Pipeline assíncrono ---
+# Os módulos continuam a usar logging.info/error(...) normalmente. O root logger só tem um
+# QueueHandler: a thread que regista (muitas vezes a do Tk) apenas coloca o registo numa fila
+# limitada, e uma thread do QueueListener formata (incluindo tracebacks) e escreve no disco.
+# Se a fila encher durante uma rajada, os registos são descartados (nunca bloqueiam quem
+# regista) e um resumo com o número descartado por nível é emitido assim que houver espaço.
+# Secção "logging" do config.json: json (linhas JSON no arquivo), fila_max, max_bytes, backups.
+
+_listener = None
+
+
+class HandlerFilaLimitada(QueueHandler):
+    """QueueHandler que descarta (e conta) registos quando a fila está cheia, em vez de bloquear."""
+
+    def __init__(self, fila):
+        super().__init__(fila)
+        self._lock_descartes = threading.Lock()
+        self.descartados = {}
+
+    def prepare(self, record):
+        # A fila é local ao processo: mantém exc_info para o traceback ser formatado na
+        # thread do listener. Só a mensagem é resolvida já, porque os args podem mudar.
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record):
+        if self.descartados:
+            self._emitir_resumo()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock_descartes:
+                self.descartados[record.levelname] = self.descartados.get(record.levelname, 0) + 1
+
+    def _emitir_resumo(self):
+        with self._lock_descartes:
+            descartados, self.descartados = self.descartados, {}
+        if not descartados:
+            return
+        total = sum(descartados.values())
+        detalhe = ", ".join(f"{n} {nivel}" for nivel, n in sorted(descartados.items()))
+        resumo = logging.LogRecord('logger_config', logging.WARNING, __file__, 0,
+                                   f"Fila de logging cheia: {total} mensagens descartadas ({detalhe}).", None, None)
+        try:
+            self.queue.put_nowait(resumo)
+        except queue.Full:
+            with self._lock_descartes:  # Ainda sem espaço: o resumo volta para a próxima tentativa
+                for nivel, n in descartados.items():
+                    self.descartados[nivel] = self.descartados.get(nivel, 0) + n
+
+
+class FormatadorJSON(logging.Formatter):
+    """Uma linha JSON por registo (para ingestão por ferramentas de análise de logs)."""
+
+    def format(self, record):
+        entrada = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensagem': record.getMessage(),
+            'modulo': record.module,
+            'linha': record.lineno,
+            'thread': record.threadName,
+        }
+        if record.exc_info:
+            entrada['excecao'] = self.formatException(record.exc_info)
+        return json.dumps(entrada, ensure_ascii=False)
+
+
+class ArquivoRotativo(RotatingFileHandler):
+    """Rotação por tamanho (maxBytes) e também à meia-noite, o que acontecer primeiro."""
+
+    def __init__(self, filename, maxBytes=0, backupCount=0, encoding='utf-8'):
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding)
+        self.proxima_rotacao = self._calcular_proxima_rotacao()
+
+    @staticmethod
+    def _calcular_proxima_rotacao():
+        amanha = datetime.now().date() + timedelta(days=1)
+        return datetime.combine(amanha, datetime.min.time()).timestamp()
+
+    def shouldRollover(self, record):
+        if time.time() >= self.proxima_rotacao and self.stream is not None and self.stream.tell() > 0:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.proxima_rotacao = self._calcular_proxima_rotacao()
+
+
+def setup_logging(json_linhas=None, fila_max=None, log_dir=None):
+    """
+    Configura o sistema de logging para a aplicação (assíncrono, via fila).
+    Chamadas repetidas não duplicam handlers. Retorna o QueueListener em execução.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    config = cfg.obter_secao('logging')
+    if json_linhas is None:
+        json_linhas = config['json']
+    if fila_max is None:
+        fila_max = config['fila_max']
+
+    log_dir = log_dir or LOG_DIR
+    os.makedirs(log_dir, exist_ok=True)
+    log_file = os.path.join(log_dir, 'luxury_wheels.jsonl' if json_linhas else 'luxury_wheels.log')
+
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(FORMATO_TEXTO))
+    arquivo = ArquivoRotativo(log_file, maxBytes=config['max_bytes'],
+                              backupCount=config['backups'])
+    arquivo.setFormatter(FormatadorJSON() if json_linhas else logging.Formatter(FORMATO_TEXTO))
+
+    fila = queue.Queue(maxsize=fila_max)
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(HandlerFilaLimitada(fila))
+
+    _listener = QueueListener(fila, console, arquivo, respect_handler_level=True)
+    _listener.start()
+    atexit.register(parar_logging)
 
     logging.getLogger("matplotlib").setLevel(logging.WARNING)
 
     logger = logging.getLogger(__name__)
     logger.info("="*50)
     logger.info("Sistema de Logging Inicializado")
-    logger.info("="*50)
\ No newline at end of file
+    logger.info("="*50)
+    return _listener
+
+
+def parar_logging():
+    """Esvazia a fila, pára a thread de escrita e fecha os arquivos (idempotente)."""
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, HandlerFilaLimitada):
+            root.removeHandler(handler)
@@ -0,0 +1,335 @@
+import bisect
+import logging
+import sqlite3
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from . import config_manager as cfg
+from . import coordenador_escritas
+from . import database as db
+
+# --- Otimizador de atribuição de veículos ---
+# Um pedido diz o que o cliente quer (marca e, opcionalmente, modelo) e quando; o
+# otimizador escolhe o veículo concreto. Cada veículo tem em memória a sua linha do
+# tempo (intervalos ordenados e sem sobreposição: reservas fixas, manutenções planeadas e
+# os pedidos já atribuídos no lote). Duas fases:
+#   1. Guloso por ordem de início (escalonamento de intervalos): cada pedido vai para o
+#      veículo compatível onde não cria sobras curtas (intervalos livres abaixo de
+#      'folga_minima_h', que já ninguém aluga) e, entre esses, onde encaixa mais justo (menor
+#      folga até à ocupação anterior, depois até à seguinte). Encostar as reservas umas às
+#      outras deixa os intervalos livres compridos, que ainda se vendem.
+#   2. Pedidos que ficaram de fora: caminhos de aumento como no emparelhamento bipartido
+#      (Kuhn). Se o pedido só colide com um pedido do lote num veículo, tenta-se mudar esse
+#      pedido para outro veículo (recursivamente, até 'profundidade' níveis).
+# As reservas que já começaram, as de outras marcas/modelos e as manutenções ficam fixas.
+
+FORMATO_DATA = '%Y-%m-%d %H:%M:%S'
+_EPOCA = datetime(2000, 1, 1)
+
+SQL_VEICULOS_ATRIBUIVEIS = "SELECT id, marca, modelo, status, valor_diaria FROM veiculos"
+
+SQL_OCUPACOES_FUTURAS = """
+    SELECT id, id_veiculo, data_inicio, data_fim, versao_alteracao FROM reservas
+    WHERE status = 'ativa' AND data_fim >= ?
+"""
+
+SQL_MANUTENCOES_FUTURAS = """
+    SELECT id_veiculo, data_inicio, data_fim FROM manutencoes
+    WHERE status = 'planeada' AND data_fim >= ?
+"""
+
+SQL_VERSAO_RESERVA = "SELECT versao_alteracao FROM reservas WHERE id = ? AND status = 'ativa'"
+# Só entre veículos com a mesma diária (ver _classe_reotimizacao): o valor_total não muda
+SQL_MUDAR_VEICULO = "UPDATE reservas SET id_veiculo = ? WHERE id = ?"
+
+
+def _segundos(data):
+    if isinstance(data, str):
+        data = datetime.strptime(data, FORMATO_DATA)
+    return (data - _EPOCA).total_seconds()
+
+
+class LinhaTempo:
+    """Intervalos [inicio, fim] (segundos) de um veículo, ordenados e sem sobreposição."""
+
+    def __init__(self):
+        self.inicios = []
+        self.itens = []  # (inicio, fim, dono): dono None = ocupação fixa
+
+    def inserir(self, inicio, fim, dono=None):
+        i = bisect.bisect_left(self.inicios, inicio)
+        self.inicios.insert(i, inicio)
+        self.itens.insert(i, (inicio, fim, dono))
+
+    def remover(self, dono):
+        for i, item in enumerate(self.itens):
+            if item[2] == dono:
+                del self.inicios[i], self.itens[i]
+                return
+
+    def conflitos(self, inicio, fim):
+        """Itens que se sobrepõem a [inicio, fim]: como os intervalos não se sobrepõem, os fins
+        também estão ordenados e basta recuar a partir do último que começa até 'fim'."""
+        i = bisect.bisect_right(self.inicios, fim) - 1
+        encontrados = []
+        while i >= 0 and self.itens[i][1] >= inicio:
+            encontrados.append(self.itens[i])
+            i -= 1
+        return encontrados
+
+    def folgas(self, inicio, fim):
+        """(tempo livre antes de 'inicio', tempo livre depois de 'fim') até às ocupações vizinhas."""
+        i = bisect.bisect_left(self.inicios, inicio)
+        antes = inicio - self.itens[i - 1][1] if i > 0 else float('inf')
+        depois = self.itens[i][0] - fim if i < len(self.itens) else float('inf')
+        return antes, depois
+
+
+def contar_fragmentos(linhas, folga_minima_s, desde=None):
+    """Número de intervalos livres entre ocupações mais curtos do que 'folga_minima_s' (sobras invendáveis)."""
+    total = 0
+    for linha in linhas.values():
+        for anterior, seguinte in zip(linha.itens, linha.itens[1:]):
+            if desde is not None and seguinte[0] < desde:
+                continue
+            if 0 < seguinte[0] - anterior[1] < folga_minima_s:
+                total += 1
+    return total
+
+
+class Otimizador:
+    """Atribui pedidos a veículos sobre as linhas do tempo em memória."""
+
+    def __init__(self, veiculos, linhas, profundidade=None, folga_minima_s=None):
+        """
+        Args:
+            veiculos: {id_veiculo: (marca, modelo)} dos veículos que podem receber pedidos.
+            linhas: {id_veiculo: LinhaTempo} com as ocupações fixas.
+        """
+        self.linhas = linhas
+        config = cfg.obter_secao('otimizador')
+        self.profundidade = config['profundidade'] if profundidade is None else profundidade
+        self.folga_minima = config['folga_minima_h'] * 3600 if folga_minima_s is None else folga_minima_s
+        self.por_marca = defaultdict(list)
+        self.por_modelo = defaultdict(list)
+        for id_veiculo, (marca, modelo) in veiculos.items():
+            self.por_marca[marca.strip().lower()].append(id_veiculo)
+            self.por_modelo[(marca.strip().lower(), (modelo or '').strip().lower())].append(id_veiculo)
+            self.linhas.setdefault(id_veiculo, LinhaTempo())
+        self.atribuicoes = {}
+        self._pedidos = {}
+
+    def candidatos(self, pedido):
+        marca = (pedido.get('marca') or '').strip().lower()
+        modelo = (pedido.get('modelo') or '').strip().lower()
+        if modelo:
+            return self.por_modelo.get((marca, modelo), [])
+        return self.por_marca.get(marca, [])
+
+    def _melhor_veiculo(self, chave, inicio, fim):
+        melhor, melhor_custo = None, None
+        for id_veiculo in self._pedidos[chave]['candidatos']:
+            linha = self.linhas[id_veiculo]
+            if linha.conflitos(inicio, fim):
+                continue
+            antes, depois = linha.folgas(inicio, fim)
+            sobras = (0 < antes < self.folga_minima) + (0 < depois < self.folga_minima)
+            custo = (sobras, antes, depois)
+            if melhor_custo is None or custo < melhor_custo:
+                melhor, melhor_custo = id_veiculo, custo
+        return melhor
+
+    def _colocar(self, chave, id_veiculo):
+        pedido = self._pedidos[chave]
+        self.linhas[id_veiculo].inserir(pedido['inicio'], pedido['fim'], chave)
+        self.atribuicoes[chave] = id_veiculo
+
+    def _retirar(self, chave):
+        self.linhas[self.atribuicoes.pop(chave)].remover(chave)
+
+    def _aumentar(self, chave, profundidade, visitados):
+        """Caminho de aumento: coloca 'chave' num veículo, deslocando no máximo um pedido do lote por nível."""
+        pedido = self._pedidos[chave]
+        id_veiculo = self._melhor_veiculo(chave, pedido['inicio'], pedido['fim'])
+        if id_veiculo is not None:
+            self._colocar(chave, id_veiculo)
+            return True
+        if profundidade == 0:
+            return False
+        for id_veiculo in pedido['candidatos']:
+            if id_veiculo in visitados:
+                continue
+            conflitos = self.linhas[id_veiculo].conflitos(pedido['inicio'], pedido['fim'])
+            if len(conflitos) != 1 or conflitos[0][2] is None:
+                continue
+            visitados.add(id_veiculo)
+            deslocado = conflitos[0][2]
+            self._retirar(deslocado)
+            self._colocar(chave, id_veiculo)
+            if self._aumentar(deslocado, profundidade - 1, visitados):
+                return True
+            self._retirar(chave)
+            self._colocar(deslocado, id_veiculo)
+        return False
+
+    def otimizar(self, pedidos):
+        """
+        Atribui os pedidos ({'chave', 'marca', 'modelo'?, 'data_inicio', 'data_fim'}).
+        Retorna (atribuicoes {chave: id_veiculo}, [chaves sem veículo]).
+        """
+        for pedido in pedidos:
+            self._pedidos[pedido['chave']] = {'inicio': _segundos(pedido['data_inicio']),
+                                              'fim': _segundos(pedido['data_fim']),
+                                              'candidatos': self.candidatos(pedido)}
+        ordem = sorted(self._pedidos, key=lambda c: (self._pedidos[c]['inicio'], self._pedidos[c]['fim']))
+        sem_veiculo = []
+        for chave in ordem:
+            id_veiculo = self._melhor_veiculo(chave, self._pedidos[chave]['inicio'], self._pedidos[chave]['fim'])
+            if id_veiculo is None:
+                sem_veiculo.append(chave)
+            else:
+                self._colocar(chave, id_veiculo)
+        if self.profundidade:
+            sem_veiculo = [chave for chave in sem_veiculo if not self._aumentar(chave, self.profundidade, set())]
+        return dict(self.atribuicoes), sem_veiculo
+
+
+def _carregar(conn, agora, movidas=None):
+    """
+    Veículos e linhas do tempo a partir do banco. As reservas com id em 'movidas' não
+    entram como ocupação fixa (são elas próprias pedidos); retorna também os seus dados.
+    """
+    agora_str = agora.strftime(FORMATO_DATA)
+    veiculos = {row['id']: row for row in conn.execute(SQL_VEICULOS_ATRIBUIVEIS)}
+    linhas = defaultdict(LinhaTempo)
+    reservas_movidas = []
+    for row in conn.execute(SQL_OCUPACOES_FUTURAS, (agora_str,)):
+        if movidas is not None and movidas(row, agora_str) and row['id_veiculo'] in veiculos:
+            reservas_movidas.append(row)
+        else:
+            linhas[row['id_veiculo']].inserir(_segundos(row['data_inicio']), _segundos(row['data_fim']))
+    for row in conn.execute(SQL_MANUTENCOES_FUTURAS, (agora_str,)):
+        linhas[row['id_veiculo']].inserir(_segundos(row['data_inicio']), _segundos(row['data_fim']))
+    return veiculos, linhas, reservas_movidas
+
+
+def atribuir_pedidos(pedidos, agora=None):
+    """
+    Escolhe veículos para um lote de pedidos novos, sem gravar nada. Só ficam de fora
+    os veículos em 'manutenção' (a mesma regra de adicionar_reserva).
+    Retorna {'atribuicoes': {chave: id_veiculo}, 'sem_veiculo': [chaves], 'fragmentos': n}.
+    """
+    agora = agora or datetime.now()
+    inicio = time.perf_counter()
+    with db.conectar_bd() as conn:
+        veiculos, linhas, _ = _carregar(conn, agora)
+    elegiveis = {id_: (v['marca'], v['modelo']) for id_, v in veiculos.items() if v['status'] != 'manutenção'}
+    otimizador = Otimizador(elegiveis, linhas)
+    atribuicoes, sem_veiculo = otimizador.otimizar(pedidos)
+    fragmentos = contar_fragmentos(linhas, cfg.obter('otimizador', 'folga_minima_h') * 3600, _segundos(agora))
+    logging.info(f"Otimizador: {len(atribuicoes)}/{len(pedidos)} pedidos atribuídos "
+                 f"em {time.perf_counter() - inicio:.2f}s ({fragmentos} sobras curtas na frota).")
+    return {'atribuicoes': atribuicoes, 'sem_veiculo': sem_veiculo, 'fragmentos': fragmentos}
+
+
+def reservar_pedidos(pedidos, agora=None):
+    """
+    Atribui e cria as reservas do lote (cada pedido com 'id_cliente' e, opcionalmente,
+    'id_forma_pagamento'). Retorna o resultado de atribuir_pedidos com 'criadas' e 'falhadas'.
+    """
+    resultado = atribuir_pedidos(pedidos, agora)
+    por_chave = {pedido['chave']: pedido for pedido in pedidos}
+    criadas, falhadas = [], []
+    for chave, id_veiculo in resultado['atribuicoes'].items():
+        pedido = por_chave[chave]
+        if db.adicionar_reserva(pedido['id_cliente'], id_veiculo, pedido.get('id_forma_pagamento'),
+                                pedido['data_inicio'], pedido['data_fim']):
+            criadas.append(chave)
+        else:  # Outro posto reservou o veículo entretanto
+            falhadas.append(chave)
+    resultado.update(criadas=criadas, falhadas=falhadas)
+    return resultado
+
+
+def _classe_reotimizacao(veiculo):
+    """(marca, modelo) para o Otimizador, com a diária no modelo: uma reserva só troca para um
+    veículo do mesmo modelo e com a mesma diária, para o preço acordado continuar certo."""
+    return veiculo['marca'], f"{veiculo['modelo']} @ {veiculo['valor_diaria'] or 0:.2f}"
+
+
+def reotimizar_reservas_futuras(agora=None, aplicar=True):
+    """
+    Reatribui as reservas ativas que ainda não começaram, dentro da mesma marca, modelo e
+    diária, para reduzir as sobras curtas entre reservas. Só aplica se todas as reservas continuarem
+    atribuídas e houver menos sobras; as alterações são gravadas numa única transação,
+    que é abandonada se alguma reserva mudou entretanto (versao_alteracao) ou se um veículo
+    de destino deixou de estar livre no período (nova reserva ou manutenção planeada).
+    Retorna {'reservas', 'mudadas', 'fragmentos_antes', 'fragmentos_depois', 'aplicado'} ou None.
+    """
+    agora = agora or datetime.now()
+    folga_minima = cfg.obter('otimizador', 'folga_minima_h') * 3600
+    inicio = time.perf_counter()
+    try:
+        with db.conectar_bd() as conn:
+            veiculos, linhas, reservas = _carregar(conn, agora, lambda row, agora_str: row['data_inicio'] > agora_str)
+    except sqlite3.Error as e:
+        logging.error(f"Erro ao carregar as reservas a reotimizar: {e}", exc_info=True)
+        return None
+
+    # Fragmentação atual: as reservas nas posições de hoje
+    linhas_atuais = defaultdict(LinhaTempo)
+    for id_veiculo, linha in linhas.items():
+        for item in linha.itens:
+            linhas_atuais[id_veiculo].inserir(*item)
+    for row in reservas:
+        linhas_atuais[row['id_veiculo']].inserir(_segundos(row['data_inicio']), _segundos(row['data_fim']))
+    fragmentos_antes = contar_fragmentos(linhas_atuais, folga_minima, _segundos(agora))
+
+    elegiveis = {id_: _classe_reotimizacao(v) for id_, v in veiculos.items() if v['status'] != 'manutenção'}
+    pedidos = []
+    for row in reservas:
+        marca, modelo = _classe_reotimizacao(veiculos[row['id_veiculo']])
+        pedidos.append({'chave': row['id'], 'marca': marca, 'modelo': modelo,
+                        'data_inicio': row['data_inicio'], 'data_fim': row['data_fim']})
+    atribuicoes, sem_veiculo = Otimizador(elegiveis, linhas).otimizar(pedidos)
+    fragmentos_depois = contar_fragmentos(linhas, folga_minima, _segundos(agora))
+
+    mudancas = [(row['id'], atribuicoes[row['id']], row['versao_alteracao'], row['data_inicio'], row['data_fim'])
+                for row in reservas if row['id'] in atribuicoes and atribuicoes[row['id']] != row['id_veiculo']]
+    resultado = {'reservas': len(reservas), 'mudadas': len(mudancas), 'fragmentos_antes': fragmentos_antes,
+                 'fragmentos_depois': fragmentos_depois, 'aplicado': False}
+    if sem_veiculo or fragmentos_depois >= fragmentos_antes or not mudancas or not aplicar:
+        logging.info(f"Reotimização não aplicada: {resultado} ({len(sem_veiculo)} sem veículo).")
+        return resultado
+
+    def _gravar(conn):
+        for id_reserva, _, versao, _, _ in mudancas:
+            atual = conn.execute(SQL_VERSAO_RESERVA, (id_reserva,)).fetchone()
+            if atual is None or atual[0] != versao:
+                return False
+        # O veículo de destino pode ter recebido uma reserva ou uma manutenção depois do
+        # cálculo: verifica-se já com todas as trocas feitas (uma reserva pode ir para o lugar
+        # de outra que também muda) e, havendo conflito, nada é gravado.
+        conn.execute("SAVEPOINT reotimizacao")
+        for id_reserva, id_veiculo, _, _, _ in mudancas:
+            conn.execute(SQL_MUDAR_VEICULO, (id_veiculo, id_reserva))
+        for id_reserva, id_veiculo, _, data_inicio, data_fim in mudancas:
+            if (conn.execute(db.SQL_VERIFICAR_DISPONIBILIDADE + " AND id != ?",
+                             (id_veiculo, data_fim, data_inicio, id_reserva)).fetchone()[0]
+                    or conn.execute(db.SQL_VERIFICAR_MANUTENCAO, (id_veiculo, data_fim, data_inicio)).fetchone()[0]):
+                conn.execute("ROLLBACK TO reotimizacao")
+                conn.execute("RELEASE reotimizacao")
+                return False
+        conn.execute("RELEASE reotimizacao")
+        return True
+
+    try:
+        resultado['aplicado'] = coordenador_escritas.executar_escrita(_gravar, "reotimização de reservas")
+    except sqlite3.Error as e:
+        logging.error(f"Erro ao gravar a reotimização das reservas: {e}", exc_info=True)
+        return None
+    if not resultado['aplicado']:
+        logging.warning("Reotimização abandonada: reservas ou veículos de destino alterados durante o cálculo.")
+    logging.info(f"Reotimização em {time.perf_counter() - inicio:.2f}s: {resultado}.")
+    return resultado
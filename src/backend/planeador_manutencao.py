@@ -0,0 +1,268 @@
+import heapq
+import logging
+import sqlite3
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from . import config_manager as cfg
+from . import coordenador_escritas
+from . import database as db
+
+# --- Planeador de revisões ---
+# Em vez de bloquear cada veículo 'dias_antecedencia' antes da revisão (e perder os
+# alugueres desse período), procura para cada veículo com revisão a vencer um intervalo
+# livre de 'duracao_dias' entre as suas reservas, antes da data de revisão, respeitando a
+# capacidade da oficina ('capacidade_diaria' veículos por dia). Trabalha em dias inteiros:
+#   1. Linha de varrimento por veículo: as ocupações (reservas ativas e blocos já
+#      planeados) ordenadas por início dão os intervalos de dias livres e, deles, os
+#      intervalos de dias em que um bloco pode começar.
+#   2. Varrimento dos dias com dois heaps: 'espera' (veículos pelo próximo dia em que
+#      podem começar) e 'prontos' (veículos que podem começar hoje, pelo prazo mais curto).
+#      Em cada dia atribui-se a oficina aos prazos mais apertados primeiro (EDF).
+# Os blocos escolhidos ficam na tabela 'manutencoes' como 'planeada': o veículo deixa de
+# poder ser reservado nesse período e atualizar_estados() põe-no em 'manutenção' quando o
+# bloco começa e devolve-o à frota (com a próxima revisão reagendada) quando acaba.
+
+FORMATO_DATA = '%Y-%m-%d %H:%M:%S'
+
+SQL_REVISOES_A_PLANEAR = """
+    SELECT v.id, v.data_proxima_revisao
+    FROM veiculos v
+    WHERE v.data_proxima_revisao <= ? AND v.status != 'manutenção'
+      AND NOT EXISTS (SELECT 1 FROM manutencoes m WHERE m.id_veiculo = v.id AND m.status = 'planeada')
+"""
+
+SQL_OCUPACAO_RESERVAS = """
+    SELECT id_veiculo, data_inicio, data_fim FROM reservas
+    WHERE status = 'ativa' AND data_fim >= ? AND data_inicio <= ?
+"""
+
+SQL_OCUPACAO_MANUTENCOES = """
+    SELECT id_veiculo, data_inicio, data_fim FROM manutencoes
+    WHERE status = 'planeada' AND data_fim >= ?
+"""
+
+SQL_INSERIR_MANUTENCAO = """
+    INSERT INTO manutencoes (id_veiculo, data_inicio, data_fim, status, criada_em) VALUES (?, ?, ?, 'planeada', ?)
+"""
+
+SQL_INICIAR_MANUTENCOES = """
+    UPDATE veiculos SET status = 'manutenção'
+    WHERE status = 'disponível'
+      AND id IN (SELECT id_veiculo FROM manutencoes
+                 WHERE status = 'planeada' AND data_inicio <= :agora AND data_fim >= :agora)
+"""
+
+# Fim do bloco: o veículo volta à frota e a próxima revisão conta a partir do fim do bloco
+SQL_LIBERTAR_MANUTENCOES = """
+    UPDATE veiculos
+    SET status = CASE WHEN status = 'manutenção' THEN 'disponível' ELSE status END,
+        data_proxima_revisao = (SELECT date(MAX(m.data_fim), '+' || :intervalo || ' days') FROM manutencoes m
+                                WHERE m.id_veiculo = veiculos.id AND m.status = 'planeada' AND m.data_fim < :agora)
+    WHERE id IN (SELECT id_veiculo FROM manutencoes WHERE status = 'planeada' AND data_fim < :agora)
+"""
+
+SQL_CONCLUIR_MANUTENCOES = """
+    UPDATE manutencoes SET status = 'concluída' WHERE status = 'planeada' AND data_fim < :agora
+"""
+
+
+def _dia(valor):
+    """Ordinal do dia de uma data/datetime ou de um texto 'YYYY-MM-DD[ HH:MM:SS]'."""
+    if isinstance(valor, str):
+        valor = date.fromisoformat(valor[:10])
+    if isinstance(valor, datetime):
+        valor = valor.date()
+    return valor.toordinal()
+
+
+def inicios_livres(ocupacoes, primeiro, ultimo, duracao):
+    """
+    Intervalos [a, b] (ordinais, inclusivos) dos dias em que um bloco de 'duracao' dias
+    pode começar, entre 'primeiro' e 'ultimo', sem tocar nenhuma ocupação.
+    'ocupacoes' são pares (dia_inicio, dia_fim) inclusivos, em qualquer ordem.
+    """
+    intervalos = []
+    cursor = primeiro
+    for inicio, fim in sorted(ocupacoes):
+        if inicio - duracao >= cursor:
+            intervalos.append((cursor, min(inicio - duracao, ultimo)))
+        cursor = max(cursor, fim + 1)
+        if cursor > ultimo:
+            break
+    if cursor <= ultimo:
+        intervalos.append((cursor, ultimo))
+    return [(a, b) for a, b in intervalos if a <= b]
+
+
+def planear(revisoes, ocupacoes, hoje, duracao_dias=1, capacidade_diaria=2, horizonte_dias=30, carga=None):
+    """
+    Distribui as revisões pelos intervalos livres.
+
+    Args:
+        revisoes: [(id_veiculo, data_revisao)].
+        ocupacoes: {id_veiculo: [(dia_inicio, dia_fim)]} em ordinais inclusivos.
+        hoje: date do primeiro dia planeável.
+        carga: {ordinal: veículos já na oficina nesse dia} (blocos planeados antes).
+
+    Returns:
+        (plano, sem_vaga): plano é uma lista de {'id_veiculo', 'inicio', 'fim', 'revisao',
+        'atrasada'} (datas do primeiro e último dia do bloco); sem_vaga são os ids sem
+        intervalo livre (ou sem capacidade) dentro do prazo.
+    """
+    primeiro = hoje.toordinal()
+    fim_horizonte = primeiro + horizonte_dias
+    carga = defaultdict(int, carga or {})
+    espera, prontos = [], []
+    sem_vaga = []
+    for id_veiculo, data_revisao in revisoes:
+        revisao = _dia(data_revisao)
+        prazo = revisao - duracao_dias + 1  # Último dia de início que acaba até à revisão
+        atrasada = prazo < primeiro
+        limite = max(fim_horizonte - duracao_dias, primeiro) if atrasada else prazo
+        livres = inicios_livres(ocupacoes.get(id_veiculo, ()), primeiro, limite, duracao_dias)
+        if not livres:
+            sem_vaga.append(id_veiculo)
+            continue
+        # Prioridade pelo prazo original: as atrasadas passam à frente de todas
+        heapq.heappush(espera, (livres[0][0], (prazo, id_veiculo), limite, atrasada, livres, 0))
+
+    plano = []
+    dia = espera[0][0] if espera else primeiro
+    while espera or prontos:
+        if not prontos and espera[0][0] > dia:
+            dia = espera[0][0]  # Salta os dias sem nenhum veículo que possa começar
+        while espera and espera[0][0] <= dia:
+            _, prioridade, limite, atrasada, livres, i = heapq.heappop(espera)
+            heapq.heappush(prontos, (prioridade, limite, atrasada, livres, i))
+
+        # Todos os blocos têm a mesma duração: se a oficina não tem vaga para um, não tem para nenhum
+        oficina_livre = all(carga[d] < capacidade_diaria for d in range(dia, dia + duracao_dias))
+        while prontos and oficina_livre:
+            prioridade, limite, atrasada, livres, i = heapq.heappop(prontos)
+            while i < len(livres) and livres[i][1] < dia:
+                i += 1
+            if i == len(livres) or dia > limite:
+                sem_vaga.append(prioridade[1])
+            elif livres[i][0] > dia:
+                heapq.heappush(espera, (livres[i][0], prioridade, limite, atrasada, livres, i))
+            else:
+                for d in range(dia, dia + duracao_dias):
+                    carga[d] += 1
+                plano.append({'id_veiculo': prioridade[1], 'inicio': date.fromordinal(dia),
+                              'fim': date.fromordinal(dia + duracao_dias - 1),
+                              'revisao': date.fromordinal(prioridade[0] + duracao_dias - 1), 'atrasada': atrasada})
+                oficina_livre = all(carga[d] < capacidade_diaria for d in range(dia, dia + duracao_dias))
+
+        # Quem ficou sem vaga hoje e já não pode começar amanhã perde o prazo
+        retidos = []
+        for item in prontos:
+            if item[1] <= dia:
+                sem_vaga.append(item[0][1])
+            else:
+                retidos.append(item)
+        if len(retidos) != len(prontos):
+            prontos = retidos
+            heapq.heapify(prontos)
+        dia += 1
+    return plano, sem_vaga
+
+
+def _carregar(conn, hoje, config):
+    """Revisões a planear, ocupação de cada veículo e carga da oficina, a partir do banco."""
+    limite_revisoes = hoje + timedelta(days=config['horizonte_dias'])
+    revisoes = [(row[0], row[1]) for row in conn.execute(SQL_REVISOES_A_PLANEAR, (limite_revisoes.isoformat(),))
+                if row[1]]
+    desde = hoje.strftime(FORMATO_DATA)
+    ate = (limite_revisoes + timedelta(days=1)).strftime(FORMATO_DATA)
+
+    ocupacoes = defaultdict(list)
+    for id_veiculo, inicio, fim in conn.execute(SQL_OCUPACAO_RESERVAS, (desde, ate)):
+        ocupacoes[id_veiculo].append((_dia(inicio), _dia(fim)))
+    carga = defaultdict(int)
+    for id_veiculo, inicio, fim in conn.execute(SQL_OCUPACAO_MANUTENCOES, (desde,)):
+        ocupacoes[id_veiculo].append((_dia(inicio), _dia(fim)))
+        for d in range(_dia(inicio), _dia(fim) + 1):
+            carga[d] += 1
+    return revisoes, ocupacoes, carga
+
+
+def aplicar_plano(plano):
+    """
+    Grava os blocos do plano como manutenções 'planeada'. Cada bloco é verificado de novo
+    dentro da transação (uma reserva pode ter sido criada desde o planeamento); os que
+    entretanto deixaram de caber são ignorados. Retorna os blocos gravados.
+    """
+    criada_em = datetime.now().strftime(FORMATO_DATA)
+
+    def _gravar(conn):
+        gravados = []
+        for bloco in plano:
+            inicio = f"{bloco['inicio'].isoformat()} 00:00:00"
+            fim = f"{bloco['fim'].isoformat()} 23:59:59"
+            params = (bloco['id_veiculo'], fim, inicio)
+            if (conn.execute(db.SQL_VERIFICAR_DISPONIBILIDADE, params).fetchone()[0]
+                    or conn.execute(db.SQL_VERIFICAR_MANUTENCAO, params).fetchone()[0]):
+                continue
+            conn.execute(SQL_INSERIR_MANUTENCAO, (bloco['id_veiculo'], inicio, fim, criada_em))
+            gravados.append(bloco)
+        return gravados
+
+    if not plano:
+        return []
+    return coordenador_escritas.executar_escrita(_gravar, f"plano de {len(plano)} manutenções")
+
+
+def planear_manutencoes(hoje=None, aplicar=True):
+    """
+    Planeia as revisões de toda a frota a vencer nos próximos 'horizonte_dias'.
+    Retorna {'planeadas', 'atrasadas', 'sem_vaga', 'plano', 'ids_sem_vaga'} ou None em caso de erro.
+    """
+    config = cfg.obter_secao('manutencao')
+    hoje = hoje or date.today()
+    inicio = time.perf_counter()
+    try:
+        with db.conectar_bd() as conn:
+            revisoes, ocupacoes, carga = _carregar(conn, hoje, config)
+        plano, sem_vaga = planear(revisoes, ocupacoes, hoje, config['duracao_dias'], config['capacidade_diaria'],
+                                  config['horizonte_dias'], carga)
+        if aplicar:
+            plano = aplicar_plano(plano)
+    except sqlite3.Error as e:
+        logging.error(f"Erro ao planear as revisões: {e}", exc_info=True)
+        return None
+
+    atrasadas = sum(1 for bloco in plano if bloco['atrasada'])
+    logging.info(f"Planeador de revisões: {len(plano)} planeadas ({atrasadas} atrasadas), {len(sem_vaga)} sem vaga, "
+                 f"{len(revisoes)} veículos em {time.perf_counter() - inicio:.3f}s.")
+    if sem_vaga:
+        logging.warning(f"Revisões sem vaga até ao prazo (veículos): {sem_vaga[:20]}")
+    return {'planeadas': len(plano), 'atrasadas': atrasadas, 'sem_vaga': len(sem_vaga),
+            'plano': plano, 'ids_sem_vaga': sem_vaga}
+
+
+def atualizar_estados(agora=None):
+    """Põe em 'manutenção' os veículos cujo bloco começou e liberta os que terminaram."""
+    config = cfg.obter_secao('manutencao')
+    parametros = {'agora': (agora or datetime.now()).strftime(FORMATO_DATA), 'intervalo': config['intervalo_revisao_dias']}
+
+    def _atualizar(conn):
+        contagens = {'libertados': conn.execute(SQL_LIBERTAR_MANUTENCOES, parametros).rowcount}
+        contagens['concluidas'] = conn.execute(SQL_CONCLUIR_MANUTENCOES, parametros).rowcount
+        contagens['iniciadas'] = conn.execute(SQL_INICIAR_MANUTENCOES, parametros).rowcount
+        return contagens
+
+    try:
+        return coordenador_escritas.executar_escrita(_atualizar, "estados das manutenções")
+    except sqlite3.Error as e:
+        logging.error(f"Erro ao atualizar os estados das manutenções: {e}", exc_info=True)
+        return None
+
+
+def executar_ciclo():
+    """Tarefa do agendador: atualiza os blocos em curso e planeia as revisões pendentes."""
+    estados = atualizar_estados()
+    resultado = planear_manutencoes()
+    return {'estados': estados, 'planeadas': resultado and resultado['planeadas'],
+            'sem_vaga': resultado and resultado['sem_vaga']}
@@ -0,0 +1,217 @@
+import atexit
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+from . import config_manager as cfg
+
+# --- Perfil de SQL (modo de diagnóstico) ---
+# Ativado pela variável de ambiente LW_PERFIL_SQL=1 ou por "diagnostico": {"perfil_sql": true} no config.json.
+# Cada conexão criada por database.conectar_bd() passa a registar as instruções executadas
+# (set_trace_callback) e os passos da máquina virtual do SQLite (set_progress_handler).
+# As instruções são agrupadas por "forma" (literais substituídos por '?') e, para cada
+# forma nova, o plano de execução (EXPLAIN QUERY PLAN) é capturado numa conexão à parte.
+
+VARIAVEL_AMBIENTE = 'LW_PERFIL_SQL'
+
+# O progress handler é chamado a cada N instruções da VM: os passos contados têm esta resolução
+PASSOS_POR_CHAMADA = 100
+
+DIRETORIO_LOGS = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'logs')
+NOME_RELATORIO = 'perfil_sql'
+
+# Só estas instruções têm plano de execução interessante
+_PREFIXOS_COM_PLANO = ('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT')
+
+_RE_STRING = re.compile(r"'(?:[^']|'')*'")
+_RE_COMENTARIO = re.compile(r"--[^\n]*")
+_RE_NUMERO = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_RE_LISTA = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+_RE_ESPACOS = re.compile(r"\s+")
+
+_lock = threading.Lock()
+_ativo = None  # None = ainda não decidido (lido do ambiente/config na primeira conexão)
+_estatisticas = {}
+_planos_pendentes = []
+
+
+def normalizar_sql(sql):
+    """Reduz uma instrução à sua forma: literais viram '?', comentários saem, listas IN colapsam."""
+    forma = _RE_STRING.sub('?', sql)
+    forma = _RE_COMENTARIO.sub(' ', forma)
+    forma = _RE_NUMERO.sub('?', forma)
+    forma = _RE_ESPACOS.sub(' ', forma).strip()
+    return _RE_LISTA.sub('(?, ...)', forma)
+
+
+def ativo():
+    """Indica se o perfil está ligado (decidido uma vez por processo, salvo ativar/desativar)."""
+    global _ativo
+    if _ativo is None:
+        valor_env = os.environ.get(VARIAVEL_AMBIENTE, '').strip().lower()
+        if valor_env:
+            _ativo = valor_env in ('1', 'true', 'sim', 'on')
+        else:
+            _ativo = cfg.obter('diagnostico', 'perfil_sql')
+        if _ativo:
+            logging.info("Perfil de SQL ativo: instruções e planos de execução serão registados.")
+    return _ativo
+
+
+def ativar():
+    """Liga o perfil para as próximas conexões (as conexões já abertas não são afetadas)."""
+    global _ativo
+    _ativo = True
+
+
+def desativar():
+    global _ativo
+    _ativo = False
+
+
+def limpar():
+    """Descarta as estatísticas recolhidas."""
+    with _lock:
+        _estatisticas.clear()
+        _planos_pendentes.clear()
+
+
+def instrumentar(conn):
+    """Liga o trace e o progress handler a uma conexão."""
+    # Estado por conexão: forma em execução e passos da execução atual
+    estado = {'forma': None, 'passos': 0}
+
+    def _rastrear(sql):
+        if sql.startswith('--'):
+            return  # Instruções de triggers: os passos contam para a instrução que os disparou
+        forma = normalizar_sql(sql)
+        agora = datetime.now().isoformat(timespec='seconds')
+        with _lock:
+            entrada = _estatisticas.get(forma)
+            if entrada is None:
+                entrada = _estatisticas[forma] = {
+                    'forma': forma, 'exemplo': sql, 'execucoes': 0, 'passos_vm': 0, 'max_passos_vm': 0,
+                    'primeira_vez': agora, 'ultima_vez': agora, 'plano': None, 'alertas': [],
+                }
+                if forma.upper().startswith(_PREFIXOS_COM_PLANO):
+                    _planos_pendentes.append(forma)
+            entrada['execucoes'] += 1
+            entrada['ultima_vez'] = agora
+        estado['forma'] = forma
+        estado['passos'] = 0
+
+    def _progresso():
+        forma = estado['forma']
+        if forma is not None:
+            estado['passos'] += PASSOS_POR_CHAMADA
+            with _lock:
+                entrada = _estatisticas.get(forma)
+                if entrada is not None:
+                    entrada['passos_vm'] += PASSOS_POR_CHAMADA
+                    if estado['passos'] > entrada['max_passos_vm']:
+                        entrada['max_passos_vm'] = estado['passos']
+        return 0  # Nunca interrompe a instrução
+
+    conn.set_trace_callback(_rastrear)
+    conn.set_progress_handler(_progresso, PASSOS_POR_CHAMADA)
+    return conn
+
+
+def _alertas_do_plano(plano):
+    """Identifica varrimentos completos de tabelas e B-trees temporárias no plano."""
+    alertas = []
+    for detalhe in plano:
+        if detalhe.startswith('SCAN ') and not detalhe.startswith('SCAN CONSTANT ROW'):
+            if 'COVERING INDEX' in detalhe:
+                alertas.append(f"Varrimento completo de índice: {detalhe}")
+            else:
+                alertas.append(f"Varrimento completo da tabela: {detalhe}")
+        elif 'USE TEMP B-TREE' in detalhe:
+            alertas.append(f"B-tree temporária: {detalhe}")
+    return alertas
+
+
+def capturar_planos(caminho_bd=None):
+    """
+    Executa EXPLAIN QUERY PLAN para as formas ainda sem plano, usando o exemplo
+    registado (com os valores reais) numa conexão própria, não instrumentada.
+    """
+    with _lock:
+        pendentes, _planos_pendentes[:] = list(_planos_pendentes), []
+        exemplos = {forma: _estatisticas[forma]['exemplo'] for forma in pendentes if forma in _estatisticas}
+    if not exemplos:
+        return 0
+
+    if caminho_bd is None:
+        from . import database as db  # Importação tardia: database importa este módulo
+        caminho_bd = db.DB_PATH
+    conn = sqlite3.connect(caminho_bd)
+    try:
+        for forma, exemplo in exemplos.items():
+            try:
+                plano = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {exemplo}")]
+            except sqlite3.Error as e:
+                plano = [f"(plano indisponível: {e})"]
+            with _lock:
+                entrada = _estatisticas.get(forma)
+                if entrada is not None:
+                    entrada['plano'] = plano
+                    entrada['alertas'] = _alertas_do_plano(plano)
+    finally:
+        conn.close()
+    return len(exemplos)
+
+
+def obter_estatisticas():
+    """Retorna uma cópia das estatísticas, ordenadas pelos passos da VM (mais custosas primeiro)."""
+    capturar_planos()
+    with _lock:
+        entradas = [dict(e, alertas=list(e['alertas'])) for e in _estatisticas.values()]
+    return sorted(entradas, key=lambda e: e['passos_vm'], reverse=True)
+
+
+def gerar_relatorio(diretorio=None):
+    """
+    Grava o relatório em logs/perfil_sql.json e logs/perfil_sql.txt (legível).
+    Retorna o caminho do relatório de texto, ou None se não houver dados.
+    """
+    entradas = obter_estatisticas()
+    if not entradas:
+        return None
+    diretorio = diretorio or DIRETORIO_LOGS
+    os.makedirs(diretorio, exist_ok=True)
+
+    caminho_json = os.path.join(diretorio, f"{NOME_RELATORIO}.json")
+    with open(caminho_json, 'w', encoding='utf-8') as f:
+        json.dump({'gerado_em': datetime.now().isoformat(timespec='seconds'),
+                   'passos_por_chamada': PASSOS_POR_CHAMADA, 'instrucoes': entradas}, f, indent=2, ensure_ascii=False)
+
+    com_alertas = [e for e in entradas if e['alertas']]
+    linhas = [f"Perfil de SQL - {datetime.now():%d/%m/%Y %H:%M:%S}",
+              f"{len(entradas)} formas de instrução, {len(com_alertas)} com alertas "
+              f"(passos da VM com resolução de {PASSOS_POR_CHAMADA}).", ""]
+    for e in entradas:
+        marca = "[!] " if e['alertas'] else ""
+        linhas.append(f"{marca}{e['execucoes']}x | {e['passos_vm']} passos (máx. {e['max_passos_vm']}) | {e['forma']}")
+        for detalhe in e['plano'] or []:
+            linhas.append(f"      plano: {detalhe}")
+        for alerta in e['alertas']:
+            linhas.append(f"      ALERTA: {alerta}")
+    caminho_txt = os.path.join(diretorio, f"{NOME_RELATORIO}.txt")
+    with open(caminho_txt, 'w', encoding='utf-8') as f:
+        f.write("\n".join(linhas) + "\n")
+    logging.info(f"Relatório de perfil de SQL gravado em {caminho_txt}")
+    return caminho_txt
+
+
+@atexit.register
+def _gravar_ao_sair():
+    if _ativo and _estatisticas:
+        try:
+            gerar_relatorio()
+        except Exception as e:
+            logging.error(f"Erro ao gravar o relatório de perfil de SQL: {e}", exc_info=True)
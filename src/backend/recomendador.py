@@ -0,0 +1,98 @@
+import json
+import logging
+import sqlite3
+import time
+
+import numpy as np
+
+from . import config_manager as cfg
+from . import database as db
+from . import indice_frota
+
+# --- Veículos alternativos para uma reserva em conflito ---
+# Quando o veículo escolhido está ocupado no período, sugere os mais parecidos que estão
+# livres. A semelhança é uma distância ponderada calculada de uma vez para toda a frota
+# sobre a matriz de características do índice em memória (indice_frota):
+#   marca, modelo e cor contam 0 se iguais e o peso se diferentes; ano e diária contam
+#   proporcionalmente à diferença (a diária em escala logarítmica).
+# A disponibilidade só é verificada para os candidatos mais próximos, por ordem, em lotes
+# que duplicam até haver sugestões suficientes: cada veículo é resolvido pelos índices
+# (id_veiculo, data_inicio) de reservas e manutenções, sem percorrer a tabela.
+
+# Mesmas regras de adicionar_reserva / SQL_VEICULOS_DISPONIVEIS_PERIODO (?2 = fim, ?3 = início)
+SQL_CANDIDATOS_LIVRES = """
+    SELECT v.id FROM json_each(?1) AS j
+    JOIN veiculos v ON v.id = j.value
+    WHERE v.status != 'manutenção'
+      AND NOT EXISTS (
+          SELECT 1 FROM reservas r
+          WHERE r.id_veiculo = v.id AND r.status != 'cancelada'
+            AND r.data_inicio <= ?2 AND r.data_fim >= ?3
+      )
+      AND NOT EXISTS (
+          SELECT 1 FROM manutencoes m
+          WHERE m.id_veiculo = v.id AND m.status = 'planeada'
+            AND m.data_inicio <= ?2 AND m.data_fim >= ?3
+      )
+"""
+
+LOTE_INICIAL = 20
+
+
+def distancias(matriz, posicao, pesos=None):
+    """Distância ponderada de cada linha da matriz à linha 'posicao' (valores em falta: infinito)."""
+    if pesos is None:
+        config = cfg.obter_secao('recomendador')
+        pesos = np.array([config['peso_marca'], config['peso_modelo'], config['peso_cor'],
+                          config['peso_ano'], config['peso_valor']])
+    diferencas = np.abs(matriz - matriz[posicao])
+    diferencas[:, :3] = diferencas[:, :3] > 0  # Categorias: igual ou diferente
+    return np.nan_to_num(diferencas @ pesos, nan=np.inf)
+
+
+def _livres(conn, ids, data_inicio, data_fim):
+    return {row[0] for row in conn.execute(SQL_CANDIDATOS_LIVRES, (json.dumps(ids), data_fim, data_inicio))}
+
+
+def recomendar_alternativas(id_veiculo, data_inicio, data_fim, limite=None, indice=None):
+    """
+    Até 'limite' veículos livres em [data_inicio, data_fim], do mais para o menos parecido
+    com 'id_veiculo', como dicionários do índice da frota com a 'distancia'.
+    Usa o índice partilhado tal como está (sem sincronizar: a releitura é feita em segundo
+    plano pelo SincronizadorIndice); a disponibilidade é sempre lida do banco.
+    Retorna [] se o veículo não existir, se o índice ainda não foi construído ou em caso de erro.
+    """
+    limite = limite or cfg.obter('recomendador', 'sugestoes')
+    inicio = time.perf_counter()
+    try:
+        indice = indice or indice_frota.indice_atual()
+        if indice is None:
+            logging.info("Alternativas: índice da frota ainda em construção, sem sugestões.")
+            return []
+        posicao = indice.posicao_de.get(id_veiculo)
+        if posicao is None:
+            return []
+        distancia = distancias(indice.caracteristicas(), posicao)
+        ordem = np.argsort(distancia, kind='stable')
+        ordem = ordem[ordem != posicao]
+
+        escolhidas = []
+        tamanho, feitos = max(LOTE_INICIAL, 4 * limite), 0
+        with db.conectar_bd() as conn:
+            while len(escolhidas) < limite and feitos < len(ordem):
+                lote = ordem[feitos:feitos + tamanho]
+                livres = _livres(conn, indice.ids[lote].tolist(), data_inicio, data_fim)
+                escolhidas += [p for p in lote.tolist() if int(indice.ids[p]) in livres]
+                feitos += len(lote)
+                tamanho *= 2
+    except sqlite3.Error as e:
+        logging.error(f"Erro ao procurar veículos alternativos ao veículo {id_veiculo}: {e}", exc_info=True)
+        return []
+
+    escolhidas = escolhidas[:limite]
+    sugestoes = indice.linhas(escolhidas)
+    for sugestao, p in zip(sugestoes, escolhidas):
+        sugestao['distancia'] = float(distancia[p])
+    logging.debug(f"Alternativas ao veículo {id_veiculo}: {len(sugestoes)} em "
+                  f"{(time.perf_counter() - inicio) * 1000:.1f} ms ({feitos} verificados).")
+    return sugestoes
@@ -0,0 +1,196 @@
+import logging
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from . import config_manager as cfg
+from . import database as db
+from . import analytics_snapshot, arquivo_reservas, backup, planeador_manutencao, status_reconciler
+
+FORMATO_DATA = '%Y-%m-%d %H:%M:%S'
+
+SQL_REGISTAR_TAREFA = """
+    INSERT OR IGNORE INTO tarefas_agendadas (nome, proxima_execucao) VALUES (?, ?)
+"""
+
+# Aquisição do bloqueio: só um posto consegue mudar 'bloqueado_por' para o seu
+# identificador enquanto a tarefa está devida e sem bloqueio válido.
+SQL_ADQUIRIR_BLOQUEIO = """
+    UPDATE tarefas_agendadas
+    SET bloqueado_por = ?, bloqueado_ate = ?
+    WHERE nome = ?
+      AND (proxima_execucao IS NULL OR proxima_execucao <= ?)
+      AND (bloqueado_ate IS NULL OR bloqueado_ate < ?)
+"""
+
+SQL_LIBERTAR_BLOQUEIO = """
+    UPDATE tarefas_agendadas
+    SET ultima_execucao = ?, proxima_execucao = ?, ultimo_resultado = ?,
+        bloqueado_por = NULL, bloqueado_ate = NULL
+    WHERE nome = ? AND bloqueado_por = ?
+"""
+
+
+class Tarefa:
+    """Uma tarefa periódica registada no agendador."""
+
+    def __init__(self, nome, funcao, intervalo, jitter=0.0, duracao_maxima=None, thread_propria=False):
+        self.nome = nome
+        self.funcao = funcao
+        self.intervalo = intervalo
+        self.jitter = jitter
+        # Tarefas longas (backup) correm numa thread à parte para não atrasar as outras
+        self.thread_propria = thread_propria
+        # Tempo após o qual um bloqueio é considerado abandonado (posto que caiu a meio)
+        self.duracao_maxima = duracao_maxima or max(intervalo, 60)
+
+    def proxima_execucao(self, a_partir_de):
+        atraso = self.intervalo + random.uniform(0, self.jitter)
+        return a_partir_de + timedelta(seconds=atraso)
+
+
+class Agendador:
+    """
+    Agendador de tarefas em processo, numa thread daemon.
+
+    O estado (última/próxima execução) fica na tabela 'tarefas_agendadas', por isso
+    sobrevive a reinícios e é partilhado pelos postos que usam o mesmo banco.
+    Antes de executar, cada posto tenta adquirir um bloqueio com prazo na própria
+    linha da tarefa; só quem o conseguir executa. O jitter evita que os postos
+    acordem todos ao mesmo tempo. As tarefas com 'thread_propria' correm numa thread
+    só delas (uma execução de cada vez), e o ciclo segue para as restantes.
+    """
+
+    def __init__(self, intervalo_verificacao=15.0):
+        self.intervalo_verificacao = intervalo_verificacao
+        self.identificador = f"{socket.gethostname()}:{os.getpid()}"
+        self.tarefas = {}
+        self._parar = threading.Event()
+        self._thread = None
+        self._em_curso = {}  # nome -> thread das tarefas com thread própria
+
+    def registrar(self, nome, funcao, intervalo, jitter=0.0, duracao_maxima=None, thread_propria=False):
+        """Regista uma tarefa periódica. 'funcao' não recebe argumentos e devolve um resultado registável."""
+        self.tarefas[nome] = Tarefa(nome, funcao, intervalo, jitter, duracao_maxima, thread_propria)
+
+    def iniciar(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._registrar_no_banco()
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._loop, name="agendador", daemon=True)
+        self._thread.start()
+        logging.info(f"Agendador iniciado com {len(self.tarefas)} tarefa(s) ({self.identificador}).")
+
+    def parar(self, timeout=5.0):
+        self._parar.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        for thread in list(self._em_curso.values()):
+            thread.join(timeout)
+
+    def _registrar_no_banco(self):
+        agora = datetime.now()
+        try:
+            with db.conectar_bd() as conn:
+                for tarefa in self.tarefas.values():
+                    # A primeira execução também tem jitter, para espalhar os postos
+                    primeira = agora + timedelta(seconds=random.uniform(0, tarefa.jitter))
+                    conn.execute(SQL_REGISTAR_TAREFA, (tarefa.nome, primeira.strftime(FORMATO_DATA)))
+                conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao registar tarefas do agendador: {e}", exc_info=True)
+
+    def _loop(self):
+        # Pequeno atraso inicial aleatório para desencontrar postos que arrancam juntos
+        if self._parar.wait(random.uniform(0, self.intervalo_verificacao)):
+            return
+        while not self._parar.is_set():
+            self.verificar_tarefas()
+            self._parar.wait(self.intervalo_verificacao)
+
+    def verificar_tarefas(self):
+        """Uma volta do ciclo: executa as tarefas devidas (as de thread própria sem esperar por elas)."""
+        for tarefa in list(self.tarefas.values()):
+            if self._parar.is_set():
+                break
+            if not tarefa.thread_propria:
+                self.executar_se_devida(tarefa.nome)
+                continue
+            em_curso = self._em_curso.get(tarefa.nome)
+            if em_curso is not None and em_curso.is_alive():
+                continue  # Ainda a correr desde uma volta anterior
+            thread = threading.Thread(target=self.executar_se_devida, args=(tarefa.nome,),
+                                      name=f"agendador-{tarefa.nome}", daemon=True)
+            self._em_curso[tarefa.nome] = thread
+            thread.start()
+
+    def _adquirir_bloqueio(self, tarefa, agora):
+        agora_str = agora.strftime(FORMATO_DATA)
+        bloqueado_ate = (agora + timedelta(seconds=tarefa.duracao_maxima)).strftime(FORMATO_DATA)
+        with db.conectar_bd() as conn:
+            cursor = conn.execute(SQL_ADQUIRIR_BLOQUEIO,
+                                  (self.identificador, bloqueado_ate, tarefa.nome, agora_str, agora_str))
+            conn.commit()
+            return cursor.rowcount == 1
+
+    def _libertar_bloqueio(self, tarefa, resultado):
+        agora = datetime.now()
+        proxima = tarefa.proxima_execucao(agora)
+        with db.conectar_bd() as conn:
+            conn.execute(SQL_LIBERTAR_BLOQUEIO, (agora.strftime(FORMATO_DATA), proxima.strftime(FORMATO_DATA),
+                                                 str(resultado)[:200], tarefa.nome, self.identificador))
+            conn.commit()
+
+    def executar_se_devida(self, nome):
+        """
+        Executa a tarefa se estiver devida e se este posto conseguir o bloqueio.
+        Retorna True se a tarefa foi executada aqui.
+        """
+        tarefa = self.tarefas[nome]
+        try:
+            if not self._adquirir_bloqueio(tarefa, datetime.now()):
+                return False
+        except sqlite3.Error as e:
+            # Banco ocupado por outro posto: tenta-se de novo na próxima verificação
+            logging.warning(f"Agendador: não foi possível adquirir o bloqueio de '{nome}': {e}")
+            return False
+
+        inicio = time.perf_counter()
+        try:
+            resultado = tarefa.funcao()
+        except Exception as e:
+            resultado = f"erro: {e}"
+            logging.error(f"Agendador: tarefa '{nome}' falhou: {e}", exc_info=True)
+        duracao = time.perf_counter() - inicio
+        logging.info(f"Agendador: tarefa '{nome}' executada em {duracao:.3f}s (resultado: {resultado}).")
+
+        try:
+            self._libertar_bloqueio(tarefa, resultado)
+        except sqlite3.Error as e:
+            # O bloqueio expira sozinho após 'duracao_maxima'
+            logging.error(f"Agendador: erro ao gravar o estado de '{nome}': {e}", exc_info=True)
+        return True
+
+
+def criar_agendador_padrao():
+    """Cria o agendador com as varreduras de manutenção e de status das reservas e o snapshot analítico."""
+    # Intervalos (em segundos) da secção "agendador" do config.json
+    config = cfg.obter_secao('agendador')
+    agendador = Agendador()
+    agendador.registrar('reconciliar_status', status_reconciler.reconciliar_status,
+                        config['intervalo_reconciliar_status'], jitter=30)
+    agendador.registrar('planear_manutencoes', planeador_manutencao.executar_ciclo,
+                        config['intervalo_manutencao_revisoes'], jitter=5 * 60)
+    agendador.registrar('arquivar_reservas', arquivo_reservas.arquivar_reservas,
+                        config['intervalo_arquivar_reservas'], jitter=30 * 60)
+    agendador.registrar('exportar_snapshot', analytics_snapshot.atualizar_snapshot,
+                        config['intervalo_snapshot_analitico'], jitter=60)
+    agendador.registrar('backup', backup.criar_backup, config['intervalo_backup'], jitter=30 * 60,
+                        duracao_maxima=60 * 60, thread_propria=True)
+    return agendador
@@ -0,0 +1,315 @@
+import logging
+import sqlite3
+
+from . import database as db
+
+# --- Migrações do Schema ---
+# Cada entrada é uma lista de comandos SQL aplicados numa única transação.
+# A versão atual do banco fica guardada em PRAGMA user_version, por isso
+# cada migração é executada exatamente uma vez, mesmo com vários postos
+# a partilhar o mesmo arquivo. Novas migrações são SEMPRE adicionadas no fim.
+
+MIGRACOES = [
+    # 1: Tabelas base (mesmas colunas usadas pelo backend: nif/cc nos clientes)
+    [
+        """
+        CREATE TABLE IF NOT EXISTS utilizadores (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            email TEXT NOT NULL UNIQUE,
+            senha TEXT NOT NULL,
+            cargo TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS clientes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome_completo TEXT NOT NULL,
+            nif NUMERIC NOT NULL UNIQUE,
+            telefone NUMERIC,
+            email TEXT UNIQUE,
+            cc TEXT NOT NULL UNIQUE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS veiculos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            marca TEXT NOT NULL,
+            modelo TEXT NOT NULL,
+            ano INTEGER NOT NULL,
+            placa TEXT NOT NULL UNIQUE,
+            cor TEXT,
+            valor_diaria REAL NOT NULL,
+            status TEXT NOT NULL DEFAULT 'disponível',
+            data_proxima_revisao DATE NOT NULL,
+            imagem_path TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS formas_pagamento (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL UNIQUE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS reservas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            id_cliente INTEGER NOT NULL,
+            id_veiculo INTEGER NOT NULL,
+            id_forma_pagamento INTEGER,
+            data_inicio DATETIME NOT NULL,
+            data_fim DATETIME NOT NULL,
+            valor_total REAL,
+            status TEXT NOT NULL DEFAULT 'ativa',
+            FOREIGN KEY (id_cliente) REFERENCES clientes(id),
+            FOREIGN KEY (id_veiculo) REFERENCES veiculos(id),
+            FOREIGN KEY (id_forma_pagamento) REFERENCES formas_pagamento(id)
+        )
+        """,
+    ],
+    # 2: Rastreio de alterações em reservas para exportações incrementais.
+    # Cada INSERT/UPDATE/DELETE recebe um número de versão crescente. Como o SQLite
+    # serializa os escritores, a ordem das versões é a ordem dos commits.
+    [
+        """
+        CREATE TABLE IF NOT EXISTS sequencia_alteracoes (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            valor INTEGER NOT NULL
+        )
+        """,
+        "INSERT OR IGNORE INTO sequencia_alteracoes (id, valor) VALUES (1, 1)",
+        "ALTER TABLE reservas ADD COLUMN versao_alteracao INTEGER NOT NULL DEFAULT 1",
+        "CREATE INDEX IF NOT EXISTS idx_reservas_versao ON reservas (versao_alteracao)",
+        """
+        CREATE TABLE IF NOT EXISTS reservas_removidas (
+            id_reserva INTEGER NOT NULL,
+            versao_alteracao INTEGER NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_reservas_removidas_versao ON reservas_removidas (versao_alteracao)",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_reservas_versao_insert AFTER INSERT ON reservas
+        BEGIN
+            UPDATE sequencia_alteracoes SET valor = valor + 1 WHERE id = 1;
+            UPDATE reservas SET versao_alteracao = (SELECT valor FROM sequencia_alteracoes WHERE id = 1)
+            WHERE id = NEW.id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_reservas_versao_update
+        AFTER UPDATE OF id_cliente, id_veiculo, id_forma_pagamento, data_inicio, data_fim, valor_total, status
+        ON reservas
+        BEGIN
+            UPDATE sequencia_alteracoes SET valor = valor + 1 WHERE id = 1;
+            UPDATE reservas SET versao_alteracao = (SELECT valor FROM sequencia_alteracoes WHERE id = 1)
+            WHERE id = NEW.id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_reservas_versao_delete AFTER DELETE ON reservas
+        BEGIN
+            UPDATE sequencia_alteracoes SET valor = valor + 1 WHERE id = 1;
+            INSERT INTO reservas_removidas (id_reserva, versao_alteracao)
+            VALUES (OLD.id, (SELECT valor FROM sequencia_alteracoes WHERE id = 1));
+        END
+        """,
+    ],
+    # 3: Estado persistido do agendador de tarefas (partilhado entre postos) e
+    # índices para as varreduras periódicas de status.
+    [
+        """
+        CREATE TABLE IF NOT EXISTS tarefas_agendadas (
+            nome TEXT PRIMARY KEY,
+            ultima_execucao TEXT,
+            proxima_execucao TEXT,
+            bloqueado_por TEXT,
+            bloqueado_ate TEXT,
+            ultimo_resultado TEXT
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_reservas_status_fim ON reservas (status, data_fim)",
+        "CREATE INDEX IF NOT EXISTS idx_veiculos_revisao ON veiculos (data_proxima_revisao)",
+    ],
+    # 4: Marcas d'água persistidas (reconciliador de status) e veículo nas marcas de remoção,
+    # para saber que veículo libertar quando uma reserva é apagada.
+    [
+        """
+        CREATE TABLE IF NOT EXISTS marcas_dagua (
+            nome TEXT PRIMARY KEY,
+            valor TEXT NOT NULL
+        )
+        """,
+        "ALTER TABLE reservas_removidas ADD COLUMN id_veiculo INTEGER",
+        "DROP TRIGGER IF EXISTS trg_reservas_versao_delete",
+        """
+        CREATE TRIGGER trg_reservas_versao_delete AFTER DELETE ON reservas
+        BEGIN
+            UPDATE sequencia_alteracoes SET valor = valor + 1 WHERE id = 1;
+            INSERT INTO reservas_removidas (id_reserva, id_veiculo, versao_alteracao)
+            VALUES (OLD.id, OLD.id_veiculo, (SELECT valor FROM sequencia_alteracoes WHERE id = 1));
+        END
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_reservas_status_inicio ON reservas (status, data_inicio)",
+        "CREATE INDEX IF NOT EXISTS idx_reservas_veiculo_inicio ON reservas (id_veiculo, data_inicio)",
+    ],
+    # 5: Gerações de escrita por tabela. Qualquer escrita incrementa a geração da tabela,
+    # o que permite validar caches (ETag da API, índices em memória) com uma única leitura.
+    [
+        """
+        CREATE TABLE IF NOT EXISTS geracoes_tabelas (
+            tabela TEXT PRIMARY KEY,
+            geracao INTEGER NOT NULL
+        )
+        """,
+        "INSERT OR IGNORE INTO geracoes_tabelas (tabela, geracao) VALUES ('veiculos', 1), ('clientes', 1), ('reservas', 1)",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_veiculos_geracao_insert AFTER INSERT ON veiculos
+        BEGIN
+            UPDATE geracoes_tabelas SET geracao = geracao + 1 WHERE tabela = 'veiculos';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_veiculos_geracao_update AFTER UPDATE ON veiculos
+        BEGIN
+            UPDATE geracoes_tabelas SET geracao = geracao + 1 WHERE tabela = 'veiculos';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_veiculos_geracao_delete AFTER DELETE ON veiculos
+        BEGIN
+            UPDATE geracoes_tabelas SET geracao = geracao + 1 WHERE tabela = 'veiculos';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_clientes_geracao_insert AFTER INSERT ON clientes
+        BEGIN
+            UPDATE geracoes_tabelas SET geracao = geracao + 1 WHERE tabela = 'clientes';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_clientes_geracao_update AFTER UPDATE ON clientes
+        BEGIN
+            UPDATE geracoes_tabelas SET geracao = geracao + 1 WHERE tabela = 'clientes';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_clientes_geracao_delete AFTER DELETE ON clientes
+        BEGIN
+            UPDATE geracoes_tabelas SET geracao = geracao + 1 WHERE tabela = 'clientes';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_reservas_geracao_insert AFTER INSERT ON reservas
+        BEGIN
+            UPDATE geracoes_tabelas SET geracao = geracao + 1 WHERE tabela = 'reservas';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_reservas_geracao_update AFTER UPDATE ON reservas
+        BEGIN
+            UPDATE geracoes_tabelas SET geracao = geracao + 1 WHERE tabela = 'reservas';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_reservas_geracao_delete AFTER DELETE ON reservas
+        BEGIN
+            UPDATE geracoes_tabelas SET geracao = geracao + 1 WHERE tabela = 'reservas';
+        END
+        """,
+    ],
+    # 6: Histórico de reservas por cliente (ficha do cliente) sem varrer a tabela.
+    [
+        "CREATE INDEX IF NOT EXISTS idx_reservas_cliente_inicio ON reservas (id_cliente, data_inicio)",
+    ],
+    # 7: Blocos de manutenção planeados (planeador_manutencao.py). Um bloco 'planeada' torna
+    # o veículo indisponível para reservas nesse período.
+    [
+        """
+        CREATE TABLE IF NOT EXISTS manutencoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            id_veiculo INTEGER NOT NULL,
+            data_inicio DATETIME NOT NULL,
+            data_fim DATETIME NOT NULL,
+            status TEXT NOT NULL DEFAULT 'planeada',
+            criada_em DATETIME NOT NULL,
+            FOREIGN KEY (id_veiculo) REFERENCES veiculos(id) ON DELETE CASCADE
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_manutencoes_veiculo_inicio ON manutencoes (id_veiculo, data_inicio)",
+        "CREATE INDEX IF NOT EXISTS idx_manutencoes_status_fim ON manutencoes (status, data_fim)",
+    ],
+    # 8: Registo da devolução do veículo. O reconciliador conclui as reservas pela data de fim;
+    # enquanto 'data_devolucao' estiver vazia o veículo não foi entregue (devolução em atraso).
+    # As reservas já concluídas contam como entregues na data de fim.
+    [
+        "ALTER TABLE reservas ADD COLUMN data_devolucao DATETIME",
+        "UPDATE reservas SET data_devolucao = data_fim WHERE status = 'concluída'",
+        """
+        CREATE INDEX IF NOT EXISTS idx_reservas_por_devolver ON reservas (status, data_devolucao)
+        WHERE data_devolucao IS NULL
+        """,
+        "DROP TRIGGER IF EXISTS trg_reservas_versao_update",
+        """
+        CREATE TRIGGER trg_reservas_versao_update
+        AFTER UPDATE OF id_cliente, id_veiculo, id_forma_pagamento, data_inicio, data_fim, valor_total, status,
+                        data_devolucao
+        ON reservas
+        BEGIN
+            UPDATE sequencia_alteracoes SET valor = valor + 1 WHERE id = 1;
+            UPDATE reservas SET versao_alteracao = (SELECT valor FROM sequencia_alteracoes WHERE id = 1)
+            WHERE id = NEW.id;
+        END
+        """,
+    ],
+]
+
+VERSAO_ATUAL = len(MIGRACOES)
+
+
+def obter_versao(conn):
+    """Retorna a versão do schema gravada no banco."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def aplicar_migracoes(conn=None):
+    """
+    Aplica as migrações pendentes. É seguro chamar em cada arranque:
+    se o banco já estiver atualizado, custa apenas uma leitura de PRAGMA.
+    Retorna a versão final do schema.
+    """
+    conn_propria = conn is None
+    if conn_propria:
+        conn = db.conectar_bd()
+        if not conn:
+            return None
+
+    try:
+        if obter_versao(conn) >= VERSAO_ATUAL:
+            return VERSAO_ATUAL
+
+        isolation_anterior = conn.isolation_level
+        conn.isolation_level = None  # Controlamos a transação manualmente
+        try:
+            # BEGIN IMMEDIATE garante que só um posto migra de cada vez;
+            # a versão é relida dentro da transação.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                versao = obter_versao(conn)
+                for numero in range(versao + 1, VERSAO_ATUAL + 1):
+                    for comando in MIGRACOES[numero - 1]:
+                        conn.execute(comando)
+                    conn.execute(f"PRAGMA user_version = {numero}")
+                    logging.info(f"Migração {numero} do schema aplicada.")
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.isolation_level = isolation_anterior
+        return VERSAO_ATUAL
+    except sqlite3.Error as e:
+        logging.error(f"Erro ao aplicar migrações do schema: {e}", exc_info=True)
+        raise
+    finally:
+        if conn_propria:
+            conn.close()
@@ -0,0 +1,217 @@
+import re
+import sqlite3
+
+from . import database as db
+from . import (alertas, analytics_snapshot, arquivo_reservas, calendario, deduplicacao, indice_frota,
+               otimizador_atribuicao, planeador_manutencao, recomendador, scheduler, status_reconciler)
+
+# --- Registo das instruções SQL do backend ---
+# Cada entrada junta a instrução, parâmetros representativos (só servem para o
+# EXPLAIN QUERY PLAN) e se pertence a um caminho "quente" (chamada por cada ação
+# do utilizador, pedido da API ou ciclo do reconciliador). As instruções quentes não
+# podem varrer por completo as tabelas grandes: tests/test_query_plans.py falha se o
+# plano de alguma delas regredir para SCAN (ou índice automático) em TABELAS_GRANDES.
+# Listagens completas (exportação, relatórios, paginação) ficam marcadas como não quentes.
+
+TABELAS_GRANDES = ('reservas', 'clientes')
+
+_AGORA = '2025-06-15 12:00:00'
+_INICIO_DIA = '2025-06-15 00:00:00'
+_FIM_DIA = '2025-06-15 23:59:59'
+_DAQUI_A_7_DIAS = '2025-06-22 12:00:00'
+
+_PARAMS_RECONCILIADOR = {'agora': _AGORA, 'desde': '2025-06-15 11:55:00', 'versao': 1000}
+
+
+def _consulta(nome, sql, parametros=(), quente=True):
+    return {'nome': nome, 'sql': sql, 'parametros': parametros, 'quente': quente}
+
+
+CONSULTAS = [
+    # database
+    _consulta('listar_veiculos', db.SQL_LISTAR_VEICULOS,
+              (_AGORA, _INICIO_DIA, _FIM_DIA, _AGORA, _DAQUI_A_7_DIAS)),
+    _consulta('veiculo_operacional', db.SQL_VEICULO_OPERACIONAL,
+              (_AGORA, _INICIO_DIA, _FIM_DIA, _AGORA, _DAQUI_A_7_DIAS, 1)),
+    _consulta('veiculos_devolucao_hoje', db.SQL_VEICULOS_DEVOLUCAO_HOJE, (_INICIO_DIA, _FIM_DIA)),
+    _consulta('reservas_por_veiculo', db.SQL_RESERVAS_POR_VEICULO, (1,)),
+    _consulta('reservas_por_cliente', db.SQL_RESERVAS_POR_CLIENTE, (1,)),
+    _consulta('verificar_disponibilidade', db.SQL_VERIFICAR_DISPONIBILIDADE, (1, _DAQUI_A_7_DIAS, _AGORA)),
+    _consulta('verificar_manutencao', db.SQL_VERIFICAR_MANUTENCAO, (1, _DAQUI_A_7_DIAS, _AGORA)),
+    _consulta('verificar_disponibilidade_edicao', db.SQL_VERIFICAR_DISPONIBILIDADE + " AND id != ?",
+              (1, _DAQUI_A_7_DIAS, _AGORA, 1)),
+    _consulta('veiculos_disponiveis_periodo', db.SQL_VEICULOS_DISPONIVEIS_PERIODO, (_DAQUI_A_7_DIAS, _AGORA)),
+    _consulta('buscar_reserva_por_id', db.SQL_BUSCAR_RESERVA_POR_ID, (1,)),
+    _consulta('buscar_cliente_por_id', db.SQL_BUSCAR_CLIENTE_POR_ID, (1,)),
+    _consulta('clientes_existentes', db.SQL_CLIENTES_EXISTENTES, ('[1, 2, 3]',)),
+    _consulta('formas_pagamento_existentes', db.SQL_FORMAS_PAGAMENTO_EXISTENTES, ('[1, 2]',)),
+    _consulta('atualizar_reserva', "UPDATE reservas SET data_inicio = ?, data_fim = ? WHERE id = ?",
+              (_AGORA, _DAQUI_A_7_DIAS, 1)),
+    _consulta('deletar_reserva', db.SQL_DELETAR_RESERVA, (1,)),
+    _consulta('registar_devolucao', db.SQL_REGISTAR_DEVOLUCAO, (_AGORA, 1)),
+    _consulta('adicionar_cliente', db.SQL_ADICIONAR_CLIENTE, ('Nome', '123456789', '910000000', 'a@b.pt', '12345678')),
+    _consulta('atualizar_cliente', db.sql_atualizar_por_id('clientes', ('telefone', 'email')), ('910000000', 'a@b.pt', 1)),
+    _consulta('atualizar_veiculo', db.sql_atualizar_por_id('veiculos', ('status',)), ('Disponível', 1)),
+    _consulta('deletar_cliente', "DELETE FROM clientes WHERE id = ?", (1,)),
+    _consulta('revisoes_proximas', db.SQL_REVISOES_PROXIMAS, ('2025-06-15', '2025-06-30')),
+    _consulta('revisoes_vencidas', db.SQL_REVISOES_VENCIDAS, ('2025-06-15',)),
+    _consulta('colocar_em_manutencao', db.SQL_COLOCAR_EM_MANUTENCAO, ('2025-06-30',)),
+    _consulta('geracoes_tabelas', db.SQL_GERACOES_TABELAS),
+    # Varrimento pela chave primária, em ordem inversa, que para ao fim de LIMIT linhas
+    _consulta('ultimos_clientes', db.SQL_ULTIMOS_CLIENTES, (5,), quente=False),
+    _consulta('listar_clientes', db.SQL_LISTAR_CLIENTES, quente=False),
+    _consulta('listar_reservas', db.SQL_LISTAR_RESERVAS, quente=False),
+    _consulta('reservas_detalhadas', db.SQL_RESERVAS_DETALHADAS, quente=False),
+    _consulta('listar_clientes_paginado', f"{db.SQL_LISTAR_CLIENTES} LIMIT ? OFFSET ?", (100, 0), quente=False),
+    _consulta('reservas_detalhadas_paginado', f"{db.SQL_RESERVAS_DETALHADAS} LIMIT ? OFFSET ?", (100, 0),
+              quente=False),
+
+    # status_reconciler
+    _consulta('libertar_encerradas', status_reconciler.SQL_LIBERTAR_ENCERRADAS, _PARAMS_RECONCILIADOR),
+    _consulta('concluir_encerradas', status_reconciler.SQL_CONCLUIR_ENCERRADAS, _PARAMS_RECONCILIADOR),
+    _consulta('libertar_alteradas', status_reconciler.SQL_LIBERTAR_ALTERADAS, _PARAMS_RECONCILIADOR),
+    _consulta('marcar_iniciadas', status_reconciler.SQL_MARCAR_INICIADAS, _PARAMS_RECONCILIADOR),
+    _consulta('libertar_todos', status_reconciler.SQL_LIBERTAR_TODOS, _PARAMS_RECONCILIADOR),
+    _consulta('marcar_todos_alugados', status_reconciler.SQL_MARCAR_TODOS_ALUGADOS, _PARAMS_RECONCILIADOR),
+    _consulta('versao_atual', status_reconciler.SQL_VERSAO_ATUAL),
+    _consulta('ler_marca', status_reconciler.SQL_LER_MARCA, (status_reconciler.MARCA_VERSAO,)),
+    _consulta('gravar_marca', status_reconciler.SQL_GRAVAR_MARCA, (status_reconciler.MARCA_VERSAO, 0)),
+
+    # scheduler
+    _consulta('registar_tarefa', scheduler.SQL_REGISTAR_TAREFA, ('tarefa', _AGORA)),
+    _consulta('adquirir_bloqueio', scheduler.SQL_ADQUIRIR_BLOQUEIO, ('posto', _DAQUI_A_7_DIAS, 'tarefa', _AGORA, _AGORA)),
+    _consulta('libertar_bloqueio', scheduler.SQL_LIBERTAR_BLOQUEIO, (_AGORA, _DAQUI_A_7_DIAS, 'ok', 'tarefa', 'posto')),
+
+    # analytics_snapshot (atualização incremental: só as versões novas)
+    _consulta('snapshot_reservas', analytics_snapshot.SQL_SNAPSHOT_RESERVAS, (1000,)),
+    _consulta('removidas_desde', analytics_snapshot.SQL_REMOVIDAS_DESDE, (1000,)),
+    _consulta('snapshot_versao_atual', analytics_snapshot.SQL_VERSAO_ATUAL),
+    _consulta('snapshot_arquivadas', analytics_snapshot.SQL_SNAPSHOT_ARQUIVADAS, (0,), quente=False),
+
+    # arquivo_reservas (precisa do arquivo anexado: ver preparar_conexao)
+    _consulta('arquivo_vista_historico', arquivo_reservas.SQL_VISTA_HISTORICO, quente=False),
+    _consulta('arquivo_selecionar_lote', arquivo_reservas.SQL_SELECIONAR_LOTE,
+              (*arquivo_reservas.STATUS_ARQUIVAVEIS, _AGORA, 5000)),
+    _consulta('arquivo_copiar_lote', arquivo_reservas.SQL_COPIAR_LOTE, (_AGORA,)),
+    _consulta('arquivo_apagar_lote', arquivo_reservas.SQL_APAGAR_LOTE),
+    _consulta('arquivo_versao_atual', arquivo_reservas.SQL_VERSAO_ATUAL),
+    _consulta('arquivo_retirar_lapides', arquivo_reservas.SQL_RETIRAR_LAPIDES, (1000,)),
+    _consulta('arquivadas_por_veiculo', arquivo_reservas.SQL_ARQUIVADAS_POR_VEICULO, (1,)),
+    _consulta('arquivadas_por_cliente', arquivo_reservas.SQL_ARQUIVADAS_POR_CLIENTE, (1,)),
+
+    # deduplicacao (construção do índice em memória: lê a tabela inteira uma vez)
+    _consulta('clientes_dedup', deduplicacao.SQL_CLIENTES_DEDUP, quente=False),
+
+    # indice_frota (atualização incremental: veículos com reservas alteradas desde uma versão)
+    _consulta('veiculos_reservas_alteradas', indice_frota.SQL_VEICULOS_ALTERADOS, (1, 1)),
+
+    # calendario (reservas dos veículos visíveis na janela de datas visível)
+    _consulta('reservas_janela', calendario.SQL_RESERVAS_JANELA,
+              ('[1, 2, 3]', _INICIO_DIA, _DAQUI_A_7_DIAS, '[1, 2, 3]', _INICIO_DIA, _INICIO_DIA)),
+    _consulta('arquivadas_janela', calendario.SQL_ARQUIVADAS_JANELA,
+              ('[1, 2, 3]', _INICIO_DIA, _DAQUI_A_7_DIAS, '[1, 2, 3]', _INICIO_DIA, _INICIO_DIA)),
+
+    # planeador_manutencao (a carga é um lote periódico; as transições de estado correm a cada ciclo)
+    _consulta('revisoes_a_planear', planeador_manutencao.SQL_REVISOES_A_PLANEAR, ('2025-07-15',), quente=False),
+    _consulta('ocupacao_reservas', planeador_manutencao.SQL_OCUPACAO_RESERVAS, (_AGORA, _DAQUI_A_7_DIAS)),
+    _consulta('ocupacao_manutencoes', planeador_manutencao.SQL_OCUPACAO_MANUTENCOES, (_AGORA,)),
+    _consulta('inserir_manutencao', planeador_manutencao.SQL_INSERIR_MANUTENCAO, (1, _INICIO_DIA, _FIM_DIA, _AGORA)),
+    _consulta('iniciar_manutencoes', planeador_manutencao.SQL_INICIAR_MANUTENCOES, {'agora': _AGORA}),
+    _consulta('libertar_manutencoes', planeador_manutencao.SQL_LIBERTAR_MANUTENCOES,
+              {'agora': _AGORA, 'intervalo': 365}),
+    _consulta('concluir_manutencoes', planeador_manutencao.SQL_CONCLUIR_MANUTENCOES, {'agora': _AGORA}),
+
+    # otimizador_atribuicao (a frota inteira entra em memória; as ocupações vêm pelo índice de status/fim)
+    _consulta('veiculos_atribuiveis', otimizador_atribuicao.SQL_VEICULOS_ATRIBUIVEIS, quente=False),
+    _consulta('ocupacoes_futuras', otimizador_atribuicao.SQL_OCUPACOES_FUTURAS, (_AGORA,)),
+    _consulta('manutencoes_futuras', otimizador_atribuicao.SQL_MANUTENCOES_FUTURAS, (_AGORA,)),
+    _consulta('versao_reserva', otimizador_atribuicao.SQL_VERSAO_RESERVA, (1,)),
+    _consulta('mudar_veiculo', otimizador_atribuicao.SQL_MUDAR_VEICULO, (2, 1)),
+
+    # recomendador (no caminho da criação de uma reserva em conflito)
+    _consulta('candidatos_livres', recomendador.SQL_CANDIDATOS_LIVRES, ('[1, 2, 3]', _DAQUI_A_7_DIAS, _AGORA)),
+
+    # alertas (leitura completa no arranque e à meia-noite; as alterações a cada verificação)
+    _consulta('alertas_revisoes_janela', alertas.SQL_REVISOES_JANELA, ('2025-06-30',)),
+    _consulta('alertas_reservas_janela', alertas.SQL_RESERVAS_JANELA, (_DAQUI_A_7_DIAS,)),
+    _consulta('alertas_reservas_alteradas', alertas.SQL_RESERVAS_ALTERADAS, (0,)),
+    _consulta('alertas_reservas_removidas', alertas.SQL_RESERVAS_REMOVIDAS, (0,)),
+]
+
+_MODULOS = (db, status_reconciler, scheduler, analytics_snapshot, arquivo_reservas, deduplicacao, indice_frota,
+            calendario, planeador_manutencao, otimizador_atribuicao, recomendador, alertas)
+
+_RE_ALIAS = re.compile(r"\b(?:FROM|JOIN|UPDATE|INTO)\s+(?:\w+\.)?(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_RE_PASSO = re.compile(r"^(SCAN|SEARCH)\s+(?:\w+\.)?(\w+)(.*)$")
+_PALAVRAS_RESERVADAS = {'WHERE', 'JOIN', 'LEFT', 'INNER', 'ON', 'ORDER', 'GROUP', 'SET', 'LIMIT', 'UNION'}
+
+
+def instrucoes_nao_registadas():
+    """Retorna os nomes 'modulo.SQL_*' cujas instruções não constam do registo."""
+    registadas = {c['sql'] for c in CONSULTAS}
+    em_falta = []
+    for modulo in _MODULOS:
+        for nome, valor in vars(modulo).items():
+            if nome.startswith('SQL_') and isinstance(valor, str) and valor not in registadas:
+                em_falta.append(f"{modulo.__name__.rsplit('.', 1)[-1]}.{nome}")
+    return em_falta
+
+
+def mapear_aliases(sql):
+    """Associa cada alias (e o próprio nome) à tabela, a partir das cláusulas FROM/JOIN/UPDATE."""
+    aliases = {}
+    for tabela, alias in _RE_ALIAS.findall(sql):
+        aliases[tabela] = tabela
+        if alias and alias.upper() not in _PALAVRAS_RESERVADAS:
+            aliases[alias] = tabela
+    return aliases
+
+
+def preparar_conexao(conn):
+    """Anexa um arquivo vazio em memória e a tabela de lote, para as instruções do arquivo terem plano."""
+    arquivo_reservas.anexar_arquivo(conn, criar=True, caminho=':memory:')
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS lote_arquivo (id INTEGER PRIMARY KEY)")
+
+
+def obter_plano(conn, sql, parametros=()):
+    """Retorna as linhas de detalhe do EXPLAIN QUERY PLAN da instrução."""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", parametros)]
+
+
+def varrimentos_proibidos(sql, plano, tabelas=TABELAS_GRANDES):
+    """
+    Retorna os passos do plano que percorrem por completo uma das tabelas indicadas:
+    SCAN (com ou sem índice) ou pesquisa por um índice automático (criado na hora).
+    """
+    aliases = mapear_aliases(sql)
+    proibidos = []
+    for detalhe in plano:
+        m = _RE_PASSO.match(detalhe)
+        if not m:
+            continue
+        operacao, nome, resto = m.groups()
+        if aliases.get(nome, nome) not in tabelas:
+            continue
+        if operacao == 'SCAN' or 'AUTOMATIC' in resto:
+            proibidos.append(detalhe)
+    return proibidos
+
+
+def verificar_planos(conn, consultas=None):
+    """
+    Executa EXPLAIN QUERY PLAN para cada consulta quente e retorna
+    {nome: [passos proibidos]} apenas para as que regrediram.
+    """
+    regressoes = {}
+    for consulta in consultas if consultas is not None else CONSULTAS:
+        if not consulta['quente']:
+            continue
+        try:
+            plano = obter_plano(conn, consulta['sql'], consulta['parametros'])
+        except sqlite3.Error as e:
+            regressoes[consulta['nome']] = [f"(plano indisponível: {e})"]
+            continue
+        proibidos = varrimentos_proibidos(consulta['sql'], plano)
+        if proibidos:
+            regressoes[consulta['nome']] = proibidos
+    return regressoes
@@ -0,0 +1,134 @@
+import logging
+import sqlite3
+import time
+from datetime import datetime
+
+from . import database as db
+
+FORMATO_DATA = '%Y-%m-%d %H:%M:%S'
+
+MARCA_TEMPO = 'reconciliador_tempo'
+MARCA_VERSAO = 'reconciliador_versao'
+
+# Existe uma reserva ativa a decorrer agora para o veículo da linha atualizada
+_COBERTO_AGORA = """
+    EXISTS (SELECT 1 FROM reservas rc
+            WHERE rc.id_veiculo = veiculos.id AND rc.status = 'ativa'
+              AND rc.data_inicio <= :agora AND rc.data_fim >= :agora)
+"""
+
+# --- Transições incrementais (uma instrução por tipo de transição) ---
+
+# Reservas que terminaram: o veículo fica livre, salvo se outra reserva ativa já começou
+SQL_LIBERTAR_ENCERRADAS = f"""
+    UPDATE veiculos SET status = 'disponível'
+    WHERE status = 'alugado'
+      AND id IN (SELECT id_veiculo FROM reservas WHERE status = 'ativa' AND data_fim < :agora)
+      AND NOT {_COBERTO_AGORA}
+"""
+
+SQL_CONCLUIR_ENCERRADAS = """
+    UPDATE reservas SET status = 'concluída' WHERE status = 'ativa' AND data_fim < :agora
+"""
+
+# Reservas canceladas, apagadas ou com datas editadas desde a última versão vista
+SQL_LIBERTAR_ALTERADAS = f"""
+    UPDATE veiculos SET status = 'disponível'
+    WHERE status = 'alugado'
+      AND id IN (SELECT id_veiculo FROM reservas WHERE versao_alteracao > :versao
+                 UNION
+                 SELECT id_veiculo FROM reservas_removidas WHERE versao_alteracao > :versao)
+      AND NOT {_COBERTO_AGORA}
+"""
+
+# Reservas que começaram desde a última execução (ou foram editadas para começar já)
+SQL_MARCAR_INICIADAS = """
+    UPDATE veiculos SET status = 'alugado'
+    WHERE status = 'disponível'
+      AND id IN (SELECT id_veiculo FROM reservas
+                 WHERE status = 'ativa' AND data_inicio > :desde AND data_inicio <= :agora AND data_fim >= :agora
+                 UNION
+                 SELECT id_veiculo FROM reservas
+                 WHERE versao_alteracao > :versao AND status = 'ativa'
+                   AND data_inicio <= :agora AND data_fim >= :agora)
+"""
+
+# --- Reconciliação completa (primeira execução ou pedido explícito) ---
+
+SQL_LIBERTAR_TODOS = f"""
+    UPDATE veiculos SET status = 'disponível' WHERE status = 'alugado' AND NOT {_COBERTO_AGORA}
+"""
+
+SQL_MARCAR_TODOS_ALUGADOS = f"""
+    UPDATE veiculos SET status = 'alugado' WHERE status = 'disponível' AND {_COBERTO_AGORA}
+"""
+
+SQL_VERSAO_ATUAL = "SELECT valor FROM sequencia_alteracoes WHERE id = 1"
+SQL_LER_MARCA = "SELECT valor FROM marcas_dagua WHERE nome = ?"
+SQL_GRAVAR_MARCA = "INSERT OR REPLACE INTO marcas_dagua (nome, valor) VALUES (?, ?)"
+
+
+def _ler_marcas(conn):
+    tempo = conn.execute(SQL_LER_MARCA, (MARCA_TEMPO,)).fetchone()
+    versao = conn.execute(SQL_LER_MARCA, (MARCA_VERSAO,)).fetchone()
+    if tempo is None or versao is None:
+        return None, None
+    return tempo['valor'], int(versao['valor'])
+
+
+def reconciliar_status(completo=False, agora=None):
+    """
+    Alinha o status dos veículos e das reservas com as datas das reservas.
+
+    Só olha para as transições desde a última marca d'água (reservas que começaram,
+    terminaram, foram canceladas/editadas ou apagadas), aplicando uma instrução
+    set-based por tipo de transição, tudo numa única transação. Veículos em
+    'manutenção' nunca são alterados. Sem marca d'água (primeira execução) ou
+    com completo=True, faz uma passagem completa pela frota.
+
+    Returns:
+        dict: número de linhas afetadas por transição, ou None em caso de erro.
+    """
+    agora_str = (agora or datetime.now()).strftime(FORMATO_DATA)
+    inicio = time.perf_counter()
+
+    conn = db.conectar_bd()
+    if not conn:
+        return None
+    conn.isolation_level = None  # Transação controlada manualmente
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            desde, versao = _ler_marcas(conn)
+            completo = completo or desde is None
+            parametros = {'agora': agora_str, 'desde': desde, 'versao': versao}
+
+            contagens = {}
+            if completo:
+                contagens['libertados'] = conn.execute(SQL_LIBERTAR_TODOS, parametros).rowcount
+                contagens['reservas_concluidas'] = conn.execute(SQL_CONCLUIR_ENCERRADAS, parametros).rowcount
+                contagens['alugados'] = conn.execute(SQL_MARCAR_TODOS_ALUGADOS, parametros).rowcount
+            else:
+                contagens['libertados_encerradas'] = conn.execute(SQL_LIBERTAR_ENCERRADAS, parametros).rowcount
+                contagens['reservas_concluidas'] = conn.execute(SQL_CONCLUIR_ENCERRADAS, parametros).rowcount
+                contagens['libertados_alteradas'] = conn.execute(SQL_LIBERTAR_ALTERADAS, parametros).rowcount
+                contagens['alugados'] = conn.execute(SQL_MARCAR_INICIADAS, parametros).rowcount
+
+            # A nova marca de versão inclui as nossas próprias alterações (já tratadas)
+            versao_atual = conn.execute(SQL_VERSAO_ATUAL).fetchone()[0]
+            conn.execute(SQL_GRAVAR_MARCA, (MARCA_TEMPO, agora_str))
+            conn.execute(SQL_GRAVAR_MARCA, (MARCA_VERSAO, str(versao_atual)))
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+    except sqlite3.Error as e:
+        logging.error(f"Erro ao reconciliar status de veículos e reservas: {e}", exc_info=True)
+        return None
+    finally:
+        conn.close()
+
+    duracao_ms = (time.perf_counter() - inicio) * 1000
+    resumo = ", ".join(f"{chave}={valor}" for chave, valor in contagens.items())
+    logging.info(f"Reconciliação {'completa' if completo else 'incremental'} em {duracao_ms:.1f} ms: {resumo}")
+    return contagens
@@ -0,0 +1,299 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# --- Validação de documentos de identificação e contactos ---
+# Regras portuguesas:
+#   - NIF: 9 dígitos; o 9º é o dígito de controlo (módulo 11, pesos 9..2 nos 8 primeiros;
+#     resto 0 ou 1 -> 0, senão 11 - resto). O 1º dígito (ou os 2 primeiros) indicam o tipo
+#     de contribuinte e só alguns prefixos existem.
+#   - Cartão de Cidadão: 8 dígitos do número civil + 1 dígito de controlo + 2 caracteres de
+#     versão + 1 dígito de controlo final ("00000000 0 ZZ4"). Os 12 caracteres são validados
+#     juntos: letras valem 10..35 (A..Z); da direita para a esquerda, um sim um não é
+#     duplicado (menos 9 se passar de 9); a soma tem de ser múltipla de 10.
+#   - Telefone: 9 dígitos a começar por 2 ou 9, com ou sem o indicativo +351/00351;
+#     números estrangeiros são aceites no formato internacional (+ ou 00, 8 a 15 dígitos).
+#   - Email: forma local@dominio.tld, guardado em minúsculas.
+# Há duas APIs com as mesmas regras: uma por registo (formulários) e uma vetorizada, que
+# converte as colunas em matrizes de códigos de caracteres NumPy e valida tudo de uma vez
+# (importações). Os erros são bits de um código inteiro por linha (0 = válido).
+
+ERRO_NIF_FORMATO = 1
+ERRO_NIF_CONTROLO = 2
+ERRO_CC_FORMATO = 4
+ERRO_CC_CONTROLO = 8
+ERRO_EMAIL = 16
+ERRO_TELEFONE = 32
+
+DESCRICOES_ERROS = {
+    ERRO_NIF_FORMATO: "NIF deve ter 9 dígitos e um prefixo válido",
+    ERRO_NIF_CONTROLO: "NIF com dígito de controlo errado",
+    ERRO_CC_FORMATO: "Cartão de Cidadão deve ter o formato 00000000 0 ZZ0",
+    ERRO_CC_CONTROLO: "Cartão de Cidadão com caracteres de controlo errados",
+    ERRO_EMAIL: "Email inválido",
+    ERRO_TELEFONE: "Telefone inválido",
+}
+
+PREFIXOS_NIF_1 = frozenset('1235689')
+PREFIXOS_NIF_2 = frozenset({'45', '70', '71', '72', '74', '75', '77', '79'})
+PESOS_NIF = np.arange(9, 1, -1)
+
+LARGURA_MAXIMA = 64  # Valores mais compridos são inválidos em qualquer um dos campos
+
+_RE_EMAIL = re.compile(r"[a-z0-9!#$%&'*+/=?^_`{|}~.-]+@[a-z0-9](?:[a-z0-9-]*[a-z0-9])?(?:\.[a-z0-9](?:[a-z0-9-]*[a-z0-9])?)*\.[a-z]{2,}")
+_RE_SEPARADORES_NIF = re.compile(r'[\s.\-]')
+_RE_SEPARADORES_CC = re.compile(r'[\s\-]')
+_RE_SEPARADORES_TELEFONE = re.compile(r'[\s.\-()/]')
+
+
+def descrever_erros(codigo):
+    """Lista das mensagens correspondentes aos bits de 'codigo'."""
+    return [mensagem for bit, mensagem in DESCRICOES_ERROS.items() if codigo & bit]
+
+
+# --- API por registo ---
+
+def normalizar_nif(nif):
+    texto = _RE_SEPARADORES_NIF.sub('', str(nif or '').upper())
+    return texto[2:] if texto.startswith('PT') else texto
+
+
+def normalizar_cc(cc):
+    return _RE_SEPARADORES_CC.sub('', str(cc or '').upper())
+
+
+def normalizar_telefone(telefone):
+    texto = _RE_SEPARADORES_TELEFONE.sub('', str(telefone or ''))
+    if texto.startswith('+'):
+        texto = '00' + texto[1:]
+    if texto.startswith('00351') and len(texto) == 14:
+        return texto[5:]
+    if texto.startswith('351') and len(texto) == 12:
+        return texto[3:]
+    return '+' + texto[2:] if texto.startswith('00') else texto
+
+
+def normalizar_email(email):
+    return str(email or '').strip().lower()
+
+
+def validar_nif(nif):
+    nif = normalizar_nif(nif)
+    if len(nif) != 9 or not nif.isascii() or not nif.isdigit():
+        return ERRO_NIF_FORMATO
+    if nif[0] not in PREFIXOS_NIF_1 and nif[:2] not in PREFIXOS_NIF_2:
+        return ERRO_NIF_FORMATO
+    resto = sum(int(d) * p for d, p in zip(nif[:8], range(9, 1, -1))) % 11
+    return 0 if int(nif[8]) == (0 if resto < 2 else 11 - resto) else ERRO_NIF_CONTROLO
+
+
+def _valor_cc(caractere):
+    return ord(caractere) - 48 if caractere.isdigit() else ord(caractere) - 55
+
+
+def validar_cc(cc):
+    cc = normalizar_cc(cc)
+    if (len(cc) != 12 or not cc.isascii() or not cc[:9].isdigit() or not cc[9:11].isalnum()
+            or not cc[11].isdigit()):
+        return ERRO_CC_FORMATO
+    soma = 0
+    for posicao, caractere in enumerate(cc):
+        valor = _valor_cc(caractere)
+        if posicao % 2 == 0:  # 2º, 4º, ... a contar da direita
+            valor = valor * 2 - 9 if valor * 2 > 9 else valor * 2
+        soma += valor
+    return 0 if soma % 10 == 0 else ERRO_CC_CONTROLO
+
+
+def validar_telefone(telefone):
+    telefone = normalizar_telefone(telefone)
+    if telefone.startswith('+'):
+        digitos = telefone[1:]
+        valido = digitos.isascii() and digitos.isdigit() and 8 <= len(digitos) <= 15 and not digitos.startswith('351')
+        return 0 if valido else ERRO_TELEFONE
+    return 0 if len(telefone) == 9 and telefone.isascii() and telefone.isdigit() and telefone[0] in '29' \
+        else ERRO_TELEFONE
+
+
+def validar_email(email):
+    email = normalizar_email(email)
+    return 0 if len(email) <= 254 and _RE_EMAIL.fullmatch(email) else ERRO_EMAIL
+
+
+_VALIDADORES_CLIENTE = {
+    'nif': (validar_nif, normalizar_nif),
+    'cc': (validar_cc, normalizar_cc),
+    'email': (validar_email, normalizar_email),
+    'telefone': (validar_telefone, normalizar_telefone),
+}
+
+
+def validar_cliente(nif, cc, email, telefone, originais=None):
+    """
+    Valida os campos de um cliente. Retorna (código de erro, {campo: valor normalizado}),
+    com os valores prontos a gravar quando o código é 0.
+    Na edição, 'originais' são os valores gravados: os campos que não mudaram não são
+    validados e ficam como estão (clientes registados antes destas regras).
+    """
+    codigo, normalizados = 0, {}
+    for campo, valor in (('nif', nif), ('cc', cc), ('email', email), ('telefone', telefone)):
+        if originais is not None and str(valor).strip() == str(originais.get(campo) or '').strip():
+            normalizados[campo] = originais[campo]
+            continue
+        validar, normalizar = _VALIDADORES_CLIENTE[campo]
+        codigo |= validar(valor)
+        normalizados[campo] = normalizar(valor)
+    return codigo, normalizados
+
+
+# --- API vetorizada ---
+
+def _matriz(valores):
+    """
+    Converte os valores numa matriz (linhas x caracteres) de códigos de caracteres uint8,
+    preenchida com 0 à direita. Caracteres fora do ASCII (inválidos em todos os campos)
+    passam a 255. Retorna (matriz, comprimentos).
+    """
+    objetos = np.array(valores, dtype=object)
+    objetos[pd.isna(objetos)] = ''
+    texto = objetos.astype(str)
+    comprimentos = np.char.str_len(texto) if len(texto) else np.zeros(0, dtype=np.int64)
+    if texto.dtype.itemsize // 4 > LARGURA_MAXIMA:
+        texto = texto.astype(f'<U{LARGURA_MAXIMA}')
+    largura = max(texto.dtype.itemsize // 4, 1)
+    codigos = texto.astype(f'<U{largura}').view(np.uint32).reshape(len(texto), largura)
+    return np.minimum(codigos, 255).astype(np.uint8), comprimentos
+
+
+def _maiusculas(c):
+    minusculas = (c >= 97) & (c <= 122)
+    c[minusculas] -= 32
+    return c
+
+
+def _espacos(c):
+    """Caracteres que o \\s das expressões regulares da API por registo apaga (e o preenchimento 0)."""
+    return (c == 0) | (c == 32) | ((c >= 9) & (c <= 13)) | ((c >= 28) & (c <= 31))
+
+
+def _compactar(c, manter, largura):
+    """Junta à esquerda, por linha, os caracteres marcados em 'manter' (ordem preservada)."""
+    compacto = np.where(manter, c, 0)
+    # Só as linhas com separadores pelo meio precisam de ser reordenadas
+    desordenadas = np.flatnonzero((manter[:, 1:] > manter[:, :-1]).any(axis=1)) if c.shape[1] > 1 else []
+    if len(desordenadas):
+        ordem = np.argsort(~manter[desordenadas], axis=1, kind='stable')
+        compacto[desordenadas] = np.take_along_axis(compacto[desordenadas], ordem, axis=1)
+    if compacto.shape[1] < largura:
+        compacto = np.pad(compacto, ((0, 0), (0, largura - compacto.shape[1])))
+    return np.ascontiguousarray(compacto[:, :largura])
+
+
+def _texto(compacto):
+    largura = compacto.shape[1]
+    return np.ascontiguousarray(compacto, dtype=np.uint32).view(f'<U{largura}').ravel()
+
+
+def validar_nifs(valores):
+    """Vetorizado: retorna (códigos de erro uint8, NIFs normalizados) para uma coluna."""
+    c, comprimentos = _matriz(valores)
+    c = _maiusculas(c)
+    # Como em normalizar_nif: primeiro saem os separadores, só depois se procura o prefixo PT
+    c = _compactar(c, ~(_espacos(c) | (c == 46) | (c == 45)), c.shape[1])
+    prefixo_pt = (c[:, 0] == ord('P')) & (c[:, 1] == ord('T')) if c.shape[1] > 1 else np.zeros(len(c), bool)
+    c[prefixo_pt, :2] = 0
+    digito = (c >= 48) & (c <= 57)
+    separador = c == 0
+    formato = (digito | separador).all(axis=1) & (digito.sum(axis=1) == 9) & (comprimentos <= LARGURA_MAXIMA)
+
+    compacto = _compactar(c, digito, 9)
+    d = compacto.astype(np.int16) - 48
+    primeiro, dois = d[:, 0], d[:, 0] * 10 + d[:, 1]
+    prefixo_valido = np.isin(primeiro, [int(p) for p in PREFIXOS_NIF_1]) | np.isin(dois, [int(p) for p in PREFIXOS_NIF_2])
+    formato &= prefixo_valido
+
+    resto = (d[:, :8] * PESOS_NIF).sum(axis=1) % 11
+    controlo = d[:, 8] == np.where(resto < 2, 0, 11 - resto)
+    codigos = np.where(~formato, ERRO_NIF_FORMATO, np.where(controlo, 0, ERRO_NIF_CONTROLO)).astype(np.uint8)
+    return codigos, _texto(compacto)
+
+
+def validar_ccs(valores):
+    """Vetorizado: retorna (códigos de erro uint8, números de CC normalizados) para uma coluna."""
+    c, comprimentos = _matriz(valores)
+    c = _maiusculas(c)
+    digito = (c >= 48) & (c <= 57)
+    letra = (c >= 65) & (c <= 90)
+    separador = _espacos(c) | (c == 45)
+    alfanumerico = digito | letra
+    formato = (alfanumerico | separador).all(axis=1) & (alfanumerico.sum(axis=1) == 12) \
+        & (comprimentos <= LARGURA_MAXIMA)
+
+    compacto = _compactar(c, alfanumerico, 12)
+    e_digito = (compacto >= 48) & (compacto <= 57)
+    formato &= e_digito[:, :9].all(axis=1) & e_digito[:, 11]
+    valor = compacto.astype(np.int16) - np.where(e_digito, 48, 55).astype(np.int16)
+    duplicado = valor[:, 0::2] * 2
+    soma = np.where(duplicado > 9, duplicado - 9, duplicado).sum(axis=1) + valor[:, 1::2].sum(axis=1)
+    codigos = np.where(~formato, ERRO_CC_FORMATO, np.where(soma % 10 == 0, 0, ERRO_CC_CONTROLO)).astype(np.uint8)
+    return codigos, _texto(compacto)
+
+
+def validar_telefones(valores):
+    """Vetorizado: retorna (códigos de erro uint8, telefones normalizados) para uma coluna."""
+    c, comprimentos = _matriz(valores)
+    linhas = np.arange(len(c))
+    digito = (c >= 48) & (c <= 57)
+    separador = _espacos(c) | (c == 46) | (c == 45) | (c == 40) | (c == 41) | (c == 47)
+    mais = c == 43
+    # O '+' só é aceite uma vez e como primeiro caractere que não é separador
+    com_mais = mais[linhas, np.argmax(~separador, axis=1)]
+    formato = (digito | separador | (mais & com_mais[:, None])).all(axis=1) & (mais.sum(axis=1) <= 1)
+    formato &= comprimentos <= LARGURA_MAXIMA
+
+    # Dígitos seguidos; nos números internacionais (+ ou 00) o indicativo começa em 'desvio'
+    largura = 18
+    compacto = _compactar(c, digito, largura)
+    n = digito.sum(axis=1)
+    com_00 = ~com_mais & (compacto[:, 0] == 48) & (compacto[:, 1] == 48)
+    internacional = com_mais | com_00
+    desvio = np.where(com_00, 2, 0)
+    m = n - desvio
+    indicativo_pt = (np.take_along_axis(compacto, desvio[:, None] + np.arange(3), axis=1) == [51, 53, 49]).all(axis=1)
+    portugues = indicativo_pt & (m == 12)
+    nacional = portugues | (~internacional & (m == 9))
+    inicio = np.where(portugues, desvio + 3, desvio)
+    numero = np.take_along_axis(compacto, np.minimum(inicio[:, None] + np.arange(15), largura - 1), axis=1)
+    numero = np.where(np.arange(15) < (m - (inicio - desvio))[:, None], numero, 0)
+
+    nacional_valido = nacional & np.isin(numero[:, 0], [50, 57])  # 2 (fixo) ou 9 (móvel)
+    estrangeiro_valido = internacional & ~indicativo_pt & (m >= 8) & (m <= 15)
+    codigos = np.where(formato & (nacional_valido | estrangeiro_valido), 0, ERRO_TELEFONE).astype(np.uint8)
+
+    resultado = _texto(np.ascontiguousarray(numero)).astype('<U16')
+    if estrangeiro_valido.any():
+        resultado[estrangeiro_valido] = np.char.add('+', resultado[estrangeiro_valido])
+    return codigos, resultado
+
+
+def validar_emails(valores):
+    """Vetorizado: retorna (códigos de erro uint8, emails normalizados) para uma coluna."""
+    emails = pd.Series(valores, dtype=object).fillna('').astype(str).str.strip().str.lower()
+    validos = emails.str.fullmatch(_RE_EMAIL.pattern) & (emails.str.len() <= 254)
+    return np.where(validos.to_numpy(dtype=bool), 0, ERRO_EMAIL).astype(np.uint8), emails.to_numpy(dtype=object)
+
+
+def validar_clientes(df):
+    """
+    Valida as colunas nif, cc, email e telefone de um DataFrame de clientes.
+    Retorna (códigos de erro por linha, cópia do DataFrame com os campos normalizados).
+    """
+    normalizado = df.copy()
+    codigos = np.zeros(len(df), dtype=np.uint8)
+    for coluna, funcao in (('nif', validar_nifs), ('cc', validar_ccs), ('email', validar_emails),
+                           ('telefone', validar_telefones)):
+        erros, valores = funcao(df[coluna].to_numpy(dtype=object))
+        codigos |= erros
+        normalizado[coluna] = valores
+    return codigos, normalizado
@@ -0,0 +1,277 @@
+import customtkinter as ctk
+import tkinter as tk
+from datetime import datetime, timedelta
+from backend import calendario
+from backend import indice_frota
+
+
+class CalendarView(ctk.CTkFrame):
+    """
+    Calendário da frota em forma de Gantt: veículos nas linhas, dias nas colunas e as
+    reservas como barras. Tudo é desenhado num único Canvas e só o que cabe na vista:
+    a cada deslocamento ou zoom o canvas é limpo e redesenhado com as linhas visíveis
+    (algumas dezenas), e as reservas vêm da JanelaCalendario (consulta indexada só para
+    esses veículos e datas, com margem). O custo por frame não depende do tamanho da
+    frota nem dos anos de histórico.
+    """
+    ALTURA_LINHA = 24
+    ALTURA_CABECALHO = 40
+    LARGURA_ROTULOS = 220
+    PX_DIA_MIN, PX_DIA_MAX = 2.0, 160.0
+    ATRASO_FILTRO_MS = 150
+    CORES_STATUS = {'ativa': '#1E88E5', 'concluída': '#546E7A'}
+    COR_FUNDO, COR_ALTERNADA, COR_GRELHA, COR_TEXTO = "#2a2d2e", "#313536", "#3d4244", "white"
+
+    def __init__(self, parent, controller):
+        super().__init__(parent)
+        self.controller = controller
+        self.janela = calendario.JanelaCalendario()
+        self.indice = indice_frota.obter_indice()
+        self.posicoes = self.indice.filtrar()
+
+        hoje = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.origem = hoje - timedelta(days=7)  # Data no limite esquerdo da área das barras
+        self.px_dia = 28.0
+        self.linha0 = 0.0  # Primeira linha visível (fracionária durante o deslocamento)
+        self._desenho_agendado = False
+        self._filtro_agendado = None
+        self._arrasto = None
+        self._itens_reserva = {}
+
+        self.label = ctk.CTkLabel(self, text="Calendário da Frota", font=("Arial", 24, "bold"))
+        self.label.pack(pady=10, padx=10)
+
+        barra = ctk.CTkFrame(self)
+        barra.pack(fill="x", padx=10, pady=(0, 5))
+        self.entry_pesquisa = ctk.CTkEntry(barra, placeholder_text="Filtrar veículos (marca, modelo, placa...)",
+                                           width=280)
+        self.entry_pesquisa.pack(side="left", padx=5, pady=5)
+        self.entry_pesquisa.bind("<KeyRelease>", lambda _: self.agendar_filtro())
+        ctk.CTkButton(barra, text="Hoje", width=70, command=self.ir_para_hoje).pack(side="left", padx=5)
+        ctk.CTkButton(barra, text="−", width=40, command=lambda: self.zoom(1 / 1.5)).pack(side="left", padx=2)
+        ctk.CTkButton(barra, text="+", width=40, command=lambda: self.zoom(1.5)).pack(side="left", padx=2)
+        self.label_info = ctk.CTkLabel(barra, text="Arraste para deslocar, Ctrl+roda para zoom")
+        self.label_info.pack(side="right", padx=10)
+
+        area = ctk.CTkFrame(self)
+        area.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        self.canvas = tk.Canvas(area, background=self.COR_FUNDO, highlightthickness=0)
+        self.scroll = ctk.CTkScrollbar(area, command=self.rolar_vertical)
+        self.scroll.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        self.canvas.bind("<Configure>", lambda _: self.agendar_desenho())
+        self.canvas.bind("<ButtonPress-1>", self.iniciar_arrasto)
+        self.canvas.bind("<B1-Motion>", self.arrastar)
+        self.canvas.bind("<ButtonRelease-1>", self.terminar_arrasto)
+        self.canvas.bind("<MouseWheel>", self.roda)
+        self.canvas.bind("<Shift-MouseWheel>", lambda e: self.deslocar_dias(-e.delta / 120 * 7))
+        self.canvas.bind("<Control-MouseWheel>", lambda e: self.zoom(1.25 if e.delta > 0 else 0.8, e.x))
+        # X11 não tem <MouseWheel>: a roda chega como botões 4/5
+        self.canvas.bind("<Button-4>", lambda e: self.roda_x11(e, -1))
+        self.canvas.bind("<Button-5>", lambda e: self.roda_x11(e, 1))
+
+    # --- Geometria ---
+
+    def dias_visiveis(self):
+        return max(self.canvas.winfo_width() - self.LARGURA_ROTULOS, 1) / self.px_dia
+
+    def linhas_visiveis(self):
+        return max(self.canvas.winfo_height() - self.ALTURA_CABECALHO, 0) / self.ALTURA_LINHA
+
+    def x_data(self, data):
+        return self.LARGURA_ROTULOS + (data - self.origem).total_seconds() / 86400 * self.px_dia
+
+    def data_x(self, x):
+        return self.origem + timedelta(days=(x - self.LARGURA_ROTULOS) / self.px_dia)
+
+    def _limitar_linha0(self):
+        maximo = max(len(self.posicoes) - int(self.linhas_visiveis()), 0)
+        self.linha0 = min(max(self.linha0, 0.0), float(maximo))
+
+    # --- Navegação ---
+
+    def agendar_desenho(self):
+        """Junta os eventos de deslocamento/zoom do mesmo ciclo num só redesenho."""
+        if not self._desenho_agendado:
+            self._desenho_agendado = True
+            self.after_idle(self.desenhar)
+
+    def agendar_filtro(self):
+        if self._filtro_agendado:
+            self.after_cancel(self._filtro_agendado)
+        self._filtro_agendado = self.after(self.ATRASO_FILTRO_MS, self.aplicar_filtro)
+
+    def aplicar_filtro(self):
+        self._filtro_agendado = None
+        self.indice = indice_frota.obter_indice()  # Põe o índice em dia, como a VehicleView
+        self.posicoes = self.indice.filtrar(self.entry_pesquisa.get())
+        self.linha0 = 0.0
+        self.agendar_desenho()
+
+    def ir_para_hoje(self):
+        hoje = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.origem = hoje - timedelta(days=self.dias_visiveis() / 4)
+        self.agendar_desenho()
+
+    def deslocar_dias(self, dias):
+        self.origem += timedelta(days=dias)
+        self.agendar_desenho()
+
+    def zoom(self, fator, x=None):
+        """Altera a escala mantendo fixa a data sob 'x' (ou ao centro da vista)."""
+        x = x if x is not None and x > self.LARGURA_ROTULOS else (self.LARGURA_ROTULOS + self.canvas.winfo_width()) / 2
+        data_fixa = self.data_x(x)
+        self.px_dia = min(max(self.px_dia * fator, self.PX_DIA_MIN), self.PX_DIA_MAX)
+        self.origem = data_fixa - timedelta(days=(x - self.LARGURA_ROTULOS) / self.px_dia)
+        self.agendar_desenho()
+
+    def rolar_vertical(self, *args):
+        if args[0] == "moveto":
+            self.linha0 = float(args[1]) * len(self.posicoes)
+        elif args[0] == "scroll":
+            passo = int(self.linhas_visiveis()) if args[2] == "pages" else 3
+            self.linha0 += int(args[1]) * passo
+        self.agendar_desenho()
+
+    def roda(self, event):
+        self.linha0 -= event.delta / 120 * 3
+        self.agendar_desenho()
+
+    def roda_x11(self, event, sentido):
+        if event.state & 0x0004:  # Ctrl
+            self.zoom(0.8 if sentido > 0 else 1.25, event.x)
+        elif event.state & 0x0001:  # Shift
+            self.deslocar_dias(sentido * 7)
+        else:
+            self.linha0 += sentido * 3
+            self.agendar_desenho()
+
+    def iniciar_arrasto(self, event):
+        self._arrasto = (event.x, event.y, self.origem, self.linha0, False)
+
+    def arrastar(self, event):
+        if not self._arrasto:
+            return
+        x0, y0, origem, linha0, _ = self._arrasto
+        self.origem = origem - timedelta(days=(event.x - x0) / self.px_dia)
+        self.linha0 = linha0 - (event.y - y0) / self.ALTURA_LINHA
+        self._arrasto = (x0, y0, origem, linha0, True)
+        self.agendar_desenho()
+
+    def terminar_arrasto(self, event):
+        moveu = self._arrasto and self._arrasto[4]
+        self._arrasto = None
+        if moveu:
+            return
+        # Clique sem arrastar: detalhe da reserva sob o cursor
+        itens = self.canvas.find_overlapping(event.x, event.y, event.x, event.y)
+        for item in reversed(itens):
+            if item in self._itens_reserva:
+                inicio, fim, status, cliente, id_reserva = self._itens_reserva[item]
+                self.label_info.configure(text=f"Reserva #{id_reserva}: {cliente} | "
+                                               f"{inicio:%d/%m/%Y %H:%M} - {fim:%d/%m/%Y %H:%M} | {status.title()}")
+                return
+
+    # --- Desenho ---
+
+    def desenhar(self):
+        self._desenho_agendado = False
+        if not self.winfo_exists():
+            return
+        self._limitar_linha0()
+        largura, altura = self.canvas.winfo_width(), self.canvas.winfo_height()
+        c = self.canvas
+        c.delete("all")
+        self._itens_reserva = {}
+
+        # O índice partilhado foi relido (outra janela ou o sincronizador): as posições filtradas
+        # referem-se ao antigo e são recalculadas no novo. Sem consultar o banco a cada desenho.
+        atual = indice_frota.indice_atual()
+        if atual is not None and atual is not self.indice:
+            self.indice = atual
+            self.posicoes = self.indice.filtrar(self.entry_pesquisa.get())
+        primeira = int(self.linha0)
+        ultima = min(len(self.posicoes), primeira + int(self.linhas_visiveis()) + 2)
+        veiculos = self.indice.linhas(self.posicoes[primeira:ultima])
+        inicio, fim = self.origem, self.data_x(largura)
+        reservas = self.janela.obter([v['id'] for v in veiculos], inicio, fim)
+        deslocamento = (self.linha0 - primeira) * self.ALTURA_LINHA
+
+        # Linhas (fundo alternado e rótulo do veículo)
+        for i, v in enumerate(veiculos):
+            y = self.ALTURA_CABECALHO + i * self.ALTURA_LINHA - deslocamento
+            if (primeira + i) % 2:
+                c.create_rectangle(0, y, largura, y + self.ALTURA_LINHA, fill=self.COR_ALTERNADA, width=0)
+
+        self._desenhar_grelha(largura, altura, inicio, fim)
+
+        for i, v in enumerate(veiculos):
+            y = self.ALTURA_CABECALHO + i * self.ALTURA_LINHA - deslocamento
+            for reserva in reservas.get(v['id'], []):
+                x1 = max(self.x_data(reserva[0]), self.LARGURA_ROTULOS)
+                x2 = min(self.x_data(reserva[1]), largura)
+                if x2 <= x1:
+                    continue
+                item = c.create_rectangle(x1, y + 3, x2, y + self.ALTURA_LINHA - 3, width=0,
+                                          fill=self.CORES_STATUS.get(reserva[2], '#8E24AA'))
+                self._itens_reserva[item] = reserva
+                if x2 - x1 > 50:
+                    texto = reserva[3][:int((x2 - x1 - 8) / 7)]
+                    self._itens_reserva[c.create_text(x1 + 4, y + self.ALTURA_LINHA / 2, text=texto, anchor="w",
+                                                      fill=self.COR_TEXTO, font=("Arial", 9))] = reserva
+
+        # Rótulos por cima das barras (coluna fixa à esquerda) e cabeçalho por cima de tudo
+        c.create_rectangle(0, self.ALTURA_CABECALHO, self.LARGURA_ROTULOS, altura, fill=self.COR_FUNDO, width=0)
+        for i, v in enumerate(veiculos):
+            y = self.ALTURA_CABECALHO + i * self.ALTURA_LINHA - deslocamento
+            c.create_text(8, y + self.ALTURA_LINHA / 2, anchor="w", fill=self.COR_TEXTO, font=("Arial", 10),
+                          text=f"{v['marca']} {v['modelo']} · {v['placa']}"[:34])
+        self._desenhar_cabecalho(largura, inicio, fim)
+
+        # Hoje
+        x_agora = self.x_data(datetime.now())
+        if self.LARGURA_ROTULOS <= x_agora <= largura:
+            c.create_line(x_agora, self.ALTURA_CABECALHO, x_agora, altura, fill="#E53935", width=2)
+
+        total = max(len(self.posicoes), 1)
+        self.scroll.set(self.linha0 / total, min((self.linha0 + self.linhas_visiveis()) / total, 1.0))
+
+    def _passo_grelha(self):
+        """Dias entre linhas verticais, consoante o zoom (dia, semana ou ~mês)."""
+        if self.px_dia >= 14:
+            return 1
+        if self.px_dia >= 4:
+            return 7
+        return 30
+
+    def _datas_grelha(self, inicio, fim):
+        passo = self._passo_grelha()
+        data = inicio.replace(hour=0, minute=0, second=0, microsecond=0)
+        while data <= fim:
+            if passo == 1 or (passo == 7 and data.weekday() == 0) or (passo == 30 and data.day == 1):
+                yield data
+            data += timedelta(days=1)
+
+    def _desenhar_grelha(self, largura, altura, inicio, fim):
+        for data in self._datas_grelha(inicio, fim):
+            x = self.x_data(data)
+            if x >= self.LARGURA_ROTULOS:
+                cor = "#5a6063" if data.day == 1 else self.COR_GRELHA
+                self.canvas.create_line(x, self.ALTURA_CABECALHO, x, altura, fill=cor)
+
+    def _desenhar_cabecalho(self, largura, inicio, fim):
+        c = self.canvas
+        c.create_rectangle(0, 0, largura, self.ALTURA_CABECALHO, fill="#565b5e", width=0)
+        c.create_text(8, self.ALTURA_CABECALHO / 2, anchor="w", fill=self.COR_TEXTO, font=("Arial", 10, "bold"),
+                      text=f"Veículos ({len(self.posicoes)})")
+        passo = self._passo_grelha()
+        for data in self._datas_grelha(inicio, fim):
+            x = self.x_data(data)
+            if x < self.LARGURA_ROTULOS:
+                continue
+            if data.day == 1 or x - self.LARGURA_ROTULOS < self.px_dia * passo:
+                c.create_text(x + 3, 10, anchor="w", fill=self.COR_TEXTO, font=("Arial", 9, "bold"),
+                              text=f"{data:%m/%Y}")
+            if passo < 30:
+                c.create_text(x + 3, 28, anchor="w", fill=self.COR_TEXTO, font=("Arial", 9), text=f"{data:%d}")
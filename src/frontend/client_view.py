@@ -2,12 +2,21 @@ from datetime import datetime, timedelta, date
 import customtkinter as ctk
 from tkinter import ttk, messagebox, filedialog
 from backend import database as db
+from backend import export_engine
+from backend import deduplicacao
+from backend import desempenho_ui
+from backend import fila_escritas
+from backend import recomendador
+from backend import validacao
+from .export_dialog import JanelaProgressoExportacao
+from . import futuros
 from PIL import Image
+import logging
 import os
+import sqlite3
 from datetime import datetime, timedelta
 import re
 from utils.helpers import  parse_datestr_flexible
-import pandas as pd
 
 
 class FormularioCliente(ctk.CTkToplevel):
@@ -52,19 +61,64 @@ class FormularioCliente(ctk.CTkToplevel):
             messagebox.showwarning("Atenção", "Por favor, preencha todos os campos!")
             return
 
+        codigo_erro, normalizados = validacao.validar_cliente(valores['nif'], valores['cc'], valores['email'],
+                                                              valores['telefone'], originais=self.dados_cliente)
+        if codigo_erro:
+            messagebox.showerror("Dados Inválidos", "\n".join(validacao.descrever_erros(codigo_erro)), parent=self)
+            return
+        valores.update(normalizados)
+
+        if not self.confirmar_possiveis_duplicados(valores):
+            return
+
+        # A escrita vai para a fila de escritas: o commit não bloqueia a interface
         if self.dados_cliente:
-            db.atualizar_cliente(self.dados_cliente['id'], **valores)
-            messagebox.showinfo("Sucesso", "Dados do cliente atualizados!")
+            futuro = fila_escritas.atualizar_cliente(self.dados_cliente['id'], **valores)
         else:  # Modo Adição
-            if not db.adicionar_cliente(**valores):
-                messagebox.showerror("Erro",
-                                     "Erro ao adicionar cliente. Verifique se o NIF, Email ou CC já existem no sistema.")
-                return
+            futuro = fila_escritas.adicionar_cliente(**valores)
+        self.btn_salvar.configure(state="disabled")
+        futuros.ao_concluir(self, futuro, lambda resultado, erro: self._gravado(valores, resultado, erro))
+
+    def _gravado(self, valores, resultado, erro):
+        self.btn_salvar.configure(state="normal")
+        if isinstance(erro, sqlite3.IntegrityError):
+            logging.warning(f"Falha ao gravar cliente. Dados duplicados (NIF, Email ou CC) para: "
+                            f"{valores['nif']}/{valores['email']}")
+            messagebox.showerror("Erro",
+                                 "Erro ao gravar cliente. Verifique se o NIF, Email ou CC já existem no sistema.",
+                                 parent=self)
+            return
+        if erro:
+            logging.error(f"Erro de banco de dados ao gravar cliente: {erro}", exc_info=erro)
+            messagebox.showerror("Erro", "Não foi possível gravar o cliente. Verifique os logs.", parent=self)
+            return
+
+        if self.dados_cliente:
+            deduplicacao.registar_cliente(self.dados_cliente['id'], **valores)
+            messagebox.showinfo("Sucesso", "Dados do cliente atualizados!")
+        else:
+            deduplicacao.registar_cliente(resultado['id'], **valores)
             messagebox.showinfo("Sucesso", "Novo cliente adicionado com sucesso!")
 
         self.parent_view.carregar_dados()
         self.destroy()
 
+    def confirmar_possiveis_duplicados(self, valores):
+        """Avisa se o cliente parece já existir (NIF/CC/email normalizados ou nome parecido)."""
+        ignorar_id = self.dados_cliente['id'] if self.dados_cliente else None
+        candidatos = deduplicacao.verificar_cliente(ignorar_id=ignorar_id, **valores)
+        if not candidatos:
+            return True
+        linhas = []
+        for candidato in candidatos[:3]:
+            cliente = db.buscar_cliente_por_id(candidato['id'])
+            if cliente:
+                linhas.append(f"- ID {cliente['id']}: {cliente['nome_completo']} (NIF {cliente['nif']}, "
+                              f"semelhança {candidato['pontuacao']:.0%})")
+        return messagebox.askyesno("Possível Duplicado",
+                                   "Este cliente parece já estar registado:\n\n" + "\n".join(linhas) +
+                                   "\n\nDeseja gravar mesmo assim?", parent=self)
+
 
 # --- CLASSE PARA A JANELA DE CRIAÇÃO DE RESERVA ---
 class CriarReservaWindow(ctk.CTkToplevel):
@@ -142,10 +196,9 @@ class CriarReservaWindow(ctk.CTkToplevel):
             messagebox.showerror("Erro de Formato", "Por favor, insira as datas no formato DD/MM/AAAA.")
             return
 
-        # 4. Verificação de disponibilidade no backend
+        # 4. Verificação de disponibilidade no backend (em conflito, sugere veículos parecidos livres)
         if not db.verificar_disponibilidade_veiculo(id_veiculo, data_inicio_db, data_fim_db):
-            messagebox.showerror("Conflito de Reserva",
-                                 "Este veículo já está reservado e indisponível para o período selecionado.")
+            self.sugerir_alternativas(id_veiculo, data_inicio_db, data_fim_db)
             return
 
         # 5. Se tudo estiver OK, adiciona a reserva
@@ -171,6 +224,25 @@ class CriarReservaWindow(ctk.CTkToplevel):
                                  "Não foi possível criar a reserva. Verifique os logs para mais detalhes.")
 
 
+    def sugerir_alternativas(self, id_veiculo, data_inicio_db, data_fim_db):
+        nomes_por_id = {id_: nome for nome, id_ in self.veiculos_map.items()}
+        sugestoes = [s for s in recomendador.recomendar_alternativas(id_veiculo, data_inicio_db, data_fim_db)
+                     if s['id'] in nomes_por_id]
+        if not sugestoes:
+            messagebox.showerror("Conflito de Reserva",
+                                 "Este veículo já está reservado e indisponível para o período selecionado.",
+                                 parent=self)
+            return
+
+        linhas = [f"• {s['marca']} {s['modelo']} {s['ano']}, {s['cor']} ({s['valor_diaria'] or 0:.2f} €/dia)"
+                  for s in sugestoes]
+        if messagebox.askyesno("Conflito de Reserva",
+                               "Este veículo está indisponível para o período selecionado.\n\n"
+                               "Veículos parecidos livres nessas datas:\n" + "\n".join(linhas) +
+                               "\n\nSelecionar o primeiro?", parent=self):
+            self.veiculo_combobox.set(nomes_por_id[sugestoes[0]['id']])
+
+
 # --- CLASSE PARA A JANELA DE HISTÓRICO DE CLIENTE ---
 class HistoricoClienteWindow(ctk.CTkToplevel):
     def __init__(self, parent, id_cliente, nome_cliente):
@@ -280,6 +352,7 @@ class ClientView(ctk.CTkFrame):
 
         self.carregar_dados()
 
+    @desempenho_ui.medido
     def carregar_dados(self):
         for item in self.tree.get_children():
             self.tree.delete(item)
@@ -319,6 +392,7 @@ class ClientView(ctk.CTkFrame):
 
         if messagebox.askyesno(titulo_confirmacao, mensagem_confirmacao):
             if db.deletar_cliente(id_cliente):
+                deduplicacao.esquecer_cliente(id_cliente)
                 messagebox.showinfo("Sucesso", "Cliente removido com sucesso.")
                 self.carregar_dados()
             else:
@@ -369,17 +443,11 @@ class ClientView(ctk.CTkFrame):
         CriarReservaWindow(self, self.controller, id_cliente, nome_cliente)
 
     def exportar_clientes(self):
-        # 1. Busca os dados mais recentes do banco
-        clientes = db.listar_clientes()
-        if not clientes:
+        especificacao = export_engine.especificacao_clientes()
+        if not db.consulta_tem_linhas(especificacao['sql'], especificacao['params']):
             messagebox.showinfo("Informação", "Não há clientes para exportar.")
             return
 
-        # 2. Converte a lista de objetos 'Row' do SQLite para um formato que o Pandas entende bem
-        dados_clientes = [dict(cliente) for cliente in clientes]
-        df = pd.DataFrame(dados_clientes)
-
-        # 3. Pede ao usuário para escolher onde salvar o arquivo
         caminho_arquivo = filedialog.asksaveasfilename(
             defaultextension=".csv",
             filetypes=[("Arquivos CSV", "*.csv"), ("Todos os arquivos", "*.*")],
@@ -390,12 +458,5 @@ class ClientView(ctk.CTkFrame):
             # O usuário clicou em "Cancelar"
             return
 
-        # 4. Tenta exportar os dados para o arquivo CSV
-        try:
-            # Usamos sep=';' que é mais compatível com o Excel em configurações europeias
-            # encoding='utf-8-sig' garante que caracteres especiais (acentos) funcionem bem
-            df.to_csv(caminho_arquivo, index=False, sep=';', encoding='utf-8-sig')
-            messagebox.showinfo("Sucesso", f"Lista de clientes exportada com sucesso para:\n{caminho_arquivo}")
-        except Exception as e:
-            logging.error(f"Erro ao exportar lista de clientes: {e}", exc_info=True)
-            messagebox.showerror("Erro de Exportação", f"Ocorreu um erro ao salvar o arquivo: {e}")
\ No newline at end of file
+        # CSV com sep=';' e utf-8-sig (compatível com o Excel europeu), escrito em segundo plano
+        JanelaProgressoExportacao(self, caminho_arquivo, especificacao, titulo="Exportando clientes...")
@@ -1,10 +1,10 @@
-from datetime import date, timedelta, datetime
 import customtkinter as ctk
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import seaborn as sns
 from backend import analytics as an
 from backend import database as db
+from backend import desempenho_ui
 
 
 class DashboardView(ctk.CTkFrame):
@@ -42,6 +42,7 @@ class DashboardView(ctk.CTkFrame):
 
         # Adicione chamadas para outros gráficos aqui
 
+    @desempenho_ui.medido
     def plotar_grafico(self, fig, row, col):
         """Função auxiliar para desenhar um gráfico na tela."""
         canvas = FigureCanvasTkAgg(fig, master=self)
@@ -54,6 +55,7 @@ class DashboardView(ctk.CTkFrame):
         # É importante fechar a figura do matplotlib para não consumir memória
         plt.close(fig)
 
+    @desempenho_ui.medido
     def plotar_faturamento_mensal(self):
         faturamento = an.get_faturamento_mensal()
 
@@ -77,6 +79,7 @@ class DashboardView(ctk.CTkFrame):
         fig.tight_layout()
         self.plotar_grafico(fig, 0, 0)
 
+    @desempenho_ui.medido
     def plotar_veiculos_por_status(self):
         status_counts = an.get_veiculos_por_status()
 
@@ -130,48 +133,89 @@ class DashboardView(ctk.CTkFrame):
 
         textbox.configure(state="disabled")
 
+    # Secções do painel de alertas, pela ordem de alertas.TIPOS
+    SECOES_ALERTAS = {
+        'devolucao_atrasada': ("DEVOLUÇÕES EM ATRASO", "VENCIDO"),
+        'revisao_vencida': ("REVISÕES VENCIDAS", "VENCIDO"),
+        'devolucao_hoje': ("DEVOLUÇÕES DE HOJE", "ALERTA"),
+        'levantamento_hoje': ("LEVANTAMENTOS DE HOJE", "ALERTA"),
+        'revisao_proxima': ("PRÓXIMAS REVISÕES", "ALERTA"),
+    }
+    INTERVALO_ALERTAS_MS = 1000
+
     def criar_secao_alertas(self):
-        """Cria e popula a área de alertas, agora com lógica no backend."""
+        """Cria a área de alertas, alimentada pelo motor de alertas (sem consultar o banco)."""
         alertas_frame = ctk.CTkFrame(self)
         alertas_frame.grid(row=1, column=1, padx=10, pady=10, sticky="nsew")
 
-        label_titulo = ctk.CTkLabel(alertas_frame, text="Painel de Controle de Revisões", font=("Arial", 16, "bold"))
+        label_titulo = ctk.CTkLabel(alertas_frame, text="Painel de Controle de Alertas", font=("Arial", 16, "bold"))
         label_titulo.pack(pady=(10, 5), padx=10, anchor="w")
 
-        revisoes_vencidas = db.buscar_revisoes_vencidas()
-        revisoes_proximas = db.buscar_revisoes_proximas()
-
-        if not revisoes_vencidas and not revisoes_proximas:
-            ctk.CTkLabel(alertas_frame, text="✅ Nenhum veículo necessita de atenção imediata.").pack(pady=10, padx=10,
-                                                                                                     anchor="w")
-            return
-
         # Usamos uma fonte monoespaçada para melhor alinhamento
-        textbox = ctk.CTkTextbox(alertas_frame, height=220, font=("Courier New", 12))
-        textbox.pack(pady=5, padx=10, fill="x", expand=True)
+        self.textbox_alertas = ctk.CTkTextbox(alertas_frame, height=220, font=("Courier New", 12))
+        self.textbox_alertas.pack(pady=5, padx=10, fill="x", expand=True)
 
         # CORREÇÃO: Removido o argumento 'font' de tag_config
         # O destaque principal será pela cor.
-        textbox.tag_config("VENCIDO", foreground="#e53935")  # Vermelho para vencidos
-        textbox.tag_config("ALERTA", foreground="#ffb300")  # Âmbar para alertas
-        textbox.tag_config("INFO", foreground="gray")  # Cinza para os títulos das seções
-
-        if revisoes_vencidas:
-            textbox.insert("end", "--- REVISÕES VENCIDAS ---\n", "INFO")
-            for veiculo in revisoes_vencidas:
-                data_formatada = datetime.strptime(veiculo['data_proxima_revisao'], '%Y-%m-%d').strftime('%d/%m/%Y')
-                linha_alerta = f"ID:{veiculo['id']:<3} | {veiculo['marca']} {veiculo['modelo']} ({veiculo['placa']}) - Venceu em: {data_formatada}\n"
-                textbox.insert("end", linha_alerta, "VENCIDO")
-
-        if revisoes_proximas:
-            if revisoes_vencidas:  # Adiciona um espaço se houver as duas seções
+        self.textbox_alertas.tag_config("VENCIDO", foreground="#e53935")  # Vermelho para vencidos/atrasados
+        self.textbox_alertas.tag_config("ALERTA", foreground="#ffb300")  # Âmbar para alertas
+        self.textbox_alertas.tag_config("INFO", foreground="gray")  # Cinza para os títulos das seções
+
+        # Os eventos chegam por uma fila (thread do motor), esvaziada aqui com after()
+        self.alertas = {}
+        self.motor_alertas = self.controller.alertas
+        self.fila_alertas = self.motor_alertas.subscrever()
+        self._alertas_agendado = None
+        self.receber_alertas()
+
+    def receber_alertas(self):
+        mudou = False
+        while not self.fila_alertas.empty():
+            evento, alerta = self.fila_alertas.get_nowait()
+            if evento == 'novo':
+                self.alertas[alerta['chave']] = alerta
+            else:
+                self.alertas.pop(alerta['chave'], None)
+            mudou = True
+        if mudou or self._alertas_agendado is None:
+            self.desenhar_alertas()
+        self._alertas_agendado = self.after(self.INTERVALO_ALERTAS_MS, self.receber_alertas)
+
+    def desenhar_alertas(self):
+        textbox = self.textbox_alertas
+        textbox.configure(state="normal")
+        textbox.delete("1.0", "end")
+        if not self.alertas:
+            textbox.insert("end", "✅ Nenhum veículo necessita de atenção imediata.\n")
+
+        primeira = True
+        for tipo, (titulo, tag) in self.SECOES_ALERTAS.items():
+            alertas = sorted((a for a in self.alertas.values() if a['tipo'] == tipo), key=lambda a: a['instante'])
+            if not alertas:
+                continue
+            if not primeira:  # Adiciona um espaço entre as seções
                 textbox.insert("end", "\n")
+            primeira = False
+            if tipo == 'revisao_proxima':
+                titulo = f"{titulo} ({self.motor_alertas.dias_revisao} dias)"
+            textbox.insert("end", f"--- {titulo} ---\n", "INFO")
+            for alerta in alertas:
+                veiculo = f"{alerta['marca']} {alerta['modelo']} ({alerta['placa']})"
+                if tipo.startswith('revisao'):
+                    quando = "Venceu em" if tipo == 'revisao_vencida' else "Agendada para"
+                    linha_alerta = (f"ID:{alerta['id_veiculo']:<3} | {veiculo} - "
+                                    f"{quando}: {alerta['instante']:%d/%m/%Y}\n")
+                else:
+                    formato = '%d/%m/%Y %H:%M' if tipo == 'devolucao_atrasada' else '%H:%M'
+                    linha_alerta = (f"Reserva:{alerta['id_reserva']:<4} | {veiculo} - {alerta['cliente']} "
+                                    f"às {alerta['instante'].strftime(formato)}\n")
+                textbox.insert("end", linha_alerta, tag)
 
-            textbox.insert("end", f"--- PRÓXIMAS REVISÕES ({db.buscar_revisoes_proximas.__defaults__[0]} dias) ---\n",
-                           "INFO")
-            for veiculo in revisoes_proximas:
-                data_formatada = datetime.strptime(veiculo['data_proxima_revisao'], '%Y-%m-%d').strftime('%d/%m/%Y')
-                linha_alerta = f"ID:{veiculo['id']:<3} | {veiculo['marca']} {veiculo['modelo']} ({veiculo['placa']}) - Agendada para: {data_formatada}\n"
-                textbox.insert("end", linha_alerta, "ALERTA")
+        textbox.configure(state="disabled")
 
-        textbox.configure(state="disabled")
\ No newline at end of file
+    def destroy(self):
+        if getattr(self, '_alertas_agendado', None):
+            self.after_cancel(self._alertas_agendado)
+        if getattr(self, 'fila_alertas', None) is not None:
+            self.motor_alertas.cancelar_subscricao(self.fila_alertas)
+        super().destroy()
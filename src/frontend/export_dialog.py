@@ -0,0 +1,61 @@
+import customtkinter as ctk
+from tkinter import messagebox
+from backend.export_engine import ExportacaoEmSegundoPlano
+
+
+class JanelaProgressoExportacao(ctk.CTkToplevel):
+    """
+    Janela modal que acompanha uma exportação em segundo plano,
+    mostrando o progresso e permitindo cancelar.
+    """
+    INTERVALO_ATUALIZACAO_MS = 100
+
+    def __init__(self, parent, caminho_arquivo, especificacao, titulo="Exportando..."):
+        super().__init__(parent)
+        self.title(titulo)
+        self.geometry("420x160")
+        self.resizable(False, False)
+        self.grab_set()
+
+        self.caminho_arquivo = caminho_arquivo
+        self.tarefa = ExportacaoEmSegundoPlano(caminho_arquivo, especificacao)
+
+        self.label_status = ctk.CTkLabel(self, text="A preparar a exportação...")
+        self.label_status.pack(pady=(20, 10), padx=20)
+
+        self.barra_progresso = ctk.CTkProgressBar(self, width=360)
+        self.barra_progresso.set(0)
+        self.barra_progresso.pack(padx=20)
+
+        self.btn_cancelar = ctk.CTkButton(self, text="Cancelar", command=self.cancelar,
+                                          fg_color="#c0392b", hover_color="#e74c3c")
+        self.btn_cancelar.pack(pady=15)
+
+        self.protocol("WM_DELETE_WINDOW", self.cancelar)
+
+        self.tarefa.start()
+        self.after(self.INTERVALO_ATUALIZACAO_MS, self.acompanhar)
+
+    def cancelar(self):
+        self.btn_cancelar.configure(state="disabled", text="A cancelar...")
+        self.tarefa.cancelar()
+
+    def acompanhar(self):
+        total = self.tarefa.total
+        exportadas = self.tarefa.linhas_exportadas
+        if total:
+            self.barra_progresso.set(min(exportadas / total, 1.0))
+            self.label_status.configure(text=f"{exportadas} de {total} linhas exportadas")
+
+        if self.tarefa.is_alive():
+            self.after(self.INTERVALO_ATUALIZACAO_MS, self.acompanhar)
+            return
+
+        self.grab_release()
+        if self.tarefa.cancelada:
+            messagebox.showinfo("Exportação Cancelada", "A exportação foi cancelada.")
+        elif self.tarefa.erro:
+            messagebox.showerror("Erro de Exportação", f"Ocorreu um erro ao salvar o arquivo: {self.tarefa.erro}")
+        else:
+            messagebox.showinfo("Sucesso", f"Dados exportados com sucesso para:\n{self.caminho_arquivo}")
+        self.destroy()
@@ -0,0 +1,26 @@
+import logging
+
+INTERVALO_MS = 30
+
+
+def ao_concluir(widget, futuro, callback, intervalo_ms=INTERVALO_MS):
+    """
+    Espera pelo Future sem bloquear a thread do Tk (verifica-o com after()) e chama
+    callback(resultado, erro) nessa thread. Se 'widget' já foi destruído, nada é chamado.
+    """
+    def _verificar():
+        try:
+            if not widget.winfo_exists():
+                return
+        except Exception:  # Interpretador do Tk já terminado
+            return
+        if not futuro.done():
+            widget.after(intervalo_ms, _verificar)
+            return
+        erro = futuro.exception()
+        try:
+            callback(None if erro else futuro.result(), erro)
+        except Exception as e:
+            logging.error(f"Erro ao concluir uma tarefa em segundo plano: {e}", exc_info=True)
+
+    widget.after(intervalo_ms, _verificar)
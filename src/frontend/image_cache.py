@@ -0,0 +1,162 @@
+import functools
+import logging
+import os
+import queue
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import customtkinter as ctk
+from PIL import Image, ImageOps
+
+from backend import config_manager as cfg
+from backend import imagens
+
+LOGO_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'assets',
+                         'logo.png')
+
+
+@functools.lru_cache(maxsize=None)
+def obter_logo(largura=100, altura=50):
+    """CTkImage do logótipo, descodificada uma única vez por processo e tamanho."""
+    with Image.open(LOGO_PATH) as imagem:
+        imagem.load()
+        return ctk.CTkImage(light_image=imagem, dark_image=imagem, size=(largura, altura))
+
+
+def _descodificar(caminho, tamanho):
+    """Abre e reduz a imagem (corre numa thread do pool, nunca na thread do Tk)."""
+    with Image.open(caminho) as imagem:
+        imagem.draft('RGB', (tamanho, tamanho))
+        imagem = ImageOps.exif_transpose(imagem).convert('RGB')
+        imagem.thumbnail((tamanho, tamanho), Image.Resampling.LANCZOS)
+        imagem.load()
+        return imagem
+
+
+@functools.lru_cache(maxsize=None)
+def _imagem_indisponivel(tamanho):
+    """Marcador cinzento para fotos que não se conseguiram carregar (uma CTkImage por tamanho)."""
+    imagem = Image.new('RGB', (tamanho, tamanho * 3 // 4), (200, 200, 200))
+    return ctk.CTkImage(light_image=imagem, dark_image=imagem, size=imagem.size)
+
+
+class CacheImagens:
+    """
+    Cache LRU limitada de CTkImage das fotos dos veículos.
+    A descodificação corre num pool de threads; os resultados voltam por uma fila que a
+    thread do Tk esvazia com after(), e só aí são criadas as CTkImage e chamados os callbacks.
+    Cada pedido pode indicar um 'dono' (a janela que o fez), para que essa janela cancele só
+    os seus pedidos. As fotos que falham ficam em cache como um marcador cinzento, para não
+    serem lidas de novo a cada página.
+    O mesmo pool corre outras tarefas lentas da interface (executar()).
+    """
+    INTERVALO_ENTREGA_MS = 30
+
+    def __init__(self, raiz, max_itens=None, workers=None):
+        config = cfg.obter_secao('imagens')
+        self.raiz = raiz
+        self.max_itens = max_itens or config['cache_max']
+        self._itens = OrderedDict()  # (imagem_path, tamanho) -> CTkImage
+        self._pendentes = {}  # (imagem_path, tamanho) -> (future, [(dono, callback)])
+        self._prontas = queue.Queue()
+        self._concluidas = queue.Queue()  # (callback, future) das tarefas de executar()
+        self._tarefas = 0
+        self._pool = ThreadPoolExecutor(max_workers=workers or config['workers'], thread_name_prefix="imagens")
+        self._agendado = None
+
+    def obter(self, imagem_path, tamanho, callback=None, dono=None):
+        """
+        Retorna a CTkImage se já estiver em cache. Caso contrário, pede a descodificação
+        e retorna None; callback(CTkImage) é chamado na thread do Tk quando estiver pronta.
+        """
+        chave = (imagem_path, tamanho)
+        if chave in self._itens:
+            self._itens.move_to_end(chave)
+            return self._itens[chave]
+        if chave in self._pendentes:
+            self._pendentes[chave][1].append((dono, callback))
+            return None
+        futuro = self._pool.submit(self._carregar, chave)
+        self._pendentes[chave] = (futuro, [(dono, callback)])
+        self._agendar()
+        return None
+
+    def executar(self, funcao, callback, *args):
+        """Corre funcao(*args) no pool; callback(resultado, erro) é chamado na thread do Tk."""
+        futuro = self._pool.submit(funcao, *args)
+        self._tarefas += 1
+        futuro.add_done_callback(lambda f: self._concluidas.put((callback, f)))
+        self._agendar()
+
+    def cancelar_pendentes(self, dono=None):
+        """
+        Desiste das descodificações de 'dono' (ex.: a página da galeria que saiu do ecrã).
+        As pedidas também por outros donos continuam; sem 'dono', desiste de todas.
+        """
+        for chave, (futuro, pedidos) in list(self._pendentes.items()):
+            if dono is not None:
+                pedidos[:] = [(d, callback) for d, callback in pedidos if d is not dono]
+                if pedidos:
+                    continue
+            if futuro.cancel():
+                del self._pendentes[chave]
+
+    def limpar(self):
+        self.cancelar_pendentes()
+        self._itens.clear()
+
+    def parar(self):
+        self.cancelar_pendentes()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _carregar(self, chave):
+        imagem_path, tamanho = chave
+        try:
+            caminho = imagens.resolver_miniatura(imagem_path, tamanho)
+            imagem = _descodificar(caminho, tamanho) if caminho else None
+        except Exception as e:
+            logging.warning(f"Não foi possível carregar a imagem {imagem_path}: {e}")
+            imagem = None
+        self._prontas.put((chave, imagem))
+
+    def _agendar(self):
+        if self._agendado is None:
+            self._agendado = self.raiz.after(self.INTERVALO_ENTREGA_MS, self._entregar)
+
+    def _entregar(self):
+        self._agendado = None
+        while True:
+            try:
+                chave, imagem = self._prontas.get_nowait()
+            except queue.Empty:
+                break
+            _, pedidos = self._pendentes.pop(chave, (None, []))
+            if imagem is None:  # Cache negativa: o marcador ocupa o lugar da foto na LRU
+                ctk_imagem = _imagem_indisponivel(chave[1])
+            else:
+                ctk_imagem = ctk.CTkImage(light_image=imagem, dark_image=imagem, size=imagem.size)
+            self._itens[chave] = ctk_imagem
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+            for _, callback in pedidos:
+                if callback is None:
+                    continue
+                try:
+                    callback(ctk_imagem)
+                except Exception as e:  # Widget destruído entretanto
+                    logging.debug(f"Callback de imagem ignorado: {e}")
+        while True:
+            try:
+                callback, futuro = self._concluidas.get_nowait()
+            except queue.Empty:
+                break
+            self._tarefas -= 1
+            if futuro.cancelled():
+                continue
+            erro = futuro.exception()
+            try:
+                callback(None if erro else futuro.result(), erro)
+            except Exception as e:  # Janela fechada entretanto
+                logging.debug(f"Callback de tarefa ignorado: {e}")
+        if self._pendentes or self._tarefas:
+            self._agendar()
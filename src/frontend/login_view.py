@@ -2,8 +2,8 @@
 import customtkinter as ctk
 from backend import database as db
 from backend import config_manager as cfg
-from PIL import Image
-import os
+from backend import desempenho_ui
+from .image_cache import obter_logo
 
 
 class LoginView(ctk.CTkFrame):
@@ -11,14 +11,8 @@ class LoginView(ctk.CTkFrame):
         super().__init__(parent)
         self.controller = controller
 
-        logo_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'assets', 'logo.png')
-
-        logo_image = ctk.CTkImage(light_image=Image.open(logo_path),
-                                  dark_image=Image.open(logo_path),
-                                  size=(100, 50))
-
-        # Widget para exibir a imagem
-        logo_label = ctk.CTkLabel(self, image=logo_image, text="")
+        # Widget para exibir a imagem (descodificada uma só vez por processo)
+        logo_label = ctk.CTkLabel(self, image=obter_logo(100, 50), text="")
         logo_label.pack(pady=(40, 20))
         self.label = ctk.CTkLabel(self, text="Login - Luxury Wheels", font=("Arial", 24, "bold"))
         self.label.pack(pady=20, padx=10)
@@ -55,6 +49,7 @@ class LoginView(ctk.CTkFrame):
             self.email_entry.insert(0, email_salvo)
             self.lembrar_var.set("on") #deixa a caixa marcada se houver email salvo
 
+    @desempenho_ui.medido
     def fazer_login(self, event=None):
         email = self.email_entry.get()
         senha = self.senha_entry.get()
@@ -1,10 +1,12 @@
 import customtkinter as ctk
+from backend import desempenho_ui
 from .dashboard_view import DashboardView
 from .vehicle_view import VehicleView
 from .client_view import ClientView
 from .reservation_view import ReservationView
-from PIL import Image, ImageTk
-import os
+from .calendar_view import CalendarView
+from .profiler_panel import PainelPerfilSQL
+from .image_cache import obter_logo
 
 class MainView(ctk.CTkFrame):
     def __init__(self, parent, controller, user_name):
@@ -20,10 +22,7 @@ class MainView(ctk.CTkFrame):
         self.menu_frame.grid(row=0, column=0, rowspan=2, sticky="nsw")
         self.menu_frame.grid_rowconfigure(5, weight=1)
 
-        logo_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'assets',
-                                 'logo.png')
-        logo_image = ctk.CTkImage(Image.open(logo_path), size=(100, 50))  # Tamanho menor para o menu
-        logo_label = ctk.CTkLabel(self.menu_frame, image=logo_image, text="")
+        logo_label = ctk.CTkLabel(self.menu_frame, image=obter_logo(100, 50), text="")  # Tamanho menor para o menu
         logo_label.grid(row=0, column=0, padx=20, pady=(20, 10))
 
         #self.label_menu = ctk.CTkLabel(self.menu_frame, text="Luxury Wheels", font=("Arial", 20, "bold"))
@@ -46,14 +45,21 @@ class MainView(ctk.CTkFrame):
         # Ajuste a ordem do grid conforme sua preferência
         self.btn_reservas.grid(row=5, column=0, padx=20, pady=10, sticky="sew")
 
+        self.btn_calendario = ctk.CTkButton(self.menu_frame, text="Calendário", command=self.show_calendar_view)
+        self.btn_calendario.grid(row=6, column=0, padx=20, pady=10, sticky="ew")
+
         self.btn_logout = ctk.CTkButton(self.menu_frame, text="Logout", command=self.logout, fg_color="#c0392b",
                                         hover_color="#e74c3c")
-        self.btn_logout.grid(row=6, column=0, padx=20, pady=20, sticky="sew")
+        self.btn_logout.grid(row=7, column=0, padx=20, pady=20, sticky="sew")
 
         # --- Frame de Conteúdo Principal ---
         self.content_frame = ctk.CTkFrame(self)
         self.content_frame.grid(row=0, column=1, rowspan=2, padx=20, pady=20, sticky="nsew")
 
+        # Atalho oculto para o painel de perfil de SQL (administração)
+        self._atalho_perfil = self.winfo_toplevel().bind("<Control-Shift-KeyPress-P>", self.abrir_painel_perfil)
+        self.painel_perfil = None
+
         # Inicia mostrando o dashboard
         self.show_dashboard_view()
 
@@ -66,9 +72,10 @@ class MainView(ctk.CTkFrame):
         # Limpa o frame de conteúdo
         for widget in self.content_frame.winfo_children():
             widget.destroy()
-        # Adiciona a nova visão
-        view = view_class(self.content_frame, self.controller)
-        view.pack(fill="both", expand=True)
+        # Adiciona a nova visão (a construção inclui a primeira carga de dados)
+        with desempenho_ui.span(f"{view_class.__name__}.__init__"):
+            view = view_class(self.content_frame, self.controller)
+            view.pack(fill="both", expand=True)
 
     def show_dashboard_view(self):
         self.show_view(DashboardView)
@@ -83,5 +90,18 @@ class MainView(ctk.CTkFrame):
     def show_reservation_view(self):
         self.show_view(ReservationView)
 
+    def show_calendar_view(self):
+        self.show_view(CalendarView)
+
+    def abrir_painel_perfil(self, event=None):
+        if self.painel_perfil is not None and self.painel_perfil.winfo_exists():
+            self.painel_perfil.focus()
+            return
+        self.painel_perfil = PainelPerfilSQL(self, self.controller)
+
+    def destroy(self):
+        self.winfo_toplevel().unbind("<Control-Shift-KeyPress-P>", self._atalho_perfil)
+        super().destroy()
+
     def logout(self):
         self.controller.show_login_view()
\ No newline at end of file
@@ -0,0 +1,118 @@
+import customtkinter as ctk
+from tkinter import ttk, messagebox
+import logging
+from backend import profiler
+
+
+class PainelPerfilSQL(ctk.CTkToplevel):
+    """
+    Painel de administração (oculto, aberto com Ctrl+Shift+P) com o perfil de SQL:
+    instruções agrupadas por forma, passos da VM, planos de execução e alertas.
+    Os planos (EXPLAIN QUERY PLAN) e o relatório são feitos no pool de threads da
+    aplicação (controller.imagens.executar), não na thread do Tk.
+    """
+
+    def __init__(self, parent, controller):
+        super().__init__(parent)
+        self.executor = controller.imagens
+        self.title("Perfil de SQL")
+        self.geometry("1100x600")
+
+        barra = ctk.CTkFrame(self)
+        barra.pack(fill="x", padx=10, pady=(10, 5))
+
+        self.switch_ativo = ctk.CTkSwitch(barra, text="Perfil ativo (novas conexões)", command=self.alternar)
+        if profiler.ativo():
+            self.switch_ativo.select()
+        self.switch_ativo.pack(side="left", padx=10)
+
+        self.btn_atualizar = ctk.CTkButton(barra, text="Atualizar", width=100, command=self.atualizar)
+        self.btn_atualizar.pack(side="left", padx=5)
+        self.btn_gravar = ctk.CTkButton(barra, text="Gravar relatório", width=130, command=self.gravar)
+        self.btn_gravar.pack(side="left", padx=5)
+        ctk.CTkButton(barra, text="Limpar", width=100, command=self.limpar,
+                      fg_color="#c0392b", hover_color="#e74c3c").pack(side="left", padx=5)
+
+        self.label_resumo = ctk.CTkLabel(barra, text="")
+        self.label_resumo.pack(side="right", padx=10)
+
+        tabela = ctk.CTkFrame(self)
+        tabela.pack(fill="both", expand=True, padx=10, pady=5)
+        colunas = ("Execuções", "Passos VM", "Máx. passos", "Alertas", "Instrução")
+        self.tree = ttk.Treeview(tabela, columns=colunas, show="headings")
+        for coluna, largura in zip(colunas, (80, 100, 100, 70, 720)):
+            self.tree.heading(coluna, text=coluna)
+            self.tree.column(coluna, width=largura, anchor="w" if coluna == "Instrução" else "e")
+        self.tree.tag_configure("alerta", background="#4a2a2d")
+        scroll = ttk.Scrollbar(tabela, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scroll.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scroll.pack(side="right", fill="y")
+        self.tree.bind("<<TreeviewSelect>>", self.mostrar_detalhe)
+
+        self.texto_detalhe = ctk.CTkTextbox(self, height=170)
+        self.texto_detalhe.pack(fill="x", padx=10, pady=(5, 10))
+
+        self.entradas = {}
+        self.atualizar()
+
+    def alternar(self):
+        if self.switch_ativo.get():
+            profiler.ativar()
+        else:
+            profiler.desativar()
+
+    def atualizar(self):
+        self.btn_atualizar.configure(state="disabled")
+        self.label_resumo.configure(text="A capturar os planos...")
+        self.executor.executar(profiler.obter_estatisticas, self._mostrar_estatisticas)
+
+    def _mostrar_estatisticas(self, entradas, erro):
+        if not self.winfo_exists():
+            return
+        self.btn_atualizar.configure(state="normal")
+        if erro:
+            logging.error(f"Perfil de SQL: erro ao obter as estatísticas: {erro}", exc_info=erro)
+            self.label_resumo.configure(text="Erro ao obter as estatísticas (ver logs)")
+            return
+        self.tree.delete(*self.tree.get_children())
+        self.entradas = {}
+        for i, e in enumerate(entradas):
+            iid = str(i)
+            self.entradas[iid] = e
+            self.tree.insert("", "end", iid=iid, tags=("alerta",) if e['alertas'] else (),
+                             values=(e['execucoes'], e['passos_vm'], e['max_passos_vm'], len(e['alertas']),
+                                     e['forma'][:300]))
+        com_alertas = sum(1 for e in entradas if e['alertas'])
+        self.label_resumo.configure(text=f"{len(entradas)} instruções, {com_alertas} com alertas")
+
+    def mostrar_detalhe(self, event=None):
+        selecao = self.tree.selection()
+        if not selecao:
+            return
+        e = self.entradas[selecao[0]]
+        linhas = [e['forma'], ""]
+        linhas += [f"plano: {detalhe}" for detalhe in (e['plano'] or ["(sem plano)"])]
+        linhas += [f"ALERTA: {alerta}" for alerta in e['alertas']]
+        self.texto_detalhe.delete("1.0", "end")
+        self.texto_detalhe.insert("1.0", "\n".join(linhas))
+
+    def gravar(self):
+        self.btn_gravar.configure(state="disabled")
+        self.executor.executar(profiler.gerar_relatorio, self._relatorio_gravado)
+
+    def _relatorio_gravado(self, caminho, erro):
+        if not self.winfo_exists():
+            return
+        self.btn_gravar.configure(state="normal")
+        if erro:
+            logging.error(f"Erro ao gravar o relatório de perfil de SQL: {erro}", exc_info=erro)
+            messagebox.showerror("Perfil de SQL", f"Não foi possível gravar o relatório: {erro}", parent=self)
+        elif caminho:
+            messagebox.showinfo("Perfil de SQL", f"Relatório gravado em:\n{caminho}", parent=self)
+        else:
+            messagebox.showwarning("Perfil de SQL", "Ainda não há instruções registadas.", parent=self)
+
+    def limpar(self):
+        profiler.limpar()
+        self.atualizar()
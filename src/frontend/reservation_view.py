@@ -1,13 +1,21 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox, filedialog
 from backend import database as db
+from backend import desempenho_ui
+from backend import export_engine
+from backend import fila_escritas
+from backend import otimizador_atribuicao
+from .export_dialog import JanelaProgressoExportacao
+from . import futuros
 from utils.helpers import parse_datestr_flexible
 from datetime import datetime
-import pandas as pd
 import logging
+import threading
 
 
 class ReservationView(ctk.CTkFrame):
+    INTERVALO_ACOMPANHAMENTO_MS = 100
+
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
@@ -34,13 +42,19 @@ class ReservationView(ctk.CTkFrame):
         button_frame = ctk.CTkFrame(self)
         button_frame.pack(fill="x", padx=20, pady=10)
         ctk.CTkButton(button_frame, text="Editar Reserva", command=self.abrir_editar_reserva).pack(side="left", padx=10)
+        ctk.CTkButton(button_frame, text="Registar Devolução", command=self.registar_devolucao).pack(side="left",
+                                                                                                 padx=10)
         ctk.CTkButton(button_frame, text="Cancelar/Remover Reserva", command=self.cancelar_reserva, fg_color="#c0392b",
                       hover_color="#e74c3c").pack(side="left", padx=10)
         ctk.CTkButton(button_frame, text="Exportar Reservas (CSV)", command=self.exportar_reservas).pack(side="left",
                                                                                                          padx=10)
+        self.btn_reotimizar = ctk.CTkButton(button_frame, text="Reotimizar Reservas Futuras",
+                                            command=self.reotimizar_reservas)
+        self.btn_reotimizar.pack(side="left", padx=10)
 
         self.carregar_dados()
 
+    @desempenho_ui.medido
     def carregar_dados(self):
         for item in self.tree.get_children():
             self.tree.delete(item)
@@ -64,59 +78,48 @@ class ReservationView(ctk.CTkFrame):
         reserva_id = self.tree.item(selected_item)["values"][0]
         EditarReservaWindow(self, reserva_id)
 
-    def cancelar_reserva(self):
+    def registar_devolucao(self):
         selected_item = self.tree.selection()
         if not selected_item:
-            messagebox.showwarning("Aviso", "Selecione uma reserva para cancelar.")
+            messagebox.showwarning("Aviso", "Selecione uma reserva para registar a devolução.")
             return
 
         reserva_id = self.tree.item(selected_item)["values"][0]
 
-        if messagebox.askyesno("Confirmação", f"Tem a certeza que deseja cancelar/remover a reserva ID {reserva_id}?"):
-            if db.deletar_reserva(reserva_id):
-                messagebox.showinfo("Sucesso", "Reserva cancelada com sucesso.")
+        if messagebox.askyesno("Confirmação", f"Confirma a entrega do veículo da reserva ID {reserva_id}?"):
+            if db.registar_devolucao(reserva_id):
+                messagebox.showinfo("Sucesso", "Devolução registada com sucesso.")
                 self.carregar_dados()
             else:
-                messagebox.showerror("Erro", "Não foi possível cancelar a reserva.")
+                messagebox.showerror("Erro", "A reserva ainda não começou, foi cancelada ou já foi devolvida.")
 
-    def exportar_reservas(self):
-        # 1. Busca os dados mais recentes do banco
-        reservas = db.listar_todas_reservas_detalhadas()
-        if not reservas:
-            messagebox.showinfo("Informação", "Não há reservas para exportar.")
+    def cancelar_reserva(self):
+        selected_item = self.tree.selection()
+        if not selected_item:
+            messagebox.showwarning("Aviso", "Selecione uma reserva para cancelar.")
             return
 
-        # 2. Converte para um DataFrame do Pandas
-        dados_reservas = [dict(reserva) for reserva in reservas]
-        df = pd.DataFrame(dados_reservas)
-
-        # 3. Limpeza e Renomeação de Colunas para o relatório final
-        df.rename(columns={
-            'reserva_id': 'ID da Reserva',
-            'cliente_nome': 'Cliente',
-            'cliente_nif': 'NIF do Cliente',
-            'marca': 'Marca do Veículo',
-            'modelo': 'Modelo do Veículo',
-            'placa': 'Placa',
-            'data_inicio': 'Data de Início',
-            'data_fim': 'Data de Fim',
-            'valor_total': 'Valor Total (€)',
-            'status': 'Status',
-            'forma_pagamento': 'Forma de Pagamento'
-        }, inplace=True)
+        reserva_id = self.tree.item(selected_item)["values"][0]
 
-        try:
-            df['Data de Início'] = df['Data de Início'].apply(
-                lambda x: parse_datestr_flexible(x).strftime('%d/%m/%Y %H:%M') if x else '')
-            df['Data de Fim'] = df['Data de Fim'].apply(
-                lambda x: parse_datestr_flexible(x).strftime('%d/%m/%Y %H:%M') if x else '')
-        except Exception as e:
-            logging.error(f"Erro ao formatar datas para exportação: {e}", exc_info=True)
-            messagebox.showerror("Erro de Dados",
-                                 "Ocorreu um erro ao formatar as datas para o relatório. Verifique os logs.")
+        if messagebox.askyesno("Confirmação", f"Tem a certeza que deseja cancelar/remover a reserva ID {reserva_id}?"):
+            futuros.ao_concluir(self, fila_escritas.deletar_reserva(reserva_id),
+                                lambda resultado, erro: self._reserva_cancelada(reserva_id, resultado, erro))
+
+    def _reserva_cancelada(self, reserva_id, resultado, erro):
+        if erro:
+            logging.error(f"Erro ao deletar reserva ID {reserva_id}: {erro}", exc_info=erro)
+        if not erro and resultado['linhas'] > 0:
+            messagebox.showinfo("Sucesso", "Reserva cancelada com sucesso.")
+            self.carregar_dados()
+        else:
+            messagebox.showerror("Erro", "Não foi possível cancelar a reserva.")
+
+    def exportar_reservas(self):
+        especificacao = export_engine.especificacao_reservas()
+        if not db.consulta_tem_linhas(especificacao['sql'], especificacao['params']):
+            messagebox.showinfo("Informação", "Não há reservas para exportar.")
             return
 
-        # 5. Pede ao usuário para escolher onde salvar
         caminho_arquivo = filedialog.asksaveasfilename(
             defaultextension=".csv",
             filetypes=[("Arquivos CSV", "*.csv"), ("Arquivos Excel", "*.xlsx")],
@@ -124,17 +127,42 @@ class ReservationView(ctk.CTkFrame):
         )
         if not caminho_arquivo: return
 
-        # 6. Tenta exportar para o formato escolhido
-        try:
-            if caminho_arquivo.endswith('.xlsx'):
-                df.to_excel(caminho_arquivo, index=False, engine='openpyxl')
-            else:
-                df.to_csv(caminho_arquivo, index=False, sep=';', encoding='utf-8-sig')
+        # A exportação corre em segundo plano, lendo o cursor em lotes
+        JanelaProgressoExportacao(self, caminho_arquivo, especificacao, titulo="Exportando reservas...")
 
-            messagebox.showinfo("Sucesso", f"Relatório de reservas exportado com sucesso para:\n{caminho_arquivo}")
-        except Exception as e:
-            logging.error(f"Erro ao exportar relatório de reservas: {e}", exc_info=True)
-            messagebox.showerror("Erro de Exportação", f"Ocorreu um erro ao salvar o arquivo: {e}")
+    def reotimizar_reservas(self):
+        if not messagebox.askyesno("Confirmação",
+                                   "Deseja trocar os veículos das reservas futuras (mesma marca, modelo e diária) "
+                                   "para reduzir os intervalos curtos entre reservas?"):
+            return
+
+        # A reotimização lê todas as reservas futuras: corre numa thread, como a exportação
+        self.btn_reotimizar.configure(state="disabled", text="A reotimizar...")
+        saida = {}
+        tarefa = threading.Thread(
+            target=lambda: saida.update(resultado=otimizador_atribuicao.reotimizar_reservas_futuras()),
+            name="reotimizar-reservas", daemon=True)
+        tarefa.start()
+        self.after(self.INTERVALO_ACOMPANHAMENTO_MS, self.acompanhar_reotimizacao, tarefa, saida)
+
+    def acompanhar_reotimizacao(self, tarefa, saida):
+        if not self.winfo_exists():
+            return
+        if tarefa.is_alive():
+            self.after(self.INTERVALO_ACOMPANHAMENTO_MS, self.acompanhar_reotimizacao, tarefa, saida)
+            return
+
+        self.btn_reotimizar.configure(state="normal", text="Reotimizar Reservas Futuras")
+        resultado = saida.get('resultado')  # Sem resultado: a thread terminou com uma exceção
+        if resultado is None:
+            messagebox.showerror("Erro", "Ocorreu um erro ao reotimizar as reservas. Verifique os logs.")
+        elif resultado['aplicado']:
+            messagebox.showinfo("Sucesso", f"{resultado['mudadas']} de {resultado['reservas']} reserva(s) mudaram de "
+                                           f"veículo.\nIntervalos curtos: {resultado['fragmentos_antes']} → "
+                                           f"{resultado['fragmentos_depois']}.")
+            self.carregar_dados()
+        else:
+            messagebox.showinfo("Informação", "A distribuição atual das reservas futuras já é a melhor encontrada.")
 
 
 class EditarReservaWindow(ctk.CTkToplevel):
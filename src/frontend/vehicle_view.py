@@ -1,11 +1,18 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox, filedialog
-from PIL import Image
-import os
+import logging
 import re
 from datetime import datetime
+from backend import config_manager as cfg
 from backend import database as db
-import pandas as pd
+from backend import desempenho_ui
+from backend import export_engine
+from backend import fila_escritas
+from backend import imagens
+from backend import indice_frota
+from backend import planeador_manutencao
+from .export_dialog import JanelaProgressoExportacao
+from . import futuros
 
 
 # --- CLASSE PARA O FORMULÁRIO DE ADICIONAR/EDITAR (BOA PRÁTICA) ---
@@ -17,9 +24,10 @@ class FormularioVeiculo(ctk.CTkToplevel):
         self.dados_veiculo = dados_veiculo
 
         self.title("Editar Veículo" if dados_veiculo else "Adicionar Novo Veículo")
-        self.geometry("400x550")
+        self.geometry("400x720")
         self.resizable(False, False)
         self.grab_set()  # Mantém o foco na janela
+        self.imagem_path = dados_veiculo.get('imagem_path') if dados_veiculo else None
 
         self.campos = ["Marca", "Modelo", "Ano", "Placa", "Cor", "Valor Diária (€)", "Próxima Revisão"]
         self.entradas = {}  # Dicionário para guardar os widgets de entrada
@@ -66,11 +74,56 @@ class FormularioVeiculo(ctk.CTkToplevel):
                 # Força uma validação inicial para definir a cor da borda
                 self.validar_data("DD/MM/AAAA")
 
-                # --- PASSO 3: Cria o botão de salvar ---
+        # Foto (opcional): pré-visualização a partir da miniatura, descodificada fora da thread do Tk
+        frame_foto = ctk.CTkFrame(self)
+        frame_foto.pack(padx=20, pady=(10, 0), fill="x")
+        self.label_foto = ctk.CTkLabel(frame_foto, text="Sem foto", width=160, height=120)
+        self.label_foto.pack(side="left", padx=5, pady=5)
+        self.btn_foto = ctk.CTkButton(frame_foto, text="Escolher Foto", command=self.escolher_foto)
+        self.btn_foto.pack(side="left", padx=10)
+        self.mostrar_foto()
+
+        # --- PASSO 3: Cria o botão de salvar ---
         texto_botao = "Confirmar Alterações" if dados_veiculo else "Salvar Novo Veículo"
         self.btn_salvar = ctk.CTkButton(self, text=texto_botao, command=self.salvar)
         self.btn_salvar.pack(pady=20)
 
+    def escolher_foto(self):
+        caminho = filedialog.askopenfilename(
+            parent=self, title="Selecione a foto do veículo",
+            filetypes=[("Imagens", "*.jpg *.jpeg *.png *.webp *.bmp *.gif")]
+        )
+        if not caminho:
+            return
+        # Copiar a foto e gerar as miniaturas pode demorar: corre no pool das imagens
+        self.btn_foto.configure(state="disabled", text="A processar...")
+        self.btn_salvar.configure(state="disabled")
+        self.controller.imagens.executar(imagens.guardar_imagem, self._foto_guardada, caminho)
+
+    def _foto_guardada(self, chave, erro):
+        if not self.winfo_exists():
+            return
+        self.btn_foto.configure(state="normal", text="Escolher Foto")
+        self.btn_salvar.configure(state="normal")
+        if erro:
+            if not isinstance(erro, (imagens.ErroImagem, OSError)):
+                logging.error(f"Erro ao guardar a foto do veículo: {erro}", exc_info=erro)
+            messagebox.showerror("Erro", f"Não foi possível usar esta imagem: {erro}", parent=self)
+            return
+        self.imagem_path = chave
+        self.mostrar_foto()
+
+    def mostrar_foto(self):
+        if not self.imagem_path:
+            return
+        imagem = self.controller.imagens.obter(self.imagem_path, 160, self._aplicar_foto, dono=self)
+        if imagem:
+            self._aplicar_foto(imagem)
+
+    def _aplicar_foto(self, imagem):
+        if self.label_foto.winfo_exists():
+            self.label_foto.configure(image=imagem, text="")
+
     def validar_data(self, novo_texto):
         if novo_texto == "":
             self.data_revisao_entry.configure(border_color="gray")
@@ -115,7 +168,7 @@ class FormularioVeiculo(ctk.CTkToplevel):
             dados_para_db['data_proxima_revisao'] = data_revisao_obj.strftime('%Y-%m-%d')
 
             # Campo opcional de imagem
-            dados_para_db['imagem_path'] = valores.get('imagem_path', None)
+            dados_para_db['imagem_path'] = self.imagem_path
 
         except (ValueError, KeyError) as e:
             logging.error(f"Erro na conversão de dados do formulário: {e}", exc_info=True)
@@ -124,27 +177,72 @@ class FormularioVeiculo(ctk.CTkToplevel):
             return
 
         # Chama as funções do DB com o dicionário de dados limpo e correto
-        if self.dados_veiculo:  # Modo Edição
-            db.atualizar_veiculo(self.dados_veiculo['id'], **dados_para_db)
-            messagebox.showinfo("Sucesso", "Veículo atualizado com sucesso!")
-        else:  # Modo Adição
-            if not db.adicionar_veiculo(**dados_para_db):
-                messagebox.showerror("Erro", "Não foi possível adicionar o veículo. Verifique se a placa já existe.")
-                return
-            messagebox.showinfo("Sucesso", "Novo veículo adicionado à frota!")
+        if self.dados_veiculo:  # Modo Edição: a escrita vai para a fila, sem bloquear a interface
+            self.btn_salvar.configure(state="disabled")
+            futuros.ao_concluir(self, fila_escritas.atualizar_veiculo(self.dados_veiculo['id'], **dados_para_db),
+                                self._veiculo_atualizado)
+            return
+        if not db.adicionar_veiculo(**dados_para_db):  # Modo Adição
+            messagebox.showerror("Erro", "Não foi possível adicionar o veículo. Verifique se a placa já existe.")
+            return
+        messagebox.showinfo("Sucesso", "Novo veículo adicionado à frota!")
+        self.parent_view.carregar_dados()
+        self.destroy()
 
+    def _veiculo_atualizado(self, resultado, erro):
+        self.btn_salvar.configure(state="normal")
+        if erro:
+            logging.error(f"Erro ao atualizar o veículo {self.dados_veiculo['id']}: {erro}", exc_info=erro)
+            messagebox.showerror("Erro", "Não foi possível atualizar o veículo. Verifique se a placa já existe.",
+                                 parent=self)
+            return
+        # Só este veículo é relido para o índice (evita a releitura completa da frota)
+        indice_frota.obter_indice().atualizar_veiculos([self.dados_veiculo['id']])
+        messagebox.showinfo("Sucesso", "Veículo atualizado com sucesso!")
         self.parent_view.carregar_dados()
         self.destroy()
 
 # --- CLASSE PRINCIPAL DA VISÃO DE VEÍCULOS ---
 class VehicleView(ctk.CTkFrame):
+    TODOS = "Todos"
+    ATRASO_FILTRO_MS = 150  # Espera entre teclas antes de reaplicar os filtros
+    # Coluna da tabela -> coluna do índice da frota (para ordenar ao clicar no cabeçalho)
+    COLUNAS_INDICE = {"ID": 'id', "Marca": 'marca', "Modelo": 'modelo', "Placa": 'placa',
+                      "Status": 'status_operacional', "Revisão": 'data_proxima_revisao',
+                      "Valor Diária": 'valor_diaria', "Data Retorno": 'data_retorno'}
+
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
+        self.indice = None
+        self.ordenar_por = 'marca'
+        self.decrescente = False
+        self._filtro_agendado = None
 
         self.label = ctk.CTkLabel(self, text="Gestão de Veículos", font=("Arial", 24, "bold"))
         self.label.pack(pady=10, padx=10)
 
+        # Barra de filtros: aplicada sobre o índice da frota em memória, sem consultas ao banco
+        filtros_frame = ctk.CTkFrame(self)
+        filtros_frame.pack(pady=(0, 5), padx=10, fill="x")
+        self.entry_pesquisa = ctk.CTkEntry(filtros_frame, placeholder_text="Pesquisar marca, modelo, placa, cor...",
+                                           width=260)
+        self.entry_pesquisa.pack(side="left", padx=5, pady=5)
+        self.menu_marca = ctk.CTkOptionMenu(filtros_frame, values=[self.TODOS], width=140,
+                                            command=lambda _: self.aplicar_filtros())
+        self.menu_marca.pack(side="left", padx=5)
+        self.menu_status = ctk.CTkOptionMenu(filtros_frame, values=[self.TODOS], width=140,
+                                             command=lambda _: self.aplicar_filtros())
+        self.menu_status.pack(side="left", padx=5)
+        self.entry_ano_min = ctk.CTkEntry(filtros_frame, placeholder_text="Ano desde", width=90)
+        self.entry_ano_min.pack(side="left", padx=5)
+        self.entry_valor_max = ctk.CTkEntry(filtros_frame, placeholder_text="Diária até (€)", width=110)
+        self.entry_valor_max.pack(side="left", padx=5)
+        for entry in (self.entry_pesquisa, self.entry_ano_min, self.entry_valor_max):
+            entry.bind("<KeyRelease>", lambda _: self.agendar_filtros())
+        self.label_contagem = ctk.CTkLabel(filtros_frame, text="")
+        self.label_contagem.pack(side="right", padx=10)
+
         # Frame para a Tabela e Botões
         content_frame = ctk.CTkFrame(self)
         content_frame.pack(pady=10, padx=10, fill="both", expand=True)
@@ -168,7 +266,7 @@ class VehicleView(ctk.CTkFrame):
                                  show="headings")
 
         for col in self.tree["columns"]:
-            self.tree.heading(col, text=col)
+            self.tree.heading(col, text=col, command=lambda c=col: self.ordenar_por_coluna(c))
             self.tree.column(col, width=150, anchor="center")
 
         self.tree.pack(pady=20, padx=10, fill="both", expand=True)
@@ -185,6 +283,7 @@ class VehicleView(ctk.CTkFrame):
         ctk.CTkButton(button_frame, text="Exportar para Excel", command=self.exportar_para_excel).pack(side="right",
                                                                                                        padx=10)
         ctk.CTkButton(button_frame, text="Ver Histórico", command=self.ver_historico_veiculo).pack(side="left", padx=10)
+        ctk.CTkButton(button_frame, text="Galeria", command=self.abrir_galeria).pack(side="left", padx=10)
         ctk.CTkButton(button_frame, text="Revisão",
                       command=self.gerir_status_revisao,
                       fg_color="#5e35b1", hover_color="#4527a0").pack(side="right", padx=10)
@@ -195,69 +294,116 @@ class VehicleView(ctk.CTkFrame):
         self.tree.tag_configure('devolucao_hoje', background='#FB8C00')
         self.carregar_dados()
 
+    @desempenho_ui.medido
     def carregar_dados(self):
-        # 1. Limpa a tabela para evitar duplicatas
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        # 2. Busca a lista de veículos do backend (já com o status_operacional)
-        veiculos = db.listar_veiculos()
-
-        # 3. Itera sobre cada veículo para preparar e inserir os dados
-        for v in veiculos:
-            # Pega o status calculado pelo backend. Usa '.title()' para capitalizar (ex: 'Disponível')
-            status_op = v['status_operacional'].title() if v['status_operacional'] else "Indefinido"
-
-            # Define a tag de cor com base no status operacional
-            # As tags devem ser configuradas no __init__ da classe
-            tag = ''
-            if status_op == 'Manutenção':
-                tag = 'manutencao'
-            elif status_op == 'Reservado':
-                tag = 'reservado'
-            elif status_op == 'Alugado':
-                tag = 'alugado'  # Assume que você tem uma tag 'alugado'
-            elif status_op == 'Devolução Hoje':
-                tag = 'devolucao_hoje'
-
-            # Formatação defensiva da data de revisão
-            data_revisao_str = ""
-            if v['data_proxima_revisao']:
-                try:
-                    data_revisao_str = datetime.strptime(v['data_proxima_revisao'], '%Y-%m-%d').strftime('%d/%m/%Y')
-                except (ValueError, TypeError):
-                    data_revisao_str = "Inválida"
-            else:
-                data_revisao_str = "N/A"
-
-            # Formatação defensiva do valor da diária
-            valor_diaria_str = "N/A"
-            if v['valor_diaria'] is not None:
-                valor_diaria_str = f"€ {v['valor_diaria']:.2f}".replace('.', ',')
-
-            # Formatação defensiva da data de retorno
-            data_retorno_str = ""
-            if v['data_retorno']:
-                try:
-                    data_retorno_str = datetime.strptime(v['data_retorno'], '%Y-%m-%d %H:%M:%S').strftime('%d/%m/%Y')
-                except (ValueError, TypeError):
-                    data_retorno_str = "Inválida"
-
-            # Cria a tupla de valores na ordem exata das suas colunas
-            # ORDEM: "ID", "Marca", "Modelo", "Placa", "Status", "Revisão", "Valor Diária", "Data Retorno"
-            valores_para_inserir = (
-                v["id"],
-                v["marca"],
-                v["modelo"],
-                v["placa"],
-                status_op,  # Usa o novo status operacional
-                data_revisao_str,
-                valor_diaria_str,
-                data_retorno_str
-            )
-
-            # Insere a linha na tabela com os valores e a tag de cor
-            self.tree.insert("", "end", values=valores_para_inserir, tags=(tag,))
+        # 1. Põe o índice da frota em dia (incremental quando só mudaram reservas)
+        self.indice = indice_frota.obter_indice()
+
+        # 2. Atualiza as opções dos filtros com os valores presentes na frota
+        for menu, coluna in ((self.menu_marca, 'marca'), (self.menu_status, 'status_operacional')):
+            opcoes = [self.TODOS] + self.indice.valores_distintos(coluna)
+            menu.configure(values=opcoes)
+            if menu.get() not in opcoes:
+                menu.set(self.TODOS)
+
+        # 3. Mostra as linhas que passam nos filtros atuais
+        self.aplicar_filtros()
+
+    def agendar_filtros(self):
+        """Reaplica os filtros depois de uma pausa na escrita (uma vez por rajada de teclas)."""
+        if self._filtro_agendado:
+            self.after_cancel(self._filtro_agendado)
+        self._filtro_agendado = self.after(self.ATRASO_FILTRO_MS, self.aplicar_filtros)
+
+    def ordenar_por_coluna(self, coluna):
+        chave = self.COLUNAS_INDICE[coluna]
+        self.decrescente = not self.decrescente if chave == self.ordenar_por else False
+        self.ordenar_por = chave
+        self.aplicar_filtros()
+
+    def _numero(self, entry, tipo):
+        try:
+            return tipo(entry.get().replace('€', '').strip().replace(',', '.'))
+        except ValueError:
+            return None
+
+    def aplicar_filtros(self):
+        self._filtro_agendado = None
+        if self.indice is None:
+            return
+        filtros = {
+            'ano_min': self._numero(self.entry_ano_min, int),
+            'valor_max': self._numero(self.entry_valor_max, float),
+        }
+        if self.menu_marca.get() != self.TODOS:
+            filtros['marca'] = [self.menu_marca.get()]
+        if self.menu_status.get() != self.TODOS:
+            filtros['status_operacional'] = [self.menu_status.get()]
+        posicoes = self.indice.filtrar(self.entry_pesquisa.get(), ordenar_por=self.ordenar_por,
+                                       decrescente=self.decrescente, **filtros)
+
+        # Só as primeiras linhas são desenhadas: o Treeview não escala para dezenas de milhares
+        limite = cfg.obter('indice_frota', 'linhas_visiveis')
+        self.tree.delete(*self.tree.get_children())
+        for v in self.indice.linhas(posicoes[:limite]):
+            self._inserir_linha(v)
+        self.label_contagem.configure(text=f"A mostrar {min(len(posicoes), limite)} de {len(posicoes)} "
+                                           f"(frota: {len(self.indice)})")
+
+    def _inserir_linha(self, v):
+        # Pega o status calculado pelo backend. Usa '.title()' para capitalizar (ex: 'Disponível')
+        status_op = v['status_operacional'].title() if v['status_operacional'] else "Indefinido"
+
+        # Define a tag de cor com base no status operacional
+        # As tags devem ser configuradas no __init__ da classe
+        tag = ''
+        if status_op == 'Manutenção':
+            tag = 'manutencao'
+        elif status_op == 'Reservado':
+            tag = 'reservado'
+        elif status_op == 'Alugado':
+            tag = 'alugado'  # Assume que você tem uma tag 'alugado'
+        elif status_op == 'Devolução Hoje':
+            tag = 'devolucao_hoje'
+
+        # Formatação defensiva da data de revisão
+        data_revisao_str = ""
+        if v['data_proxima_revisao']:
+            try:
+                data_revisao_str = datetime.strptime(v['data_proxima_revisao'], '%Y-%m-%d').strftime('%d/%m/%Y')
+            except (ValueError, TypeError):
+                data_revisao_str = "Inválida"
+        else:
+            data_revisao_str = "N/A"
+
+        # Formatação defensiva do valor da diária
+        valor_diaria_str = "N/A"
+        if v['valor_diaria'] is not None:
+            valor_diaria_str = f"€ {v['valor_diaria']:.2f}".replace('.', ',')
+
+        # Formatação defensiva da data de retorno
+        data_retorno_str = ""
+        if v['data_retorno']:
+            try:
+                data_retorno_str = datetime.strptime(v['data_retorno'], '%Y-%m-%d %H:%M:%S').strftime('%d/%m/%Y')
+            except (ValueError, TypeError):
+                data_retorno_str = "Inválida"
+
+        # Cria a tupla de valores na ordem exata das suas colunas
+        # ORDEM: "ID", "Marca", "Modelo", "Placa", "Status", "Revisão", "Valor Diária", "Data Retorno"
+        valores_para_inserir = (
+            v["id"],
+            v["marca"],
+            v["modelo"],
+            v["placa"],
+            status_op,  # Usa o novo status operacional
+            data_revisao_str,
+            valor_diaria_str,
+            data_retorno_str
+        )
+
+        # Insere a linha na tabela com os valores e a tag de cor
+        self.tree.insert("", "end", values=valores_para_inserir, tags=(tag,))
 
     def abrir_adicionar(self):
         FormularioVeiculo(self, self.controller)
@@ -287,6 +433,7 @@ class VehicleView(ctk.CTkFrame):
 
         if messagebox.askyesno("Confirmação", f"Tem certeza que deseja remover o veículo ID {id_veiculo}?"):
             if db.deletar_veiculo(id_veiculo):
+                indice_frota.obter_indice().atualizar_veiculos([id_veiculo])
                 messagebox.showinfo("Sucesso", "Veículo removido com sucesso.")
                 self.carregar_dados()
             else:
@@ -310,15 +457,11 @@ class VehicleView(ctk.CTkFrame):
         self.carregar_dados()
 
     def exportar_para_excel(self):
-        veiculos = db.listar_veiculos()
-        if not veiculos:
+        especificacao = export_engine.especificacao_veiculos()
+        if not db.consulta_tem_linhas(especificacao['sql'], especificacao['params']):
             messagebox.showinfo("Informação", "Não há veículos para exportar.")
             return
 
-        dados_veiculos = [dict(v) for v in veiculos]
-        df = pd.DataFrame(dados_veiculos)
-        df.rename(columns={'valor_diaria': 'valor_diaria_eur'}, inplace=True)
-
         caminho_arquivo = filedialog.asksaveasfilename(
             defaultextension=".xlsx",
             filetypes=[("Arquivos Excel", "*.xlsx"), ("Todos os arquivos", "*.*")],
@@ -326,11 +469,7 @@ class VehicleView(ctk.CTkFrame):
         )
         if not caminho_arquivo: return
 
-        try:
-            df.to_excel(caminho_arquivo, index=False, engine='openpyxl')
-            messagebox.showinfo("Sucesso", f"Dados exportados com sucesso para:\n{caminho_arquivo}")
-        except Exception as e:
-            messagebox.showerror("Erro", f"Ocorreu um erro ao exportar os dados: {e}")
+        JanelaProgressoExportacao(self, caminho_arquivo, especificacao, titulo="Exportando veículos...")
 
     def ver_historico_veiculo(self):
         selected_item = self.tree.selection()
@@ -345,26 +484,125 @@ class VehicleView(ctk.CTkFrame):
         # Chama a nova janela para exibir o histórico
         HistoricoVeiculoWindow(self, id_veiculo, nome_veiculo)
 
+    def abrir_galeria(self):
+        GaleriaVeiculosWindow(self, self.controller)
+
     def gerir_status_revisao(self):
         """
-        Chama a função do backend para colocar veículos em manutenção e atualiza a view.
+        Planeia as revisões a vencer nos intervalos livres entre reservas (em vez de
+        bloquear os veículos com antecedência), mostra o resultado e atualiza a view.
         """
         if not messagebox.askyesno("Confirmação",
-                                   "Deseja verificar e colocar todos os veículos com revisão vencida ou próxima (15 dias) em status de 'Manutenção'?"):
+                                   "Deseja planear as revisões que vencem em breve nos intervalos livres entre reservas?"):
             return
 
-        num_atualizados = db.colocar_veiculos_revisao_em_manutencao()
-
-        if num_atualizados > 0:
-            messagebox.showinfo("Sucesso", f"{num_atualizados} veículo(s) foram atualizados para 'Manutenção'.")
-        elif num_atualizados == 0:
-            messagebox.showinfo("Informação", "Nenhum veículo necessitava de atualização de status.")
-        else:  # num_atualizados == -1
-            messagebox.showerror("Erro", "Ocorreu um erro ao atualizar os status. Verifique os logs.")
+        planeador_manutencao.atualizar_estados()
+        resultado = planeador_manutencao.planear_manutencoes()
+
+        if resultado is None:
+            messagebox.showerror("Erro", "Ocorreu um erro ao planear as revisões. Verifique os logs.")
+        elif resultado['planeadas'] or resultado['sem_vaga']:
+            linhas = [f"{bloco['inicio']:%d/%m/%Y}: veículo ID {bloco['id_veiculo']}"
+                      + (" (revisão vencida)" if bloco['atrasada'] else "") for bloco in resultado['plano'][:15]]
+            mensagem = f"{resultado['planeadas']} revisão(ões) planeada(s).\n\n" + "\n".join(linhas)
+            if resultado['sem_vaga']:
+                mensagem += (f"\n\n{resultado['sem_vaga']} veículo(s) sem vaga antes do prazo (IDs: "
+                             f"{', '.join(map(str, resultado['ids_sem_vaga'][:10]))}).")
+            messagebox.showinfo("Plano de Revisões", mensagem)
+        else:
+            messagebox.showinfo("Informação", "Nenhuma revisão por planear.")
 
         self.carregar_dados()
 
 
+class GaleriaVeiculosWindow(ctk.CTkToplevel):
+    """
+    Galeria paginada das fotos da frota. Cada página cria no máximo POR_PAGINA miniaturas;
+    as fotos chegam da cache partilhada (LRU) à medida que o pool as descodifica, e ao mudar
+    de página as descodificações desta janela ainda por começar são canceladas. A memória fica
+    limitada pela página visível mais a cache, seja qual for o tamanho da frota. A lista de
+    veículos também é lida no pool, para a janela abrir sem esperar pelo banco.
+    """
+    POR_PAGINA = 48
+    COLUNAS = 6
+    TAMANHO = 160
+
+    def __init__(self, parent, controller):
+        super().__init__(parent)
+        self.title("Galeria da Frota")
+        self.geometry("1100x700")
+        self.cache = controller.imagens
+        self.veiculos = None  # Ainda a carregar
+        self.pagina = 0
+
+        self.grade = ctk.CTkScrollableFrame(self)
+        self.grade.pack(fill="both", expand=True, padx=10, pady=10)
+
+        navegacao = ctk.CTkFrame(self)
+        navegacao.pack(fill="x", padx=10, pady=(0, 10))
+        self.btn_anterior = ctk.CTkButton(navegacao, text="< Anterior", command=lambda: self.mudar_pagina(-1))
+        self.btn_anterior.pack(side="left", padx=10)
+        self.label_pagina = ctk.CTkLabel(navegacao, text="")
+        self.label_pagina.pack(side="left", expand=True)
+        self.btn_seguinte = ctk.CTkButton(navegacao, text="Seguinte >", command=lambda: self.mudar_pagina(1))
+        self.btn_seguinte.pack(side="right", padx=10)
+
+        self.protocol("WM_DELETE_WINDOW", self.fechar)
+        self.mostrar_pagina()
+        self.cache.executar(db.listar_veiculos, self._veiculos_carregados)
+
+    def _veiculos_carregados(self, veiculos, erro):
+        if not self.winfo_exists():
+            return
+        if erro:
+            logging.error(f"Galeria: erro ao listar os veículos: {erro}", exc_info=erro)
+            messagebox.showerror("Erro", "Não foi possível carregar a lista de veículos.", parent=self)
+            veiculos = []
+        self.veiculos = [v for v in veiculos if v['imagem_path']]
+        self.mostrar_pagina()
+
+    def total_paginas(self):
+        return max(1, -(-len(self.veiculos or []) // self.POR_PAGINA))
+
+    def mudar_pagina(self, passo):
+        self.pagina = min(max(self.pagina + passo, 0), self.total_paginas() - 1)
+        self.mostrar_pagina()
+
+    def mostrar_pagina(self):
+        self.cache.cancelar_pendentes(dono=self)
+        for widget in self.grade.winfo_children():
+            widget.destroy()
+
+        if self.veiculos is None:
+            ctk.CTkLabel(self.grade, text="A carregar a frota...", font=("Arial", 14)).pack(pady=20)
+        elif not self.veiculos:
+            ctk.CTkLabel(self.grade, text="Nenhum veículo tem foto.", font=("Arial", 14)).pack(pady=20)
+        inicio = self.pagina * self.POR_PAGINA
+        for indice, v in enumerate((self.veiculos or [])[inicio:inicio + self.POR_PAGINA]):
+            cartao = ctk.CTkFrame(self.grade)
+            cartao.grid(row=indice // self.COLUNAS, column=indice % self.COLUNAS, padx=5, pady=5)
+            foto = ctk.CTkLabel(cartao, text="A carregar...", width=self.TAMANHO, height=self.TAMANHO * 3 // 4)
+            foto.pack(padx=5, pady=(5, 0))
+            ctk.CTkLabel(cartao, text=f"{v['marca']} {v['modelo']}\n{v['placa']}").pack(pady=(0, 5))
+
+            imagem = self.cache.obter(v['imagem_path'], self.TAMANHO, lambda img, label=foto: self._aplicar(label, img),
+                                      dono=self)
+            if imagem:
+                self._aplicar(foto, imagem)
+
+        self.label_pagina.configure(text=f"Página {self.pagina + 1} de {self.total_paginas()}")
+        self.btn_anterior.configure(state="normal" if self.pagina > 0 else "disabled")
+        self.btn_seguinte.configure(state="normal" if self.pagina < self.total_paginas() - 1 else "disabled")
+
+    def _aplicar(self, label, imagem):
+        if label.winfo_exists():
+            label.configure(image=imagem, text="")
+
+    def fechar(self):
+        self.cache.cancelar_pendentes(dono=self)
+        self.destroy()
+
+
 class HistoricoVeiculoWindow(ctk.CTkToplevel):
     def __init__(self, parent, id_veiculo, nome_veiculo):
         super().__init__(parent)
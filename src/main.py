@@ -4,7 +4,15 @@ import customtkinter as ctk
 from frontend.login_view import LoginView
 from frontend.register_view import RegisterView
 from frontend.main_view import MainView
+from frontend.image_cache import CacheImagens
 from backend.logger_config import setup_logging
+from backend import schema
+from backend.scheduler import criar_agendador_padrao
+from backend.alertas import MotorAlertas
+from backend.indice_frota import SincronizadorIndice
+from backend import deduplicacao
+from backend import fila_escritas
+from backend.desempenho_ui import Vigia
 import logging
 
 
@@ -14,8 +22,35 @@ class App(ctk.CTk):
         self.title("Luxury Wheels - Sistema de Gestão")
         ctk.set_appearance_mode("dark")
         self._current_frame = None
+        # Fotos dos veículos descodificadas fora da thread da interface (LRU partilhada)
+        self.imagens = CacheImagens(self)
+
+        # Varreduras periódicas (manutenção, status das reservas) fora da thread da interface
+        self.agendador = criar_agendador_padrao()
+        self.agendador.iniciar()
+        # Prazos de revisões, levantamentos e devoluções: as vistas subscrevem os alertas
+        self.alertas = MotorAlertas()
+        self.alertas.iniciar()
+        # Índice da frota construído e recarregado fora da thread da interface
+        self.sincronizador_indice = SincronizadorIndice()
+        self.sincronizador_indice.iniciar()
+        deduplicacao.obter_indice()  # Começa já a construir o índice de duplicados, numa thread
+        # Mede a latência do mainloop e captura a pilha quando a interface fica parada
+        self.vigia = Vigia()
+        self.vigia.iniciar(self)
+        self.protocol("WM_DELETE_WINDOW", self.fechar)
+
         self.show_login_view()
 
+    def fechar(self):
+        self.agendador.parar()
+        self.alertas.parar()
+        self.sincronizador_indice.parar()
+        self.vigia.parar()
+        self.imagens.parar()
+        fila_escritas.parar_fila()  # Grava as escritas dos formulários ainda na fila
+        self.destroy()
+
     def switch_frame(self, frame_class, *args):
         if self._current_frame:
             self._current_frame.destroy()
@@ -52,6 +87,7 @@ class App(ctk.CTk):
 if __name__ == "__main__":
     setup_logging()
     try:
+        schema.aplicar_migracoes()
         app = App()
         app.mainloop()
     except Exception as e:
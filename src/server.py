@@ -0,0 +1,35 @@
+# src/server.py
+
+import argparse
+import logging
+
+from backend.logger_config import setup_logging
+from backend import schema
+from backend.http_api import criar_servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor HTTP/JSON da Luxury Wheels (sem interface gráfica).")
+    parser.add_argument('--host', default='127.0.0.1', help="Endereço de escuta (padrão: 127.0.0.1)")
+    parser.add_argument('--porta', type=int, default=8080, help="Porta de escuta (padrão: 8080)")
+    parser.add_argument('--workers', type=int,
+                        help="Número de workers, cada um com a sua conexão ao banco "
+                             "(padrão: 'api.workers' do config.json, ou 16)")
+    args = parser.parse_args()
+
+    setup_logging()
+    schema.aplicar_migracoes()
+
+    servidor = criar_servidor(args.host, args.porta, args.workers)
+    logging.info(f"API a escutar em http://{args.host}:{args.porta} com {servidor.workers} workers.")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        logging.info("API encerrada.")
+
+
+if __name__ == "__main__":
+    main()
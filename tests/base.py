@@ -0,0 +1,27 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Adiciona a pasta 'src' ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import database as db
+from backend import schema
+
+
+class TesteComBanco(unittest.TestCase):
+    """
+    Cada teste corre sobre um banco SQLite próprio numa pasta temporária (self.temp_dir),
+    com db.DB_PATH a apontar para ele e o esquema migrado. O caminho original é reposto
+    e a pasta apagada depois do tearDown() da subclasse.
+    """
+
+    migrar = True  # False para testes que criam as suas próprias tabelas
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.addCleanup(setattr, db, 'DB_PATH', db.DB_PATH)
+        db.DB_PATH = os.path.join(self.temp_dir.name, 'teste.db')
+        if self.migrar:
+            schema.aplicar_migracoes()
@@ -0,0 +1,89 @@
+import unittest
+import sys
+import os
+from datetime import datetime
+
+# Adiciona a pasta 'src' ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import database as db
+from backend import alertas
+from backend import status_reconciler
+from tests.base import TesteComBanco
+
+
+def _esvaziar(fila):
+    eventos = []
+    while not fila.empty():
+        evento, alerta = fila.get_nowait()
+        eventos.append((evento, alerta['tipo'], alerta['chave']))
+    return eventos
+
+
+class TestAlertas(TesteComBanco):
+
+    def setUp(self):
+        super().setUp()
+        db.adicionar_veiculo("Porsche", "911", 2021, "AA-00-01", "Preto", 900.0, "2030-03-10")
+        db.adicionar_veiculo("Ferrari", "Roma", 2023, "AA-00-02", "Vermelho", 1500.0, "2030-02-20")
+        db.adicionar_veiculo("BMW", "M5", 2022, "AA-00-03", "Azul", 700.0, "2031-01-01")
+        db.adicionar_cliente("Ana Lopes", "123456789", "912345678", "ana@mail.pt", "000000000ZZ4")
+
+    def test_prazos_disparam_pela_ordem(self):
+        db.adicionar_reserva(1, 3, None, "2030-03-01 15:00:00", "2030-03-02 10:00:00")
+        motor = alertas.MotorAlertas(dias_revisao=15)
+        motor.carregar(agora=datetime(2030, 3, 1, 9))
+        self.assertEqual([a['tipo'] for a in motor.ativos()], ['revisao_vencida', 'levantamento_hoje', 'revisao_proxima'])
+
+        fila = motor.subscrever()
+        _esvaziar(fila)
+        self.assertEqual(motor.avancar(agora=datetime(2030, 3, 1, 16)), datetime(2030, 3, 2))
+        self.assertEqual(_esvaziar(fila), [('removido', 'levantamento_hoje', ('reserva', 1))])
+        motor.avancar(agora=datetime(2030, 3, 2, 8))
+        self.assertEqual(_esvaziar(fila), [('novo', 'devolucao_hoje', ('reserva', 1))])
+        motor.avancar(agora=datetime(2030, 3, 2, 11))
+        self.assertEqual(_esvaziar(fila), [('removido', 'devolucao_hoje', ('reserva', 1)),
+                                           ('novo', 'devolucao_atrasada', ('reserva', 1))])
+
+    def test_alteracoes_no_banco_sao_incrementais(self):
+        agora = datetime(2030, 3, 1, 9)
+        motor = alertas.MotorAlertas(dias_revisao=15)
+        motor.carregar(agora=agora)
+        fila = motor.subscrever()
+        _esvaziar(fila)
+        self.assertFalse(motor.sincronizar(agora=agora))
+
+        db.adicionar_reserva(1, 3, None, "2030-03-01 18:00:00", "2030-03-05 10:00:00")
+        db.atualizar_veiculo(1, data_proxima_revisao="2031-03-10")
+        self.assertTrue(motor.sincronizar(agora=agora))
+        self.assertEqual(sorted(_esvaziar(fila)), [('novo', 'levantamento_hoje', ('reserva', 1)),
+                                                   ('removido', 'revisao_proxima', ('revisao', 1))])
+
+        db.deletar_reserva(1)
+        motor.sincronizar(agora=agora)
+        self.assertEqual(_esvaziar(fila), [('removido', 'levantamento_hoje', ('reserva', 1))])
+        self.assertIsNone(motor.avancar(agora=agora))  # Só falta a revisão vencida, que não muda mais
+
+    def test_atraso_sobrevive_ao_reconciliador(self):
+        """A devolução em atraso depende do registo da entrega, não do status que o reconciliador muda."""
+        db.adicionar_reserva(1, 3, None, "2030-03-01 15:00:00", "2030-03-02 10:00:00")
+        agora = datetime(2030, 3, 2, 11)
+        motor = alertas.MotorAlertas(dias_revisao=15)
+        motor.carregar(agora=agora)
+        fila = motor.subscrever()
+        self.assertIn(('novo', 'devolucao_atrasada', ('reserva', 1)), _esvaziar(fila))
+
+        status_reconciler.reconciliar_status(agora=agora)
+        self.assertEqual(db.buscar_reserva_por_id(1)['status'], 'concluída')
+        motor.sincronizar(agora=agora)
+        motor.carregar(agora=agora)  # Também na leitura completa (arranque, meia-noite)
+        self.assertEqual(_esvaziar(fila), [])
+        self.assertIn(('reserva', 1), [a['chave'] for a in motor.ativos()])
+
+        self.assertTrue(db.registar_devolucao(1, "2030-03-02 11:30:00"))
+        self.assertFalse(db.registar_devolucao(1))  # Já devolvida
+        motor.sincronizar(agora=agora)
+        self.assertEqual(_esvaziar(fila), [('removido', 'devolucao_atrasada', ('reserva', 1))])
+
+
+if __name__ == '__main__':
+    unittest.main()
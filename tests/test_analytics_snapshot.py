@@ -0,0 +1,72 @@
+import unittest
+import sys
+import os
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+# Adiciona a pasta 'src' ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import database as db
+from backend import data_generator
+from backend import analytics
+from backend import analytics_snapshot
+from tests.base import TesteComBanco
+
+
+class TestAnalyticsSnapshot(TesteComBanco):
+
+    def setUp(self):
+        """Banco temporário com dados sintéticos e snapshot numa pasta temporária."""
+        super().setUp()
+        self.addCleanup(setattr, analytics_snapshot, 'SNAPSHOT_DIR', analytics_snapshot.SNAPSHOT_DIR)
+        analytics_snapshot.SNAPSHOT_DIR = os.path.join(self.temp_dir.name, 'snapshots')
+        with db.conectar_bd() as conn:
+            data_generator.gerar_dados(conn, veiculos=10, clientes=20, reservas=200, semente=5,
+                                       referencia=datetime(2025, 6, 1, 12, 0))
+
+    def _ids(self):
+        return sorted(analytics_snapshot.carregar_tabela().column('reserva_id').to_pylist())
+
+    def test_completo_e_incremental(self):
+        manifesto = analytics_snapshot.exportar_snapshot()
+        self.assertEqual((manifesto['formato'], len(manifesto['partes'])), ('feather', 1))
+        self.assertEqual(self._ids(), list(range(1, 201)))
+
+        # Sem alterações não há parte nova
+        self.assertEqual(analytics_snapshot.exportar_snapshot(), manifesto)
+
+        db.adicionar_reserva(1, 1, 1, "2030-01-10 10:00:00", "2030-01-12 10:00:00")
+        with db.conectar_bd() as conn:
+            conn.execute("UPDATE reservas SET status = 'cancelada' WHERE id = 2")
+        db.deletar_reserva(3)
+        manifesto = analytics_snapshot.exportar_snapshot()
+        self.assertEqual(len(manifesto['partes']), 2)
+
+        df = analytics_snapshot.carregar_reservas_df().set_index('reserva_id')
+        self.assertEqual(sorted(df.index), [i for i in range(1, 202) if i != 3])
+        self.assertEqual(df.loc[2, 'status'], 'cancelada')
+        self.assertEqual(df.loc[201, 'data_inicio'], pd.Timestamp("2030-01-10 10:00:00"))
+
+    def test_dataframe_igual_ao_do_sqlite(self):
+        # Uma reserva cujo cliente já não existe continua nos dois caminhos (LEFT JOIN)
+        conn = sqlite3.connect(db.DB_PATH)
+        conn.execute("INSERT INTO reservas (id_cliente, id_veiculo, data_inicio, data_fim, valor_total, status) "
+                     "VALUES (999, 1, '2030-02-01 10:00:00', '2030-02-03 10:00:00', 100, 'ativa')")
+        conn.commit()
+        conn.close()
+
+        via_sqlite = analytics.get_reservas_df()  # Ainda sem snapshot: caminho via SQLite
+        analytics_snapshot.exportar_snapshot()
+        via_snapshot = analytics.get_reservas_df()
+
+        colunas = analytics.COLUNAS_RESERVAS
+        esperado = via_sqlite[colunas].sort_values('id').reset_index(drop=True)
+        obtido = via_snapshot[colunas].sort_values('id').reset_index(drop=True)
+        self.assertEqual(len(obtido), 201)
+        pd.testing.assert_frame_equal(obtido, esperado, check_dtype=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import sys
+import os
+from datetime import datetime
+
+# Adiciona a pasta 'src' ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import database as db
+from backend import data_generator
+from backend import arquivo_reservas
+from tests.base import TesteComBanco
+
+
+class TestArquivoReservas(TesteComBanco):
+
+    def setUp(self):
+        """Banco temporário com reservas sintéticas distribuídas pelo último ano."""
+        super().setUp()
+        self.referencia = datetime(2025, 6, 15, 12, 0)
+        with db.conectar_bd() as conn:
+            data_generator.gerar_dados(conn, veiculos=10, clientes=50, reservas=1500, semente=5,
+                                       referencia=self.referencia)
+
+    def test_arquivar_em_lotes_preserva_historico(self):
+        with db.conectar_bd() as conn:
+            total_antes = conn.execute("SELECT COUNT(*) FROM reservas").fetchone()[0]
+            elegiveis = conn.execute(
+                "SELECT COUNT(*) FROM reservas WHERE status IN ('concluída', 'cancelada') AND data_fim < ?",
+                ('2025-03-17 12:00:00',)).fetchone()[0]
+            lapides_antes = conn.execute("SELECT COUNT(*) FROM reservas_removidas").fetchone()[0]
+        historico_veiculo = [tuple(r) for r in db.buscar_reservas_por_veiculo(1)]
+        historico_cliente = [tuple(r) for r in db.buscar_reservas_por_cliente(1)]
+        self.assertGreater(elegiveis, 100)
+
+        movidas = arquivo_reservas.arquivar_reservas(horizonte_dias=90, tamanho_lote=100, referencia=self.referencia)
+        self.assertEqual(movidas, elegiveis)
+        self.assertTrue(os.path.exists(arquivo_reservas.caminho_arquivo()))
+
+        with db.conectar_bd() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM reservas").fetchone()[0], total_antes - movidas)
+            # Mudar de sítio não é apagar: nenhuma lápide nova para o snapshot/reconciliador
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM reservas_removidas").fetchone()[0], lapides_antes)
+
+        # O histórico por veículo e por cliente inclui as arquivadas, na mesma ordem
+        self.assertEqual([tuple(r) for r in db.buscar_reservas_por_veiculo(1)], historico_veiculo)
+        self.assertEqual([tuple(r) for r in db.buscar_reservas_por_cliente(1)], historico_cliente)
+
+        conn = arquivo_reservas.conectar_historico()
+        try:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM reservas_historico").fetchone()[0], total_antes)
+        finally:
+            conn.close()
+
+        # Segunda execução: nada mais a mover
+        self.assertEqual(arquivo_reservas.arquivar_reservas(horizonte_dias=90, referencia=self.referencia), 0)
+
+    def test_repovoar_limpa_o_arquivo_e_guarda_devolucao(self):
+        """Depois de limpar_tabelas + gerar_dados os ids recomeçam: o arquivo antigo não pode ficar."""
+        with db.conectar_bd() as conn:
+            devolvidas = conn.execute(
+                "SELECT COUNT(*) FROM reservas WHERE data_devolucao IS NOT NULL AND data_fim < ?",
+                ('2025-03-17 12:00:00',)).fetchone()[0]
+        self.assertGreater(arquivo_reservas.arquivar_reservas(horizonte_dias=90, referencia=self.referencia), 0)
+        conn = arquivo_reservas.conectar_historico()
+        try:
+            arquivadas = conn.execute(f"SELECT COUNT(*) FROM {arquivo_reservas.ALIAS}.reservas "
+                                      "WHERE data_devolucao IS NOT NULL").fetchone()[0]
+        finally:
+            conn.close()
+        self.assertEqual(arquivadas, devolvidas)
+
+        with db.conectar_bd() as conn:
+            data_generator.limpar_tabelas(conn)
+            data_generator.gerar_dados(conn, veiculos=10, clientes=50, reservas=1500, semente=6,
+                                       referencia=self.referencia)
+        conn = arquivo_reservas.conectar_historico()
+        try:
+            self.assertEqual(conn.execute(f"SELECT COUNT(*) FROM {arquivo_reservas.ALIAS}.reservas").fetchone()[0], 0)
+        finally:
+            conn.close()
+        self.assertGreater(arquivo_reservas.arquivar_reservas(horizonte_dias=90, referencia=self.referencia), 0)
+        with db.conectar_bd() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM reservas WHERE status IN ('concluída', 'cancelada') "
+                                          "AND data_fim < '2025-03-17 12:00:00'").fetchone()[0], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import sys
+import os
+
+# Adiciona a pasta 'src' ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import database as db
+from backend import data_generator
+from backend import backup
+from backend import arquivo_reservas
+from tests.base import TesteComBanco
+
+
+class TestBackup(TesteComBanco):
+
+    def setUp(self):
+        super().setUp()
+        self.dir_backups = os.path.join(self.temp_dir.name, 'backups')
+        with db.conectar_bd() as conn:
+            data_generator.gerar_dados(conn, veiculos=10, clientes=50, reservas=500, semente=2)
+
+    def _contar_reservas(self):
+        with db.conectar_bd() as conn:
+            return conn.execute("SELECT COUNT(*) FROM reservas").fetchone()[0]
+
+    def test_backup_comprimido_e_restauro(self):
+        criados = backup.criar_backup(self.dir_backups, comprimir=True)
+        self.assertEqual(len(criados), 1)
+        self.assertTrue(criados[0]['caminho'].endswith('.db.gz'))
+
+        with db.conectar_bd() as conn:
+            conn.execute("DELETE FROM reservas WHERE id <= 100")
+        self.assertEqual(self._contar_reservas(), 400)
+
+        backup.restaurar_backup(criados[0]['caminho'])
+        self.assertEqual(self._contar_reservas(), 500)
+        self.assertFalse(any(nome.endswith('.tmp') for nome in os.listdir(self.temp_dir.name)))
+
+    def test_retencao_e_backup_corrompido(self):
+        for _ in range(3):
+            backup.criar_backup(self.dir_backups, comprimir=False)
+        backup.rotacionar(self.dir_backups, retencao=2)
+        caminhos = backup.listar_backups(self.dir_backups)[backup.PREFIXO]
+        self.assertEqual(len(caminhos), 2)
+
+        # Um arquivo danificado (truncado a meio) é recusado antes de tocar no banco
+        with open(caminhos[0], 'r+b') as f:
+            f.truncate(os.path.getsize(caminhos[0]) // 2)
+        with self.assertRaises(backup.ErroBackup):
+            backup.restaurar_backup(caminhos[0])
+        self.assertEqual(self._contar_reservas(), 500)
+
+    def _contar_historico(self):
+        conn = arquivo_reservas.conectar_historico()
+        try:
+            return tuple(conn.execute("SELECT COUNT(*), COUNT(DISTINCT id) FROM reservas_historico").fetchone())
+        finally:
+            conn.close()
+
+    def test_par_principal_e_arquivo_restaurado_em_conjunto(self):
+        """Depois de restaurar, arquivar de novo não encontra reservas nos dois bancos."""
+        self.assertGreater(arquivo_reservas.arquivar_reservas(horizonte_dias=300), 0)
+        criados = backup.criar_backup(self.dir_backups, comprimir=True)
+        self.assertEqual(len(criados), 2)
+        self.assertEqual({os.path.basename(c['caminho']).split('_2')[0] for c in criados},
+                         {backup.PREFIXO, backup.BASE_ARQUIVO})
+        historico = self._contar_historico()
+
+        self.assertGreater(arquivo_reservas.arquivar_reservas(horizonte_dias=30), 0)
+        # Restaurar a partir de qualquer uma das cópias repõe as duas
+        destinos = backup.restaurar_backup(criados[1]['caminho'])
+        self.assertEqual(len(destinos), 2)
+        self.assertEqual(self._contar_historico(), historico)
+        self.assertGreater(arquivo_reservas.arquivar_reservas(horizonte_dias=30), 0)
+        self.assertEqual(self._contar_historico(), historico)
+
+    def test_restaurar_copia_anterior_ao_arquivo(self):
+        criados = backup.criar_backup(self.dir_backups, comprimir=False)
+        self.assertGreater(arquivo_reservas.arquivar_reservas(horizonte_dias=30), 0)
+        backup.restaurar_backup(criados[0]['caminho'])
+        # As reservas voltaram ao principal: o arquivo, mais recente do que a cópia, é esvaziado
+        self.assertEqual(self._contar_historico(), (500, 500))
+        self.assertGreater(arquivo_reservas.arquivar_reservas(horizonte_dias=30), 0)
+        self.assertEqual(self._contar_historico(), (500, 500))
+
+
+if __name__ == '__main__':
+    unittest.main()
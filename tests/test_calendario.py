@@ -0,0 +1,44 @@
+import unittest
+import sys
+import os
+from datetime import datetime
+
+# Adiciona a pasta 'src' ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import database as db
+from backend import calendario
+from tests.base import TesteComBanco
+
+
+class TestCalendario(TesteComBanco):
+
+    def setUp(self):
+        super().setUp()
+        db.adicionar_veiculo("Porsche", "911", 2021, "AA-00-01", "Preto", 900.0, "2030-01-01")
+        db.adicionar_veiculo("Ferrari", "Roma", 2023, "AA-00-02", "Vermelho", 1500.0, "2030-01-01")
+        db.adicionar_cliente("Ana Lopes", "123456789", "912345678", "ana@mail.pt", "000000000ZZ4")
+        for inicio, fim in [("2029-01-01", "2029-01-20"), ("2029-02-01", "2029-02-05"), ("2029-03-10", "2029-03-12")]:
+            db.adicionar_reserva(1, 1, None, f"{inicio} 10:00:00", f"{fim} 10:00:00")
+        db.adicionar_reserva(1, 2, None, "2029-02-03 10:00:00", "2029-02-04 10:00:00")
+
+    def test_reservas_sobrepostas_a_janela(self):
+        # A reserva de janeiro começou antes da janela mas ainda decorre no início dela
+        reservas = calendario.reservas_na_janela([1, 2], datetime(2029, 1, 15), datetime(2029, 2, 4))
+        self.assertEqual([r[0].strftime('%m-%d') for r in reservas[1]], ["01-01", "02-01"])
+        self.assertEqual([r[3] for r in reservas[2]], ["Ana Lopes"])
+        self.assertEqual(calendario.reservas_na_janela([1], datetime(2029, 1, 21), datetime(2029, 1, 31)), {1: []})
+
+    def test_janela_em_cache_com_margem(self):
+        janela = calendario.JanelaCalendario(margem_dias=30, incluir_arquivo=False)
+        janela.obter([1, 2], datetime(2029, 2, 1), datetime(2029, 2, 10))
+        reservas = janela.obter([1], datetime(2029, 2, 15), datetime(2029, 3, 11))  # Dentro da margem
+        self.assertEqual(janela.consultas, 1)
+        self.assertEqual(len(reservas[1]), 3)  # Inclui as da margem (janeiro a março)
+
+        db.adicionar_reserva(1, 2, None, "2029-02-20 10:00:00", "2029-02-21 10:00:00")
+        self.assertEqual(len(janela.obter([2], datetime(2029, 2, 1), datetime(2029, 2, 28))[2]), 2)
+        self.assertEqual(janela.consultas, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+
+# Adiciona a pasta 'src' ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import config_manager as cfg
+
+
+class TestConfigManager(unittest.TestCase):
+
+    def setUp(self):
+        self.dir_temp = tempfile.mkdtemp()
+        self.caminho_original = cfg.CONFIG_PATH
+        cfg.CONFIG_PATH = os.path.join(self.dir_temp, 'config.json')
+        cfg._config = cfg._assinatura = None
+
+    def tearDown(self):
+        cfg._cancelar_temporizador()
+        cfg._pendente = False
+        cfg.CONFIG_PATH = self.caminho_original
+        cfg._config = cfg._assinatura = None
+        shutil.rmtree(self.dir_temp)
+
+    def test_escritas_agrupadas_e_atomicas(self):
+        """Várias alterações seguidas geram uma única escrita, sem arquivos temporários a sobrar."""
+        cfg.salvar_email_lembrado("a@lw.com")
+        cfg.salvar_email_lembrado("b@lw.com")
+        self.assertFalse(os.path.exists(cfg.CONFIG_PATH))  # Ainda dentro do atraso de gravação
+        self.assertEqual(cfg.obter_email_lembrado(), "b@lw.com")
+
+        cfg.gravar_pendentes()
+        with open(cfg.CONFIG_PATH, encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {'lembrar_email': "b@lw.com"})
+        self.assertEqual(os.listdir(self.dir_temp), ['config.json'])
+
+        cfg.limpar_email_lembrado()
+        cfg.gravar_pendentes()
+        self.assertEqual(cfg.carregar_config(), {})
+
+    def test_secoes_tipadas_e_recarga_por_mtime(self):
+        self.assertEqual(cfg.obter('api', 'workers'), 16)
+
+        with open(cfg.CONFIG_PATH, 'w', encoding='utf-8') as f:
+            json.dump({'api': {'workers': 32, 'cache_respostas': "muitas"}}, f)
+        api = cfg.obter_secao('api')
+        self.assertEqual(api['workers'], 32)
+        self.assertEqual(api['cache_respostas'], 256)  # Valor inválido: fica o padrão
+
+        # Alteração externa ao arquivo (outro tamanho): é relido na próxima consulta
+        with open(cfg.CONFIG_PATH, 'w', encoding='utf-8') as f:
+            json.dump({'api': {'workers': 8}, 'diagnostico': {'perfil_sql': True}}, f)
+        self.assertEqual(cfg.obter('api', 'workers'), 8)
+        self.assertTrue(cfg.obter('diagnostico', 'perfil_sql'))
+
+
+if __name__ == '__main__':
+    unittest.main()
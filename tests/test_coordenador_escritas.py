@@ -0,0 +1,70 @@
+import unittest
+import sys
+import os
+import random
+import multiprocessing
+from datetime import datetime, timedelta
+
+# Adiciona a pasta 'src' ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import database as db
+from backend import coordenador_escritas
+from tests.base import TesteComBanco
+
+N_PROCESSOS = 4
+RESERVAS_POR_PROCESSO = 40
+VEICULOS = (1, 2)
+
+
+def _reservar_em_rajada(argumentos):
+    """Processo de um 'posto': tenta muitas reservas sobrepostas nos mesmos veículos."""
+    caminho_bd, semente = argumentos
+    db.DB_PATH = caminho_bd
+    # As métricas do coordenador são do processo: com fork, o posto herda as dos testes anteriores,
+    # e um processo do Pool pode correr mais do que uma rajada. As devolvidas são só as desta.
+    coordenador_escritas.limpar_metricas()
+    rng = random.Random(semente)
+    base = datetime.now() + timedelta(days=30)
+    sucessos = 0
+    for _ in range(RESERVAS_POR_PROCESSO):
+        inicio = base + timedelta(hours=rng.randrange(0, 24 * 10))
+        fim = inicio + timedelta(hours=rng.randrange(1, 48))
+        if db.adicionar_reserva(1, rng.choice(VEICULOS), None, inicio.strftime('%Y-%m-%d %H:%M:%S'),
+                                fim.strftime('%Y-%m-%d %H:%M:%S')):
+            sucessos += 1
+    return sucessos, coordenador_escritas.obter_metricas()
+
+
+class TestCoordenadorEscritas(TesteComBanco):
+
+    def setUp(self):
+        super().setUp()
+        with db.conectar_bd() as conn:
+            conn.execute("INSERT INTO clientes (id, nome_completo, nif, email, cc) VALUES (1, 'Cliente', '1', 'c@t.pt', 'CC1')")
+            for i in VEICULOS:
+                conn.execute(
+                    "INSERT INTO veiculos (id, marca, modelo, ano, placa, valor_diaria, data_proxima_revisao) "
+                    "VALUES (?, 'BMW', 'X5', 2023, ?, 100, '2099-01-01')", (i, f"AA-00-0{i}"))
+
+    def test_postos_concorrentes_sem_reservas_duplicadas(self):
+        """Vários processos a reservar os mesmos veículos: nenhuma sobreposição e nenhuma desistência."""
+        with multiprocessing.Pool(N_PROCESSOS) as pool:
+            resultados = pool.map(_reservar_em_rajada, [(db.DB_PATH, s) for s in range(N_PROCESSOS)])
+
+        with db.conectar_bd() as conn:
+            sobrepostas = conn.execute("""
+                SELECT COUNT(*) FROM reservas a JOIN reservas b
+                  ON a.id_veiculo = b.id_veiculo AND a.id < b.id
+                 AND a.data_inicio <= b.data_fim AND a.data_fim >= b.data_inicio
+            """).fetchone()[0]
+            total = conn.execute("SELECT COUNT(*) FROM reservas").fetchone()[0]
+        self.assertEqual(sobrepostas, 0)
+        self.assertEqual(total, sum(sucessos for sucessos, _ in resultados))
+        self.assertGreater(total, 0)
+        metricas = [m for _, m in resultados]
+        self.assertEqual(sum(m['falhas'] for m in metricas), 0)
+        self.assertEqual(sum(m['transacoes'] for m in metricas), N_PROCESSOS * RESERVAS_POR_PROCESSO)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import sys
+import os
+
+# Adiciona a pasta 'src' ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import database as db
+from backend import deduplicacao
+from tests.base import TesteComBanco
+
+
+class TestDeduplicacao(TesteComBanco):
+
+    def test_quase_duplicados_por_bloco_e_identificador(self):
+        indice = deduplicacao.IndiceDuplicados(limiar=0.75)
+        indice.adicionar(1, "Maria da Conceição Sousa", "123456789", "912345678", "maria.sousa@mail.pt", "12345678ZZ4")
+        indice.adicionar(2, "João Pereira", "987654321", "934567890", "joao@mail.pt", "87654321AA1")
+
+        # Mesmo NIF escrito de outra forma: duplicado certo
+        candidatos = indice.verificar("M. Sousa", "PT 123 456 789", "", "", "")
+        self.assertEqual(candidatos[0]['id'], 1)
+        self.assertEqual(candidatos[0]['pontuacao'], 1.0)
+
+        # Grafia diferente, mesmo telefone (com indicativo) e email parecido: mesmo bloco fonético
+        self.assertEqual(deduplicacao.chave_bloco("Maria Sousa"), deduplicacao.chave_bloco("Marya Souza"))
+        candidatos = indice.verificar("Maria da Conseicao Souza", "111111111", "+351 912 345 678",
+                                      "maria.souza@mail.pt", "")
+        self.assertEqual([c['id'] for c in candidatos], [1])
+        self.assertIn('telefone', candidatos[0]['motivos'])
+
+        self.assertEqual(indice.verificar("Ana Lopes", "555555555", "960000000", "ana@mail.pt", ""), [])
+        self.assertEqual(indice.verificar("João Pereira", "987654321", "", "", "", ignorar_id=2), [])
+
+        indice.adicionar(3, "Joao Pereyra", "", "934567890", "JOAO@mail.pt", "")
+        self.assertEqual([(a, b) for a, b, _, _ in indice.pares_suspeitos()], [(2, 3)])
+
+    def _esperar_reconstrucao(self):
+        reconstrucao = deduplicacao._reconstrucao
+        if reconstrucao is not None:
+            reconstrucao.join(timeout=10)
+
+    def test_indice_reconstruido_em_segundo_plano(self):
+        """Depois de uma escrita em 'clientes' o índice anterior continua a ser servido até o novo estar pronto."""
+        deduplicacao._indice = deduplicacao._geracao_indice = None
+        self.addCleanup(setattr, deduplicacao, '_indice', None)
+        self.addCleanup(setattr, deduplicacao, '_geracao_indice', None)
+        db.adicionar_cliente("Rui Costa", "111222338", "910000001", "rui@mail.pt", "111222330ZZ2")
+
+        self.assertIsNone(deduplicacao.obter_indice())  # Primeira construção ainda a decorrer
+        self._esperar_reconstrucao()
+        antigo = deduplicacao.obter_indice()
+        self.assertEqual(len(deduplicacao.verificar_cliente("Rui Costa", "111222338", "", "", "")), 1)
+
+        db.adicionar_cliente("Ana Lopes", "555555555", "960000000", "ana@mail.pt", "555555550ZZ1")
+        self.assertIs(deduplicacao.obter_indice(), antigo)
+        self._esperar_reconstrucao()
+        novo = deduplicacao.obter_indice()
+        self.assertIsNot(novo, antigo)
+        self.assertEqual(len(novo.verificar("Ana Lopes", "555555555", "", "", "")), 1)
+
+        # Alterações feitas neste posto entram logo no índice servido
+        deduplicacao.registar_cliente(99, "Pedro Alves", "222333444", "930000000", "pedro@mail.pt", "")
+        self.assertEqual(novo.verificar("Pedro Alves", "222333444", "", "", "")[0]['id'], 99)
+        deduplicacao.esquecer_cliente(99)
+        self.assertEqual(novo.verificar("Pedro Alves", "222333444", "", "", ""), [])
+
+    def test_importacao_ignora_duplicados_normalizados(self):
+        db.adicionar_cliente("Rui Costa", "111222338", "910000001", "rui@mail.pt", "111222330ZZ2")
+        caminho = os.path.join(self.temp_dir.name, 'clientes.csv')
+        with open(caminho, 'w', encoding='utf-8') as f:
+            f.write("nome_completo;nif;telefone;email;cc\n"
+                    "Rui Costa;111 222 338;910000001;rui.costa@mail.pt;000000000ZZ4\n"  # NIF já existe
+                    "Sara Lima;244555664;920000002;sara@mail.pt;444555660ZZ4\n"
+                    "Sara Lima;244555672;920000002;SARA@mail.pt;444555671ZZ1\n")  # Repetida no próprio arquivo
+
+        sucessos, falhas, erros = db.importar_clientes_de_csv(caminho)
+        self.assertEqual((sucessos, falhas), (1, 2))
+        self.assertIn("duplicado do cliente ID 1", erros[0])
+        self.assertEqual(len(db.listar_clientes()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import sys
+import json
+import os
+import tempfile
+import threading
+import time
+
+# Adiciona a pasta 'src' ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import desempenho_ui
+
+
+def _carregar_lento():
+    time.sleep(0.3)
+
+
+@desempenho_ui.medido
+def _render():
+    time.sleep(0.01)
+
+
+class TestDesempenhoUI(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        desempenho_ui.gravar_pendentes(self.temp_dir.name)  # Registos de outros testes ficam à parte
+        self.diretorio = os.path.join(self.temp_dir.name, 'logs')
+
+    def tearDown(self):
+        desempenho_ui.fechar()
+        self.temp_dir.cleanup()
+
+    def test_vigia_captura_pilha_da_thread_bloqueada(self):
+        vigia = desempenho_ui.Vigia(intervalo_ms=50, limiar_bloqueio_ms=100, diretorio=self.diretorio)
+        vigia.batimento(time.monotonic())
+        self.assertIsNone(vigia.verificar(time.monotonic()))
+
+        capturas = []
+        verificacao = threading.Timer(0.2, lambda: capturas.append(vigia.verificar(time.monotonic())))
+        verificacao.start()
+        _carregar_lento()  # A thread "do Tk" fica parada aqui
+        verificacao.join()
+        vigia.batimento(time.monotonic())
+
+        self.assertIn('_carregar_lento', capturas[0]['origem'])
+        vigia.parar()
+        resumo = desempenho_ui.resumir(self.diretorio)
+        bloqueio = resumo['bloqueios'][0]
+        self.assertEqual(bloqueio['bloqueios'], 1)
+        self.assertGreaterEqual(bloqueio['max_ms'], 200)  # Duração total, registada no batimento seguinte
+        self.assertEqual(resumo['latencia']['n'], 2)
+
+    def test_origem_e_o_quadro_mais_interior_da_aplicacao(self):
+        # Caminhos de bibliotecas em qualquer formato (ex.: Windows) não contam como código da aplicação
+        raiz = desempenho_ui.RAIZ_CODIGO
+        quadros = desempenho_ui._pilha(sys._getframe())
+        self.assertFalse(any(da_aplicacao for _, da_aplicacao in quadros))
+        self.assertTrue(desempenho_ui._da_aplicacao(os.path.join(raiz, 'frontend', 'vehicle_view.py')))
+        self.assertFalse(desempenho_ui._da_aplicacao(raiz + '_copia' + os.sep + 'x.py'))
+        quadros = [("main.py:80 em <module>", True), ("frontend/vehicle_view.py:275 em carregar_dados", True),
+                   ("C:\\Python\\Lib\\sqlite3\\dbapi2.py:10 em execute", False)]
+        self.assertEqual(desempenho_ui._origem(quadros), "frontend/vehicle_view.py:275 em carregar_dados")
+        self.assertEqual(desempenho_ui._origem(quadros[2:]), quadros[2][0])
+        self.assertEqual(desempenho_ui._origem([]), '?')
+
+    def test_spans_resumidos_por_nome(self):
+        for _ in range(3):
+            _render()
+        with desempenho_ui.span('VehicleView.__init__'):
+            time.sleep(0.02)
+        desempenho_ui.gravar_pendentes(self.diretorio)
+
+        spans = {s['nome']: s for s in desempenho_ui.resumir(self.diretorio)['spans']}
+        self.assertEqual(spans['_render']['n'], 3)
+        self.assertGreaterEqual(spans['VehicleView.__init__']['max_ms'], 20)
+        self.assertIn('_render', desempenho_ui.formatar_resumo(desempenho_ui.resumir(self.diretorio)))
+
+    def test_desligado_nao_acumula_registos(self):
+        """Com 'ativo' a False não há vigia a esvaziar a fila: spans e registos não entram nela."""
+        caminho_original = desempenho_ui.cfg.CONFIG_PATH
+        desempenho_ui.cfg.CONFIG_PATH = os.path.join(self.temp_dir.name, 'config.json')
+        desempenho_ui.cfg._config = desempenho_ui.cfg._assinatura = None
+        with open(desempenho_ui.cfg.CONFIG_PATH, 'w', encoding='utf-8') as f:
+            json.dump({'desempenho_ui': {'ativo': False}}, f)
+        try:
+            for _ in range(3):
+                _render()
+            desempenho_ui.registar({'tipo': 'latencia', 'n': 1})
+            self.assertTrue(desempenho_ui._pendentes.empty())
+        finally:
+            desempenho_ui.cfg.CONFIG_PATH = caminho_original
+            desempenho_ui.cfg._config = desempenho_ui.cfg._assinatura = None
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import sys
+import os
+import csv
+import sqlite3
+import threading
+
+# Adiciona a pasta 'src' ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import database as db
+from backend import export_engine
+from tests.base import TesteComBanco
+
+
+class TestExportEngine(TesteComBanco):
+
+    migrar = False  # Só a tabela de reservas usada nos testes
+
+    def setUp(self):
+        """Cria um banco temporário isolado com algumas reservas."""
+        super().setUp()
+        conn = sqlite3.connect(db.DB_PATH)
+        conn.execute("CREATE TABLE reservas (id INTEGER PRIMARY KEY, data_inicio TEXT, valor_total REAL)")
+        conn.executemany(
+            "INSERT INTO reservas (data_inicio, valor_total) VALUES (?, ?)",
+            [(f"2024-01-{(i % 28) + 1:02d} 10:30:00", float(i)) for i in range(50)]
+        )
+        conn.commit()
+        conn.close()
+
+    def test_csv_streaming_renomeia_e_formata_datas(self):
+        """O CSV deve ter os cabeçalhos renomeados, as datas formatadas e todas as linhas."""
+        caminho = os.path.join(self.temp_dir.name, 'reservas.csv')
+        progresso = []
+
+        total = export_engine.exportar_em_streaming(
+            caminho, "SELECT id, data_inicio, valor_total FROM reservas ORDER BY id",
+            renomear={'id': 'ID da Reserva'},
+            colunas_data={'data_inicio': '%d/%m/%Y %H:%M'},
+            tamanho_lote=7,
+            progresso=progresso.append,
+        )
+
+        self.assertEqual(total, 50)
+        self.assertEqual(progresso[-1], 50)
+        self.assertEqual(len(progresso), 8)  # 50 linhas em lotes de 7
+
+        with open(caminho, encoding='utf-8-sig', newline='') as f:
+            linhas = list(csv.reader(f, delimiter=';'))
+
+        self.assertEqual(linhas[0], ['ID da Reserva', 'data_inicio', 'valor_total'])
+        self.assertEqual(linhas[1][1], '01/01/2024 10:30')
+        self.assertEqual(len(linhas), 51)
+
+    def test_resultado_vazio_leva_cabecalho(self):
+        caminho = os.path.join(self.temp_dir.name, 'vazio.csv')
+        total = export_engine.exportar_em_streaming(
+            caminho, "SELECT id, valor_total FROM reservas WHERE valor_total > ? ORDER BY id", (1000,),
+            renomear={'id': 'ID da Reserva'})
+        self.assertEqual(total, 0)
+        with open(caminho, encoding='utf-8-sig', newline='') as f:
+            self.assertEqual(list(csv.reader(f, delimiter=';')), [['ID da Reserva', 'valor_total']])
+
+    def test_verificacao_de_vazio_sem_contar(self):
+        """A vista só precisa de saber se há linhas; a contagem para a barra de progresso é do worker."""
+        sql = "SELECT id FROM reservas WHERE valor_total >= ? ORDER BY id"
+        self.assertTrue(db.consulta_tem_linhas(sql, (49,)))
+        self.assertFalse(db.consulta_tem_linhas(sql, (50,)))
+
+    def test_cancelamento_remove_arquivo_parcial(self):
+        """Uma exportação cancelada não deve deixar um arquivo incompleto para trás."""
+        caminho = os.path.join(self.temp_dir.name, 'cancelada.csv')
+        cancelar = threading.Event()
+        cancelar.set()
+
+        with self.assertRaises(export_engine.ExportacaoCancelada):
+            export_engine.exportar_em_streaming(caminho, "SELECT * FROM reservas", cancelar=cancelar)
+
+        self.assertFalse(os.path.exists(caminho))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import sys
+import os
+import sqlite3
+
+# Adiciona a pasta 'src' ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import database as db
+from backend import fila_escritas
+from tests.base import TesteComBanco
+
+
+class TestFilaEscritas(TesteComBanco):
+
+    def setUp(self):
+        super().setUp()
+        self.fila = fila_escritas.FilaEscritas(intervalo_ms=50, max_lote=1000).iniciar()
+
+    def tearDown(self):
+        self.fila.parar()
+
+    def test_lote_com_resultado_individual(self):
+        futuros = [self.fila.submeter(db.SQL_ADICIONAR_CLIENTE,
+                                      (f"Cliente {i}", f"{i:09d}", "910000000", f"c{i}@teste.pt", f"{i:08d}"))
+                   for i in range(200)]
+        # NIF repetido: só esta instrução é anulada, as restantes do lote são gravadas
+        duplicado = self.fila.submeter(db.SQL_ADICIONAR_CLIENTE,
+                                       ("Duplicado", f"{0:09d}", "910000000", "dup@teste.pt", "99999999"))
+        futuros.append(self.fila.submeter(db.SQL_ADICIONAR_CLIENTE,
+                                          ("Depois", "999999999", "910000000", "depois@teste.pt", "88888888")))
+
+        resultados = [f.result(timeout=10) for f in futuros]
+        self.assertTrue(all(r['linhas'] == 1 for r in resultados))
+        with self.assertRaises(sqlite3.IntegrityError):
+            duplicado.result(timeout=10)
+
+        with db.conectar_bd() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM clientes").fetchone()[0], 201)
+        # Tudo chegou dentro da janela de agrupamento: muito menos commits do que escritas
+        self.assertLess(self.fila.lotes, 20)
+        self.assertEqual(self.fila.instrucoes, 202)
+
+    def test_thread_escritora_sobrevive_a_falhas(self):
+        class ParametrosInvalidos:
+            def __len__(self):
+                raise RuntimeError("parâmetros inválidos")
+
+            def __getitem__(self, indice):
+                raise RuntimeError("parâmetros inválidos")
+
+        # Erro que não é do SQLite: o lote falha, mas a fila continua a gravar
+        futuro = self.fila.submeter(db.SQL_ADICIONAR_CLIENTE, ParametrosInvalidos())
+        with self.assertRaises(RuntimeError):
+            futuro.result(timeout=10)
+
+        # Banco impossível de abrir: os Futures pendentes falham em vez de ficarem à espera
+        caminho = db.DB_PATH
+        db.DB_PATH = os.path.join(self.temp_dir.name, 'inexistente', 'teste.db')
+        futuro = self.fila.submeter(db.SQL_ADICIONAR_CLIENTE, ("Ana", "123456789", "910000000", "a@teste.pt", "1"))
+        with self.assertRaises(sqlite3.OperationalError):
+            futuro.result(timeout=10)
+        db.DB_PATH = caminho
+
+        futuro = self.fila.submeter(db.SQL_ADICIONAR_CLIENTE, ("Rui", "987654321", "910000000", "r@teste.pt", "2"))
+        self.assertEqual(futuro.result(timeout=10)['linhas'], 1)
+        self.assertTrue(self.fila._thread.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+import sys
+import os
+import gzip
+import json
+import threading
+import http.client
+
+# Adiciona a pasta 'src' ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import database as db
+from backend import http_api
+from tests.base import TesteComBanco
+
+
+class TestHttpApi(TesteComBanco):
+
+    def setUp(self):
+        """Banco temporário migrado e servidor numa porta livre."""
+        super().setUp()
+        with db.conectar_bd() as conn:
+            conn.execute("INSERT INTO clientes (id, nome_completo, nif, email, cc) VALUES (1, 'Cliente', '1', 'c@t.pt', 'CC1')")
+            for i in range(1, 31):
+                conn.execute(
+                    "INSERT INTO veiculos (id, marca, modelo, ano, placa, valor_diaria, data_proxima_revisao) "
+                    "VALUES (?, 'BMW', 'X5', 2023, ?, 100, '2099-01-01')", (i, f"AA-00-{i:02d}"))
+            conn.commit()
+
+        self.servidor = http_api.criar_servidor(porta=0, workers=2)
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        self.conn = http.client.HTTPConnection('127.0.0.1', self.servidor.server_address[1], timeout=5)
+
+    def tearDown(self):
+        self.conn.close()
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+    def _pedir(self, metodo, caminho, corpo=None, cabecalhos=None):
+        self.conn.request(metodo, caminho, body=corpo, headers=cabecalhos or {})
+        resposta = self.conn.getresponse()
+        return resposta, resposta.read()
+
+    def test_etag_e_gzip(self):
+        """Respostas comprimidas quando pedido; o ETag só muda após uma escrita na tabela."""
+        resposta, corpo = self._pedir('GET', '/api/clientes', cabecalhos={'Accept-Encoding': 'gzip'})
+        self.assertEqual(resposta.status, 200)
+        self.assertEqual(json.loads(corpo)[0]['nome_completo'], 'Cliente')
+        etag = resposta.getheader('ETag')
+
+        resposta, corpo = self._pedir('GET', '/api/veiculos', cabecalhos={'Accept-Encoding': 'gzip'})
+        self.assertEqual(resposta.getheader('Content-Encoding'), 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(corpo))), 30)
+
+        resposta, corpo = self._pedir('GET', '/api/clientes', cabecalhos={'If-None-Match': etag})
+        self.assertEqual(resposta.status, 304)
+        self.assertEqual(corpo, b'')
+
+        db.atualizar_cliente(1, nome_completo='Cliente Alterado')
+        resposta, corpo = self._pedir('GET', '/api/clientes', cabecalhos={'If-None-Match': etag})
+        self.assertEqual(resposta.status, 200)
+        self.assertEqual(json.loads(corpo)[0]['nome_completo'], 'Cliente Alterado')
+
+    def test_criar_reserva_e_conflito(self):
+        """POST cria a reserva (201); repetir o mesmo período devolve 409."""
+        dados = json.dumps({'id_cliente': 1, 'id_veiculo': 1, 'data_inicio': '2099-01-10', 'data_fim': '2099-01-12'})
+        resposta, _ = self._pedir('POST', '/api/reservas', dados, {'Content-Type': 'application/json'})
+        self.assertEqual(resposta.status, 201)
+        resposta, _ = self._pedir('POST', '/api/reservas', dados, {'Content-Type': 'application/json'})
+        self.assertEqual(resposta.status, 409)
+
+        resposta, corpo = self._pedir('GET', '/api/veiculos/disponiveis?inicio=2099-01-11&fim=2099-01-11')
+        ids = {v['id'] for v in json.loads(corpo)}
+        self.assertNotIn(1, ids)
+        self.assertEqual(len(ids), 29)
+
+        # Um veículo alugado agora continua disponível para um período futuro livre
+        db.atualizar_veiculo(2, status='alugado')
+        resposta, corpo = self._pedir('GET', '/api/veiculos/disponiveis?inicio=2099-01-11&fim=2099-01-11')
+        self.assertIn(2, {v['id'] for v in json.loads(corpo)})
+
+    def test_lote_valida_cliente_e_forma_de_pagamento(self):
+        """Cliente ou forma de pagamento inexistentes são erros do pedido (422), não falta de veículo."""
+        pedido = {'id_cliente': 1, 'marca': 'BMW', 'data_inicio': '2099-02-10', 'data_fim': '2099-02-12'}
+        casos = [({'id_cliente': 999}, 422), ({'id_forma_pagamento': 7}, 422), ({'id_forma_pagamento': 'x'}, 400),
+                 ({}, 201)]
+        for alteracao, status in casos:
+            corpo = json.dumps({'pedidos': [dict(pedido, **alteracao)]})
+            resposta, dados = self._pedir('POST', '/api/reservas/lote', corpo, {'Content-Type': 'application/json'})
+            self.assertEqual(resposta.status, status, alteracao)
+        self.assertEqual(json.loads(dados)['sem_veiculo'], [])
+        self.assertEqual(len(json.loads(dados)['atribuidos']), 1)
+
+    def test_content_length_invalido(self):
+        """Um Content-Length que não é um inteiro não negativo devolve 400."""
+        for valor in ('abc', '-5'):
+            resposta, _ = self._pedir('POST', '/api/reservas', cabecalhos={'Content-Length': valor})
+            self.assertEqual(resposta.status, 400)
+
+    def test_datas_que_nao_sao_texto(self):
+        """Datas JSON de outro tipo (número, lista, null) devolvem 400 em vez de fechar a ligação."""
+        for data in (20990110, ['2099-01-10'], None):
+            corpo = json.dumps({'id_cliente': 1, 'id_veiculo': 1, 'data_inicio': data, 'data_fim': '2099-01-12'})
+            resposta, dados = self._pedir('POST', '/api/reservas', corpo, {'Content-Type': 'application/json'})
+            self.assertEqual(resposta.status, 400, data)
+            self.assertIn('data_inicio', json.loads(dados)['erro'])
+
+    def test_paginacao_rejeita_limites_negativos(self):
+        for query, status in (('limite=-1', 400), ('limite=0', 400), ('offset=-3', 400), ('limite=2&offset=1', 200)):
+            resposta, corpo = self._pedir('GET', f'/api/clientes?{query}')
+            self.assertEqual(resposta.status, status, query)
+        self.assertEqual(json.loads(corpo), [])  # Só há um cliente
+
+    def test_reserva_valida_cliente_e_forma_de_pagamento(self):
+        """Como no lote: referências inexistentes devolvem 422 com o motivo, sem chegar ao INSERT."""
+        reserva = {'id_cliente': 1, 'id_veiculo': 1, 'data_inicio': '2099-03-10', 'data_fim': '2099-03-12'}
+        casos = [({'id_cliente': 999}, 422, 'cliente 999'), ({'id_forma_pagamento': 7}, 422, 'forma de pagamento 7'),
+                 ({'id_forma_pagamento': 'x'}, 400, 'id_forma_pagamento')]
+        for alteracao, status, motivo in casos:
+            corpo = json.dumps(dict(reserva, **alteracao))
+            resposta, dados = self._pedir('POST', '/api/reservas', corpo, {'Content-Type': 'application/json'})
+            self.assertEqual(resposta.status, status, alteracao)
+            self.assertIn(motivo, json.loads(dados)['erro'])
+        with db.conectar_bd() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM reservas").fetchone()[0], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
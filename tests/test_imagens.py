@@ -0,0 +1,48 @@
+import unittest
+import sys
+import os
+
+from PIL import Image
+
+# Adiciona a pasta 'src' ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import imagens
+from tests.base import TesteComBanco
+
+
+class TestImagens(TesteComBanco):
+
+    migrar = False
+
+    def setUp(self):
+        super().setUp()
+        self.foto = os.path.join(self.temp_dir.name, 'foto.jpg')
+        Image.new('RGB', (1200, 800), (180, 20, 20)).save(self.foto, 'JPEG')
+
+    def test_armazem_por_conteudo_com_miniaturas(self):
+        chave = imagens.guardar_imagem(self.foto)
+        self.assertTrue(chave.endswith('.jpg'))
+        self.assertTrue(os.path.exists(imagens.caminho_imagem(chave)))
+        for tamanho in imagens.TAMANHOS_MINIATURA:
+            with Image.open(imagens.caminho_miniatura(chave, tamanho)) as miniatura:
+                self.assertEqual(max(miniatura.size), tamanho)
+
+        # A mesma foto com outro nome é o mesmo conteúdo: mesma chave, um só arquivo
+        copia = os.path.join(self.temp_dir.name, 'copia.jpg')
+        with open(self.foto, 'rb') as origem, open(copia, 'wb') as destino:
+            destino.write(origem.read())
+        self.assertEqual(imagens.guardar_imagem(copia), chave)
+
+        # A miniatura pedida é a menor que cobre o tamanho; caminhos antigos são usados tal como estão
+        self.assertEqual(imagens.resolver_miniatura(chave, 100), imagens.caminho_miniatura(chave, 160))
+        self.assertEqual(imagens.resolver_miniatura(self.foto, 100), self.foto)
+
+        texto = os.path.join(self.temp_dir.name, 'nao_e_imagem.jpg')
+        with open(texto, 'w') as f:
+            f.write("texto")
+        with self.assertRaises(imagens.ErroImagem):
+            imagens.guardar_imagem(texto)
+
+
+if __name__ == '__main__':
+    unittest.main()
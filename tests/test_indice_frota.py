@@ -0,0 +1,56 @@
+import unittest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Adiciona a pasta 'src' ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import database as db
+from backend import indice_frota
+from tests.base import TesteComBanco
+
+
+class TestIndiceFrota(TesteComBanco):
+
+    def setUp(self):
+        super().setUp()
+        for marca, modelo, ano, placa, cor, valor in [
+            ("Porsche", "911", 2021, "AA-00-01", "Preto", 900.0),
+            ("Ferrari", "Roma", 2023, "AA-00-02", "Vermelho", 1500.0),
+            ("Porsche", "Taycan", 2019, "AA-00-03", "Branco", 700.0),
+        ]:
+            db.adicionar_veiculo(marca, modelo, ano, placa, cor, valor, "2027-01-01")
+        db.adicionar_cliente("Ana Lopes", "123456789", "912345678", "ana@mail.pt", "000000000ZZ4")
+
+    def test_filtros_combinados_e_ordenacao(self):
+        indice = indice_frota.IndiceFrota()
+        indice.sincronizar()
+        self.assertEqual(len(indice), 3)
+        self.assertEqual(indice.valores_distintos('marca'), ["Ferrari", "Porsche"])
+
+        placas = lambda pos: [l['placa'] for l in indice.linhas(pos)]
+        self.assertEqual(placas(indice.filtrar(marca=["Porsche"], ordenar_por='ano')), ["AA-00-03", "AA-00-01"])
+        self.assertEqual(placas(indice.filtrar(ordenar_por='valor_diaria', decrescente=True)),
+                         ["AA-00-02", "AA-00-01", "AA-00-03"])
+        self.assertEqual(placas(indice.filtrar("taY")), ["AA-00-03"])
+        self.assertEqual(placas(indice.filtrar("porsche", ano_min=2020, valor_max=1000)), ["AA-00-01"])
+        self.assertEqual(len(indice.filtrar("lamborghini")), 0)
+
+    def test_atualizacao_incremental_por_reservas(self):
+        indice = indice_frota.IndiceFrota()
+        indice.sincronizar()
+        id_ferrari = indice.linhas(indice.filtrar("ferrari"))[0]['id']
+
+        agora = datetime.now()
+        db.adicionar_reserva(1, id_ferrari, None, (agora - timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S'),
+                             (agora + timedelta(days=3)).strftime('%Y-%m-%d %H:%M:%S'))
+        ids_antes = indice.ids
+        self.assertTrue(indice.sincronizar())
+        self.assertIs(indice.ids, ids_antes)  # Não houve releitura completa
+        self.assertEqual([l['id'] for l in indice.linhas(indice.filtrar(status_operacional=["Alugado"]))],
+                         [id_ferrari])
+        self.assertFalse(indice.sincronizar())
+
+
+if __name__ == '__main__':
+    unittest.main()
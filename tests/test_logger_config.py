@@ -0,0 +1,52 @@
+import unittest
+import sys
+import os
+import json
+import logging
+import queue
+
+# Adiciona a pasta 'src' ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import logger_config
+
+
+class TestLoggerConfig(unittest.TestCase):
+
+    def test_fila_cheia_descarta_e_resume(self):
+        """Com a fila cheia os registos são descartados sem bloquear; depois sai um resumo."""
+        fila = queue.Queue(maxsize=2)
+        handler = logger_config.HandlerFilaLimitada(fila)
+        logger = logging.getLogger('teste_fila_limitada')
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        logger.addHandler(handler)
+        try:
+            for i in range(4):
+                logger.warning("aviso %d", i)
+            logger.error("erro")
+            self.assertEqual(handler.descartados, {'WARNING': 2, 'ERROR': 1})
+
+            fila.get_nowait()
+            fila.get_nowait()
+            logger.info("depois da rajada")
+            resumo, registo = fila.get_nowait(), fila.get_nowait()
+            self.assertIn("3 mensagens descartadas", resumo.getMessage())
+            self.assertEqual(registo.getMessage(), "depois da rajada")
+            self.assertEqual(handler.descartados, {})
+        finally:
+            logger.removeHandler(handler)
+
+    def test_formatador_json_com_excecao(self):
+        try:
+            raise ValueError("falhou")
+        except ValueError:
+            registo = logging.getLogger('teste_json').makeRecord(
+                'teste_json', logging.ERROR, __file__, 1, "erro ao gravar %s", ('reserva',), sys.exc_info())
+        linha = json.loads(logger_config.FormatadorJSON().format(registo))
+        self.assertEqual(linha['nivel'], 'ERROR')
+        self.assertEqual(linha['mensagem'], "erro ao gravar reserva")
+        self.assertIn("ValueError: falhou", linha['excecao'])
+
+
+if __name__ == '__main__':
+    unittest.main()
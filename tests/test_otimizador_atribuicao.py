@@ -0,0 +1,91 @@
+import unittest
+import sys
+import os
+from datetime import datetime
+
+# Adiciona a pasta 'src' ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import database as db
+from backend import coordenador_escritas
+from backend import otimizador_atribuicao as oa
+from tests.base import TesteComBanco
+
+
+class TestOtimizadorAtribuicao(TesteComBanco):
+
+    def test_caminho_de_aumento_desloca_pedido_do_lote(self):
+        veiculos = {1: ("Porsche", "911"), 2: ("Porsche", "911"), 3: ("Porsche", "Taycan")}
+        pedidos = [
+            {'chave': 'qualquer', 'marca': "Porsche", 'data_inicio': "2030-03-01 10:00:00", 'data_fim': "2030-03-03 10:00:00"},
+            {'chave': 'a', 'marca': "Porsche", 'modelo': "911",
+             'data_inicio': "2030-03-02 10:00:00", 'data_fim': "2030-03-04 10:00:00"},
+            {'chave': 'b', 'marca': "porsche", 'modelo': "911 ",
+             'data_inicio': "2030-03-02 12:00:00", 'data_fim': "2030-03-04 10:00:00"},
+        ]
+        # O guloso põe 'qualquer' num 911 e 'b' fica sem lugar; o aumento muda-o para o Taycan
+        atribuicoes, sem_veiculo = oa.Otimizador(veiculos, {}, profundidade=1).otimizar(pedidos)
+        self.assertEqual(sem_veiculo, [])
+        self.assertEqual(atribuicoes['qualquer'], 3)
+        self.assertEqual({atribuicoes['a'], atribuicoes['b']}, {1, 2})
+
+        _, sem_veiculo = oa.Otimizador(veiculos, {}, profundidade=0).otimizar(pedidos)
+        self.assertEqual(sem_veiculo, ['b'])
+
+    def test_reotimizar_reduz_sobras_curtas(self):
+        db.adicionar_veiculo("Porsche", "911", 2021, "AA-00-01", "Preto", 900.0, "2031-01-01")
+        db.adicionar_veiculo("Porsche", "911", 2022, "AA-00-02", "Branco", 900.0, "2031-01-01")
+        db.adicionar_cliente("Ana Lopes", "123456789", "912345678", "ana@mail.pt", "000000000ZZ4")
+        db.adicionar_reserva(1, 1, None, "2030-03-01 10:00:00", "2030-03-03 10:00:00")
+        db.adicionar_reserva(1, 1, None, "2030-03-03 14:00:00", "2030-03-05 10:00:00")  # Sobra de 4h no veículo 1
+        db.adicionar_reserva(1, 2, None, "2030-03-05 12:00:00", "2030-03-07 10:00:00")
+
+        agora = datetime(2030, 2, 1)
+        simulado = oa.reotimizar_reservas_futuras(agora=agora, aplicar=False)
+        self.assertEqual((simulado['fragmentos_antes'], simulado['fragmentos_depois'], simulado['aplicado']), (1, 0, False))
+
+        resultado = oa.reotimizar_reservas_futuras(agora=agora)
+        self.assertTrue(resultado['aplicado'])
+        self.assertEqual(resultado['mudadas'], 2)
+        veiculos = {r['id']: r['id_veiculo'] for r in db.listar_reservas()}
+        self.assertEqual(veiculos, {1: 1, 2: 2, 3: 1})
+        self.assertFalse(oa.reotimizar_reservas_futuras(agora=agora)['aplicado'])  # Já está otimizado
+
+    def test_reotimizar_so_troca_entre_diarias_iguais(self):
+        """Trocar para um veículo com outra diária mudaria o preço acordado: a troca não é feita."""
+        db.adicionar_veiculo("Porsche", "911", 2021, "AA-00-01", "Preto", 900.0, "2031-01-01")
+        db.adicionar_veiculo("Porsche", "911", 2022, "AA-00-02", "Branco", 950.0, "2031-01-01")
+        db.adicionar_cliente("Ana Lopes", "123456789", "912345678", "ana@mail.pt", "000000000ZZ4")
+        db.adicionar_reserva(1, 1, None, "2030-03-01 10:00:00", "2030-03-03 10:00:00")
+        db.adicionar_reserva(1, 1, None, "2030-03-03 14:00:00", "2030-03-05 10:00:00")
+        db.adicionar_reserva(1, 2, None, "2030-03-05 12:00:00", "2030-03-07 10:00:00")
+
+        resultado = oa.reotimizar_reservas_futuras(agora=datetime(2030, 2, 1))
+        self.assertEqual((resultado['mudadas'], resultado['aplicado']), (0, False))
+        self.assertEqual({r['id']: r['id_veiculo'] for r in db.listar_reservas()}, {1: 1, 2: 1, 3: 2})
+
+    def test_reotimizar_verifica_veiculo_de_destino_ao_gravar(self):
+        """Uma reserva feita no veículo de destino depois do cálculo anula a reotimização inteira."""
+        db.adicionar_veiculo("Porsche", "911", 2021, "AA-00-01", "Preto", 900.0, "2031-01-01")
+        db.adicionar_veiculo("Porsche", "911", 2022, "AA-00-02", "Branco", 900.0, "2031-01-01")
+        db.adicionar_cliente("Ana Lopes", "123456789", "912345678", "ana@mail.pt", "000000000ZZ4")
+        db.adicionar_reserva(1, 1, None, "2030-03-01 10:00:00", "2030-03-03 10:00:00")
+        db.adicionar_reserva(1, 1, None, "2030-03-03 14:00:00", "2030-03-05 10:00:00")
+        db.adicionar_reserva(1, 2, None, "2030-03-05 12:00:00", "2030-03-07 10:00:00")
+
+        # Outro posto reserva o veículo 1 entre o cálculo do plano e a sua gravação
+        executar_escrita = coordenador_escritas.executar_escrita
+        self.addCleanup(setattr, coordenador_escritas, 'executar_escrita', executar_escrita)
+
+        def reservar_antes(funcao, descricao='escrita'):
+            coordenador_escritas.executar_escrita = executar_escrita
+            self.assertTrue(db.adicionar_reserva(1, 1, None, "2030-03-05 11:00:00", "2030-03-06 00:00:00"))
+            return executar_escrita(funcao, descricao)
+
+        coordenador_escritas.executar_escrita = reservar_antes
+        resultado = oa.reotimizar_reservas_futuras(agora=datetime(2030, 2, 1))
+        self.assertEqual((resultado['mudadas'], resultado['aplicado']), (2, False))
+        self.assertEqual({r['id']: r['id_veiculo'] for r in db.listar_reservas()}, {1: 1, 2: 1, 3: 2, 4: 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
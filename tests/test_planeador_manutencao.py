@@ -0,0 +1,59 @@
+import unittest
+import sys
+import os
+from datetime import date, datetime
+
+# Adiciona a pasta 'src' ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import database as db
+from backend import planeador_manutencao as pm
+from tests.base import TesteComBanco
+
+
+def _d(texto):
+    return date.fromisoformat(texto).toordinal()
+
+
+class TestPlaneadorManutencao(TesteComBanco):
+
+    def test_intervalos_livres_capacidade_e_prazos(self):
+        hoje = date(2030, 3, 1)
+        self.assertEqual(pm.inicios_livres([(_d("2030-03-03"), _d("2030-03-05")), (_d("2030-03-07"), _d("2030-03-20"))],
+                                           _d("2030-03-01"), _d("2030-03-25"), 2),
+                         [(_d("2030-03-01"), _d("2030-03-01")), (_d("2030-03-21"), _d("2030-03-25"))])
+
+        ocupacoes = {
+            1: [(_d("2030-03-01"), _d("2030-03-03"))],  # Só fica livre no dia 4
+            2: [], 3: [], 4: [],
+            5: [(_d("2030-03-01"), _d("2030-03-10"))],  # Ocupado até depois do prazo
+        }
+        revisoes = [(1, "2030-03-05"), (2, "2030-03-02"), (3, "2030-02-20"), (4, "2030-03-20"), (5, "2030-03-06")]
+        plano, sem_vaga = pm.planear(revisoes, ocupacoes, hoje, duracao_dias=1, capacidade_diaria=1)
+        dias = {b['id_veiculo']: b['inicio'].day for b in plano}
+        # A atrasada (3) e a mais urgente (2) ocupam os dias 1 e 2; 4 tem folga e espera
+        self.assertEqual(dias, {3: 1, 2: 2, 1: 4, 4: 3})
+        self.assertEqual(sem_vaga, [5])
+        self.assertTrue(next(b for b in plano if b['id_veiculo'] == 3)['atrasada'])
+
+    def test_blocos_gravados_bloqueiam_reservas_e_mudam_estado(self):
+        db.adicionar_veiculo("Porsche", "911", 2021, "AA-00-01", "Preto", 900.0, "2030-03-10")
+        db.adicionar_cliente("Ana Lopes", "123456789", "912345678", "ana@mail.pt", "000000000ZZ4")
+        db.adicionar_reserva(1, 1, None, "2030-03-01 10:00:00", "2030-03-07 18:00:00")
+
+        resultado = pm.planear_manutencoes(hoje=date(2030, 3, 1))
+        self.assertEqual(resultado['planeadas'], 1)
+        self.assertEqual(resultado['plano'][0]['inicio'], date(2030, 3, 8))
+        self.assertEqual(pm.planear_manutencoes(hoje=date(2030, 3, 1))['planeadas'], 0)  # Já planeado
+
+        self.assertFalse(db.adicionar_reserva(1, 1, None, "2030-03-08 09:00:00", "2030-03-09 09:00:00"))
+        self.assertFalse(db.verificar_disponibilidade_veiculo(1, "2030-03-08 12:00:00", "2030-03-08 13:00:00"))
+
+        pm.atualizar_estados(agora=datetime(2030, 3, 8, 12))
+        self.assertEqual(db.buscar_veiculo_por_id(1)['status'], 'manutenção')
+        pm.atualizar_estados(agora=datetime(2030, 3, 9, 12))
+        veiculo = db.buscar_veiculo_por_id(1)
+        self.assertEqual((veiculo['status'], veiculo['data_proxima_revisao']), ('disponível', '2031-03-08'))
+
+
+if __name__ == '__main__':
+    unittest.main()
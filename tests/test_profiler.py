@@ -0,0 +1,55 @@
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+
+# Adiciona a pasta 'src' ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import profiler
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        profiler.limpar()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.temp_dir.name, 'perfil.db')
+        with sqlite3.connect(self.caminho) as conn:
+            conn.execute("CREATE TABLE reservas (id INTEGER PRIMARY KEY, id_veiculo INTEGER, status TEXT)")
+            conn.execute("CREATE INDEX idx_reservas_veiculo ON reservas (id_veiculo)")
+            conn.executemany("INSERT INTO reservas (id_veiculo, status) VALUES (?, 'ativa')",
+                             [(i % 50,) for i in range(2000)])
+
+    def tearDown(self):
+        profiler.limpar()
+        self.temp_dir.cleanup()
+
+    def test_normalizar_sql(self):
+        """Literais, comentários e listas IN não criam formas diferentes."""
+        a = profiler.normalizar_sql("SELECT * FROM t WHERE a = 'x''y' AND b IN (1, 2, 3) -- nota\n")
+        b = profiler.normalizar_sql("SELECT *  FROM t\nWHERE a = 'z' AND b IN (4, 5)")
+        self.assertEqual(a, b)
+        self.assertEqual(a, "SELECT * FROM t WHERE a = ? AND b IN (?, ...)")
+
+    def test_agrupa_instrucoes_e_sinaliza_varrimentos(self):
+        """Conta execuções por forma, soma passos da VM e marca o varrimento completo no plano."""
+        conn = profiler.instrumentar(sqlite3.connect(self.caminho))
+        for id_veiculo in (1, 2, 3):
+            conn.execute("SELECT COUNT(*) FROM reservas WHERE id_veiculo = ?", (id_veiculo,)).fetchone()
+        conn.execute("SELECT COUNT(*) FROM reservas WHERE status = 'ativa'").fetchone()
+        conn.close()
+        profiler.capturar_planos(self.caminho)
+
+        entradas = {e['forma']: e for e in profiler.obter_estatisticas()}
+        indexada = entradas["SELECT COUNT(*) FROM reservas WHERE id_veiculo = ?"]
+        varrimento = entradas["SELECT COUNT(*) FROM reservas WHERE status = ?"]
+        self.assertEqual(indexada['execucoes'], 3)
+        self.assertEqual(indexada['alertas'], [])
+        self.assertTrue(any('idx_reservas_veiculo' in detalhe for detalhe in indexada['plano']))
+        self.assertTrue(varrimento['alertas'])
+        self.assertGreater(varrimento['passos_vm'], indexada['passos_vm'] / 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
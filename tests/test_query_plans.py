@@ -0,0 +1,51 @@
+import unittest
+import sys
+import os
+import sqlite3
+from datetime import datetime
+
+# Adiciona a pasta 'src' ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import schema
+from backend import data_generator
+from backend import sql_registry
+
+
+class TestPlanosDeConsulta(unittest.TestCase):
+    """
+    Portão de regressão: as consultas quentes têm de usar índices em 'reservas' e 'clientes'
+    num schema migrado, com volume e estatísticas (ANALYZE) representativos.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = sqlite3.connect(':memory:')
+        cls.conn.row_factory = sqlite3.Row
+        schema.aplicar_migracoes(cls.conn)
+        # gerar_dados termina com ANALYZE: o planeador vê a distribuição real dos dados
+        data_generator.gerar_dados(cls.conn, veiculos=200, clientes=2000, reservas=20000, semente=11,
+                                   referencia=datetime(2025, 6, 15, 12, 0))
+        sql_registry.preparar_conexao(cls.conn)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def test_todas_as_instrucoes_registadas(self):
+        """Cada constante SQL_* dos módulos do backend tem de constar do registo."""
+        self.assertEqual(sql_registry.instrucoes_nao_registadas(), [])
+
+    def test_consultas_quentes_sem_varrimentos(self):
+        regressoes = sql_registry.verificar_planos(self.conn)
+        detalhe = "\n".join(f"{nome}: {passos}" for nome, passos in regressoes.items())
+        self.assertEqual(regressoes, {}, f"Consultas quentes com varrimento completo:\n{detalhe}")
+
+    def test_detecao_de_regressao(self):
+        """Envolver a coluna numa função (DATE(data_fim)) impede o uso do índice e tem de ser detetado."""
+        sql = "SELECT id_veiculo FROM reservas WHERE DATE(data_fim) = ?"
+        consulta = sql_registry._consulta('devolucoes_do_dia', sql, ('2025-06-15',))
+        self.assertEqual(sql_registry.verificar_planos(self.conn, [consulta]), {'devolucoes_do_dia': ['SCAN reservas']})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import sys
+import os
+
+# Adiciona a pasta 'src' ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import database as db
+from backend import indice_frota
+from backend import recomendador
+from tests.base import TesteComBanco
+
+
+class TestRecomendador(TesteComBanco):
+
+    def test_alternativas_livres_por_semelhanca(self):
+        db.adicionar_veiculo("Porsche", "911", 2021, "AA-00-01", "Preto", 900.0, "2031-01-01")
+        db.adicionar_veiculo("Ferrari", "Roma", 2023, "AA-00-02", "Vermelho", 1500.0, "2031-01-01")
+        db.adicionar_veiculo("Porsche", "911", 2021, "AA-00-03", "Preto", 900.0, "2031-01-01")  # Ocupado
+        db.adicionar_veiculo("Porsche", "Cayenne", 2021, "AA-00-04", "Preto", 600.0, "2031-01-01")
+        db.adicionar_veiculo("Porsche", "911", 2022, "AA-00-05", "Branco", 950.0, "2031-01-01")
+        db.adicionar_cliente("Ana Lopes", "123456789", "912345678", "ana@mail.pt", "000000000ZZ4")
+        db.adicionar_reserva(1, 3, None, "2030-03-05 00:00:00", "2030-03-12 23:59:59")
+
+        indice = indice_frota.IndiceFrota()
+        indice.recarregar()
+        sugestoes = recomendador.recomendar_alternativas(1, "2030-03-01 00:00:00", "2030-03-07 23:59:59", indice=indice)
+        self.assertEqual([s['id'] for s in sugestoes], [5, 4, 2])
+        self.assertLess(sugestoes[0]['distancia'], sugestoes[1]['distancia'])
+
+        # Fora do período da reserva, o gémeo do veículo 1 é a melhor alternativa
+        sugestoes = recomendador.recomendar_alternativas(1, "2030-04-01 00:00:00", "2030-04-02 23:59:59", limite=1,
+                                                         indice=indice)
+        self.assertEqual([(s['id'], s['distancia']) for s in sugestoes], [(3, 0.0)])
+
+    def test_usa_indice_partilhado_sem_sincronizar(self):
+        db.adicionar_veiculo("Porsche", "911", 2021, "AA-00-01", "Preto", 900.0, "2031-01-01")
+        db.adicionar_veiculo("Porsche", "911", 2021, "AA-00-02", "Preto", 900.0, "2031-01-01")
+        indice_original = indice_frota._indice
+        self.addCleanup(setattr, indice_frota, '_indice', indice_original)
+        indice_frota._indice = None
+
+        # Índice ainda por construir: sem sugestões, e sem o construir na thread de quem chama
+        self.assertEqual(recomendador.recomendar_alternativas(1, "2030-03-01 00:00:00", "2030-03-07 23:59:59"), [])
+        self.assertIsNone(indice_frota.indice_atual())
+
+        sincronizador = indice_frota.SincronizadorIndice(intervalo=60)
+        self.assertTrue(sincronizador.atualizar())
+        self.assertFalse(sincronizador.atualizar())  # Acabado de ler: nada a fazer
+        indice = indice_frota.indice_atual()
+        indice.sincronizar = lambda: self.fail("O recomendador não deve sincronizar o índice")
+        sugestoes = recomendador.recomendar_alternativas(1, "2030-03-01 00:00:00", "2030-03-07 23:59:59")
+        self.assertEqual([s['id'] for s in sugestoes], [2])
+
+        # Veículos alterados noutro posto: a releitura completa é feita pelo sincronizador
+        with db.conectar_bd() as conn:
+            conn.execute("UPDATE veiculos SET cor = 'Branco' WHERE id = 2")
+        self.assertTrue(sincronizador.atualizar())
+        self.assertIsNot(indice_frota.indice_atual(), indice)
+        self.assertEqual(indice_frota.indice_atual().linhas([1])[0]['cor'], 'Branco')
+
+
+if __name__ == '__main__':
+    unittest.main()
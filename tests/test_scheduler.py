@@ -0,0 +1,117 @@
+import unittest
+import sys
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Adiciona a pasta 'src' ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import database as db
+from backend import scheduler
+from tests.base import TesteComBanco
+
+SQL_ESTADO = "SELECT bloqueado_por, ultimo_resultado, proxima_execucao FROM tarefas_agendadas WHERE nome = ?"
+
+
+def _criar_posto(identificador, funcao, duracao_maxima=None):
+    agendador = scheduler.Agendador()
+    agendador.identificador = identificador
+    agendador.registrar('tarefa', funcao, 3600, duracao_maxima=duracao_maxima)
+    agendador._registrar_no_banco()
+    return agendador
+
+
+class TestScheduler(TesteComBanco):
+
+    def _estado(self):
+        with db.conectar_bd() as conn:
+            return conn.execute(SQL_ESTADO, ('tarefa',)).fetchone()
+
+    def test_dois_postos_so_um_executa(self):
+        """Dois agendadores sobre o mesmo banco: a tarefa devida corre uma única vez."""
+        execucoes = []
+        a_correr = threading.Event()
+        pode_terminar = threading.Event()
+
+        def tarefa():
+            execucoes.append(threading.current_thread().name)
+            a_correr.set()
+            pode_terminar.wait(5)
+            return 'ok'
+
+        postos = [_criar_posto('posto-a', tarefa), _criar_posto('posto-b', tarefa)]
+        resultados = {}
+
+        def executar(posto):
+            resultados[posto.identificador] = posto.executar_se_devida('tarefa')
+
+        threads = [threading.Thread(target=executar, args=(p,), name=p.identificador) for p in postos]
+        for t in threads:
+            t.start()
+        self.assertTrue(a_correr.wait(5))
+        # Enquanto um posto executa, o outro não consegue o bloqueio
+        for posto in postos:
+            if posto.identificador not in execucoes:
+                self.assertFalse(posto.executar_se_devida('tarefa'))
+        pode_terminar.set()
+        for t in threads:
+            t.join(5)
+
+        self.assertEqual(len(execucoes), 1)
+        self.assertEqual(sorted(resultados.values()), [False, True])
+        estado = self._estado()
+        self.assertIsNone(estado['bloqueado_por'])
+        self.assertEqual(estado['ultimo_resultado'], 'ok')
+        # Já executada: só volta a estar devida depois do intervalo
+        self.assertFalse(any(p.executar_se_devida('tarefa') for p in postos))
+
+    def test_bloqueio_abandonado_e_retomado(self):
+        """Um bloqueio de um posto que caiu a meio expira após 'duracao_maxima' e outro posto retoma a tarefa."""
+        posto_a = _criar_posto('posto-a', lambda: 'a', duracao_maxima=600)
+        posto_b = _criar_posto('posto-b', lambda: 'b', duracao_maxima=600)
+        tarefa = posto_a.tarefas['tarefa']
+
+        # O posto A adquire o bloqueio e "cai" sem o libertar
+        self.assertTrue(posto_a._adquirir_bloqueio(tarefa, datetime.now()))
+        self.assertFalse(posto_b.executar_se_devida('tarefa'))
+        self.assertEqual(self._estado()['bloqueado_por'], 'posto-a')
+
+        # Passada a duração máxima, o bloqueio é considerado abandonado
+        with db.conectar_bd() as conn:
+            conn.execute("UPDATE tarefas_agendadas SET bloqueado_ate = ? WHERE nome = 'tarefa'",
+                         ((datetime.now() - timedelta(seconds=1)).strftime(scheduler.FORMATO_DATA),))
+        self.assertTrue(posto_b.executar_se_devida('tarefa'))
+        self.assertEqual(self._estado()['ultimo_resultado'], 'b')
+
+        # Se o posto A voltar e tentar libertar o bloqueio antigo, não apaga o estado do B
+        posto_a._libertar_bloqueio(tarefa, 'a')
+        self.assertEqual(self._estado()['ultimo_resultado'], 'b')
+
+    def test_tarefa_com_thread_propria_nao_atrasa_as_outras(self):
+        """Um backup demorado corre à parte: as outras tarefas da mesma volta executam logo."""
+        pode_terminar = threading.Event()
+        execucoes = []
+
+        def backup_lento():
+            execucoes.append('backup')
+            pode_terminar.wait(5)
+            return 'backup'
+
+        agendador = scheduler.Agendador()
+        agendador.registrar('backup', backup_lento, 3600, thread_propria=True)
+        agendador.registrar('tarefa', lambda: execucoes.append('tarefa') or 'ok', 3600)
+        agendador._registrar_no_banco()
+
+        inicio = time.monotonic()
+        agendador.verificar_tarefas()
+        self.assertLess(time.monotonic() - inicio, 2)  # Sem esperar pelo backup
+        self.assertEqual(self._estado()['ultimo_resultado'], 'ok')
+        agendador.verificar_tarefas()  # O backup ainda está a correr: não é lançado de novo
+        pode_terminar.set()
+        agendador.parar()
+        self.assertEqual(sorted(execucoes), ['backup', 'tarefa'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Adiciona a pasta 'src' ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import database as db
+from backend import status_reconciler
+from tests.base import TesteComBanco
+
+
+def _fmt(d):
+    return d.strftime('%Y-%m-%d %H:%M:%S')
+
+
+class TestStatusReconciler(TesteComBanco):
+
+    def setUp(self):
+        """Cria um banco temporário migrado com três veículos e um cliente."""
+        super().setUp()
+
+        self.agora = datetime.now()
+        with db.conectar_bd() as conn:
+            conn.execute("INSERT INTO clientes (id, nome_completo, nif, email, cc) VALUES (1, 'Cliente', '1', 'c@t.pt', 'CC1')")
+            for i in (1, 2, 3):
+                conn.execute(
+                    "INSERT INTO veiculos (id, marca, modelo, ano, placa, valor_diaria, data_proxima_revisao) "
+                    "VALUES (?, 'BMW', 'X5', 2023, ?, 100, '2099-01-01')", (i, f"AA-00-0{i}"))
+            conn.commit()
+
+    def _inserir_reserva(self, id_veiculo, inicio, fim, status='ativa'):
+        with db.conectar_bd() as conn:
+            cursor = conn.execute(
+                "INSERT INTO reservas (id_cliente, id_veiculo, data_inicio, data_fim, valor_total, status) "
+                "VALUES (1, ?, ?, ?, 100, ?)", (id_veiculo, _fmt(inicio), _fmt(fim), status))
+            conn.commit()
+            return cursor.lastrowid
+
+    def _status_veiculo(self, id_veiculo):
+        return db.buscar_veiculo_por_id(id_veiculo)['status']
+
+    def test_reconciliacao_completa_e_incremental(self):
+        """A primeira execução é completa; as seguintes só aplicam as transições novas."""
+        # Veículo 1 está alugado agora; veículo 2 tem uma reserva que já terminou
+        self._inserir_reserva(1, self.agora - timedelta(days=1), self.agora + timedelta(days=1))
+        id_encerrada = self._inserir_reserva(2, self.agora - timedelta(days=5), self.agora - timedelta(days=2))
+        db.atualizar_veiculo(2, status='alugado')
+
+        contagens = status_reconciler.reconciliar_status(agora=self.agora)
+        self.assertEqual(contagens['alugados'], 1)
+        self.assertEqual(contagens['libertados'], 1)
+        self.assertEqual(self._status_veiculo(1), 'alugado')
+        self.assertEqual(self._status_veiculo(2), 'disponível')
+        self.assertEqual(db.buscar_reserva_por_id(id_encerrada)['status'], 'concluída')
+
+        # Sem alterações, a execução incremental não toca em nada
+        contagens = status_reconciler.reconciliar_status(agora=self.agora)
+        self.assertEqual(sum(contagens.values()), 0)
+
+    def test_cancelamento_e_remocao_libertam_veiculo(self):
+        """Cancelar ou apagar a reserva em curso liberta o veículo na próxima execução."""
+        id_reserva = self._inserir_reserva(1, self.agora - timedelta(days=1), self.agora + timedelta(days=1))
+        id_reserva_2 = self._inserir_reserva(3, self.agora - timedelta(days=1), self.agora + timedelta(days=1))
+        status_reconciler.reconciliar_status(agora=self.agora)
+
+        with db.conectar_bd() as conn:
+            conn.execute("UPDATE reservas SET status = 'cancelada' WHERE id = ?", (id_reserva,))
+            conn.commit()
+        db.deletar_reserva(id_reserva_2)
+
+        contagens = status_reconciler.reconciliar_status(agora=self.agora)
+        self.assertEqual(contagens['libertados_alteradas'], 2)
+        self.assertEqual(self._status_veiculo(1), 'disponível')
+        self.assertEqual(self._status_veiculo(3), 'disponível')
+
+    def test_manutencao_nunca_e_alterada(self):
+        """Um veículo em manutenção mantém o status mesmo com uma reserva em curso."""
+        db.atualizar_veiculo(1, status='manutenção')
+        self._inserir_reserva(1, self.agora - timedelta(days=1), self.agora + timedelta(days=1))
+
+        status_reconciler.reconciliar_status(agora=self.agora)
+        self.assertEqual(self._status_veiculo(1), 'manutenção')
+
+    def test_veiculo_alugado_aceita_reserva_futura(self):
+        """Um veículo alugado agora pode ser reservado para depois; só o período em curso é recusado."""
+        self._inserir_reserva(1, self.agora - timedelta(days=1), self.agora + timedelta(days=1))
+        status_reconciler.reconciliar_status(agora=self.agora)
+        self.assertEqual(self._status_veiculo(1), 'alugado')
+
+        self.assertTrue(db.adicionar_reserva(1, 1, None, _fmt(self.agora + timedelta(days=3)),
+                                             _fmt(self.agora + timedelta(days=5))))
+        self.assertFalse(db.adicionar_reserva(1, 1, None, _fmt(self.agora),
+                                              _fmt(self.agora + timedelta(days=2))))
+
+        db.atualizar_veiculo(2, status='manutenção')
+        self.assertFalse(db.adicionar_reserva(1, 2, None, _fmt(self.agora + timedelta(days=3)),
+                                              _fmt(self.agora + timedelta(days=5))))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Adiciona a pasta 'src' ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backend import validacao as v
+
+
+class TestValidacao(unittest.TestCase):
+
+    def test_regras_por_registo(self):
+        self.assertEqual(v.validar_nif("123456789"), 0)
+        self.assertEqual(v.validar_nif("PT 501 234 560"), 0)
+        self.assertEqual(v.validar_nif("123456788"), v.ERRO_NIF_CONTROLO)
+        self.assertEqual(v.validar_nif("423456789"), v.ERRO_NIF_FORMATO)  # Prefixo 4 só como 45
+        self.assertEqual(v.validar_nif("12345678"), v.ERRO_NIF_FORMATO)
+
+        self.assertEqual(v.validar_cc("00000000 0 ZZ4"), 0)
+        self.assertEqual(v.validar_cc("00000000 0 zz4"), 0)
+        self.assertEqual(v.validar_cc("00000000 0 ZZ5"), v.ERRO_CC_CONTROLO)
+        self.assertEqual(v.validar_cc("12345678"), v.ERRO_CC_FORMATO)
+
+        self.assertEqual(v.normalizar_telefone("+351 912 345 678"), "912345678")
+        self.assertEqual(v.normalizar_telefone("0044 20 7946 0958"), "+442079460958")
+        self.assertEqual(v.validar_telefone("812345678"), v.ERRO_TELEFONE)
+        self.assertEqual(v.validar_email(" Ana.Silva@Mail.PT "), 0)
+        self.assertEqual(v.validar_email("ana@mail"), v.ERRO_EMAIL)
+
+        codigo, normalizados = v.validar_cliente("123456788", "000000000ZZ4", "ana@", "912345678")
+        self.assertEqual(codigo, v.ERRO_NIF_CONTROLO | v.ERRO_EMAIL)
+        self.assertEqual(len(v.descrever_erros(codigo)), 2)
+        self.assertEqual(normalizados['cc'], "000000000ZZ4")
+
+        # Na edição só os campos alterados são validados (clientes antigos com dados fora das regras)
+        originais = {'nif': '155-95-8724', 'cc': '12345678AB', 'email': 'ana@mail.pt', 'telefone': 912345678}
+        codigo, normalizados = v.validar_cliente('155-95-8724', '12345678AB', 'ana@', '912345678', originais=originais)
+        self.assertEqual(codigo, v.ERRO_EMAIL)
+        self.assertEqual(normalizados['nif'], '155-95-8724')
+        codigo, _ = v.validar_cliente('155-95-8724', '12345678AB', 'Ana@Mail.pt', '912345678', originais=originais)
+        self.assertEqual(codigo, 0)
+
+    def test_vetorizado_igual_ao_por_registo(self):
+        df = pd.DataFrame({
+            'nif': ["123456789", "PT501234560", "123 456 788", "12345", None, "98765432x", " PT123456789",
+                    "123456789\n", "1PT23456789"],
+            'cc': ["000000000ZZ4", "00000000 0 zz4", "000000000ZZ5", "", "123456780ZZ0", "0000000Ç0ZZ4",
+                   "000000000ZZ4\r\n", "000000000ZZ4", "000000000ZZ4"],
+            'email': ["a@b.pt", "A@B.PT ", "a@b", "", None, "x.y+z@mail.com", "a@b.pt", "a@b.pt", "a@b.pt"],
+            'telefone': ["912345678", "+351 912 345 678", "+44 20 7946 0958", "812345678", "00351 212345678",
+                         "+35191234567", "912345678", "912345678\n", "912345678"],
+        })
+        codigos, normalizado = v.validar_clientes(df)
+        for i, linha in df.iterrows():
+            codigo, valores = v.validar_cliente(linha['nif'], linha['cc'], linha['email'], linha['telefone'])
+            self.assertEqual(codigos[i], codigo, f"linha {i}")
+            if codigo == 0:
+                self.assertEqual({c: normalizado.loc[i, c] for c in valores}, valores)
+        self.assertEqual(codigos.dtype, np.uint8)
+        self.assertEqual(int(codigos[0]), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()